@@ -0,0 +1,68 @@
+#!/bin/bash
+# Copyright (c) 2019, NVIDIA CORPORATION. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#  * Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#  * Neither the name of NVIDIA CORPORATION nor the names of its
+#    contributors may be used to endorse or promote products derived
+#    from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS ``AS IS'' AND ANY
+# EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY
+# OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+CLIENT_LOG="./client.log"
+BENCHMARK_PY=../clients/client_benchmark.py
+
+# A baseline recorded on the machine running the test, e.g. with
+# 'python client_benchmark.py -o baseline.json'. If not set the
+# benchmark only checks that every case returns the correct results.
+BASELINE=${CLIENT_BENCHMARK_BASELINE:=""}
+
+RET=0
+
+rm -f $CLIENT_LOG benchmark.json
+
+set +e
+if [ "$BASELINE" == "" ]; then
+    python $BENCHMARK_PY --quick -r1 -t0.01 -o benchmark.json >>$CLIENT_LOG 2>&1
+else
+    python $BENCHMARK_PY -b $BASELINE -o benchmark.json >>$CLIENT_LOG 2>&1
+fi
+if [ $? -ne 0 ]; then
+    cat $CLIENT_LOG
+    echo -e "\n***\n*** Test Failed\n***"
+    RET=1
+fi
+
+# Every case must be recorded
+python -c "import json, sys; \
+r = json.load(open('benchmark.json')); \
+sys.exit(0 if ((len(r['cases']) > 0) and all((m['iterations'] > 0) and \
+    (m['prepare_us'] > 0) and (m['results_us'] > 0) for m in r['cases'].values())) else 1)"
+if [ $? -ne 0 ]; then
+    cat benchmark.json
+    echo -e "\n***\n*** Test Failed\n***"
+    RET=1
+fi
+set -e
+
+if [ $RET -eq 0 ]; then
+  echo -e "\n***\n*** Test Passed\n***"
+fi
+
+exit $RET
@@ -0,0 +1,98 @@
+# Copyright (c) 2019, NVIDIA CORPORATION. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#  * Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#  * Neither the name of NVIDIA CORPORATION nor the names of its
+#    contributors may be used to endorse or promote products derived
+#    from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS ``AS IS'' AND ANY
+# EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY
+# OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+# Maximum median time, in milliseconds, that importing
+# tensorrtserver.api may add on top of importing numpy.
+IMPORT_THRESHOLD_MS = float(os.environ.get('TRTSERVER_IMPORT_THRESHOLD_MS', '50'))
+IMPORT_REPEAT = int(os.environ.get('TRTSERVER_IMPORT_REPEAT', '10'))
+
+# Run in a fresh interpreter for each measurement so that nothing is
+# already imported. numpy is imported first since the client can't
+# avoid it, the measurement is what the client adds on top.
+_IMPORT_SCRIPT = """
+import json, sys, time
+t0 = time.time()
+import numpy
+t1 = time.time()
+import tensorrtserver.api
+t2 = time.time()
+print(json.dumps({
+    'numpy_ms' : (t1 - t0) * 1000.0,
+    'api_ms' : (t2 - t1) * 1000.0,
+    'modules' : list(sys.modules.keys()),
+    'crequest_loaded' : not isinstance(tensorrtserver.api._crequest,
+                                       tensorrtserver.api._LazyCrequest) }))
+"""
+
+def _measure_import():
+    out = subprocess.check_output([sys.executable, '-c', _IMPORT_SCRIPT])
+    return json.loads(out.decode('utf-8').strip().splitlines()[-1])
+
+
+class ImportTest(unittest.TestCase):
+
+    def test_lazy(self):
+        # Importing must not load libcrequest, pkg_resources or
+        # (where module __getattr__ is supported) the protobuf
+        # modules.
+        result = _measure_import()
+        self.assertFalse(result['crequest_loaded'])
+        self.assertNotIn('pkg_resources', result['modules'])
+        if sys.version_info >= (3, 7):
+            pb2_modules = [ name for name in result['modules'] if name.endswith('_pb2') ]
+            self.assertEqual(pb2_modules, [])
+
+    def test_import_time(self):
+        results = [ _measure_import() for _ in range(IMPORT_REPEAT) ]
+        api_ms = sorted(result['api_ms'] for result in results)
+        numpy_ms = sorted(result['numpy_ms'] for result in results)
+        median_api_ms = api_ms[len(api_ms) // 2]
+        print("import numpy: median {:.1f} ms, min {:.1f} ms".format(
+            numpy_ms[len(numpy_ms) // 2], numpy_ms[0]))
+        print("import tensorrtserver.api: median {:.1f} ms, min {:.1f} ms".format(
+            median_api_ms, api_ms[0]))
+        self.assertLess(median_api_ms, IMPORT_THRESHOLD_MS)
+
+    def test_first_use(self):
+        # Names provided lazily must still be available, including
+        # through 'import *'.
+        out = subprocess.check_output([sys.executable, '-c',
+            "from tensorrtserver.api import *\n"
+            "import tensorrtserver.api\n"
+            "print(InferRequestHeader.FLAG_SEQUENCE_START)\n"
+            "print(tensorrtserver.api.model_config_pb2.TYPE_FP32)\n"])
+        self.assertEqual(out.decode('utf-8').split(), ['1', '11'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -34,7 +34,12 @@ import numpy as np
 import infer_util as iu
 import test_util as tu
 from tensorrtserver.api import *
+from tensorrtserver.api.aio import AsyncInferContext, AsyncGrpcInferContext
+from tensorrtserver.api.grpc_transport import GrpcInferContext
+from tensorrtserver.api.trace import TraceRecorder, chrome_trace
+import asyncio
 import os
+import threading
 
 CPU_ONLY = (os.environ.get('TENSORRT_SERVER_CPU_ONLY') is not None)
 
@@ -217,6 +222,527 @@ class InferTest(unittest.TestCase):
         self._full_exact(np.int32, np.float32, np.float32,
                          output0_raw=False, output1_raw=True, swap=False)
 
+    def test_raw_fff_batched_input(self):
+        # Each input provided as a single array holding the entire batch
+        for bs in (1, 8):
+            iu.infer_exact(self, "graphdef", (16,), bs,
+                           np.float32, np.float32, np.float32,
+                           swap=True, batched_input=True)
+
+    def test_raw_ooo_batched_input(self):
+        for bs in (1, 8):
+            iu.infer_exact(self, "graphdef", (16,), bs,
+                           np_dtype_string, np_dtype_string, np_dtype_string,
+                           swap=False, batched_input=True)
+
+    def test_raw_batch_output(self):
+        # RAW_BATCH and RAW_BATCH_VIEW must produce the same values as
+        # RAW, with the entire batch in a single array.
+        for dtype in (np.float32, np_dtype_string):
+            for protocol, url in ((ProtocolType.HTTP, 'localhost:8000'),
+                                  (ProtocolType.GRPC, 'localhost:8001')):
+                model_name = tu.get_model_name("graphdef", dtype, dtype, dtype)
+                in0 = np.random.randint(low=0, high=100, size=(8, 16), dtype=np.int32)
+                in1 = np.random.randint(low=0, high=100, size=(8, 16), dtype=np.int32)
+                if dtype == np_dtype_string:
+                    in0 = np.array([str(x) for x in in0.flatten()], dtype=object).reshape(in0.shape)
+                    in1 = np.array([str(x) for x in in1.flatten()], dtype=object).reshape(in1.shape)
+                else:
+                    in0 = in0.astype(dtype)
+                    in1 = in1.astype(dtype)
+
+                ctx = InferContext(url, protocol, model_name, None, True)
+                results = ctx.run({ 'INPUT0' : in0, 'INPUT1' : in1 },
+                                  { 'OUTPUT0' : InferContext.ResultFormat.RAW,
+                                    'OUTPUT1' : InferContext.ResultFormat.RAW },
+                                  8)
+                for fmt in (InferContext.ResultFormat.RAW_BATCH,
+                            InferContext.ResultFormat.RAW_BATCH_VIEW):
+                    batch_results = ctx.run({ 'INPUT0' : in0, 'INPUT1' : in1 },
+                                            { 'OUTPUT0' : fmt, 'OUTPUT1' : fmt },
+                                            8)
+                    for name in ('OUTPUT0', 'OUTPUT1'):
+                        self.assertEqual(batch_results[name].shape, (8, 16))
+                        self.assertTrue(np.array_equal(batch_results[name],
+                                                       np.stack(results[name])))
+
+    def test_raw_batch_view_kept(self):
+        # A RAW_BATCH_VIEW result kept across runs of the same context
+        # must not be changed by the later runs.
+        model_name = tu.get_model_name("graphdef", np.float32, np.float32, np.float32)
+        outputs = { 'OUTPUT0' : InferContext.ResultFormat.RAW_BATCH_VIEW,
+                    'OUTPUT1' : InferContext.ResultFormat.RAW_BATCH_VIEW }
+        for protocol, url in ((ProtocolType.HTTP, 'localhost:8000'),
+                              (ProtocolType.GRPC, 'localhost:8001')):
+            ctx = InferContext(url, protocol, model_name, None, True)
+            in0 = np.random.randint(low=0, high=100, size=(8, 16)).astype(np.float32)
+            kept = ctx.run({ 'INPUT0' : in0, 'INPUT1' : in0 }, outputs, 8)
+            for _ in range(4):
+                in1 = np.random.randint(low=100, high=200, size=(8, 16)).astype(np.float32)
+                results = ctx.run({ 'INPUT0' : in1, 'INPUT1' : in1 }, outputs, 8)
+                self.assertTrue(np.array_equal(results['OUTPUT0'], in1 + in1))
+                self.assertTrue(np.array_equal(kept['OUTPUT0'], in0 + in0))
+                self.assertTrue(np.array_equal(kept['OUTPUT1'], in0 - in0))
+            ctx.close()
+
+    def test_raw_asyncio(self):
+        # Concurrent AsyncInferContext.run() requests must each
+        # complete with the results of their own inputs.
+        loop = asyncio.get_event_loop()
+        for protocol, url in ((ProtocolType.HTTP, 'localhost:8000'),
+                              (ProtocolType.GRPC, 'localhost:8001')):
+            model_name = tu.get_model_name("graphdef", np.float32, np.float32, np.float32)
+            inputs = [ np.random.randint(low=0, high=100, size=(1, 16)).astype(np.float32)
+                       for _ in range(8) ]
+            with AsyncInferContext(url, protocol, model_name, None, True,
+                                   loop=loop) as ctx:
+                all_results = loop.run_until_complete(asyncio.gather(*[
+                    ctx.run({ 'INPUT0' : in0, 'INPUT1' : in0 },
+                            { 'OUTPUT0' : InferContext.ResultFormat.RAW_BATCH,
+                              'OUTPUT1' : InferContext.ResultFormat.RAW_BATCH },
+                            1)
+                    for in0 in inputs ]))
+            for in0, results in zip(inputs, all_results):
+                self.assertTrue(np.array_equal(results['OUTPUT0'], in0 + in0))
+                self.assertTrue(np.array_equal(results['OUTPUT1'], in0 - in0))
+
+    def test_raw_async_future(self):
+        # Futures and callbacks of async requests must each complete
+        # with the results of their own inputs.
+        for protocol, url in ((ProtocolType.HTTP, 'localhost:8000'),
+                              (ProtocolType.GRPC, 'localhost:8001')):
+            model_name = tu.get_model_name("graphdef", np.float32, np.float32, np.float32)
+            inputs = [ np.random.randint(low=0, high=100, size=(1, 16)).astype(np.float32)
+                       for _ in range(8) ]
+            outputs = { 'OUTPUT0' : InferContext.ResultFormat.RAW_BATCH,
+                        'OUTPUT1' : InferContext.ResultFormat.RAW_BATCH }
+            callback_futures = list()
+            with InferContext(url, protocol, model_name, None, True) as ctx:
+                futures = [ ctx.async_run_future({ 'INPUT0' : in0, 'INPUT1' : in0 },
+                                                 outputs, 1)
+                            for in0 in inputs ]
+                for in0 in inputs:
+                    ctx.async_run({ 'INPUT0' : in0, 'INPUT1' : in0 }, outputs, 1,
+                                  callback=callback_futures.append)
+            # close() waits for all requests so all callbacks are done
+            self.assertEqual(len(callback_futures), len(inputs))
+            for in0, future in zip(inputs, futures):
+                results = future.result()
+                self.assertTrue(np.array_equal(results['OUTPUT0'], in0 + in0))
+                self.assertTrue(np.array_equal(results['OUTPUT1'], in0 - in0))
+            expected = sorted((in0 + in0).tobytes() for in0 in inputs)
+            actual = sorted(future.result()['OUTPUT0'].tobytes()
+                            for future in callback_futures)
+            self.assertEqual(expected, actual)
+
+    def test_context_pool(self):
+        # Threads sharing a pool must reuse contexts and never
+        # exceed the pool size.
+        model_name = tu.get_model_name("graphdef", np.float32, np.float32, np.float32)
+        in0 = np.random.randint(low=0, high=100, size=(1, 16)).astype(np.float32)
+        errors = list()
+        with InferContextPool(max_size=2) as pool:
+            def run_requests(protocol, url):
+                try:
+                    for _ in range(8):
+                        with pool.context(url, protocol, model_name) as ctx:
+                            results = ctx.run(
+                                { 'INPUT0' : in0, 'INPUT1' : in0 },
+                                { 'OUTPUT0' : InferContext.ResultFormat.RAW_BATCH },
+                                1)
+                            self.assertTrue(np.array_equal(results['OUTPUT0'], in0 + in0))
+                except Exception as ex:
+                    errors.append(ex)
+
+            threads = list()
+            for protocol, url in ((ProtocolType.HTTP, 'localhost:8000'),
+                                  (ProtocolType.GRPC, 'localhost:8001')):
+                for _ in range(4):
+                    threads.append(threading.Thread(target=run_requests,
+                                                    args=(protocol, url)))
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+            self.assertEqual(len(errors), 0, str(errors))
+            stats = pool.get_stats()
+            self.assertEqual(stats['hits'] + stats['misses'], 64)
+            self.assertLessEqual(stats['misses'], 4)
+            self.assertEqual(stats['checked_out'], 0)
+
+    def test_batching_client(self):
+        # Concurrent single-sample requests must be batched together
+        # and each get the results of its own inputs.
+        model_name = tu.get_model_name("graphdef", np.float32, np.float32, np.float32)
+        for protocol, url in ((ProtocolType.HTTP, 'localhost:8000'),
+                              (ProtocolType.GRPC, 'localhost:8001')):
+            inputs = [ np.random.randint(low=0, high=100, size=(16,)).astype(np.float32)
+                       for _ in range(16) ]
+            with BatchingInferClient(url, protocol, model_name,
+                                     max_delay_us=100000) as client:
+                futures = [ client.run_future({ 'INPUT0' : in0, 'INPUT1' : in0 },
+                                              { 'OUTPUT0' : InferContext.ResultFormat.RAW,
+                                                'OUTPUT1' : InferContext.ResultFormat.RAW })
+                            for in0 in inputs ]
+                for in0, future in zip(inputs, futures):
+                    results = future.result()
+                    self.assertTrue(np.array_equal(results['OUTPUT0'], in0 + in0))
+                    self.assertTrue(np.array_equal(results['OUTPUT1'], in0 - in0))
+                stats = client.get_stats()
+                self.assertEqual(stats['requests'], 16)
+                self.assertLess(stats['batches'], 16)
+
+    def test_raw_plan(self):
+        # Repeated runs of a plan, interleaved with run() on the same
+        # context, must produce the results of their own inputs.
+        for dtype in (np.float32, np_dtype_string):
+            for protocol, url in ((ProtocolType.HTTP, 'localhost:8000'),
+                                  (ProtocolType.GRPC, 'localhost:8001')):
+                model_name = tu.get_model_name("graphdef", dtype, dtype, dtype)
+                ctx = InferContext(url, protocol, model_name, None, True)
+                plan = ctx.prepare({ 'INPUT0' : (16,), 'INPUT1' : (16,) },
+                                   { 'OUTPUT0' : InferContext.ResultFormat.RAW_BATCH,
+                                     'OUTPUT1' : InferContext.ResultFormat.RAW_BATCH },
+                                   4)
+                for _ in range(3):
+                    in0 = np.random.randint(low=0, high=100, size=(4, 16), dtype=np.int32)
+                    in1 = np.random.randint(low=0, high=100, size=(4, 16), dtype=np.int32)
+                    if dtype == np_dtype_string:
+                        in0 = np.array([str(x) for x in in0.flatten()], dtype=object).reshape(in0.shape)
+                        in1 = np.array([str(x) for x in in1.flatten()], dtype=object).reshape(in1.shape)
+                    else:
+                        in0 = in0.astype(dtype)
+                        in1 = in1.astype(dtype)
+
+                    expected = ctx.run({ 'INPUT0' : in0, 'INPUT1' : in1 },
+                                       { 'OUTPUT0' : InferContext.ResultFormat.RAW_BATCH,
+                                         'OUTPUT1' : InferContext.ResultFormat.RAW_BATCH },
+                                       4)
+                    for results in (plan.run({ 'INPUT0' : in0, 'INPUT1' : in1 }),
+                                    plan.run({ 'INPUT0' : list(in0), 'INPUT1' : list(in1) }),
+                                    plan.async_run_future(
+                                        { 'INPUT0' : in0, 'INPUT1' : in1 }).result()):
+                        for name in ('OUTPUT0', 'OUTPUT1'):
+                            self.assertTrue(np.array_equal(results[name], expected[name]))
+                with self.assertRaises(InferenceServerException):
+                    plan.run({ 'INPUT0' : [ in0[0], in0[1][:8] ], 'INPUT1' : in1 })
+                plan.close()
+                ctx.close()
+
+    def test_raw_stream(self):
+        # stream() must generate the results of each request, in
+        # order, for streaming and non-streaming contexts.
+        model_name = tu.get_model_name("graphdef", np.float32, np.float32, np.float32)
+        inputs = [ np.random.randint(low=0, high=100, size=(1, 16)).astype(np.float32)
+                   for _ in range(16) ]
+        outputs = { 'OUTPUT0' : InferContext.ResultFormat.RAW_BATCH,
+                    'OUTPUT1' : InferContext.ResultFormat.RAW_BATCH }
+        for protocol, url, streaming in ((ProtocolType.HTTP, 'localhost:8000', False),
+                                         (ProtocolType.GRPC, 'localhost:8001', False),
+                                         (ProtocolType.GRPC, 'localhost:8001', True)):
+            with InferContext(url, protocol, model_name, None, True,
+                              streaming=streaming) as ctx:
+                all_results = list(ctx.stream(
+                    (({ 'INPUT0' : in0, 'INPUT1' : in0 }, outputs, 1) for in0 in inputs),
+                    window=4))
+            self.assertEqual(len(all_results), len(inputs))
+            for in0, results in zip(inputs, all_results):
+                self.assertTrue(np.array_equal(results['OUTPUT0'], in0 + in0))
+                self.assertTrue(np.array_equal(results['OUTPUT1'], in0 - in0))
+
+    def test_raw_imap(self):
+        # imap() must generate the results of each inputs, in input
+        # order if ordered and otherwise tagged with the input index.
+        model_name = tu.get_model_name("graphdef", np.float32, np.float32, np.float32)
+        inputs = [ np.random.randint(low=0, high=100, size=(1, 16)).astype(np.float32)
+                   for _ in range(16) ]
+        outputs = { 'OUTPUT0' : InferContext.ResultFormat.RAW_BATCH,
+                    'OUTPUT1' : InferContext.ResultFormat.RAW_BATCH }
+        for protocol, url in ((ProtocolType.HTTP, 'localhost:8000'),
+                              (ProtocolType.GRPC, 'localhost:8001')):
+            with InferContext(url, protocol, model_name, None, True) as ctx:
+                ordered_results = list(ctx.imap(
+                    ({ 'INPUT0' : in0, 'INPUT1' : in0 } for in0 in inputs), outputs, 4))
+                unordered_results = list(ctx.imap(
+                    ({ 'INPUT0' : in0, 'INPUT1' : in0 } for in0 in inputs), outputs, 4,
+                    ordered=False))
+            self.assertEqual(len(ordered_results), len(inputs))
+            for in0, results in zip(inputs, ordered_results):
+                self.assertTrue(np.array_equal(results['OUTPUT0'], in0 + in0))
+            self.assertEqual(sorted(idx for idx, _ in unordered_results),
+                             list(range(len(inputs))))
+            for idx, results in unordered_results:
+                self.assertTrue(np.array_equal(results['OUTPUT0'], inputs[idx] + inputs[idx]))
+                self.assertTrue(np.array_equal(results['OUTPUT1'], inputs[idx] - inputs[idx]))
+
+    def test_load_balanced(self):
+        # Requests must be spread across the reachable servers and
+        # never sent to an unreachable server.
+        model_name = tu.get_model_name("graphdef", np.float32, np.float32, np.float32)
+        outputs = { 'OUTPUT0' : InferContext.ResultFormat.RAW_BATCH }
+        for protocol, port in ((ProtocolType.HTTP, 8000), (ProtocolType.GRPC, 8001)):
+            urls = [ 'localhost:' + str(port), '127.0.0.1:' + str(port), 'localhost:9' ]
+            with LoadBalancedInferContext(urls, protocol, model_name,
+                                          probe_interval_s=0.1) as ctx:
+                in0 = np.random.randint(low=0, high=100, size=(1, 16)).astype(np.float32)
+                futures = [ ctx.async_run_future({ 'INPUT0' : in0, 'INPUT1' : in0 },
+                                                 outputs, 1)
+                            for _ in range(16) ]
+                for future in futures:
+                    self.assertTrue(np.array_equal(future.result()['OUTPUT0'], in0 + in0))
+                stats = ctx.get_stats()
+            self.assertFalse(stats['localhost:9']['healthy'])
+            self.assertEqual(stats['localhost:9']['requests'], 0)
+            self.assertEqual(stats['localhost:9']['admissions'], 0)
+            self.assertEqual(stats[urls[0]]['admissions'], 1)
+            self.assertGreater(stats[urls[0]]['requests'], 0)
+            self.assertGreater(stats[urls[1]]['requests'], 0)
+
+    def test_load_balanced_hedging(self):
+        # Hedged requests must complete with the results of their
+        # own inputs whether the original or the hedge wins. A 0
+        # percentile hedges nearly every request once enough
+        # latencies are measured.
+        model_name = tu.get_model_name("graphdef", np.float32, np.float32, np.float32)
+        outputs = { 'OUTPUT0' : InferContext.ResultFormat.RAW_BATCH }
+        urls = [ 'localhost:8000', '127.0.0.1:8000' ]
+        with LoadBalancedInferContext(urls, ProtocolType.HTTP, model_name,
+                                      hedge_percentile=0, hedge_min_samples=4) as ctx:
+            inputs = [ np.random.randint(low=0, high=100, size=(1, 16)).astype(np.float32)
+                       for _ in range(64) ]
+            futures = [ ctx.async_run_future({ 'INPUT0' : in0, 'INPUT1' : in0 }, outputs, 1)
+                        for in0 in inputs ]
+            for in0, future in zip(inputs, futures):
+                self.assertTrue(np.array_equal(future.result()['OUTPUT0'], in0 + in0))
+            stats = ctx.get_hedge_stats()
+        self.assertIsNotNone(stats['threshold_s'])
+        self.assertGreaterEqual(stats['hedges_sent'], stats['hedges_won'])
+
+    def test_result_cache(self):
+        # A repeated request must be answered from the cache with the
+        # same results, and modifying returned results must not
+        # modify the cached results.
+        model_name = tu.get_model_name("graphdef", np.float32, np.float32, np.float32)
+        outputs = { 'OUTPUT0' : InferContext.ResultFormat.RAW_BATCH,
+                    'OUTPUT1' : InferContext.ResultFormat.RAW }
+        cache = InferResultCache(max_bytes=1024 * 1024, ttl_s=60)
+        in0 = np.random.randint(low=0, high=100, size=(1, 16)).astype(np.float32)
+        in1 = np.random.randint(low=0, high=100, size=(1, 16)).astype(np.float32)
+        with InferContext('localhost:8000', ProtocolType.HTTP, model_name) as ctx:
+            ctx.set_result_cache(cache)
+            first = ctx.run({ 'INPUT0' : in0, 'INPUT1' : in1 }, outputs, 1)
+            first['OUTPUT0'][:] = 0
+            second = ctx.run({ 'INPUT0' : in0, 'INPUT1' : in1 }, outputs, 1)
+            self.assertTrue(np.array_equal(second['OUTPUT0'], in0 + in1))
+            self.assertTrue(np.array_equal(second['OUTPUT1'][0], (in0 - in1)[0]))
+            third = ctx.async_run_future({ 'INPUT0' : in1, 'INPUT1' : in0 }, outputs, 1)
+            self.assertTrue(np.array_equal(third.result()['OUTPUT0'], in0 + in1))
+        stats = cache.get_stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 2)
+        self.assertEqual(stats['entries'], 2)
+
+    def test_class_batch(self):
+        # CLASS_BATCH results must hold the same classes as CLASS
+        # results, with labels interned per output.
+        model_name = tu.get_model_name("graphdef", np.float32, np.float32, np.float32)
+        in0 = np.random.randint(low=0, high=100, size=(8, 16)).astype(np.float32)
+        for protocol, url in ((ProtocolType.HTTP, 'localhost:8000'),
+                              (ProtocolType.GRPC, 'localhost:8001')):
+            with InferContext(url, protocol, model_name, None, True) as ctx:
+                expected = ctx.run({ 'INPUT0' : in0, 'INPUT1' : in0 },
+                                   { 'OUTPUT0' : (InferContext.ResultFormat.CLASS, 3) },
+                                   8)['OUTPUT0']
+                actual = ctx.run({ 'INPUT0' : in0, 'INPUT1' : in0 },
+                                 { 'OUTPUT0' : (InferContext.ResultFormat.CLASS_BATCH, 3) },
+                                 8)['OUTPUT0']
+                labels = ctx.get_class_labels('OUTPUT0')
+            self.assertEqual(actual.shape, (8, 3))
+            for b in range(8):
+                for c, (idx, value, label) in enumerate(expected[b]):
+                    self.assertEqual(actual[b, c]['idx'], idx)
+                    self.assertEqual(actual[b, c]['value'], np.float32(value))
+                    self.assertEqual(labels[actual[b, c]['label_id']], label)
+
+    def test_shared_memory_input(self):
+        # Inputs read from a registered shared memory region must give
+        # the same results as inputs sent in the request.
+        model_name = tu.get_model_name("graphdef", np.float32, np.float32, np.float32)
+        outputs = { 'OUTPUT0' : InferContext.ResultFormat.RAW_BATCH,
+                    'OUTPUT1' : InferContext.ResultFormat.RAW_BATCH }
+        in0 = np.random.randint(low=0, high=100, size=(8, 16)).astype(np.float32)
+        in1 = np.random.randint(low=0, high=100, size=(8, 16)).astype(np.float32)
+        with SharedMemoryRegion("/infer_test_input", 2 * in0.nbytes) as region:
+            region.set(in0)
+            region.set(in1, offset=in0.nbytes)
+            for protocol, url in ((ProtocolType.HTTP, 'localhost:8000'),
+                                  (ProtocolType.GRPC, 'localhost:8001')):
+                with SharedMemoryControlContext(url, protocol) as shm_ctx:
+                    shm_ctx.register("input", region.key(), 0, region.byte_size())
+                    try:
+                        with InferContext(url, protocol, model_name) as ctx:
+                            results = ctx.run(
+                                { 'INPUT0' : SharedMemoryTensor("input", 0, in0.nbytes),
+                                  'INPUT1' : SharedMemoryTensor("input", in0.nbytes,
+                                                                in1.nbytes) },
+                                outputs, 8)
+                    finally:
+                        shm_ctx.unregister("input")
+                self.assertTrue(np.array_equal(results['OUTPUT0'], in0 + in1))
+                self.assertTrue(np.array_equal(results['OUTPUT1'], in0 - in1))
+            region.close(unlink=True)
+
+    def test_shared_memory_output(self):
+        # Outputs written to a registered shared memory region must be
+        # returned as views of the region holding the expected values.
+        model_name = tu.get_model_name("graphdef", np.float32, np.float32, np.float32)
+        in0 = np.random.randint(low=0, high=100, size=(8, 16)).astype(np.float32)
+        in1 = np.random.randint(low=0, high=100, size=(8, 16)).astype(np.float32)
+        with SharedMemoryRegion("/infer_test_output", 2 * in0.nbytes) as region:
+            for protocol, url in ((ProtocolType.HTTP, 'localhost:8000'),
+                                  (ProtocolType.GRPC, 'localhost:8001')):
+                with SharedMemoryControlContext(url, protocol) as shm_ctx:
+                    shm_ctx.register("output", region.key(), 0, region.byte_size())
+                    try:
+                        with InferContext(url, protocol, model_name) as ctx:
+                            results = ctx.run(
+                                { 'INPUT0' : in0, 'INPUT1' : in1 },
+                                { 'OUTPUT0' : SharedMemoryTensor("output", 0, in0.nbytes),
+                                  'OUTPUT1' : SharedMemoryTensor("output", in0.nbytes,
+                                                                 in1.nbytes) },
+                                8)
+                        self.assertTrue(np.array_equal(results['OUTPUT0'], in0 + in1))
+                        self.assertTrue(np.array_equal(results['OUTPUT1'], in0 - in1))
+                        self.assertTrue(np.array_equal(
+                            region.array(np.float32, (8, 16)), in0 + in1))
+                        del results
+                    finally:
+                        shm_ctx.unregister("output")
+            region.close(unlink=True)
+
+    def test_request_timing(self):
+        # Async requests must report ordered stage timestamps and the
+        # context statistics must count every completed request.
+        model_name = tu.get_model_name("graphdef", np.float32, np.float32, np.float32)
+        in0 = np.random.randint(low=0, high=100, size=(8, 16)).astype(np.float32)
+        outputs = { 'OUTPUT0' : InferContext.ResultFormat.RAW_BATCH }
+        for protocol, url in ((ProtocolType.HTTP, 'localhost:8000'),
+                              (ProtocolType.GRPC, 'localhost:8001')):
+            with InferContext(url, protocol, model_name) as ctx:
+                request_id = ctx.async_run({ 'INPUT0' : in0, 'INPUT1' : in0 }, outputs, 8)
+                self.assertIsNone(ctx.get_async_run_timing(request_id))
+                ctx.get_async_run_results(request_id, True)
+                future = ctx.async_run_future({ 'INPUT0' : in0, 'INPUT1' : in0 }, outputs, 8)
+                future.result()
+                for timing in (ctx.get_async_run_timing(request_id), future.timing):
+                    self.assertTrue(timing.enqueue_ns <= timing.request_start_ns <=
+                                    timing.send_start_ns <= timing.send_end_ns <=
+                                    timing.receive_end_ns <= timing.deserialize_start_ns <=
+                                    timing.deserialize_end_ns)
+                    self.assertTrue(timing.receive_start_ns <= timing.receive_end_ns)
+                self.assertIsNone(ctx.get_async_run_timing(request_id))
+
+                stat = ctx.get_stat()
+                self.assertEqual(stat['completed_request_count'], 2)
+                self.assertTrue(stat['cumulative_total_request_time_ns'] >=
+                                stat['cumulative_send_time_ns'] > 0)
+
+    def test_trace_hook(self):
+        # Each request must report its lifecycle events in order with
+        # its request ID, and a failed request must report an ERROR.
+        model_name = tu.get_model_name("graphdef", np.float32, np.float32, np.float32)
+        in0 = np.random.randint(low=0, high=100, size=(8, 16)).astype(np.float32)
+        outputs = { 'OUTPUT0' : InferContext.ResultFormat.RAW_BATCH }
+        lifecycle = [ TraceEventType.PREPARE_START, TraceEventType.PREPARE_END,
+                      TraceEventType.SEND, TraceEventType.RESPONSE, TraceEventType.DECODED ]
+        for protocol, url in ((ProtocolType.HTTP, 'localhost:8000'),
+                              (ProtocolType.GRPC, 'localhost:8001')):
+            recorder = TraceRecorder()
+            with InferContext(url, protocol, model_name) as ctx:
+                ctx.set_trace_hook(recorder)
+                ctx.run({ 'INPUT0' : in0, 'INPUT1' : in0 }, outputs, 8)
+                sync_id = ctx.get_last_request_id()
+                async_id = ctx.async_run({ 'INPUT0' : in0, 'INPUT1' : in0 }, outputs, 8)
+                ctx.get_async_run_results(async_id, True)
+                # Batch dimension of the inputs doesn't match
+                with self.assertRaises(InferenceServerException):
+                    ctx.run({ 'INPUT0' : in0, 'INPUT1' : in0 }, outputs, 4)
+
+                ctx.set_trace_hook(None)
+                ctx.run({ 'INPUT0' : in0, 'INPUT1' : in0 }, outputs, 8)
+
+            events = recorder.events()
+            for request_id in (sync_id, async_id):
+                request_events = [ e for e in events if e.request_id == request_id ]
+                self.assertEqual([ e.type for e in request_events ], lifecycle)
+                self.assertEqual([ e.timestamp_ns for e in request_events ],
+                                 sorted([ e.timestamp_ns for e in request_events ]))
+                self.assertTrue(all((e.model_name == model_name) and
+                                    (e.context == 'InferContext') for e in request_events))
+            self.assertEqual(events[-1].type, TraceEventType.ERROR)
+            self.assertIsNotNone(events[-1].error)
+            self.assertEqual(len(events), 12)
+            self.assertEqual(recorder.get_stats()['dropped'], 0)
+
+            # A span for each request, nested with a span for each of
+            # its stages, and an instant event for the error.
+            trace_events = chrome_trace(events)['traceEvents']
+            self.assertEqual(len(trace_events), 2 * (2 + 2 * 3) + 3)
+
+    def test_raw_grpc_transport(self):
+        # The grpcio transport must produce the same results as the
+        # libcrequest gRPC transport, for sync, async and asyncio
+        # requests.
+        model_name = tu.get_model_name("graphdef", np.float32, np.float32, np.float32)
+        inputs = [ np.random.randint(low=0, high=100, size=(1, 16)).astype(np.float32)
+                   for _ in range(8) ]
+        outputs = { 'OUTPUT0' : InferContext.ResultFormat.RAW_BATCH,
+                    'OUTPUT1' : InferContext.ResultFormat.RAW }
+        with InferContext('localhost:8001', ProtocolType.GRPC, model_name) as ctx:
+            expected = [ ctx.run({ 'INPUT0' : in0, 'INPUT1' : in0 }, outputs, 1)
+                         for in0 in inputs ]
+
+        with GrpcInferContext('localhost:8001', model_name, verbose=True) as ctx:
+            for in0, results in zip(inputs, expected):
+                actual = ctx.run({ 'INPUT0' : in0, 'INPUT1' : [ in0[0] ] }, outputs, 1)
+                self.assertTrue(np.array_equal(actual['OUTPUT0'], results['OUTPUT0']))
+                self.assertTrue(np.array_equal(actual['OUTPUT1'][0], results['OUTPUT1'][0]))
+            request_ids = [ ctx.async_run({ 'INPUT0' : in0, 'INPUT1' : in0 }, outputs, 1)
+                            for in0 in inputs ]
+            for request_id, results in zip(request_ids, expected):
+                actual = ctx.get_async_run_results(request_id, True)
+                self.assertTrue(np.array_equal(actual['OUTPUT0'], results['OUTPUT0']))
+
+        loop = asyncio.get_event_loop()
+        ctx = AsyncGrpcInferContext('localhost:8001', model_name, loop=loop)
+        all_results = loop.run_until_complete(asyncio.gather(*[
+            ctx.run({ 'INPUT0' : in0, 'INPUT1' : in0 }, outputs, 1) for in0 in inputs ]))
+        ctx.close()
+        for actual, results in zip(all_results, expected):
+            self.assertTrue(np.array_equal(actual['OUTPUT0'], results['OUTPUT0']))
+
+    def test_model_metadata_cache(self):
+        # Metadata must match the model configuration and repeated
+        # lookups must be served from the cache.
+        model_name = tu.get_model_name("graphdef", np.float32, np.float32, np.float32)
+        for protocol, url in ((ProtocolType.HTTP, 'localhost:8000'),
+                              (ProtocolType.GRPC, 'localhost:8001')):
+            cache = ModelMetadataCache()
+            metadata = cache.get(url, protocol, model_name)
+            self.assertTrue(metadata.ready)
+            self.assertEqual(sorted(metadata.inputs.keys()), ['INPUT0', 'INPUT1'])
+            self.assertEqual(sorted(metadata.outputs.keys()), ['OUTPUT0', 'OUTPUT1'])
+            self.assertEqual(metadata.inputs['INPUT0'].dtype, np.float32)
+            self.assertEqual(cache.get(url, protocol, model_name).model_version,
+                             metadata.model_version)
+            self.assertEqual(cache.get_stats()['hits'], 1)
+            self.assertEqual(cache.get_stats()['misses'], 1)
+
+            cache.invalidate(model_name=model_name)
+            cache.get(url, protocol, model_name)
+            self.assertEqual(cache.get_stats()['misses'], 2)
+
     def test_raw_version_latest_1(self):
         input_size = 16
         tensor_shape = (input_size,)
@@ -0,0 +1,168 @@
+# Copyright (c) 2019, NVIDIA CORPORATION. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#  * Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#  * Neither the name of NVIDIA CORPORATION nor the names of its
+#    contributors may be used to endorse or promote products derived
+#    from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS ``AS IS'' AND ANY
+# EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY
+# OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import json
+import threading
+import time
+import unittest
+import numpy as np
+from google.protobuf import text_format
+from http import client as http_client
+
+from tensorrtserver.api import InferContext, InferenceServerException, ProtocolType
+from tensorrtserver.api import api_pb2
+from tensorrtserver.monitor import StatusMonitor, merge_intervals, main
+from tensorrtserver.perf import StandInServer
+
+class MonitorTest(unittest.TestCase):
+    def setUp(self):
+        # 1 msec of compute so that requests sent concurrently queue.
+        self.server_ = StandInServer('identity', dims=(16,), max_batch_size=8,
+                                     compute_delay_us=1000)
+        self.server_.start()
+
+    def tearDown(self):
+        self.server_.stop()
+
+    def _infer(self, batch_size, count):
+        ctx = InferContext(self.server_.url, ProtocolType.HTTP, 'identity', 1)
+        input = [ np.zeros((16,), dtype=np.float32) for _ in range(batch_size) ]
+        for _ in range(count):
+            ctx.run({ 'INPUT0' : input },
+                    { 'OUTPUT0' : InferContext.ResultFormat.RAW }, batch_size)
+        ctx.close()
+
+    def _infer_invalid(self, batch_size):
+        # Send a request, with an output the model does not have,
+        # directly to the stand-in. InferContext would reject the
+        # request without sending it.
+        header = api_pb2.InferRequestHeader()
+        header.batch_size = batch_size
+        header.input.add().name = 'INPUT0'
+        header.output.add().name = 'OUTPUT7'
+        conn = http_client.HTTPConnection(self.server_.url)
+        conn.request('POST', '/api/infer/identity',
+                     np.zeros((batch_size, 16), dtype=np.float32).tobytes(),
+                     { 'NV-InferRequest' : text_format.MessageToString(header,
+                                                                       as_one_line=True) })
+        response = conn.getresponse()
+        response.read()
+        conn.close()
+        self.assertEqual(response.status, 400)
+
+    def test_poll(self):
+        monitor = StatusMonitor(self.server_.url, ProtocolType.HTTP, 'identity', history=2)
+        self.assertIsNone(monitor.poll())
+
+        self._infer(1, 30)
+        self._infer(4, 10)
+        self._infer_invalid(2)
+        interval = monitor.poll()
+        self.assertEqual(interval, monitor.latest())
+        self.assertEqual(interval.models(), [ ('identity', 1) ])
+        self.assertGreater(interval.duration_s, 0)
+
+        stats = interval.model_stats('identity', 1)
+        self.assertEqual(stats.request_count, 40)
+        self.assertEqual(stats.failed_count, 1)
+        self.assertEqual(stats.inference_count, 70)
+        self.assertAlmostEqual(stats.throughput, 70 / interval.duration_s)
+        self.assertGreaterEqual(stats.compute_avg_us, 1000)
+        self.assertGreaterEqual(stats.request_avg_us, stats.compute_avg_us)
+        self.assertEqual([ (s.batch_size, s.request_count) for s in interval.stats() ],
+                         [ (1, 30), (2, 0), (4, 10) ])
+        self.assertEqual([ s.failed_count for s in interval.stats() ], [ 0, 1, 0 ])
+        self.assertEqual(interval.batch_size_distribution('identity'),
+                         { 1 : 0.75, 4 : 0.25 })
+        json.dumps(interval.as_dict())
+
+        # Only the requests since the previous poll are counted.
+        self._infer(2, 5)
+        interval = monitor.poll()
+        self.assertEqual([ (s.batch_size, s.request_count) for s in interval.stats() ],
+                         [ (2, 5) ])
+        self.assertEqual(monitor.summary().model_stats('identity').request_count, 45)
+        self.assertEqual(monitor.summary(1).model_stats('identity').request_count, 5)
+
+        # The history keeps the most recent intervals.
+        interval = monitor.poll()
+        self.assertEqual(interval.models(), [])
+        self.assertEqual(len(monitor.history()), 2)
+        self.assertEqual(monitor.summary().model_stats('identity').request_count, 5)
+        self.assertEqual(monitor.get_stats()['polls'], 4)
+
+        # The history is kept after the monitor is closed.
+        monitor.close()
+        with self.assertRaises(InferenceServerException):
+            monitor.poll()
+        self.assertEqual(len(monitor.history()), 2)
+
+    def test_background(self):
+        intervals = list()
+        monitor = StatusMonitor(self.server_.url, ProtocolType.HTTP, 'identity',
+                                interval_s=0.1, history=1000, callback=intervals.append)
+        # Take the first snapshot before any request so that every
+        # request is counted.
+        self.assertIsNone(monitor.poll())
+        with monitor:
+            threads = [ threading.Thread(target=self._infer, args=(1, 100))
+                        for _ in range(4) ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            time.sleep(0.3)
+
+        self.assertEqual(monitor.history(), intervals)
+        self.assertGreater(len(intervals), 1)
+        stats = merge_intervals(intervals).model_stats('identity', 1)
+        self.assertEqual(stats.request_count, 400)
+        # With 4 concurrent requests and a single model instance the
+        # requests must wait in the queue.
+        self.assertGreater(stats.queue_avg_us, 0)
+        self.assertEqual(monitor.get_stats()['poll_errors'], 0)
+
+    def test_cli(self):
+        thread = threading.Thread(target=self._infer, args=(2, 200))
+        thread.start()
+        self.assertEqual(main([ '-u', self.server_.url, '-m', 'identity', '-t', '0.1',
+                                '-n', '3', '--format', 'json', '-f', 'monitor.json' ]), 0)
+        thread.join()
+        with open('monitor.json') as f:
+            intervals = [ json.loads(line) for line in f ]
+        self.assertEqual(len(intervals), 3)
+        for interval in intervals:
+            for model in interval['models']:
+                self.assertEqual(model['model_name'], 'identity')
+                self.assertEqual(model['batch_size_distribution'], { '2' : 1.0 })
+
+    def test_cli_no_server(self):
+        url = self.server_.url
+        self.server_.stop()
+        self.assertEqual(main([ '-u', url, '-n', '1' ]), 1)
+
+if __name__ == '__main__':
+    unittest.main()
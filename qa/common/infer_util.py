@@ -48,7 +48,7 @@ def infer_exact(tester, pf, tensor_shape, batch_size,
                 model_version=None, swap=False,
                 outputs=("OUTPUT0", "OUTPUT1"), use_http=True, use_grpc=True,
                 skip_request_id_check=False, use_streaming=True,
-                correlation_id=0):
+                correlation_id=0, batched_input=False):
     tester.assertTrue(use_http or use_grpc or use_streaming)
     configs = []
     if use_http:
@@ -138,6 +138,12 @@ def infer_exact(tester, pf, tensor_shape, batch_size,
             else:
                 output_req["OUTPUT1"] = (InferContext.ResultFormat.CLASS, num_classes)
 
+        # Optionally provide each input as a single array holding the
+        # entire batch.
+        if batched_input:
+            input0_list = np.stack(input0_list)
+            input1_list = np.stack(input1_list)
+
         ctx = InferContext(config[0], config[1], model_name, model_version,
                            correlation_id=correlation_id, streaming=config[2],
                            verbose=True)
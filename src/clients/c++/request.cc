@@ -31,6 +31,7 @@ namespace nvidia { namespace inferenceserver { namespace client {
 //==============================================================================
 
 ProfileContext::~ProfileContext() {}
+SharedMemoryControlContext::~SharedMemoryControlContext() {}
 ServerHealthContext::~ServerHealthContext() {}
 ServerStatusContext::~ServerStatusContext() {}
 InferContext::Input::~Input() {}
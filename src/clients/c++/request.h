@@ -318,6 +318,22 @@ class InferContext {
     /// \param input The vector holding tensor string values.
     /// \return Error object indicating success or failure.
     virtual Error SetFromString(const std::vector<std::string>& input) = 0;
+
+    /// Set tensor values for this input to be read by the server from
+    /// a shared memory region. The region must have been registered
+    /// with the server using a SharedMemoryControlContext. The range
+    /// holds the tensor values for the entire batch and must not be
+    /// modified until the Run() call(s) that use the input have
+    /// completed. Any values set by SetRaw() or SetFromString() are
+    /// forgotten.
+    /// \param name The name of the registered shared memory region.
+    /// \param offset The offset, in bytes, of the tensor values from
+    /// the start of the region.
+    /// \param byte_size The size, in bytes, of the tensor values for
+    /// the entire batch.
+    /// \return Error object indicating success or failure.
+    virtual Error SetSharedMemory(
+        const std::string& name, size_t offset, size_t byte_size) = 0;
   };
 
   //==============
@@ -504,6 +520,22 @@ class InferContext {
     /// \return Error object indicating success or failure.
     virtual Error AddClassResult(
         const std::shared_ptr<InferContext::Output>& output, uint64_t k) = 0;
+
+    /// Add 'output' to the list of requested RAW results that the
+    /// server writes to a registered shared memory region instead of
+    /// returning them in the response. The result returned by Run()
+    /// for the output provides the shape of the output but not its
+    /// values, which must be read from the region.
+    /// \param output The output.
+    /// \param name The name of the registered shared memory region.
+    /// \param offset The offset, in bytes, into the region where the
+    /// output values for the entire batch are written.
+    /// \param byte_size The size, in bytes, of the output values for
+    /// the entire batch.
+    /// \return Error object indicating success or failure.
+    virtual Error AddSharedMemoryResult(
+        const std::shared_ptr<InferContext::Output>& output,
+        const std::string& name, size_t offset, size_t byte_size) = 0;
   };
 
   //==============
@@ -515,6 +547,47 @@ class InferContext {
 
     /// \return The unique identifier of the request.
     virtual uint64_t Id() const = 0;
+
+    /// Timestamps of the stages of the request, in nanoseconds of
+    /// CLOCK_MONOTONIC. A stage that has not been reached has
+    /// timestamp 0.
+    ///
+    /// \note
+    ///   For GRPC protocol, the send stage represents marshaling the
+    ///   infer request and the receive stage represents unmarshaling
+    ///   the infer response.
+    struct Timing {
+      /// The start of request handling.
+      uint64_t request_start_ns;
+
+      /// The end of request handling.
+      uint64_t request_end_ns;
+
+      /// The start of sending the request (i.e. first byte).
+      uint64_t send_start_ns;
+
+      /// The end of sending the request (i.e. last byte).
+      uint64_t send_end_ns;
+
+      /// The start of receiving the response (i.e. first byte).
+      uint64_t receive_start_ns;
+
+      /// The end of receiving the response (i.e. last byte).
+      uint64_t receive_end_ns;
+
+      /// Create a new Timing object with zero-ed timestamps.
+      Timing()
+          : request_start_ns(0), request_end_ns(0), send_start_ns(0),
+            send_end_ns(0), receive_start_ns(0), receive_end_ns(0)
+      {
+      }
+    };
+
+    /// Get the timestamps of the stages of the request. The timestamps
+    /// are complete once the request's results have been retrieved.
+    /// \param timing Returns the Timing of the request.
+    /// \return Error object indicating success or failure.
+    virtual Error GetTiming(Timing* timing) const = 0;
   };
 
   //==============
@@ -640,6 +713,17 @@ class InferContext {
   /// \return Error object indicating success or failure.
   virtual Error GetReadyAsyncRequest(
       std::shared_ptr<Request>* async_request, bool* is_ready, bool wait) = 0;
+
+  /// Set a file descriptor that is signaled each time an asynchronous
+  /// request completes. The signal is an 8-byte write of the value 1
+  /// so 'fd' can be an eventfd or the write end of a pipe. The write
+  /// is performed by the thread that completes the request and so
+  /// 'fd' should be non-blocking. A signal indicates that
+  /// GetReadyAsyncRequest() will find a completed request, which
+  /// allows an event loop to wait for completions without polling.
+  /// \param fd The file descriptor, or -1 to stop signaling.
+  /// \return Error object indicating success or failure.
+  virtual Error SetCompletionFd(int fd) = 0;
 };
 
 //==============================================================================
@@ -678,6 +762,58 @@ class ProfileContext {
   virtual Error StopProfile() = 0;
 };
 
+//==============================================================================
+/// A SharedMemoryControlContext object is used to register and
+/// unregister shared memory regions with an inference server. An
+/// input whose values are placed in a registered region can then be
+/// delivered to the server without copying the values into the
+/// request, see InferContext::Input::SetSharedMemory(). Only POSIX
+/// shared memory objects on the same host as the server can be
+/// registered. A SharedMemoryControlContext object can use either
+/// HTTP protocol or GRPC protocol depending on the Create function
+/// (SharedMemoryControlHttpContext::Create or
+/// SharedMemoryControlGrpcContext::Create). For example:
+///
+/// \code
+///   std::unique_ptr<SharedMemoryControlContext> ctx;
+///   SharedMemoryControlGrpcContext::Create(&ctx, "localhost:8001");
+///   ctx->RegisterSharedMemory("input_data", "/input_shm", 0, byte_size);
+///   ...
+///   ctx->UnregisterSharedMemory("input_data");
+/// \endcode
+///
+/// \note
+///   SharedMemoryControlContext::Create methods are thread-safe. All
+///   other SharedMemoryControlContext methods are not thread-safe.
+///   For a given SharedMemoryControlContext, calls to these methods
+///   must be serialized.
+///
+class SharedMemoryControlContext {
+ public:
+  virtual ~SharedMemoryControlContext() = 0;
+
+  /// Register a shared memory region on the inference server.
+  /// \param name The name for the region.
+  /// \param shm_key The key of the POSIX shared memory object
+  /// holding the region.
+  /// \param offset The offset, in bytes, of the region within the
+  /// shared memory object.
+  /// \param byte_size The size, in bytes, of the region.
+  /// \return Error object indicating success or failure.
+  virtual Error RegisterSharedMemory(
+      const std::string& name, const std::string& shm_key, size_t offset,
+      size_t byte_size) = 0;
+
+  /// Unregister a shared memory region on the inference server.
+  /// \param name The name of the region.
+  /// \return Error object indicating success or failure.
+  virtual Error UnregisterSharedMemory(const std::string& name) = 0;
+
+  /// Unregister all shared memory regions on the inference server.
+  /// \return Error object indicating success or failure.
+  virtual Error UnregisterAllSharedMemory() = 0;
+};
+
 //==============================================================================
 
 std::ostream& operator<<(std::ostream&, const Error&);
@@ -26,6 +26,8 @@
 
 #include "src/clients/c++/request_common.h"
 
+#include <unistd.h>
+
 namespace nvidia { namespace inferenceserver { namespace client {
 
 //==============================================================================
@@ -118,6 +120,26 @@ OptionsImpl::AddClassResult(
   return Error::Success;
 }
 
+Error
+OptionsImpl::AddSharedMemoryResult(
+    const std::shared_ptr<InferContext::Output>& output,
+    const std::string& name, size_t offset, size_t byte_size)
+{
+  if (name.empty()) {
+    return Error(
+        RequestStatusCode::INVALID_ARG,
+        "shared memory region name must be non-empty for output '" +
+            output->Name() + "'");
+  }
+
+  OutputOptions ooptions(InferContext::Result::ResultFormat::RAW);
+  ooptions.shm_name = name;
+  ooptions.shm_offset = offset;
+  ooptions.shm_byte_size = byte_size;
+  outputs_.emplace_back(std::make_pair(output, ooptions));
+  return Error::Success;
+}
+
 Error
 InferContext::Options::Create(std::unique_ptr<InferContext::Options>* options)
 {
@@ -129,7 +151,7 @@ InferContext::Options::Create(std::unique_ptr<InferContext::Options>* options)
 
 InputImpl::InputImpl(const ModelInput& mio)
     : mio_(mio), total_byte_size_(0), needs_shape_(false), batch_size_(0),
-      bufs_idx_(0), buf_pos_(0)
+      bufs_idx_(0), buf_pos_(0), shm_offset_(0)
 {
   if (GetElementCount(mio) == -1) {
     byte_size_ = -1;
@@ -144,7 +166,8 @@ InputImpl::InputImpl(const InputImpl& obj)
       total_byte_size_(obj.total_byte_size_), needs_shape_(obj.needs_shape_),
       shape_(obj.shape_), batch_size_(obj.batch_size_), bufs_idx_(0),
       buf_pos_(0), bufs_(obj.bufs_), buf_byte_sizes_(obj.buf_byte_sizes_),
-      str_bufs_(obj.str_bufs_)
+      str_bufs_(obj.str_bufs_), shm_name_(obj.shm_name_),
+      shm_offset_(obj.shm_offset_)
 {
 }
 
@@ -204,6 +227,12 @@ InputImpl::SetRaw(const uint8_t* input, size_t input_byte_size)
             "', one per batch entry");
   }
 
+  if (IsSharedMemory()) {
+    shm_name_.clear();
+    shm_offset_ = 0;
+    total_byte_size_ = 0;
+  }
+
   total_byte_size_ += input_byte_size;
 
   bufs_.push_back(input);
@@ -264,6 +293,47 @@ InputImpl::SetFromString(const std::vector<std::string>& input)
   return SetRaw(reinterpret_cast<const uint8_t*>(&sbuf[0]), sbuf.size());
 }
 
+Error
+InputImpl::SetSharedMemory(
+    const std::string& name, size_t offset, size_t byte_size)
+{
+  bufs_.clear();
+  buf_byte_sizes_.clear();
+  str_bufs_.clear();
+  shm_name_.clear();
+  shm_offset_ = 0;
+  total_byte_size_ = 0;
+
+  if (name.empty()) {
+    return Error(
+        RequestStatusCode::INVALID_ARG,
+        "shared memory region name must be non-empty for input '" + Name() +
+            "'");
+  }
+
+  if (needs_shape_) {
+    return Error(
+        RequestStatusCode::INVALID_ARG,
+        "must set shape for variable-size input '" + Name() +
+            "' before setting input data");
+  }
+
+  if (IsFixedSizeDataType(DType()) &&
+      (byte_size != (size_t)byte_size_ * batch_size_)) {
+    return Error(
+        RequestStatusCode::INVALID_ARG,
+        "invalid size " + std::to_string(byte_size) + " bytes for input '" +
+            Name() + "', expects " +
+            std::to_string(byte_size_ * batch_size_) + " bytes");
+  }
+
+  shm_name_ = name;
+  shm_offset_ = offset;
+  total_byte_size_ = byte_size;
+
+  return Error::Success;
+}
+
 Error
 InputImpl::GetNext(
     uint8_t* buf, size_t size, size_t* input_bytes, bool* end_of_input)
@@ -297,6 +367,13 @@ Error
 InputImpl::GetRaw(
     size_t batch_idx, const uint8_t** buf, size_t* byte_size) const
 {
+  if (IsSharedMemory()) {
+    return Error(
+        RequestStatusCode::INVALID_ARG,
+        "raw values requested for input '" + Name() +
+            "' that is delivered in shared memory");
+  }
+
   if (batch_idx >= batch_size_) {
     return Error(
         RequestStatusCode::INVALID_ARG,
@@ -320,6 +397,8 @@ InputImpl::Reset()
   bufs_idx_ = 0;
   buf_pos_ = 0;
   total_byte_size_ = 0;
+  shm_name_.clear();
+  shm_offset_ = 0;
 
   return Error::Success;
 }
@@ -327,7 +406,7 @@ InputImpl::Reset()
 Error
 InputImpl::PrepareForRequest()
 {
-  if (bufs_.size() != batch_size_) {
+  if (!IsSharedMemory() && (bufs_.size() != batch_size_)) {
     return Error(
         RequestStatusCode::INVALID_ARG,
         "expecting " + std::to_string(batch_size_) +
@@ -348,6 +427,8 @@ ResultImpl::ResultImpl(
     : output_(output),
       result_format_(
           reinterpret_cast<OutputImpl*>(output.get())->ResultFormat()),
+      shared_memory_(
+          reinterpret_cast<OutputImpl*>(output.get())->IsSharedMemory()),
       batch_size_(batch_size), has_fixed_batch1_byte_size_(false),
       batch1_byte_size_(0), batch1_element_count_(0), inplace_(false),
       inplace_ptrs_(batch_size), buffers_(batch_size), bufs_idx_(0),
@@ -380,6 +461,13 @@ ResultImpl::GetRaw(size_t batch_idx, const std::vector<uint8_t>** buf) const
             "'");
   }
 
+  if (shared_memory_) {
+    return Error(
+        RequestStatusCode::UNSUPPORTED,
+        "raw result not available for output '" + output_->Name() +
+            "' that is written to shared memory");
+  }
+
   if (batch_idx >= batch_size_) {
     return Error(
         RequestStatusCode::INVALID_ARG,
@@ -411,6 +499,13 @@ ResultImpl::GetRaw(
             "'");
   }
 
+  if (shared_memory_) {
+    return Error(
+        RequestStatusCode::UNSUPPORTED,
+        "raw result not available for output '" + output_->Name() +
+            "' that is written to shared memory");
+  }
+
   if (batch_idx >= batch_size_) {
     return Error(
         RequestStatusCode::INVALID_ARG,
@@ -441,6 +536,13 @@ ResultImpl::GetRawAtCursor(
             "'");
   }
 
+  if (shared_memory_) {
+    return Error(
+        RequestStatusCode::UNSUPPORTED,
+        "raw result not available for output '" + output_->Name() +
+            "' that is written to shared memory");
+  }
+
   if (batch_idx >= batch_size_) {
     return Error(
         RequestStatusCode::INVALID_ARG,
@@ -706,6 +808,26 @@ ResultImpl::SetNextRawResult(
 
 //==============================================================================
 
+Error
+RequestImpl::GetTiming(Timing* timing) const
+{
+  timing->request_start_ns =
+      timer_.request_start_.tv_sec * NANOS_PER_SECOND +
+      timer_.request_start_.tv_nsec;
+  timing->request_end_ns = timer_.request_end_.tv_sec * NANOS_PER_SECOND +
+                           timer_.request_end_.tv_nsec;
+  timing->send_start_ns = timer_.send_start_.tv_sec * NANOS_PER_SECOND +
+                          timer_.send_start_.tv_nsec;
+  timing->send_end_ns =
+      timer_.send_end_.tv_sec * NANOS_PER_SECOND + timer_.send_end_.tv_nsec;
+  timing->receive_start_ns =
+      timer_.receive_start_.tv_sec * NANOS_PER_SECOND +
+      timer_.receive_start_.tv_nsec;
+  timing->receive_end_ns = timer_.receive_end_.tv_sec * NANOS_PER_SECOND +
+                           timer_.receive_end_.tv_nsec;
+  return Error::Success;
+}
+
 Error
 RequestImpl::PostRunProcessing(
     const InferResponseHeader& infer_response,
@@ -743,7 +865,7 @@ InferContextImpl::InferContextImpl(
     CorrelationID correlation_id, bool verbose)
     : model_name_(model_name), model_version_(model_version),
       correlation_id_(correlation_id), verbose_(verbose), batch_size_(0),
-      async_request_id_(1), worker_(), exiting_(false)
+      async_request_id_(1), worker_(), exiting_(false), completion_fd_(-1)
 {
 }
 
@@ -846,14 +968,21 @@ InferContextImpl::SetRunOptions(const InferContext::Options& boptions)
     const std::shared_ptr<Output>& output = p.first;
     const OptionsImpl::OutputOptions& ooptions = p.second;
 
-    reinterpret_cast<OutputImpl*>(output.get())
-        ->SetResultFormat(ooptions.result_format);
+    OutputImpl* oimpl = reinterpret_cast<OutputImpl*>(output.get());
+    oimpl->SetResultFormat(ooptions.result_format);
+    oimpl->SetSharedMemory(!ooptions.shm_name.empty());
 
     auto routput = infer_request_.add_output();
     routput->set_name(output->Name());
     if (ooptions.result_format == Result::ResultFormat::CLASS) {
       routput->mutable_cls()->set_count(ooptions.u64);
     }
+    if (!ooptions.shm_name.empty()) {
+      auto shm = routput->mutable_shared_memory();
+      shm->set_name(ooptions.shm_name);
+      shm->set_offset(ooptions.shm_offset);
+      shm->set_byte_size(ooptions.shm_byte_size);
+    }
   }
 
   return Error::Success;
@@ -947,6 +1076,26 @@ InferContextImpl::GetReadyAsyncRequest(
   return Error::Success;
 }
 
+Error
+InferContextImpl::SetCompletionFd(int fd)
+{
+  completion_fd_ = fd;
+  return Error::Success;
+}
+
+void
+InferContextImpl::SignalCompletion()
+{
+  const int fd = completion_fd_;
+  if (fd >= 0) {
+    // A failed write (e.g. a full non-blocking pipe) is ignored since
+    // it means there are already unconsumed signals.
+    const uint64_t one = 1;
+    ssize_t written = write(fd, &one, sizeof(one));
+    (void)written;
+  }
+}
+
 Error
 InferContextImpl::IsRequestReady(
     const std::shared_ptr<Request>& async_request, bool* is_ready, bool wait)
@@ -25,6 +25,7 @@
 // OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 #pragma once
 
+#include <atomic>
 #include <condition_variable>
 #include <deque>
 #include <list>
@@ -101,15 +102,25 @@ class OptionsImpl : public InferContext::Options {
       const std::shared_ptr<InferContext::Output>& output) override;
   Error AddClassResult(
       const std::shared_ptr<InferContext::Output>& output, uint64_t k) override;
+  Error AddSharedMemoryResult(
+      const std::shared_ptr<InferContext::Output>& output,
+      const std::string& name, size_t offset, size_t byte_size) override;
 
   // Options for an output
   struct OutputOptions {
     OutputOptions(InferContext::Result::ResultFormat f, uint64_t n = 0)
-        : result_format(f), u64(n)
+        : result_format(f), u64(n), shm_offset(0), shm_byte_size(0)
     {
     }
     InferContext::Result::ResultFormat result_format;
     uint64_t u64;
+
+    // The registered shared memory region to write a RAW result
+    // to. 'shm_name' is empty if the result is returned in the
+    // response.
+    std::string shm_name;
+    size_t shm_offset;
+    size_t shm_byte_size;
   };
 
   using OutputOptionsPair =
@@ -147,6 +158,15 @@ class InputImpl : public InferContext::Input {
   Error SetRaw(const std::vector<uint8_t>& input) override;
   Error SetRaw(const uint8_t* input, size_t input_byte_size) override;
   Error SetFromString(const std::vector<std::string>& input) override;
+  Error SetSharedMemory(
+      const std::string& name, size_t offset, size_t byte_size) override;
+
+  // Return true if the values of this input are delivered in shared
+  // memory, and if so the range of the registered region holding
+  // them.
+  bool IsSharedMemory() const { return !shm_name_.empty(); }
+  const std::string& SharedMemoryName() const { return shm_name_; }
+  size_t SharedMemoryOffset() const { return shm_offset_; }
 
   // Copy into 'buf' up to 'size' bytes of this input's data. Return
   // the actual amount copied in 'input_bytes' and if the end of input
@@ -180,6 +200,12 @@ class InputImpl : public InferContext::Input {
   // reallocs that could invalidate the pointer references into the
   // std::string objects.
   std::list<std::string> str_bufs_;
+
+  // The registered shared memory region and offset holding the
+  // values for this input, set with SetSharedMemory(). 'shm_name_' is
+  // empty if the values are not in shared memory.
+  std::string shm_name_;
+  size_t shm_offset_;
 };
 
 //==============================================================================
@@ -187,7 +213,8 @@ class InputImpl : public InferContext::Input {
 class OutputImpl : public InferContext::Output {
  public:
   OutputImpl(const ModelOutput& mio)
-      : mio_(mio), result_format_(InferContext::Result::ResultFormat::RAW)
+      : mio_(mio), result_format_(InferContext::Result::ResultFormat::RAW),
+        shared_memory_(false)
   {
   }
   ~OutputImpl() = default;
@@ -205,9 +232,15 @@ class OutputImpl : public InferContext::Output {
     result_format_ = result_format;
   }
 
+  // Return true if the RAW result for this output is written to
+  // shared memory instead of being returned in the response.
+  bool IsSharedMemory() const { return shared_memory_; }
+  void SetSharedMemory(bool shared_memory) { shared_memory_ = shared_memory; }
+
  private:
   const ModelOutput mio_;
   InferContext::Result::ResultFormat result_format_;
+  bool shared_memory_;
 };
 
 //==============================================================================
@@ -244,6 +277,10 @@ class ResultImpl : public InferContext::Result {
     return result_format_;
   }
 
+  // Return true if the values of this result were written to shared
+  // memory and so are not held by the result.
+  bool IsSharedMemory() const { return shared_memory_; }
+
   void SetBatchnByteSize(const size_t s)
   {
     has_fixed_batch1_byte_size_ = true;
@@ -286,6 +323,7 @@ class ResultImpl : public InferContext::Result {
 
   const std::shared_ptr<InferContext::Output> output_;
   const InferContext::Result::ResultFormat result_format_;
+  const bool shared_memory_;
   const size_t batch_size_;
 
   bool has_fixed_batch1_byte_size_;
@@ -325,6 +363,8 @@ class RequestImpl : public InferContext::Request {
   uint64_t Id() const override { return id_; };
   void SetId(uint64_t id) { id_ = id; }
 
+  Error GetTiming(Timing* timing) const override;
+
   uintptr_t RunIndex() const { return run_index_; }
   void SetRunIndex(uintptr_t idx) { run_index_ = idx; }
 
@@ -389,6 +429,8 @@ class InferContextImpl : public InferContext {
       std::shared_ptr<Request>* async_request, bool* is_ready,
       bool wait) override;
 
+  Error SetCompletionFd(int fd) override;
+
  protected:
   Error Init(std::unique_ptr<ServerStatusContext> sctx);
 
@@ -401,6 +443,10 @@ class InferContextImpl : public InferContext {
   // Update the context stat with the given timer
   Error UpdateStat(const RequestTimers& timer);
 
+  // Signal the completion file descriptor, if any. Called by the
+  // worker thread each time an asynchronous request becomes ready.
+  void SignalCompletion();
+
   using AsyncReqMap = std::map<uintptr_t, std::shared_ptr<Request>>;
 
   // map to record ongoing asynchronous requests with pointer to easy handle
@@ -456,6 +502,10 @@ class InferContextImpl : public InferContext {
 
   // signal for worker thread to stop
   bool exiting_;
+
+  // File descriptor signaled when an asynchronous request completes,
+  // -1 if none.
+  std::atomic<int> completion_fd_;
 };
 
 }}}  // namespace nvidia::inferenceserver::client
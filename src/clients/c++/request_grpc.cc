@@ -289,6 +289,94 @@ ProfileGrpcContext::Create(
   return Error::Success;
 }
 
+//==============================================================================
+
+class SharedMemoryControlGrpcContextImpl : public SharedMemoryControlContext {
+ public:
+  SharedMemoryControlGrpcContextImpl(const std::string& url, bool verbose);
+  Error RegisterSharedMemory(
+      const std::string& name, const std::string& shm_key, size_t offset,
+      size_t byte_size) override;
+  Error UnregisterSharedMemory(const std::string& name) override;
+  Error UnregisterAllSharedMemory() override;
+
+ private:
+  Error SendRequest(const SharedMemoryControlRequest& request);
+
+  // GRPC end point.
+  std::unique_ptr<GRPCService::Stub> stub_;
+
+  // Enable verbose output
+  const bool verbose_;
+};
+
+SharedMemoryControlGrpcContextImpl::SharedMemoryControlGrpcContextImpl(
+    const std::string& url, bool verbose)
+    : stub_(GRPCService::NewStub(GetChannel(url))), verbose_(verbose)
+{
+}
+
+Error
+SharedMemoryControlGrpcContextImpl::RegisterSharedMemory(
+    const std::string& name, const std::string& shm_key, size_t offset,
+    size_t byte_size)
+{
+  SharedMemoryControlRequest request;
+  auto reg = request.mutable_register_region();
+  reg->set_name(name);
+  reg->set_shared_memory_key(shm_key);
+  reg->set_offset(offset);
+  reg->set_byte_size(byte_size);
+  return SendRequest(request);
+}
+
+Error
+SharedMemoryControlGrpcContextImpl::UnregisterSharedMemory(
+    const std::string& name)
+{
+  SharedMemoryControlRequest request;
+  request.mutable_unregister_region()->set_name(name);
+  return SendRequest(request);
+}
+
+Error
+SharedMemoryControlGrpcContextImpl::UnregisterAllSharedMemory()
+{
+  SharedMemoryControlRequest request;
+  request.mutable_unregister_all();
+  return SendRequest(request);
+}
+
+Error
+SharedMemoryControlGrpcContextImpl::SendRequest(
+    const SharedMemoryControlRequest& request)
+{
+  SharedMemoryControlResponse response;
+  grpc::ClientContext context;
+
+  grpc::Status status =
+      stub_->SharedMemoryControl(&context, request, &response);
+  if (status.ok()) {
+    return Error(response.request_status());
+  } else {
+    // Something wrong with the GRPC conncection
+    return Error(
+        RequestStatusCode::INTERNAL,
+        "GRPC client failed: " + std::to_string(status.error_code()) + ": " +
+            status.error_message());
+  }
+}
+
+Error
+SharedMemoryControlGrpcContext::Create(
+    std::unique_ptr<SharedMemoryControlContext>* ctx,
+    const std::string& server_url, bool verbose)
+{
+  ctx->reset(static_cast<SharedMemoryControlContext*>(
+      new SharedMemoryControlGrpcContextImpl(server_url, verbose)));
+  return Error::Success;
+}
+
 //==============================================================================
 class GrpcResultImpl : public ResultImpl {
  public:
@@ -385,7 +473,8 @@ GrpcRequestImpl::InitResult(
     result->SetBatchnByteSize(output.raw().batch_byte_size());
   }
 
-  if (result->ResultFormat() == InferContext::Result::ResultFormat::RAW) {
+  if ((result->ResultFormat() == InferContext::Result::ResultFormat::RAW) &&
+      !result->IsSharedMemory()) {
     if (grpc_response_->raw_output_size() <= (int)idx) {
       return Error(
           RequestStatusCode::INVALID,
@@ -531,7 +620,10 @@ InferGrpcContextImpl::Run(ResultMap* results)
   sync_request->Timer().Record(RequestTimers::Kind::SEND_END);
 
   sync_request->Timer().Record(RequestTimers::Kind::REQUEST_START);
-  sync_request->grpc_response_->Clear();
+  // Results of the previous run may still reference the previous
+  // response, e.g. through InferContext::Result::GetRawBatch(), so
+  // receive into a new response instead of clearing it.
+  sync_request->grpc_response_ = std::make_shared<InferResponse>();
   sync_request->grpc_status_ =
       stub_->Infer(&context, request_, sync_request->grpc_response_.get());
   sync_request->Timer().Record(RequestTimers::Kind::REQUEST_END);
@@ -632,7 +724,8 @@ InferGrpcContextImpl::PreRunProcessing(std::shared_ptr<Request>& request)
   infer_request_.mutable_input()->Clear();
   infer_request_.set_id(request->Id());
   for (auto& io : inputs_) {
-    reinterpret_cast<InputImpl*>(io.get())->PrepareForRequest();
+    InputImpl* iimpl = reinterpret_cast<InputImpl*>(io.get());
+    iimpl->PrepareForRequest();
 
     auto rinput = infer_request_.add_input();
     rinput->set_name(io->Name());
@@ -640,7 +733,13 @@ InferGrpcContextImpl::PreRunProcessing(std::shared_ptr<Request>& request)
     for (const auto s : io->Shape()) {
       rinput->add_dims(s);
     }
-    if (!IsFixedSizeDataType(io->DType())) {
+    if (iimpl->IsSharedMemory()) {
+      rinput->set_batch_byte_size(io->TotalByteSize());
+      auto shm = rinput->mutable_shared_memory();
+      shm->set_name(iimpl->SharedMemoryName());
+      shm->set_offset(iimpl->SharedMemoryOffset());
+      shm->set_byte_size(io->TotalByteSize());
+    } else if (!IsFixedSizeDataType(io->DType())) {
       rinput->set_batch_byte_size(io->TotalByteSize());
     }
   }
@@ -653,6 +752,13 @@ InferGrpcContextImpl::PreRunProcessing(std::shared_ptr<Request>& request)
   size_t input_pos_idx = 0;
   while (input_pos_idx < inputs_.size()) {
     InputImpl* io = reinterpret_cast<InputImpl*>(inputs_[input_pos_idx].get());
+
+    // Values of an input in shared memory have no raw input entry.
+    if (io->IsSharedMemory()) {
+      input_pos_idx++;
+      continue;
+    }
+
     std::string* new_input = request_.add_raw_input();
 
     // Append all batches of one input together
@@ -719,6 +825,7 @@ InferGrpcContextImpl::AsyncTransfer()
       }
       // send signal in case the main thread is waiting
       cv_.notify_all();
+      SignalCompletion();
     }
   } while (!exiting_);
 }
@@ -869,6 +976,7 @@ InferGrpcStreamContextImpl::AsyncTransfer()
     }
     // send signal in case the main thread is waiting for response
     cv_.notify_all();
+    SignalCompletion();
   }
   stream_->Finish();
 }
@@ -95,6 +95,24 @@ class ProfileGrpcContext {
       bool verbose = false);
 };
 
+//==============================================================================
+/// SharedMemoryControlGrpcContext is the GRPC instantiation of
+/// SharedMemoryControlContext.
+///
+class SharedMemoryControlGrpcContext {
+ public:
+  /// Create context that registers and unregisters shared memory
+  /// regions on a server using GRPC protocol.
+  /// \param ctx Returns the new SharedMemoryControlContext object.
+  /// \param server_url The inference server name and port.
+  /// \param verbose If true generate verbose output when contacting
+  /// the inference server.
+  /// \return Error object indicating success or failure.
+  static Error Create(
+      std::unique_ptr<SharedMemoryControlContext>* ctx,
+      const std::string& server_url, bool verbose = false);
+};
+
 //==============================================================================
 /// InferGrpcContext is the GRPC instantiation of InferContext.
 ///
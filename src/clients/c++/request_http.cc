@@ -29,6 +29,7 @@
 #include <curl/curl.h>
 #include <google/protobuf/text_format.h>
 #include "src/clients/c++/request_common.h"
+#include "src/core/grpc_service.pb.h"
 
 namespace nvidia { namespace inferenceserver { namespace client {
 
@@ -76,11 +77,13 @@ static CurlGlobal curl_global;
 class ServerHealthHttpContextImpl : public ServerHealthContext {
  public:
   ServerHealthHttpContextImpl(const std::string& url, bool verbose);
+  ~ServerHealthHttpContextImpl();
 
   Error GetReady(bool* ready) override;
   Error GetLive(bool* live) override;
 
  private:
+  static size_t ResponseHandler(void*, size_t, size_t, void*);
   Error GetHealth(const std::string& url, bool* health);
 
   // URL for health endpoint on inference server.
@@ -88,12 +91,33 @@ class ServerHealthHttpContextImpl : public ServerHealthContext {
 
   // Enable verbose output
   const bool verbose_;
+
+  // Curl easy handle reused by all requests so that the connection
+  // to the server is kept alive between requests. Created by the
+  // first request.
+  CURL* easy_handle_;
 };
 
 ServerHealthHttpContextImpl::ServerHealthHttpContextImpl(
     const std::string& url, bool verbose)
-    : url_(url + "/" + kHealthRESTEndpoint), verbose_(verbose)
+    : url_(url + "/" + kHealthRESTEndpoint), verbose_(verbose),
+      easy_handle_(nullptr)
+{
+}
+
+ServerHealthHttpContextImpl::~ServerHealthHttpContextImpl()
 {
+  if (easy_handle_ != nullptr) {
+    curl_easy_cleanup(easy_handle_);
+  }
+}
+
+size_t
+ServerHealthHttpContextImpl::ResponseHandler(
+    void* contents, size_t size, size_t nmemb, void* userp)
+{
+  // The health response has no meaningful body, discard it.
+  return size * nmemb;
 }
 
 Error
@@ -103,21 +127,27 @@ ServerHealthHttpContextImpl::GetHealth(const std::string& url, bool* health)
     return curl_global.Status();
   }
 
-  CURL* curl = curl_easy_init();
-  if (!curl) {
-    return Error(
-        RequestStatusCode::INTERNAL, "failed to initialize HTTP client");
-  }
+  if (easy_handle_ == nullptr) {
+    easy_handle_ = curl_easy_init();
+    if (!easy_handle_) {
+      return Error(
+          RequestStatusCode::INTERNAL, "failed to initialize HTTP client");
+    }
 
-  curl_easy_setopt(curl, CURLOPT_URL, url.c_str());
-  curl_easy_setopt(curl, CURLOPT_USERAGENT, "libcurl-agent/1.0");
-  if (verbose_) {
-    curl_easy_setopt(curl, CURLOPT_VERBOSE, 1L);
+    curl_easy_setopt(easy_handle_, CURLOPT_USERAGENT, "libcurl-agent/1.0");
+    curl_easy_setopt(easy_handle_, CURLOPT_TCP_KEEPALIVE, 1L);
+    if (verbose_) {
+      curl_easy_setopt(easy_handle_, CURLOPT_VERBOSE, 1L);
+    }
+
+    // response data handled by ResponseHandler()
+    curl_easy_setopt(easy_handle_, CURLOPT_WRITEFUNCTION, ResponseHandler);
   }
 
-  CURLcode res = curl_easy_perform(curl);
+  curl_easy_setopt(easy_handle_, CURLOPT_URL, url.c_str());
+
+  CURLcode res = curl_easy_perform(easy_handle_);
   if (res != CURLE_OK) {
-    curl_easy_cleanup(curl);
     return Error(
         RequestStatusCode::INTERNAL,
         "HTTP client failed: " + std::string(curl_easy_strerror(res)));
@@ -125,9 +155,7 @@ ServerHealthHttpContextImpl::GetHealth(const std::string& url, bool* health)
 
   // Must use 64-bit integer with curl_easy_getinfo
   int64_t http_code;
-  curl_easy_getinfo(curl, CURLINFO_RESPONSE_CODE, &http_code);
-
-  curl_easy_cleanup(curl);
+  curl_easy_getinfo(easy_handle_, CURLINFO_RESPONSE_CODE, &http_code);
 
   *health = (http_code == 200) ? true : false;
 
@@ -163,6 +191,7 @@ class ServerStatusHttpContextImpl : public ServerStatusContext {
   ServerStatusHttpContextImpl(const std::string& url, bool verbose);
   ServerStatusHttpContextImpl(
       const std::string& url, const std::string& model_name, bool verbose);
+  ~ServerStatusHttpContextImpl();
   Error GetServerStatus(ServerStatus* status) override;
 
  private:
@@ -180,21 +209,34 @@ class ServerStatusHttpContextImpl : public ServerStatusContext {
 
   // Serialized ServerStatus response from server.
   std::string response_;
+
+  // Curl easy handle reused by all requests so that the connection
+  // to the server is kept alive between requests. Created by the
+  // first request.
+  CURL* easy_handle_;
 };
 
 ServerStatusHttpContextImpl::ServerStatusHttpContextImpl(
     const std::string& url, bool verbose)
-    : url_(url + "/" + kStatusRESTEndpoint), verbose_(verbose)
+    : url_(url + "/" + kStatusRESTEndpoint), verbose_(verbose),
+      easy_handle_(nullptr)
 {
 }
 
 ServerStatusHttpContextImpl::ServerStatusHttpContextImpl(
     const std::string& url, const std::string& model_name, bool verbose)
     : url_(url + "/" + kStatusRESTEndpoint + "/" + model_name),
-      verbose_(verbose)
+      verbose_(verbose), easy_handle_(nullptr)
 {
 }
 
+ServerStatusHttpContextImpl::~ServerStatusHttpContextImpl()
+{
+  if (easy_handle_ != nullptr) {
+    curl_easy_cleanup(easy_handle_);
+  }
+}
+
 Error
 ServerStatusHttpContextImpl::GetServerStatus(ServerStatus* server_status)
 {
@@ -206,31 +248,34 @@ ServerStatusHttpContextImpl::GetServerStatus(ServerStatus* server_status)
     return curl_global.Status();
   }
 
-  CURL* curl = curl_easy_init();
-  if (!curl) {
-    return Error(
-        RequestStatusCode::INTERNAL, "failed to initialize HTTP client");
-  }
+  if (easy_handle_ == nullptr) {
+    easy_handle_ = curl_easy_init();
+    if (!easy_handle_) {
+      return Error(
+          RequestStatusCode::INTERNAL, "failed to initialize HTTP client");
+    }
 
-  // Want binary representation of the status.
-  std::string full_url = url_ + "?format=binary";
-  curl_easy_setopt(curl, CURLOPT_URL, full_url.c_str());
-  curl_easy_setopt(curl, CURLOPT_USERAGENT, "libcurl-agent/1.0");
-  if (verbose_) {
-    curl_easy_setopt(curl, CURLOPT_VERBOSE, 1L);
-  }
+    // Want binary representation of the status.
+    std::string full_url = url_ + "?format=binary";
+    curl_easy_setopt(easy_handle_, CURLOPT_URL, full_url.c_str());
+    curl_easy_setopt(easy_handle_, CURLOPT_USERAGENT, "libcurl-agent/1.0");
+    curl_easy_setopt(easy_handle_, CURLOPT_TCP_KEEPALIVE, 1L);
+    if (verbose_) {
+      curl_easy_setopt(easy_handle_, CURLOPT_VERBOSE, 1L);
+    }
 
-  // response headers handled by ResponseHeaderHandler()
-  curl_easy_setopt(curl, CURLOPT_HEADERFUNCTION, ResponseHeaderHandler);
-  curl_easy_setopt(curl, CURLOPT_HEADERDATA, this);
+    // response headers handled by ResponseHeaderHandler()
+    curl_easy_setopt(
+        easy_handle_, CURLOPT_HEADERFUNCTION, ResponseHeaderHandler);
+    curl_easy_setopt(easy_handle_, CURLOPT_HEADERDATA, this);
 
-  // response data handled by ResponseHandler()
-  curl_easy_setopt(curl, CURLOPT_WRITEFUNCTION, ResponseHandler);
-  curl_easy_setopt(curl, CURLOPT_WRITEDATA, this);
+    // response data handled by ResponseHandler()
+    curl_easy_setopt(easy_handle_, CURLOPT_WRITEFUNCTION, ResponseHandler);
+    curl_easy_setopt(easy_handle_, CURLOPT_WRITEDATA, this);
+  }
 
-  CURLcode res = curl_easy_perform(curl);
+  CURLcode res = curl_easy_perform(easy_handle_);
   if (res != CURLE_OK) {
-    curl_easy_cleanup(curl);
     return Error(
         RequestStatusCode::INTERNAL,
         "HTTP client failed: " + std::string(curl_easy_strerror(res)));
@@ -238,9 +283,7 @@ ServerStatusHttpContextImpl::GetServerStatus(ServerStatus* server_status)
 
   // Must use 64-bit integer with curl_easy_getinfo
   int64_t http_code;
-  curl_easy_getinfo(curl, CURLINFO_RESPONSE_CODE, &http_code);
-
-  curl_easy_cleanup(curl);
+  curl_easy_getinfo(easy_handle_, CURLINFO_RESPONSE_CODE, &http_code);
 
   // Should have a request status, if not then create an error status.
   if (request_status_.code() == RequestStatusCode::INVALID) {
@@ -461,6 +504,167 @@ ProfileHttpContext::Create(
 
 //==============================================================================
 
+class SharedMemoryControlHttpContextImpl : public SharedMemoryControlContext {
+ public:
+  SharedMemoryControlHttpContextImpl(const std::string& url, bool verbose);
+  Error RegisterSharedMemory(
+      const std::string& name, const std::string& shm_key, size_t offset,
+      size_t byte_size) override;
+  Error UnregisterSharedMemory(const std::string& name) override;
+  Error UnregisterAllSharedMemory() override;
+
+ private:
+  static size_t ResponseHeaderHandler(void*, size_t, size_t, void*);
+  Error SendRequest(const SharedMemoryControlRequest& request);
+
+  // URL for shared memory control endpoint on inference server.
+  const std::string url_;
+
+  // RequestStatus received in server response
+  RequestStatus request_status_;
+
+  // Enable verbose output
+  const bool verbose_;
+};
+
+SharedMemoryControlHttpContextImpl::SharedMemoryControlHttpContextImpl(
+    const std::string& url, bool verbose)
+    : url_(url + "/" + kSharedMemoryControlRESTEndpoint), verbose_(verbose)
+{
+}
+
+Error
+SharedMemoryControlHttpContextImpl::RegisterSharedMemory(
+    const std::string& name, const std::string& shm_key, size_t offset,
+    size_t byte_size)
+{
+  SharedMemoryControlRequest request;
+  auto reg = request.mutable_register_region();
+  reg->set_name(name);
+  reg->set_shared_memory_key(shm_key);
+  reg->set_offset(offset);
+  reg->set_byte_size(byte_size);
+  return SendRequest(request);
+}
+
+Error
+SharedMemoryControlHttpContextImpl::UnregisterSharedMemory(
+    const std::string& name)
+{
+  SharedMemoryControlRequest request;
+  request.mutable_unregister_region()->set_name(name);
+  return SendRequest(request);
+}
+
+Error
+SharedMemoryControlHttpContextImpl::UnregisterAllSharedMemory()
+{
+  SharedMemoryControlRequest request;
+  request.mutable_unregister_all();
+  return SendRequest(request);
+}
+
+Error
+SharedMemoryControlHttpContextImpl::SendRequest(
+    const SharedMemoryControlRequest& request)
+{
+  request_status_.Clear();
+
+  if (!curl_global.Status().IsOk()) {
+    return curl_global.Status();
+  }
+
+  CURL* curl = curl_easy_init();
+  if (!curl) {
+    return Error(
+        RequestStatusCode::INTERNAL, "failed to initialize HTTP client");
+  }
+
+  curl_easy_setopt(curl, CURLOPT_URL, url_.c_str());
+  curl_easy_setopt(curl, CURLOPT_USERAGENT, "libcurl-agent/1.0");
+  curl_easy_setopt(curl, CURLOPT_POST, 1L);
+  curl_easy_setopt(curl, CURLOPT_POSTFIELDSIZE, 0L);
+  curl_easy_setopt(curl, CURLOPT_POSTFIELDS, "");
+  if (verbose_) {
+    curl_easy_setopt(curl, CURLOPT_VERBOSE, 1L);
+  }
+
+  // The action is described by the request header.
+  const std::string request_str =
+      std::string(kSharedMemoryControlRequestHTTPHeader) + ":" +
+      request.ShortDebugString();
+  struct curl_slist* list = nullptr;
+  list = curl_slist_append(list, "Expect:");
+  list = curl_slist_append(list, request_str.c_str());
+  curl_easy_setopt(curl, CURLOPT_HTTPHEADER, list);
+
+  // response headers handled by ResponseHeaderHandler()
+  curl_easy_setopt(curl, CURLOPT_HEADERFUNCTION, ResponseHeaderHandler);
+  curl_easy_setopt(curl, CURLOPT_HEADERDATA, this);
+
+  CURLcode res = curl_easy_perform(curl);
+  curl_slist_free_all(list);
+  if (res != CURLE_OK) {
+    curl_easy_cleanup(curl);
+    return Error(
+        RequestStatusCode::INTERNAL,
+        "HTTP client failed: " + std::string(curl_easy_strerror(res)));
+  }
+
+  curl_easy_cleanup(curl);
+
+  // Should have a request status, if not then create an error status.
+  if (request_status_.code() == RequestStatusCode::INVALID) {
+    request_status_.Clear();
+    request_status_.set_code(RequestStatusCode::INTERNAL);
+    request_status_.set_msg(
+        "shared memory control request did not return status");
+  }
+
+  return Error(request_status_);
+}
+
+size_t
+SharedMemoryControlHttpContextImpl::ResponseHeaderHandler(
+    void* contents, size_t size, size_t nmemb, void* userp)
+{
+  SharedMemoryControlHttpContextImpl* ctx =
+      reinterpret_cast<SharedMemoryControlHttpContextImpl*>(userp);
+
+  char* buf = reinterpret_cast<char*>(contents);
+  size_t byte_size = size * nmemb;
+
+  size_t idx = strlen(kStatusHTTPHeader);
+  if ((idx < byte_size) && !strncasecmp(buf, kStatusHTTPHeader, idx)) {
+    while ((idx < byte_size) && (buf[idx] != ':')) {
+      ++idx;
+    }
+
+    if (idx < byte_size) {
+      std::string hdr(buf + idx + 1, byte_size - idx - 1);
+
+      if (!google::protobuf::TextFormat::ParseFromString(
+              hdr, &ctx->request_status_)) {
+        ctx->request_status_.Clear();
+      }
+    }
+  }
+
+  return byte_size;
+}
+
+Error
+SharedMemoryControlHttpContext::Create(
+    std::unique_ptr<SharedMemoryControlContext>* ctx,
+    const std::string& server_url, bool verbose)
+{
+  ctx->reset(static_cast<SharedMemoryControlContext*>(
+      new SharedMemoryControlHttpContextImpl(server_url, verbose)));
+  return Error::Success;
+}
+
+//==============================================================================
+
 class HttpRequestImpl : public RequestImpl {
  public:
   HttpRequestImpl(
@@ -653,8 +857,10 @@ HttpRequestImpl::SetNextRawResult(
     ResultImpl* io = ordered_results_[result_pos_idx_].get();
     size_t ob = 0;
 
-    // Only try to read raw result for RAW
-    if (io->ResultFormat() == InferContext::Result::ResultFormat::RAW) {
+    // Only try to read raw result for RAW that is not written to
+    // shared memory
+    if ((io->ResultFormat() == InferContext::Result::ResultFormat::RAW) &&
+        !io->IsSharedMemory()) {
       Error err = io->SetNextRawResult(buf, size, false /* inplace */, &ob);
       if (!err.IsOk()) {
         return err;
@@ -1082,7 +1288,7 @@ InferHttpContextImpl::PreRunProcessing(std::shared_ptr<Request>& request)
   infer_request_.mutable_input()->Clear();
   infer_request_.set_id(request->Id());
   for (const auto& io : inputs_) {
-    http_request->total_input_byte_size_ += io->TotalByteSize();
+    const InputImpl* iimpl = reinterpret_cast<const InputImpl*>(io.get());
 
     auto rinput = infer_request_.add_input();
     rinput->set_name(io->Name());
@@ -1090,6 +1296,18 @@ InferHttpContextImpl::PreRunProcessing(std::shared_ptr<Request>& request)
     for (const auto s : io->Shape()) {
       rinput->add_dims(s);
     }
+
+    // Values of an input in shared memory are not sent in the body.
+    if (iimpl->IsSharedMemory()) {
+      rinput->set_batch_byte_size(io->TotalByteSize());
+      auto shm = rinput->mutable_shared_memory();
+      shm->set_name(iimpl->SharedMemoryName());
+      shm->set_offset(iimpl->SharedMemoryOffset());
+      shm->set_byte_size(io->TotalByteSize());
+      continue;
+    }
+
+    http_request->total_input_byte_size_ += io->TotalByteSize();
     if (!IsFixedSizeDataType(io->DType())) {
       rinput->set_batch_byte_size(io->TotalByteSize());
     }
@@ -1172,6 +1390,7 @@ InferHttpContextImpl::AsyncTransfer()
     // if it has completed tasks, send signal in case the main thread is waiting
     if (has_completed) {
       cv_.notify_all();
+      SignalCompletion();
     }
   } while (!exiting_);
 }
@@ -95,6 +95,24 @@ class ProfileHttpContext {
       bool verbose = false);
 };
 
+//==============================================================================
+/// SharedMemoryControlHttpContext is the HTTP instantiation of
+/// SharedMemoryControlContext.
+///
+class SharedMemoryControlHttpContext {
+ public:
+  /// Create context that registers and unregisters shared memory
+  /// regions on a server using HTTP protocol.
+  /// \param ctx Returns the new SharedMemoryControlContext object.
+  /// \param server_url The inference server name and port.
+  /// \param verbose If true generate verbose output when contacting
+  /// the inference server.
+  /// \return Error object indicating success or failure.
+  static Error Create(
+      std::unique_ptr<SharedMemoryControlContext>* ctx,
+      const std::string& server_url, bool verbose = false);
+};
+
 //==============================================================================
 /// InferHttpContext is the HTTP instantiation of InferContext.
 ///
@@ -25,16 +25,70 @@
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 from builtins import range
+from collections import deque, namedtuple, OrderedDict
+from contextlib import contextmanager
 from enum import IntEnum
 from future.utils import iteritems
 from ctypes import *
+import hashlib
+import heapq
+import importlib
+import mmap
 import numpy as np
 from numpy.ctypeslib import ndpointer
-import pkg_resources
+import os
 import struct
-import tensorrtserver.api.model_config_pb2
-from tensorrtserver.api.server_status_pb2 import ServerStatus
-from tensorrtserver.api.api_pb2 import *
+import sys
+import threading
+import time
+import weakref
+
+# The generated protobuf modules are imported on first use, by
+# __getattr__ for the protobuf messages that are part of this
+# module's API. Module __getattr__ requires Python 3.7 so import
+# eagerly on earlier versions.
+_PROTOBUF_MODULES = ('api_pb2', 'grpc_service_pb2', 'grpc_service_pb2_grpc',
+                     'model_config_pb2', 'request_status_pb2', 'server_status_pb2')
+_PROTOBUF_NAMES = { 'InferRequestHeader' : 'api_pb2',
+                    'InferResponseHeader' : 'api_pb2' }
+
+if sys.version_info < (3, 7):
+    import tensorrtserver.api.model_config_pb2
+    from tensorrtserver.api.api_pb2 import *
+else:
+    def __getattr__(name):
+        if name in _PROTOBUF_MODULES:
+            return importlib.import_module('tensorrtserver.api.' + name)
+        module_name = _PROTOBUF_NAMES.get(name)
+        if module_name is None:
+            raise AttributeError("module '" + __name__ + "' has no attribute '" + name + "'")
+        value = getattr(importlib.import_module('tensorrtserver.api.' + module_name), name)
+        globals()[name] = value
+        return value
+
+# Map from model_config DataType to numpy dtype, created on first use.
+_result_numpy_dtypes = None
+
+def _get_numpy_dtype(data_type):
+    global _result_numpy_dtypes
+    if _result_numpy_dtypes is None:
+        from tensorrtserver.api import model_config_pb2
+        _result_numpy_dtypes = {
+            model_config_pb2.TYPE_BOOL : np.bool_,
+            model_config_pb2.TYPE_UINT8 : np.uint8,
+            model_config_pb2.TYPE_UINT16 : np.uint16,
+            model_config_pb2.TYPE_UINT32 : np.uint32,
+            model_config_pb2.TYPE_UINT64 : np.uint64,
+            model_config_pb2.TYPE_INT8 : np.int8,
+            model_config_pb2.TYPE_INT16 : np.int16,
+            model_config_pb2.TYPE_INT32 : np.int32,
+            model_config_pb2.TYPE_INT64 : np.int64,
+            model_config_pb2.TYPE_FP16 : np.float16,
+            model_config_pb2.TYPE_FP32 : np.float32,
+            model_config_pb2.TYPE_FP64 : np.float64,
+            model_config_pb2.TYPE_STRING : np.dtype(object)
+        }
+    return _result_numpy_dtypes.get(data_type)
 
 class _utf8(object):
     @classmethod
@@ -46,8 +100,53 @@ class _utf8(object):
         else:
             return value.encode('utf8')
 
-_crequest_path = pkg_resources.resource_filename('tensorrtserver.api', 'libcrequest.so')
-_crequest = cdll.LoadLibrary(_crequest_path)
+class _CrequestFunction(object):
+    # Placeholder for a libcrequest function. 'restype' and
+    # 'argtypes' are recorded and applied when the library is loaded
+    # by the first call of any placeholder. Loading replaces every
+    # placeholder in this module's globals with the ctypes function
+    # so later calls have no overhead.
+    def __init__(self, name):
+        self.name = name
+        self.restype = c_int
+        self.argtypes = None
+        self.function = None
+
+    def __call__(self, *args):
+        if self.function is None:
+            _load_crequest()
+        return self.function(*args)
+
+class _LazyCrequest(object):
+    # Stands in for libcrequest until it is loaded.
+    def __getattr__(self, name):
+        return _CrequestFunction(name)
+
+def _load_crequest():
+    global _crequest
+    with _crequest_lock:
+        if not isinstance(_crequest, _LazyCrequest):
+            return
+
+        # The package is not zip-safe so libcrequest.so is installed
+        # next to this file. Using pkg_resources to find it would add
+        # considerably to the time to import this module.
+        crequest = cdll.LoadLibrary(
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), 'libcrequest.so'))
+        module_globals = globals()
+        for name, value in list(module_globals.items()):
+            if isinstance(value, _CrequestFunction):
+                function = getattr(crequest, value.name)
+                function.restype = value.restype
+                if value.argtypes is not None:
+                    function.argtypes = value.argtypes
+                value.function = function
+                module_globals[name] = function
+        _crequest = crequest
+
+# libcrequest is loaded on first use, see _load_crequest().
+_crequest_lock = threading.Lock()
+_crequest = _LazyCrequest()
 
 _crequest_error_new = _crequest.ErrorNew
 _crequest_error_new.restype = c_void_p
@@ -88,6 +187,21 @@ _crequest_status_ctx_get = _crequest.ServerStatusContextGetServerStatus
 _crequest_status_ctx_get.restype = c_void_p
 _crequest_status_ctx_get.argtypes = [c_void_p, POINTER(c_char_p), POINTER(c_uint32)]
 
+_crequest_shm_control_ctx_new = _crequest.SharedMemoryControlContextNew
+_crequest_shm_control_ctx_new.restype = c_void_p
+_crequest_shm_control_ctx_new.argtypes = [POINTER(c_void_p), _utf8, c_int, c_bool]
+_crequest_shm_control_ctx_del = _crequest.SharedMemoryControlContextDelete
+_crequest_shm_control_ctx_del.argtypes = [c_void_p]
+_crequest_shm_control_ctx_register = _crequest.SharedMemoryControlContextRegister
+_crequest_shm_control_ctx_register.restype = c_void_p
+_crequest_shm_control_ctx_register.argtypes = [c_void_p, _utf8, _utf8, c_uint64, c_uint64]
+_crequest_shm_control_ctx_unregister = _crequest.SharedMemoryControlContextUnregister
+_crequest_shm_control_ctx_unregister.restype = c_void_p
+_crequest_shm_control_ctx_unregister.argtypes = [c_void_p, _utf8]
+_crequest_shm_control_ctx_unregister_all = _crequest.SharedMemoryControlContextUnregisterAll
+_crequest_shm_control_ctx_unregister_all.restype = c_void_p
+_crequest_shm_control_ctx_unregister_all.argtypes = [c_void_p]
+
 _crequest_infer_ctx_new = _crequest.InferContextNew
 _crequest_infer_ctx_new.restype = c_void_p
 _crequest_infer_ctx_new.argtypes = [POINTER(c_void_p), _utf8, c_int, _utf8, c_int64, c_uint64, c_bool, c_bool]
@@ -108,6 +222,19 @@ _crequest_infer_ctx_get_async_run_results.argtypes = [c_void_p, POINTER(c_bool),
 _crequest_infer_ctx_get_ready_async_request = _crequest.InferContextGetReadyAsyncRequest
 _crequest_infer_ctx_get_ready_async_request.restype = c_void_p
 _crequest_infer_ctx_get_ready_async_request.argtypes = [c_void_p, POINTER(c_bool), POINTER(c_uint64), c_bool]
+_crequest_infer_ctx_set_completion_fd = _crequest.InferContextSetCompletionFd
+_crequest_infer_ctx_set_completion_fd.restype = c_void_p
+_crequest_infer_ctx_set_completion_fd.argtypes = [c_void_p, c_int]
+_crequest_infer_ctx_get_async_run_timing = _crequest.InferContextGetAsyncRunTiming
+_crequest_infer_ctx_get_async_run_timing.restype = c_void_p
+_crequest_infer_ctx_get_async_run_timing.argtypes = [c_void_p, POINTER(c_uint64),
+                                                     POINTER(c_uint64), POINTER(c_uint64),
+                                                     POINTER(c_uint64), POINTER(c_uint64),
+                                                     POINTER(c_uint64)]
+_crequest_infer_ctx_get_stat = _crequest.InferContextGetStat
+_crequest_infer_ctx_get_stat.restype = c_void_p
+_crequest_infer_ctx_get_stat.argtypes = [c_void_p, POINTER(c_uint64), POINTER(c_uint64),
+                                         POINTER(c_uint64), POINTER(c_uint64)]
 
 _crequest_infer_ctx_options_new = _crequest.InferContextOptionsNew
 _crequest_infer_ctx_options_new.restype = c_void_p
@@ -120,6 +247,10 @@ _crequest_infer_ctx_options_add_raw.argtypes = [c_void_p, c_void_p, _utf8]
 _crequest_infer_ctx_options_add_class = _crequest.InferContextOptionsAddClass
 _crequest_infer_ctx_options_add_class.restype = c_void_p
 _crequest_infer_ctx_options_add_class.argtypes = [c_void_p, c_void_p, _utf8, c_uint64]
+_crequest_infer_ctx_options_add_shared_memory = _crequest.InferContextOptionsAddSharedMemory
+_crequest_infer_ctx_options_add_shared_memory.restype = c_void_p
+_crequest_infer_ctx_options_add_shared_memory.argtypes = [c_void_p, c_void_p, _utf8, _utf8,
+                                                          c_uint64, c_uint64]
 
 _crequest_infer_ctx_input_new = _crequest.InferContextInputNew
 _crequest_infer_ctx_input_new.restype = c_void_p
@@ -134,6 +265,14 @@ _crequest_infer_ctx_input_set_shape.argtypes = [c_void_p,
 _crequest_infer_ctx_input_set_raw = _crequest.InferContextInputSetRaw
 _crequest_infer_ctx_input_set_raw.restype = c_void_p
 _crequest_infer_ctx_input_set_raw.argtypes = [c_void_p, c_void_p, c_uint64]
+_crequest_infer_ctx_input_set_raw_batch = _crequest.InferContextInputSetRawBatch
+_crequest_infer_ctx_input_set_raw_batch.restype = c_void_p
+_crequest_infer_ctx_input_set_raw_batch.argtypes = [c_void_p, c_void_p,
+                                                    ndpointer(c_uint64, flags="C_CONTIGUOUS"),
+                                                    c_uint64]
+_crequest_infer_ctx_input_set_shared_memory = _crequest.InferContextInputSetSharedMemory
+_crequest_infer_ctx_input_set_shared_memory.restype = c_void_p
+_crequest_infer_ctx_input_set_shared_memory.argtypes = [c_void_p, _utf8, c_uint64, c_uint64]
 
 _crequest_infer_ctx_result_new = _crequest.InferContextResultNew
 _crequest_infer_ctx_result_new.restype = c_void_p
@@ -158,6 +297,10 @@ _crequest_infer_ctx_result_next_raw = _crequest.InferContextResultNextRaw
 _crequest_infer_ctx_result_next_raw.restype = c_void_p
 _crequest_infer_ctx_result_next_raw.argtypes = [c_void_p, c_uint64, POINTER(c_char_p),
                                                 POINTER(c_uint64)]
+_crequest_infer_ctx_result_raw_batch = _crequest.InferContextResultRawBatch
+_crequest_infer_ctx_result_raw_batch.restype = c_void_p
+_crequest_infer_ctx_result_raw_batch.argtypes = [c_void_p, c_uint64, POINTER(c_char_p),
+                                                 POINTER(c_uint64)]
 _crequest_infer_ctx_result_class_cnt = _crequest.InferContextResultClassCount
 _crequest_infer_ctx_result_class_cnt.restype = c_void_p
 _crequest_infer_ctx_result_class_cnt.argtypes = [c_void_p, c_uint64, POINTER(c_uint64)]
@@ -165,6 +308,13 @@ _crequest_infer_ctx_result_next_class = _crequest.InferContextResultNextClass
 _crequest_infer_ctx_result_next_class.restype = c_void_p
 _crequest_infer_ctx_result_next_class.argtypes = [c_void_p, c_uint64, POINTER(c_uint64),
                                                   POINTER(c_float), POINTER(c_char_p)]
+_crequest_infer_ctx_result_class_batch = _crequest.InferContextResultClassBatch
+_crequest_infer_ctx_result_class_batch.restype = c_void_p
+_crequest_infer_ctx_result_class_batch.argtypes = [c_void_p, c_uint64, c_uint64,
+                                                   ndpointer(c_int64, flags="C_CONTIGUOUS"),
+                                                   ndpointer(c_float, flags="C_CONTIGUOUS"),
+                                                   ndpointer(np.uintp, flags="C_CONTIGUOUS"),
+                                                   ndpointer(c_uint64, flags="C_CONTIGUOUS")]
 
 
 def _raise_if_error(err):
@@ -187,6 +337,79 @@ def _raise_error(msg):
     _crequest_error_del(err)
     raise ex
 
+def _serialize_string_tensor(input_value):
+    """
+    Serialize a tensor of string objects into a 1-dimensional array
+    containing the 4-byte string length followed by the actual string
+    characters. All strings are concatenated together in "C" order.
+    """
+    return _serialize_string_elements(input_value)[0]
+
+def _serialize_string_elements(input_value):
+    """
+    Serialize a tensor of string objects as described in
+    _serialize_string_tensor(). Return the serialized array together
+    with the serialized size, in bytes, of each element.
+    """
+    cnt = input_value.size
+
+    # Fixed-width bytes arrays have the same length for every element
+    # so the serialized buffer can be built with a single copy.
+    if input_value.dtype.type == np.bytes_:
+        itemsize = input_value.dtype.itemsize
+        flattened = np.empty((cnt, 4 + itemsize), dtype=np.uint8)
+        flattened[:, :4] = np.array(itemsize, dtype='<u4').view(np.uint8)
+        flattened[:, 4:] = np.ascontiguousarray(input_value).view(np.uint8).reshape(cnt, itemsize)
+        return flattened.reshape(-1), np.full(cnt, 4 + itemsize, dtype=np.int64)
+
+    # If directly passing bytes to STRING type, don't convert it to
+    # str as Python will encode the bytes which may distort the
+    # meaning
+    strs = [ obj if isinstance(obj, bytes) else str(obj).encode('utf-8')
+             for obj in input_value.ravel(order='C').tolist() ]
+    lens = np.fromiter(map(len, strs), dtype=np.int64, count=cnt)
+
+    # Offset of each string's 4-byte length within the serialized
+    # buffer. The characters of string 'i' are shifted from their
+    # position in the concatenation of all strings by the 4-byte
+    # lengths of strings 0 through 'i'.
+    starts = np.arange(cnt, dtype=np.int64) * 4
+    starts[1:] += np.cumsum(lens[:-1])
+
+    flattened = np.empty(int(lens.sum()) + (4 * cnt), dtype=np.uint8)
+    flattened[starts[:, None] + np.arange(4)] = \
+        lens.astype('<u4').view(np.uint8).reshape(cnt, 4)
+    chars = np.frombuffer(b''.join(strs), dtype=np.uint8)
+    char_shift = 4 * (np.repeat(np.arange(cnt, dtype=np.int64), lens) + 1)
+    flattened[np.arange(chars.size, dtype=np.int64) + char_shift] = chars
+    return flattened, lens + 4
+
+_string_len_unpack_from = struct.Struct("<I").unpack_from
+
+def _deserialize_string_tensor(val_buf):
+    """
+    Deserialize a buffer holding 4-byte string lengths each followed
+    by the actual string characters into a 1-dimensional numpy array
+    of bytes objects.
+    """
+    # The offset of each string depends on the lengths of all the
+    # strings that precede it so the buffer must be scanned in order,
+    # but each string is sliced directly from the buffer.
+    buf = bytes(val_buf)
+    strs = list()
+    append = strs.append
+    offset = 0
+    end = len(buf)
+    while offset < end:
+        l = _string_len_unpack_from(buf, offset)[0]
+        offset += 4
+        append(buf[offset:offset + l])
+        offset += l
+
+    val = np.empty(len(strs), dtype=object)
+    val[:] = strs
+    return val
+
 
 class ProtocolType(IntEnum):
     """Protocol types supported by the client API
@@ -234,13 +457,25 @@ class InferenceServerException(Exception):
     Parameters
     ----------
     err : c_void_p
-        Pointer to an Error that should be used to initialize the exception.
+        Pointer to an Error that should be used to initialize the
+        exception, or None if the exception is initialized from
+        'msg', 'server_id' and 'request_id'.
+
+    msg : str
+        The exception message, used if 'err' is None.
+
+    server_id : str
+        The ID of the server that reported the error, used if 'err'
+        is None.
+
+    request_id : int
+        The ID of the request that failed, used if 'err' is None.
 
     """
-    def __init__(self, err):
-        self._msg = None
-        self._server_id = None
-        self._request_id = 0
+    def __init__(self, err, msg=None, server_id=None, request_id=0):
+        self._msg = msg
+        self._server_id = server_id
+        self._request_id = request_id
         if (err is not None) and (err.value is not None):
             self._msg = _crequest_error_msg(err)
             if self._msg is not None:
@@ -308,6 +543,7 @@ class ServerHealthContext:
     """
     def __init__(self, url, protocol, verbose=False):
         self._last_request_id = 0
+        self._trace_hook = None
         self._ctx = c_void_p()
         _raise_if_error(
             c_void_p(
@@ -353,8 +589,8 @@ class ServerHealthContext:
             _raise_error("ServerHealthContext is closed")
 
         cready = c_bool()
-        self._last_request_id = _raise_if_error(
-            c_void_p(_crequest_health_ctx_ready(self._ctx, byref(cready))))
+        self._last_request_id = _traced_request(
+            self, _crequest_health_ctx_ready, self._ctx, byref(cready))
         return cready.value
 
     def is_live(self):
@@ -376,10 +612,23 @@ class ServerHealthContext:
             _raise_error("ServerHealthContext is closed")
 
         clive = c_bool()
-        self._last_request_id = _raise_if_error(
-            c_void_p(_crequest_health_ctx_live(self._ctx, byref(clive))))
+        self._last_request_id = _traced_request(
+            self, _crequest_health_ctx_live, self._ctx, byref(clive))
         return clive.value
 
+    def set_trace_hook(self, hook):
+        """Set the hook that receives the SEND and RESPONSE, or ERROR,
+        events of each is_ready() and is_live() request.
+
+        Parameters
+        ----------
+        hook : callable
+            Called with a TraceEvent for each event, or None to stop
+            tracing.
+
+        """
+        self._trace_hook = hook
+
     def get_last_request_id(self):
         """Get the request ID of the most recent is_ready() or is_live()
         request.
@@ -417,7 +666,9 @@ class ServerStatusContext:
 
     """
     def __init__(self, url, protocol, model_name=None, verbose=False):
+        self._model_name = model_name
         self._last_request_id = 0
+        self._trace_hook = None
         self._ctx = c_void_p()
         _raise_if_error(
             c_void_p(
@@ -462,17 +713,47 @@ class ServerStatusContext:
         if self._ctx is None:
             _raise_error("ServerStatusContext is closed")
 
+        trace = None
+        if self._trace_hook is not None:
+            trace = _RequestTrace(self._trace_hook, self, self._model_name)
+            trace.mark(TraceEventType.SEND)
+
         cstatus = c_char_p()
         cstatus_len = c_uint32()
-        self._last_request_id = _raise_if_error(
-            c_void_p(_crequest_status_ctx_get(
-                self._ctx, byref(cstatus), byref(cstatus_len))))
+        try:
+            self._last_request_id = _raise_if_error(
+                c_void_p(_crequest_status_ctx_get(
+                    self._ctx, byref(cstatus), byref(cstatus_len))))
+        except InferenceServerException as ex:
+            if trace is not None:
+                trace.fail(ex)
+            raise
+        if trace is not None:
+            trace.mark(TraceEventType.RESPONSE)
         status_buf = cast(cstatus, POINTER(c_byte * cstatus_len.value))[0]
 
+        from tensorrtserver.api.server_status_pb2 import ServerStatus
         status = ServerStatus()
         status.ParseFromString(status_buf)
+        if trace is not None:
+            trace.mark(TraceEventType.DECODED)
+            trace.emit(self._last_request_id)
         return status
 
+    def set_trace_hook(self, hook):
+        """Set the hook that receives the lifecycle events of each
+        get_server_status() request: SEND, RESPONSE and DECODED once
+        the status is parsed, or ERROR.
+
+        Parameters
+        ----------
+        hook : callable
+            Called with a TraceEvent for each event, or None to stop
+            tracing.
+
+        """
+        self._trace_hook = hook
+
     def get_last_request_id(self):
         """Get the request ID of the most recent get_server_status() request.
 
@@ -486,77 +767,262 @@ class ServerStatusContext:
         return self._last_request_id
 
 
-class InferContext:
-    """An InferContext object is used to run inference on an inference
-    server for a specific model.
-
-    Once created an InferContext object can be used repeatedly to
-    perform inference using the model.
+# The regions mapped by this process, by shared memory key, and the
+# shared memory key and offset of each region registered by this
+# process, by region name. Used to return outputs written to shared
+# memory as views of the region.
+_shared_memory_regions = weakref.WeakValueDictionary()
+_registered_shared_memory = dict()
+
+def _shared_memory_array(tensor, dtype, shape):
+    registered = _registered_shared_memory.get(tensor.region_name)
+    region = None
+    if registered is not None:
+        region = _shared_memory_regions.get(registered[0])
+    if region is None:
+        _raise_error("shared memory region '" + tensor.region_name +
+                     "' must be registered with SharedMemoryControlContext and " +
+                     "mapped with SharedMemoryRegion by this process")
+    return region.array(dtype, shape, registered[1] + tensor.offset)
+
+class SharedMemoryRegion:
+    """A POSIX shared memory object mapped into this process. The
+    inference server reads input tensor values directly from, and
+    writes output tensor values directly to, the object once a range
+    of it is registered with the server using a
+    SharedMemoryControlContext, so the client and server must be on
+    the same host.
 
     Parameters
     ----------
-    url : str
-        The inference server URL, e.g. localhost:8000.
+    shm_key : str
+        The key of the shared memory object, e.g. /input_data.
 
-    protocol : ProtocolType
-        The protocol used to communicate with the server.
+    byte_size : int
+        The size of the shared memory object, in bytes.
 
-    model_name : str
-        The name of the model to use for inference.
+    create : bool
+        If True create the shared memory object, or resize it if it
+        already exists. If False the object must already exist.
 
-    model_version : int
-        The version of the model to use for inference,
-        or None to indicate that the latest (i.e. highest version number)
-        version should be used.
+    """
+    def __init__(self, shm_key, byte_size, create=True):
+        self._key = shm_key
+        self._byte_size = byte_size
+        self._mmap = None
+
+        # On Linux, shm_open() objects live in /dev/shm so the object
+        # can be created and mapped without going through librt.
+        path = os.path.join('/dev/shm', shm_key.lstrip('/'))
+        try:
+            fd = os.open(path, os.O_RDWR | (os.O_CREAT if create else 0), 0o600)
+        except OSError as ex:
+            _raise_error("unable to open shared memory object '" + shm_key +
+                         "': " + str(ex))
+        try:
+            if create:
+                os.ftruncate(fd, byte_size)
+            self._mmap = mmap.mmap(fd, byte_size)
+        except (OSError, ValueError) as ex:
+            _raise_error("unable to map shared memory object '" + shm_key +
+                         "': " + str(ex))
+        finally:
+            os.close(fd)
 
-    correlation_id : int
-        The correlation ID for the inference. If not specified (or if
-        specified as 0), the inference will have no correlation ID.
+        _shared_memory_regions[shm_key] = self
 
-    streaming : bool
-        If True create streaming context. Streaming is only allowed with
-        gRPC protocol.
+    def __enter__(self):
+        return self
 
-    verbose : bool
-        If True generate verbose output.
+    def __exit__(self, type, value, traceback):
+        self.close()
 
-    """
-    class ResultFormat:
-        """Formats for output tensor results.
+    def key(self):
+        """Get the key of the shared memory object.
 
-        RAW
-            All values of the output are returned as an numpy array
-            of the appropriate type.
+        Returns
+        -------
+        str
+            The key.
 
-        CLASS
-            Specified as tuple (CLASS, k). Top 'k' results
-            are returned as an array of (index, value, label) tuples.
+        """
+        return self._key
+
+    def byte_size(self):
+        """Get the size of the shared memory object.
+
+        Returns
+        -------
+        int
+            The size, in bytes.
 
         """
-        RAW = 1,
-        CLASS = 2
+        return self._byte_size
 
-    def __init__(self, url, protocol, model_name, model_version=None,
-                 verbose=False, correlation_id=0, streaming=False):
-        self._correlation_id = correlation_id
-        self._last_request_id = None
-        self._last_request_model_name = None
-        self._last_request_model_version = None
-        self._requested_outputs_dict = dict()
-        self._ctx = c_void_p()
+    def array(self, dtype, shape, offset=0):
+        """Get a numpy array whose values are stored in the shared
+        memory object. Writing to the array writes the object, so an
+        input can be produced in place without a copy.
 
-        imodel_version = -1 if model_version is None else model_version
+        Parameters
+        ----------
+        dtype : numpy.dtype
+            The datatype of the array. Must be a fixed-size datatype.
+
+        shape : tuple of int
+            The shape of the array.
+
+        offset : int
+            The offset, in bytes, of the array from the start of the
+            object.
+
+        Returns
+        -------
+        numpy.ndarray
+            The array.
+
+        Raises
+        ------
+        InferenceServerException
+            If the region is closed or if the array does not fit
+            within the object.
+
+        """
+        if self._mmap is None:
+            _raise_error("SharedMemoryRegion is closed")
+
+        dtype = np.dtype(dtype)
+        byte_size = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+        if offset + byte_size > self._byte_size:
+            _raise_error("array of " + str(byte_size) + " bytes at offset " +
+                         str(offset) + " does not fit in shared memory object '" +
+                         self._key + "' of " + str(self._byte_size) + " bytes")
+        return np.ndarray(shape, dtype, buffer=self._mmap, offset=offset)
+
+    def set(self, values, offset=0):
+        """Copy the values of a numpy array into the shared memory
+        object. String tensors are serialized as expected by the
+        inference server.
+
+        Parameters
+        ----------
+        values : numpy.ndarray
+            The values to copy.
+
+        offset : int
+            The offset, in bytes, from the start of the object to
+            copy the values to.
+
+        Returns
+        -------
+        int
+            The number of bytes copied.
+
+        Raises
+        ------
+        InferenceServerException
+            If the region is closed or if the values do not fit
+            within the object.
+
+        """
+        if (values.dtype == np.object) or (values.dtype.type == np.bytes_):
+            values = _serialize_string_tensor(values)
+        elif not values.flags['C_CONTIGUOUS']:
+            values = np.ascontiguousarray(values)
+
+        dst = self.array(np.uint8, (values.nbytes,), offset)
+        dst[:] = values.view(np.uint8).reshape(-1)
+        return values.nbytes
+
+    def close(self, unlink=False):
+        """Close the region. The object is unmapped once no array
+        returned by array() references it.
+
+        Parameters
+        ----------
+        unlink : bool
+            If True also remove the shared memory object. The server
+            keeps any registered range mapped until it is unregistered.
+
+        """
+        # Arrays from array() reference the mmap object, so releasing
+        # it rather than closing it never unmaps memory in use.
+        self._mmap = None
+        if _shared_memory_regions.get(self._key) is self:
+            del _shared_memory_regions[self._key]
+        if unlink:
+            try:
+                os.unlink(os.path.join('/dev/shm', self._key.lstrip('/')))
+            except OSError:
+                pass
+
+
+class SharedMemoryTensor(namedtuple('SharedMemoryTensor',
+                                    ['region_name', 'offset', 'byte_size', 'shape'])):
+    """The values of an input or output, for the entire batch, held
+    in a shared memory region that is registered with the inference
+    server. Given in place of the input values, or in place of the
+    output format, when running inference.
+
+    Parameters
+    ----------
+    region_name : str
+        The name the region was registered with.
+
+    offset : int
+        The offset, in bytes, of the values from the start of the
+        registered region.
+
+    byte_size : int
+        The size, in bytes, of the values for the entire batch.
+
+    shape : tuple of int
+        The shape of each batch entry of the input, not including the
+        batch dimension. Required only for inputs with variable-size
+        dimensions. Not used for outputs.
+
+    """
+    __slots__ = ()
+
+    def __new__(cls, region_name, offset, byte_size, shape=None):
+        return super(SharedMemoryTensor, cls).__new__(
+            cls, region_name, offset, byte_size, shape)
+
+
+class SharedMemoryControlContext:
+    """Registers and unregisters shared memory regions with an
+    inference server. Inputs whose values are held in a registered
+    region, and outputs to be written to a registered region, are
+    then given to InferContext as SharedMemoryTensor and are not
+    copied into the request or response. To return such outputs as
+    views of the region, the region must be registered by this
+    process using the key of a SharedMemoryRegion.
+
+    Parameters
+    ----------
+    url : str
+        The inference server URL, e.g. localhost:8000.
+
+    protocol : ProtocolType
+        The protocol used to communicate with the server.
+
+    verbose : bool
+        If True generate verbose output.
+
+    """
+    def __init__(self, url, protocol, verbose=False):
+        self._last_request_id = 0
+        self._trace_hook = None
+        self._ctx = c_void_p()
         _raise_if_error(
             c_void_p(
-                _crequest_infer_ctx_new(
-                    byref(self._ctx), url, int(protocol),
-                    model_name, imodel_version, correlation_id,
-                    streaming, verbose)))
+                _crequest_shm_control_ctx_new(
+                    byref(self._ctx), url, int(protocol), verbose)))
 
     def __del__(self):
         # when module is unloading may get called after
-        # _crequest_infer_ctx_del has been released
-        if _crequest_infer_ctx_del is not None:
+        # _crequest_shm_control_ctx_del has been released
+        if _crequest_shm_control_ctx_del is not None:
             self.close()
 
     def __enter__(self):
@@ -565,347 +1031,2914 @@ class InferContext:
     def __exit__(self, type, value, traceback):
         self.close()
 
-    def _get_result_numpy_dtype(self, result):
-        ctype = c_uint32()
-        _raise_if_error(c_void_p(_crequest_infer_ctx_result_dtype(result, byref(ctype))))
-        if ctype.value == model_config_pb2.TYPE_BOOL:
-            return np.bool_
-        elif ctype.value == model_config_pb2.TYPE_UINT8:
-            return np.uint8
-        elif ctype.value == model_config_pb2.TYPE_UINT16:
-            return np.uint16
-        elif ctype.value == model_config_pb2.TYPE_UINT32:
-            return np.uint32
-        elif ctype.value == model_config_pb2.TYPE_UINT64:
-            return np.uint64
-        elif ctype.value == model_config_pb2.TYPE_INT8:
-            return np.int8
-        elif ctype.value == model_config_pb2.TYPE_INT16:
-            return np.int16
-        elif ctype.value == model_config_pb2.TYPE_INT32:
-            return np.int32
-        elif ctype.value == model_config_pb2.TYPE_INT64:
-            return np.int64
-        elif ctype.value == model_config_pb2.TYPE_FP16:
-            return np.float16
-        elif ctype.value == model_config_pb2.TYPE_FP32:
-            return np.float32
-        elif ctype.value == model_config_pb2.TYPE_FP64:
-            return np.float64
-        elif ctype.value == model_config_pb2.TYPE_STRING:
-            return np.dtype(object)
-        _raise_error("unknown result datatype " + ctype.value)
+    def close(self):
+        """Close the context. Any future calls to register(),
+        unregister() or unregister_all() will result in an Error.
 
-    def _prepare_request(self, inputs, outputs,
-                         flags, batch_size, contiguous_input_values):
-        # Make sure each input is given as a list (one entry per
-        # batch). It is a common error when using batch-size 1 to
-        # specify an input directly as an array instead of as a list
-        # containing one array.
-        for inp_name, inp in inputs.items():
-            if not isinstance(inp, (list, tuple)):
-                _raise_error("input '" + inp_name +
-                             "' values must be specified as a list of numpy arrays")
+        """
+        _crequest_shm_control_ctx_del(self._ctx)
+        self._ctx = None
 
-        # Set run options using formats specified in 'outputs'
-        options = c_void_p()
-        try:
-            _raise_if_error(c_void_p(
-                _crequest_infer_ctx_options_new(byref(options), flags, batch_size)))
+    def register(self, name, shm_key, offset, byte_size):
+        """Register a range of a POSIX shared memory object with the
+        inference server.
 
-            for (output_name, output_format) in iteritems(outputs):
-                if output_format == InferContext.ResultFormat.RAW:
-                    _raise_if_error(
-                        c_void_p(
-                            _crequest_infer_ctx_options_add_raw(self._ctx, options, output_name)))
-                elif (isinstance(output_format, (list, tuple)) and
-                      (output_format[0] == InferContext.ResultFormat.CLASS)):
-                    _raise_if_error(
-                        c_void_p(
-                            _crequest_infer_ctx_options_add_class(
-                                self._ctx, options, output_name, c_uint64(output_format[1]))))
-                else:
-                    _raise_error("unrecognized output format")
+        Parameters
+        ----------
+        name : str
+            The name for the region, used to refer to it in
+            SharedMemoryTensor.
 
-            _raise_if_error(c_void_p(_crequest_infer_ctx_set_options(self._ctx, options)))
+        shm_key : str
+            The key of the shared memory object, see
+            SharedMemoryRegion.key().
 
-        finally:
-            _crequest_infer_ctx_options_del(options)
+        offset : int
+            The offset, in bytes, of the region within the object.
 
-        # Set the input tensors
-        for (input_name, input_values) in iteritems(inputs):
-            input = c_void_p()
-            try:
-                _raise_if_error(
-                    c_void_p(_crequest_infer_ctx_input_new(byref(input), self._ctx, input_name)))
+        byte_size : int
+            The size of the region, in bytes.
 
-                # Set the input shape
-                if len(input_values) > 0:
-                    shape_value = np.asarray(input_values[0].shape, dtype=np.int64)
-                    _raise_if_error(
-                        c_void_p(
-                            _crequest_infer_ctx_input_set_shape(
-                                input, shape_value, c_uint64(shape_value.size))))
+        Raises
+        ------
+        InferenceServerException
+            If unable to register the region.
 
-                for input_value in input_values:
-                    # If the input tensor is empty then avoid going
-                    # through the more complicated logic since
-                    # creating the buffer for string objects results
-                    # is a size-1 array instead of 0.
-                    if input_value.size == 0:
-                        _raise_if_error(
-                            c_void_p(
-                                _crequest_infer_ctx_input_set_raw(input, 0, 0)))
-                    else:
-                        # If the input is a tensor of string objects,
-                        # then must flatten those into a 1-dimensional
-                        # array containing the 4-byte string length
-                        # followed by the actual string characters.
-                        # All strings are concatenated together in "C"
-                        # order.
-                        if input_value.dtype == np.object or input_value.dtype.type == np.bytes_:
-                            flattened = bytes()
-                            for obj in np.nditer(input_value, flags=["refs_ok"], order='C'):
-                                # If directly passing bytes to STRING type,
-                                # don't convert it to str as Python will encode the
-                                # bytes which may distort the meaning
-                                if obj.dtype.type == np.bytes_:
-                                    s = bytes(obj)
-                                else:
-                                    s = str(obj).encode('utf-8')
-                                flattened += struct.pack("<I", len(s))
-                                flattened += s
-                            input_value = np.asarray(flattened)
+        """
+        self._last_request_id = None
+        if self._ctx is None:
+            _raise_error("SharedMemoryControlContext is closed")
 
-                        if not input_value.flags['C_CONTIGUOUS']:
-                            input_value = np.ascontiguousarray(input_value)
-                        contiguous_input_values.append(input_value)
-                        _raise_if_error(
-                            c_void_p(
-                                _crequest_infer_ctx_input_set_raw(
-                                    input, input_value.ctypes.data_as(c_void_p),
-                                    c_uint64(input_value.size * input_value.itemsize))))
-            finally:
-                _crequest_infer_ctx_input_del(input)
+        self._last_request_id = _traced_request(
+            self, _crequest_shm_control_ctx_register,
+            self._ctx, name, shm_key, c_uint64(offset), c_uint64(byte_size))
+        _registered_shared_memory[name] = (shm_key, offset)
 
-    def _get_results(self, outputs, batch_size):
-        # Create the result map.
-        results = dict()
-        for (output_name, output_format) in iteritems(outputs):
-            result = c_void_p()
-            try:
-                _raise_if_error(
-                    c_void_p(_crequest_infer_ctx_result_new(byref(result), self._ctx, output_name)))
+    def unregister(self, name):
+        """Unregister a shared memory region from the inference
+        server.
 
-                # The model name and version are the same for every
-                # result so only set once
-                if self._last_request_model_name is None:
-                    cmodelname = c_char_p()
-                    _raise_if_error(
-                        c_void_p(
-                            _crequest_infer_ctx_result_modelname(result, byref(cmodelname))))
-                    if cmodelname.value is not None:
-                        self._last_request_model_name = cmodelname.value.decode('utf-8')
-                if self._last_request_model_version is None:
-                    cmodelver = c_int64()
-                    _raise_if_error(
-                        c_void_p(
-                            _crequest_infer_ctx_result_modelver(result, byref(cmodelver))))
-                    self._last_request_model_version = cmodelver.value
+        Parameters
+        ----------
+        name : str
+            The name of the region.
+
+        Raises
+        ------
+        InferenceServerException
+            If unable to unregister the region.
+
+        """
+        self._last_request_id = None
+        if self._ctx is None:
+            _raise_error("SharedMemoryControlContext is closed")
+
+        self._last_request_id = _traced_request(
+            self, _crequest_shm_control_ctx_unregister, self._ctx, name)
+        _registered_shared_memory.pop(name, None)
+
+    def unregister_all(self):
+        """Unregister all shared memory regions from the inference
+        server.
+
+        Raises
+        ------
+        InferenceServerException
+            If unable to unregister the regions.
+
+        """
+        self._last_request_id = None
+        if self._ctx is None:
+            _raise_error("SharedMemoryControlContext is closed")
+
+        self._last_request_id = _traced_request(
+            self, _crequest_shm_control_ctx_unregister_all, self._ctx)
+        _registered_shared_memory.clear()
+
+    def set_trace_hook(self, hook):
+        """Set the hook that receives the SEND and RESPONSE, or ERROR,
+        events of each register(), unregister() and unregister_all()
+        request.
+
+        Parameters
+        ----------
+        hook : callable
+            Called with a TraceEvent for each event, or None to stop
+            tracing.
+
+        """
+        self._trace_hook = hook
+
+    def get_last_request_id(self):
+        """Get the request ID of the most recent register(),
+        unregister() or unregister_all() request.
+
+        Returns
+        -------
+        int
+            The request ID, or None if a request has not yet been made
+            or if the last request was not successful.
+
+        """
+        return self._last_request_id
+
+
+TensorMetadata = namedtuple('TensorMetadata', ['name', 'dtype', 'dims'])
+TensorMetadata.__doc__ = """Metadata of a model input or output: its name, the numpy
+dtype of its values and its dims, not including the batch
+dimension. A dimension of -1 indicates a variable-size dimension.
+
+"""
+
+class ModelMetadata:
+    """Metadata of a model version, as read from the model's status.
+
+    Attributes
+    ----------
+    model_name : str
+        The name of the model.
+
+    model_version : int
+        The version of the model, or None if the latest version was
+        requested and the model has no ready version.
+
+    ready : bool
+        True if the version is ready for inferencing.
+
+    config : ModelConfig
+        The ModelConfig protobuf of the model.
+
+    max_batch_size : int
+        The maximum batch size supported by the model, 0 if the model
+        doesn't support batching.
+
+    inputs : dict
+        Map from input name to TensorMetadata of the input.
+
+    outputs : dict
+        Map from output name to TensorMetadata of the output.
+
+    preferred_batch_sizes : list of int
+        The preferred batch sizes of the dynamic batcher, empty if
+        none.
+
+    max_queue_delay_us : int
+        The maximum queue delay, in microseconds, of the dynamic
+        batcher, 0 if none.
+
+    """
+    def __init__(self, model_name, model_status, model_version):
+        from tensorrtserver.api.server_status_pb2 import MODEL_READY
+
+        config = model_status.config
+        if model_version is None:
+            ready_versions = [ version for version, version_status
+                               in iteritems(model_status.version_status)
+                               if version_status.ready_state == MODEL_READY ]
+            if ready_versions:
+                model_version = max(ready_versions)
+
+        version_status = None
+        if model_version in model_status.version_status:
+            version_status = model_status.version_status[model_version]
+        self.model_name = model_name
+        self.model_version = model_version
+        self.ready = ((version_status is not None) and
+                      (version_status.ready_state == MODEL_READY))
+        self.config = config
+        self.max_batch_size = config.max_batch_size
+        self.inputs = { io.name : TensorMetadata(io.name,
+                                                 _get_numpy_dtype(io.data_type),
+                                                 tuple(io.dims))
+                        for io in config.input }
+        self.outputs = { io.name : TensorMetadata(io.name,
+                                                  _get_numpy_dtype(io.data_type),
+                                                  tuple(io.dims))
+                         for io in config.output }
+        self.preferred_batch_sizes = list(config.dynamic_batching.preferred_batch_size)
+        self.max_queue_delay_us = config.dynamic_batching.max_queue_delay_microseconds
+
+class ModelMetadataCache:
+    """A ModelMetadataCache caches the metadata of models so that
+    clients needing a model's configuration don't each request the
+    server status. A refresh requests the status of only the model
+    being refreshed. The cache is thread-safe.
+
+    Use ModelMetadataCache.instance() to get the process-wide cache.
+
+    Parameters
+    ----------
+    ttl_s : float
+        The number of seconds that cached metadata is used before it
+        is refreshed. None indicates that metadata is only refreshed
+        when invalidated.
+
+    verbose : bool
+        If True generate verbose output for status requests.
+
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @staticmethod
+    def instance():
+        """Get the process-wide cache.
+
+        Returns
+        -------
+        ModelMetadataCache
+            The cache, created with the default parameters on first
+            use.
+
+        """
+        with ModelMetadataCache._instance_lock:
+            if ModelMetadataCache._instance is None:
+                ModelMetadataCache._instance = ModelMetadataCache()
+            return ModelMetadataCache._instance
+
+    def __init__(self, ttl_s=60.0, verbose=False):
+        self._ttl_s = ttl_s
+        self._verbose = verbose
+        self._lock = threading.Lock()
+        # Map from (url, protocol, model name) to (ModelStatus, time
+        # of refresh).
+        self._entries = dict()
+        self._hits = 0
+        self._misses = 0
+
+    def _model_status(self, url, protocol, model_name, refresh):
+        key = (url, int(protocol), model_name)
+        now = time.time()
+        if not refresh:
+            with self._lock:
+                entry = self._entries.get(key)
+                if ((entry is not None) and
+                        ((self._ttl_s is None) or ((now - entry[1]) < self._ttl_s))):
+                    self._hits += 1
+                    return entry[0]
+                self._misses += 1
+
+        # Concurrent misses of the same model may each request the
+        # status, the last one is kept.
+        ctx = ServerStatusContext(url, protocol, model_name, self._verbose)
+        try:
+            server_status = ctx.get_server_status()
+        finally:
+            ctx.close()
+        if model_name not in server_status.model_status:
+            _raise_error("unable to get status for '" + model_name + "'")
+
+        model_status = server_status.model_status[model_name]
+        with self._lock:
+            self._entries[key] = (model_status, now)
+        return model_status
+
+    def get(self, url, protocol, model_name, model_version=None):
+        """Get the metadata of a model version, requesting the model's
+        status from the server if the model is not cached or if the
+        cached metadata has expired.
+
+        Parameters
+        ----------
+        url : str
+            The inference server URL, e.g. localhost:8000.
+
+        protocol : ProtocolType
+            The protocol used to communicate with the server.
+
+        model_name : str
+            The name of the model.
+
+        model_version : int
+            The version of the model, or None to indicate the latest
+            (i.e. highest version number) ready version.
+
+        Returns
+        -------
+        ModelMetadata
+            The metadata of the model version.
+
+        Raises
+        ------
+        InferenceServerException
+            If unable to get the status of the model.
+
+        """
+        return ModelMetadata(
+            model_name, self._model_status(url, protocol, model_name, False),
+            model_version)
+
+    def refresh(self, url, protocol, model_name, model_version=None):
+        """Request the model's status from the server and update the
+        cache, regardless of whether the cached metadata has expired.
+        See get() for a description of the parameters and return
+        value.
+
+        """
+        return ModelMetadata(
+            model_name, self._model_status(url, protocol, model_name, True),
+            model_version)
+
+    def invalidate(self, url=None, protocol=None, model_name=None):
+        """Remove metadata from the cache so that it is requested again
+        on next use. Metadata is removed for all models matching the
+        given parameters, a parameter that is None matches any value.
+
+        Parameters
+        ----------
+        url : str
+            The inference server URL.
+
+        protocol : ProtocolType
+            The protocol.
+
+        model_name : str
+            The name of the model.
+
+        """
+        with self._lock:
+            for key in list(self._entries.keys()):
+                if (((url is None) or (key[0] == url)) and
+                        ((protocol is None) or (key[1] == int(protocol))) and
+                        ((model_name is None) or (key[2] == model_name))):
+                    del self._entries[key]
+
+    def get_stats(self):
+        """Get the cache metrics.
+
+        Returns
+        -------
+        dict
+            Dictionary with 'hits', the number of get() calls answered
+            from the cache, 'misses', the number of get() calls that
+            requested status from the server and 'models', the number
+            of models currently cached.
+
+        """
+        with self._lock:
+            return { 'hits' : self._hits,
+                     'misses' : self._misses,
+                     'models' : len(self._entries) }
+
+# The datatype of a CLASS_BATCH result.
+_CLASS_BATCH_DTYPE = np.dtype([('idx', np.int64), ('value', np.float32),
+                               ('label_id', np.int32)])
+
+class _ClassLabels:
+    # The interned class labels of an output. 'labels' holds each
+    # distinct label once, 'lookup' maps a class index to the index
+    # of its label in 'labels', or to -1 if not yet known.
+    def __init__(self):
+        self.labels = list()
+        self.label_ids = dict()
+        self.lookup = np.empty(0, dtype=np.int32)
+
+    def intern(self, idx, label_ptrs):
+        # Return the label IDs for the class indices 'idx', reading
+        # the labels of indices not yet known from 'label_ptrs'.
+        valid = idx >= 0
+        if not valid.any():
+            return np.full(idx.shape, -1, dtype=np.int32)
+        max_idx = int(idx.max())
+        if max_idx >= self.lookup.size:
+            lookup = np.full(max_idx + 1, -1, dtype=np.int32)
+            lookup[:self.lookup.size] = self.lookup
+            self.lookup = lookup
+
+        valid_idx = np.where(valid, idx, 0)
+        label_id = self.lookup[valid_idx]
+        unknown = valid & (label_id < 0)
+        if unknown.any():
+            unknown_idx, first = np.unique(idx[unknown], return_index=True)
+            unknown_ptrs = label_ptrs[unknown]
+            for class_idx, pos in zip(unknown_idx.tolist(), first.tolist()):
+                label = string_at(int(unknown_ptrs[pos])).decode('utf-8')
+                label_idx = self.label_ids.get(label)
+                if label_idx is None:
+                    label_idx = len(self.labels)
+                    self.label_ids[label] = label_idx
+                    self.labels.append(label)
+                self.lookup[class_idx] = label_idx
+            label_id = self.lookup[valid_idx]
+
+        return np.where(valid, label_id, -1).astype(np.int32)
+
+def _uses_shared_memory(inputs, outputs):
+    # Values in shared memory can change without the request changing,
+    # and results written to shared memory are not held by the
+    # results, so such requests are never served from the result
+    # cache.
+    for values in inputs.values():
+        if isinstance(values, SharedMemoryTensor):
+            return True
+    for output_format in outputs.values():
+        if isinstance(output_format, SharedMemoryTensor):
+            return True
+    return False
+
+def _result_cache_key(model_name, model_version, inputs, outputs, batch_size, flags):
+    # Hash everything that determines the results of a request.
+    hasher = hashlib.sha1()
+    hasher.update(repr((model_name, model_version, batch_size, flags,
+                        sorted((name, repr(output_format))
+                               for name, output_format in iteritems(outputs)))).encode('utf-8'))
+    for name in sorted(inputs.keys()):
+        values = inputs[name]
+        if isinstance(values, np.ndarray):
+            values = (values,)
+        hasher.update(repr((name, len(values))).encode('utf-8'))
+        for value in values:
+            hasher.update(repr((value.dtype.str, value.shape)).encode('utf-8'))
+            if value.dtype == np.object:
+                value = _serialize_string_tensor(value)
+            elif not value.flags['C_CONTIGUOUS']:
+                value = np.ascontiguousarray(value)
+            hasher.update(value.view(np.uint8).reshape(-1) if value.size > 0 else b'')
+    return hasher.digest()
+
+def _results_byte_size(results):
+    # Approximate memory used by a results dictionary.
+    byte_size = 0
+    for values in results.values():
+        if isinstance(values, np.ndarray):
+            values = (values,)
+        for value in values:
+            if isinstance(value, np.ndarray):
+                byte_size += value.nbytes
+                if value.dtype == np.object:
+                    byte_size += sum(len(v) for v in value.flat)
+            else:
+                # CLASS results, (index, value, label) tuples
+                byte_size += sum(64 + len(cls[2] or '') for cls in value)
+    return byte_size
+
+def _copy_results(results):
+    # Copy a results dictionary so that the copy can be modified
+    # without affecting 'results'. Read-only arrays, as returned for
+    # RAW_BATCH_VIEW, are shared.
+    copied = dict()
+    for name, values in iteritems(results):
+        if isinstance(values, np.ndarray):
+            copied[name] = values if not values.flags.writeable else values.copy()
+        else:
+            copied[name] = [ value.copy() if isinstance(value, np.ndarray) else list(value)
+                             for value in values ]
+    return copied
+
+class InferResultCache:
+    """An InferResultCache holds the results of recent inference
+    requests so that repeating a request with the same model, inputs,
+    outputs, batch size and flags returns the cached results without
+    sending it to the server. The least-recently used results are
+    evicted to stay within the byte budget. The cache is thread-safe
+    and may be shared by several contexts.
+
+    Only use a cache with contexts for models whose results depend on
+    nothing but the request, see InferContext.set_result_cache().
+
+    Parameters
+    ----------
+    max_bytes : int
+        The approximate maximum size, in bytes, of the cached results.
+
+    ttl_s : float
+        The number of seconds that results are cached, or None to
+        cache results until evicted.
+
+    """
+    def __init__(self, max_bytes=64 * 1024 * 1024, ttl_s=None):
+        self._max_bytes = max_bytes
+        self._ttl_s = ttl_s
+        self._lock = threading.Lock()
+        # Map from key to (results, byte size, time cached), in
+        # least-recently used order.
+        self._entries = OrderedDict()
+        self._byte_size = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                if (self._ttl_s is None) or ((time.time() - entry[2]) < self._ttl_s):
+                    self._entries[key] = entry
+                    self._hits += 1
+                    return _copy_results(entry[0])
+                self._byte_size -= entry[1]
+            self._misses += 1
+            return None
+
+    def _put(self, key, results):
+        cached = _copy_results(results)
+        byte_size = _results_byte_size(cached) + len(key)
+        if byte_size > self._max_bytes:
+            return
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._byte_size -= entry[1]
+            while self._entries and ((self._byte_size + byte_size) > self._max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._byte_size -= evicted[1]
+                self._evictions += 1
+            self._entries[key] = (cached, byte_size, time.time())
+            self._byte_size += byte_size
+
+    def clear(self):
+        """Remove all results from the cache."""
+        with self._lock:
+            self._entries.clear()
+            self._byte_size = 0
+
+    def get_stats(self):
+        """Get the cache metrics.
+
+        Returns
+        -------
+        dict
+            Dictionary with 'hits', the number of requests answered
+            from the cache, 'misses', the number of requests sent to
+            the server, 'evictions', the number of results evicted to
+            stay within the byte budget, 'entries', the number of
+            results currently cached and 'bytes', their approximate
+            size.
+
+        """
+        with self._lock:
+            return { 'hits' : self._hits,
+                     'misses' : self._misses,
+                     'evictions' : self._evictions,
+                     'entries' : len(self._entries),
+                     'bytes' : self._byte_size }
+
+# Timestamps of RequestTiming, in nanoseconds of CLOCK_MONOTONIC which
+# is the clock used by time.monotonic() and by the C++ client.
+if hasattr(time, 'monotonic_ns'):
+    _monotonic_ns = time.monotonic_ns
+else:
+    def _monotonic_ns():
+        return int(time.monotonic() * 1e9)
+
+# The maximum number of RequestTiming kept by an InferContext for
+# get_async_run_timing().
+_MAX_ASYNC_TIMINGS = 1024
+
+class RequestTiming(namedtuple('RequestTiming',
+                               ['enqueue_ns', 'request_start_ns', 'send_start_ns',
+                                'send_end_ns', 'receive_start_ns', 'receive_end_ns',
+                                'request_end_ns', 'deserialize_start_ns',
+                                'deserialize_end_ns'])):
+    """The timestamps of the stages of an asynchronous inference
+    request, in nanoseconds of CLOCK_MONOTONIC (the clock of
+    time.monotonic()). For gRPC the send stage is the marshaling of
+    the request and the receive stage is the unmarshaling of the
+    response.
+
+    Attributes
+    ----------
+    enqueue_ns : int
+        When async_run() or async_run_future() was called.
+
+    request_start_ns : int
+        When the prepared request was handed to the C++ client.
+
+    send_start_ns, send_end_ns : int
+        When the first and last byte of the request were sent.
+
+    receive_start_ns, receive_end_ns : int
+        When the first and last byte of the response were received.
+
+    request_end_ns : int
+        When the C++ client completed the request.
+
+    deserialize_start_ns, deserialize_end_ns : int
+        When the results started and finished being converted to
+        Python values.
+
+    """
+    __slots__ = ()
+
+class TraceEventType(IntEnum):
+    """The lifecycle events of a request reported to a trace hook.
+
+    PREPARE_START, PREPARE_END: Setting the options and inputs of the
+        request started and ended.
+
+    SEND: The request was handed to the transport to be sent.
+
+    RESPONSE: The response to the request was received.
+
+    DECODED: The results were converted to Python values.
+
+    ERROR: The request failed, the 'error' of the event holds the
+        InferenceServerException.
+
+    """
+    PREPARE_START = 1
+    PREPARE_END = 2
+    SEND = 3
+    RESPONSE = 4
+    DECODED = 5
+    ERROR = 6
+
+class TraceEvent(namedtuple('TraceEvent',
+                            ['type', 'timestamp_ns', 'request_id', 'context',
+                             'context_id', 'model_name', 'error'])):
+    """A lifecycle event of a request, reported to the trace hook of the
+    context that made the request. See set_trace_hook() of the
+    contexts.
+
+    Attributes
+    ----------
+    type : TraceEventType
+        The type of the event.
+
+    timestamp_ns : int
+        When the event occurred, in nanoseconds of CLOCK_MONOTONIC
+        (the clock of time.monotonic()).
+
+    request_id : int
+        The ID of the request. For a failed request this is the
+        request ID of the InferenceServerException, which is 0 if the
+        request failed before it was sent.
+
+    context : str
+        The class name of the context that made the request.
+
+    context_id : int
+        Identifies the context that made the request, as returned by
+        id(). Request IDs are only unique within a context.
+
+    model_name : str
+        The name of the model of the request, or None for a request
+        not made for a model.
+
+    error : InferenceServerException
+        The error of an ERROR event, None for other events.
+
+    """
+    __slots__ = ()
+
+class _RequestTrace(object):
+    # The events of a single request, collected until the request ID
+    # is known and then reported to the trace hook. Only created for
+    # a context with a trace hook so requests have no tracing
+    # overhead otherwise.
+    __slots__ = ('hook', 'context', 'context_id', 'model_name', 'events')
+
+    def __init__(self, hook, context, model_name=None):
+        self.hook = hook
+        self.context = type(context).__name__
+        self.context_id = id(context)
+        self.model_name = model_name
+        self.events = list()
+
+    def mark(self, event_type, timestamp_ns=None):
+        self.events.append(
+            (event_type, _monotonic_ns() if timestamp_ns is None else timestamp_ns))
+
+    def emit(self, request_id):
+        # Report the collected events.
+        events = self.events
+        self.events = list()
+        for event_type, timestamp_ns in events:
+            self.hook(TraceEvent(event_type, timestamp_ns, request_id, self.context,
+                                 self.context_id, self.model_name, None))
+
+    def fail(self, ex, request_id=None):
+        # Report the collected events followed by the ERROR event of
+        # 'ex'.
+        if request_id is None:
+            request_id = ex.request_id()
+        self.emit(request_id)
+        self.hook(TraceEvent(TraceEventType.ERROR, _monotonic_ns(), request_id, self.context,
+                             self.context_id, self.model_name, ex))
+
+def _traced_request(context, function, *args):
+    # Make a request for 'context' with libcrequest 'function' and
+    # return its request ID, raising InferenceServerException if it
+    # fails. The SEND and RESPONSE, or ERROR, events of the request
+    # are reported to the trace hook of 'context' if it has one.
+    hook = context._trace_hook
+    if hook is None:
+        return _raise_if_error(c_void_p(function(*args)))
+
+    trace = _RequestTrace(hook, context)
+    trace.mark(TraceEventType.SEND)
+    try:
+        request_id = _raise_if_error(c_void_p(function(*args)))
+    except InferenceServerException as ex:
+        trace.fail(ex)
+        raise
+    trace.mark(TraceEventType.RESPONSE)
+    trace.emit(request_id)
+    return request_id
+
+class InferContext:
+    """An InferContext object is used to run inference on an inference
+    server for a specific model.
+
+    Once created an InferContext object can be used repeatedly to
+    perform inference using the model.
+
+    Parameters
+    ----------
+    url : str
+        The inference server URL, e.g. localhost:8000.
+
+    protocol : ProtocolType
+        The protocol used to communicate with the server.
+
+    model_name : str
+        The name of the model to use for inference.
+
+    model_version : int
+        The version of the model to use for inference,
+        or None to indicate that the latest (i.e. highest version number)
+        version should be used.
+
+    correlation_id : int
+        The correlation ID for the inference. If not specified (or if
+        specified as 0), the inference will have no correlation ID.
+
+    streaming : bool
+        If True create streaming context. Streaming is only allowed with
+        gRPC protocol.
+
+    verbose : bool
+        If True generate verbose output.
+
+    """
+    class ResultFormat:
+        """Formats for output tensor results.
+
+        RAW
+            All values of the output are returned as an numpy array
+            of the appropriate type.
+
+        CLASS
+            Specified as tuple (CLASS, k). Top 'k' results
+            are returned as an array of (index, value, label) tuples.
+
+        RAW_BATCH
+            All values of the output for the entire batch are
+            returned as a single numpy array of the appropriate type
+            with shape [ batch_size, ... ].
+
+        RAW_BATCH_VIEW
+            Same as RAW_BATCH except that the returned numpy array is
+            a read-only view of the response buffer instead of a
+            copy. The response buffer is kept alive for as long as the
+            array (or any view derived from it) is alive. Output
+            tensors with STRING datatype are always returned as a
+            copy.
+
+        CLASS_BATCH
+            Specified as tuple (CLASS_BATCH, k). Top 'k' results for
+            the entire batch are returned as a single numpy
+            structured array with shape [ batch_size, k ] and fields
+            'idx', 'value' and 'label_id'. The label of a class is
+            get_class_labels(output_name)[label_id]. Entries beyond
+            the number of classes returned for a batch entry have
+            'idx' and 'label_id' -1.
+
+        """
+        RAW = 1,
+        CLASS = 2
+        RAW_BATCH = 3
+        RAW_BATCH_VIEW = 4
+        CLASS_BATCH = 5
+
+    def __init__(self, url, protocol, model_name, model_version=None,
+                 verbose=False, correlation_id=0, streaming=False):
+        self._model_name = model_name
+        self._model_version = model_version
+        self._correlation_id = correlation_id
+        self._last_request_id = None
+        self._last_request_model_name = None
+        self._last_request_model_version = None
+        self._requested_outputs_dict = dict()
+        # Map from request ID to the RequestTiming of completed
+        # async_run() requests whose results have been read, until
+        # read with get_async_run_timing().
+        self._async_timings = OrderedDict()
+        self._result_cache = None
+        # Map from output name to the _ClassLabels of the output's
+        # CLASS_BATCH results.
+        self._class_labels = dict()
+        self._trace_hook = None
+        self._ctx = c_void_p()
+
+        # The InferPlan whose options and input shapes are currently
+        # set in the context, if any.
+        self._active_plan = None
+
+        # State of the completion thread that resolves the futures
+        # of async_run_future() and async_run() with callback. While
+        # the thread is running it completes every async request,
+        # 'completion_pending' maps each of those request IDs to its
+        # Future, or to None for a request whose results are read
+        # with get_async_run_results(). Results for the latter are
+        # held in 'completion_results' until read. 'lock' serializes
+        # use of the context between the thread and the caller.
+        self._lock = threading.Lock()
+        self._completion_cv = threading.Condition(self._lock)
+        self._completion_thread = None
+        self._completion_pending = dict()
+        self._completion_results = dict()
+
+        imodel_version = -1 if model_version is None else model_version
+        _raise_if_error(
+            c_void_p(
+                _crequest_infer_ctx_new(
+                    byref(self._ctx), url, int(protocol),
+                    model_name, imodel_version, correlation_id,
+                    streaming, verbose)))
+
+    def __del__(self):
+        # when module is unloading may get called after
+        # _crequest_infer_ctx_del has been released
+        if _crequest_infer_ctx_del is not None:
+            self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def _get_result_numpy_dtype(self, result):
+        ctype = c_uint32()
+        _raise_if_error(c_void_p(_crequest_infer_ctx_result_dtype(result, byref(ctype))))
+        dtype = _get_numpy_dtype(ctype.value)
+        if dtype is None:
+            _raise_error("unknown result datatype " + str(ctype.value))
+        return dtype
+
+    def _start_trace(self):
+        # Must be called with 'lock' held and a trace hook set. Start
+        # the trace of a request that is about to be prepared.
+        trace = _RequestTrace(self._trace_hook, self, self._model_name)
+        trace.mark(TraceEventType.PREPARE_START)
+        return trace
+
+    def _new_options(self, outputs, flags, batch_size):
+        # Create run options using formats specified in 'outputs'. The
+        # caller owns the returned options.
+        options = c_void_p()
+        try:
+            _raise_if_error(c_void_p(
+                _crequest_infer_ctx_options_new(byref(options), flags, batch_size)))
+
+            for (output_name, output_format) in iteritems(outputs):
+                if isinstance(output_format, SharedMemoryTensor):
+                    _raise_if_error(
+                        c_void_p(
+                            _crequest_infer_ctx_options_add_shared_memory(
+                                self._ctx, options, output_name, output_format.region_name,
+                                c_uint64(output_format.offset),
+                                c_uint64(output_format.byte_size))))
+                elif output_format in (InferContext.ResultFormat.RAW,
+                                     InferContext.ResultFormat.RAW_BATCH,
+                                     InferContext.ResultFormat.RAW_BATCH_VIEW):
+                    _raise_if_error(
+                        c_void_p(
+                            _crequest_infer_ctx_options_add_raw(self._ctx, options, output_name)))
+                elif (isinstance(output_format, (list, tuple)) and
+                      (output_format[0] in (InferContext.ResultFormat.CLASS,
+                                            InferContext.ResultFormat.CLASS_BATCH))):
+                    _raise_if_error(
+                        c_void_p(
+                            _crequest_infer_ctx_options_add_class(
+                                self._ctx, options, output_name, c_uint64(output_format[1]))))
+                else:
+                    _raise_error("unrecognized output format")
+        except:
+            _crequest_infer_ctx_options_del(options)
+            raise
+
+        return options
+
+    def _prepare_request(self, inputs, outputs,
+                         flags, batch_size, contiguous_input_values):
+        # Each input is given either as a list (one entry per batch)
+        # or as a single numpy array holding the entire batch, in
+        # which case the first dimension must be the batch
+        # dimension. It is a common error when using batch-size 1 to
+        # specify an input directly as an array without the batch
+        # dimension, so check the batch dimension explicitly.
+        effective_batch_size = max(1, batch_size)
+        for inp_name, inp in inputs.items():
+            if isinstance(inp, SharedMemoryTensor):
+                continue
+            if isinstance(inp, np.ndarray):
+                if (inp.ndim == 0) or (inp.shape[0] != effective_batch_size):
+                    _raise_error("input '" + inp_name + "' specified as a numpy array " +
+                                 "must have batch dimension " + str(effective_batch_size) +
+                                 ", got shape " + str(list(inp.shape)))
+            elif not isinstance(inp, (list, tuple)):
+                _raise_error("input '" + inp_name +
+                             "' values must be specified as a list of numpy arrays " +
+                             "or as a single batched numpy array")
+
+        # Set run options using formats specified in 'outputs'
+        options = self._new_options(outputs, flags, batch_size)
+        try:
+            self._active_plan = None
+            _raise_if_error(c_void_p(_crequest_infer_ctx_set_options(self._ctx, options)))
+        finally:
+            _crequest_infer_ctx_options_del(options)
+
+        # Set the input tensors
+        for (input_name, input_values) in iteritems(inputs):
+            input = c_void_p()
+            try:
+                _raise_if_error(
+                    c_void_p(_crequest_infer_ctx_input_new(byref(input), self._ctx, input_name)))
+
+                if isinstance(input_values, np.ndarray):
+                    self._set_batched_input(input, input_values, contiguous_input_values)
+                    continue
+                if isinstance(input_values, SharedMemoryTensor):
+                    self._set_shared_memory_input(input, input_values)
+                    continue
+
+                # Set the input shape
+                if len(input_values) > 0:
+                    shape_value = np.asarray(input_values[0].shape, dtype=np.int64)
+                    _raise_if_error(
+                        c_void_p(
+                            _crequest_infer_ctx_input_set_shape(
+                                input, shape_value, c_uint64(shape_value.size))))
+
+                for input_value in input_values:
+                    # If the input tensor is empty then avoid going
+                    # through the more complicated logic since
+                    # creating the buffer for string objects results
+                    # is a size-1 array instead of 0.
+                    if input_value.size == 0:
+                        _raise_if_error(
+                            c_void_p(
+                                _crequest_infer_ctx_input_set_raw(input, 0, 0)))
+                    else:
+                        # If the input is a tensor of string objects,
+                        # then must flatten those into a 1-dimensional
+                        # array containing the 4-byte string length
+                        # followed by the actual string characters.
+                        if input_value.dtype == np.object or input_value.dtype.type == np.bytes_:
+                            input_value = _serialize_string_tensor(input_value)
+
+                        if not input_value.flags['C_CONTIGUOUS']:
+                            input_value = np.ascontiguousarray(input_value)
+                        contiguous_input_values.append(input_value)
+                        _raise_if_error(
+                            c_void_p(
+                                _crequest_infer_ctx_input_set_raw(
+                                    input, input_value.ctypes.data_as(c_void_p),
+                                    c_uint64(input_value.size * input_value.itemsize))))
+            finally:
+                _crequest_infer_ctx_input_del(input)
+
+    def _set_batched_input(self, input, input_value, contiguous_input_values):
+        # Set the shape of each batch entry, which does not include
+        # the batch dimension.
+        batch_size = input_value.shape[0]
+        shape_value = np.asarray(input_value.shape[1:], dtype=np.int64)
+        _raise_if_error(
+            c_void_p(
+                _crequest_infer_ctx_input_set_shape(
+                    input, shape_value, c_uint64(shape_value.size))))
+
+        self._set_batch_data(input, input_value, contiguous_input_values)
+
+    def _set_shared_memory_input(self, input, tensor):
+        # The server reads the values of the entire batch from the
+        # registered region, nothing is copied into the request.
+        if tensor.shape is not None:
+            shape_value = np.asarray(tensor.shape, dtype=np.int64)
+            _raise_if_error(
+                c_void_p(
+                    _crequest_infer_ctx_input_set_shape(
+                        input, shape_value, c_uint64(shape_value.size))))
+
+        _raise_if_error(
+            c_void_p(
+                _crequest_infer_ctx_input_set_shared_memory(
+                    input, tensor.region_name, c_uint64(tensor.offset),
+                    c_uint64(tensor.byte_size))))
+
+    def _set_batch_data(self, input, input_value, contiguous_input_values):
+        # Set the data of the entire batch, replacing any data
+        # previously set for 'input'.
+        batch_size = input_value.shape[0]
+        if input_value.size == 0:
+            byte_sizes = np.zeros(batch_size, dtype=np.uint64)
+            _raise_if_error(
+                c_void_p(
+                    _crequest_infer_ctx_input_set_raw_batch(
+                        input, None, byte_sizes, c_uint64(batch_size))))
+            return
+
+        # String tensors are serialized for the entire batch at once,
+        # the size of each batch entry within the serialized buffer
+        # is then found from the string lengths.
+        if input_value.dtype == np.object or input_value.dtype.type == np.bytes_:
+            input_value, element_byte_sizes = _serialize_string_elements(input_value)
+            byte_sizes = element_byte_sizes.reshape(batch_size, -1).sum(
+                axis=1).astype(np.uint64)
+        else:
+            if not input_value.flags['C_CONTIGUOUS']:
+                input_value = np.ascontiguousarray(input_value)
+            byte_sizes = np.full(batch_size, input_value.nbytes // batch_size,
+                                 dtype=np.uint64)
+
+        # A single call hands the entire batch to the context, the
+        # buffer must stay alive until the inference completes.
+        contiguous_input_values.append(input_value)
+        _raise_if_error(
+            c_void_p(
+                _crequest_infer_ctx_input_set_raw_batch(
+                    input, input_value.ctypes.data_as(c_void_p),
+                    byte_sizes, c_uint64(batch_size))))
+
+    def _get_results(self, outputs, batch_size, result_dtypes=None):
+        # Create the result map. If 'result_dtypes' is given it caches
+        # the datatype of each output across requests.
+        results = dict()
+        for (output_name, output_format) in iteritems(outputs):
+            result = c_void_p()
+            try:
+                _raise_if_error(
+                    c_void_p(_crequest_infer_ctx_result_new(byref(result), self._ctx, output_name)))
+
+                # The model name and version are the same for every
+                # result so only set once
+                if self._last_request_model_name is None:
+                    cmodelname = c_char_p()
+                    _raise_if_error(
+                        c_void_p(
+                            _crequest_infer_ctx_result_modelname(result, byref(cmodelname))))
+                    if cmodelname.value is not None:
+                        self._last_request_model_name = cmodelname.value.decode('utf-8')
+                if self._last_request_model_version is None:
+                    cmodelver = c_int64()
+                    _raise_if_error(
+                        c_void_p(
+                            _crequest_infer_ctx_result_modelver(result, byref(cmodelver))))
+                    self._last_request_model_version = cmodelver.value
+
+                if isinstance(output_format, SharedMemoryTensor):
+                    results[output_name] = self._get_shared_memory_result(
+                        result, output_format, batch_size)
+                    continue
+
+                if (isinstance(output_format, (list, tuple)) and
+                        (output_format[0] == InferContext.ResultFormat.CLASS_BATCH)):
+                    results[output_name] = self._get_batch_class_result(
+                        output_name, result, batch_size, output_format[1])
+                    continue
+
+                if result_dtypes is None:
+                    result_dtype = self._get_result_numpy_dtype(result)
+                else:
+                    result_dtype = result_dtypes.get(output_name)
+                    if result_dtype is None:
+                        result_dtype = self._get_result_numpy_dtype(result)
+                        result_dtypes[output_name] = result_dtype
+                if output_format in (InferContext.ResultFormat.RAW_BATCH,
+                                     InferContext.ResultFormat.RAW_BATCH_VIEW):
+                    view = (output_format == InferContext.ResultFormat.RAW_BATCH_VIEW)
+                    results[output_name], owned = self._get_batch_raw_result(
+                        result, result_dtype, batch_size, view)
+                    # Ownership of a viewed result passes to the
+                    # returned array.
+                    if owned:
+                        result = None
+                    continue
+
+                results[output_name] = list()
+                if output_format == InferContext.ResultFormat.RAW:
+                    shape = self._get_result_shape(result)
+
+                    for b in range(batch_size):
+                        # Get the result value into a 1-dim np array
+                        # of the appropriate type
+                        cval = c_char_p()
+                        cval_len = c_uint64()
+                        _raise_if_error(
+                            c_void_p(
+                                _crequest_infer_ctx_result_next_raw(
+                                    result, b, byref(cval), byref(cval_len))))
+                        if cval_len.value == 0:
+                            val = np.empty(shape, dtype=result_dtype)
+                            results[output_name].append(val)
+                        else:
+                            val_buf = cast(cval, POINTER(c_byte * cval_len.value))[0]
+
+                            # If the result is not a string datatype
+                            # then convert directly. Otherwise parse
+                            # 'val_buf' into an array of strings and
+                            # from that into a numpy array of string
+                            # objects.
+                            if result_dtype != np.object:
+                                val = np.frombuffer(val_buf, dtype=result_dtype)
+                            else:
+                                val = _deserialize_string_tensor(val_buf)
+
+                            # Reshape the result to the appropriate shape
+                            shaped = np.reshape(np.copy(val), shape)
+                            results[output_name].append(shaped)
+
+                elif (isinstance(output_format, (list, tuple)) and
+                      (output_format[0] == InferContext.ResultFormat.CLASS)):
+                    for b in range(batch_size):
+                        classes = list()
+                        ccnt = c_uint64()
+                        _raise_if_error(
+                           c_void_p(_crequest_infer_ctx_result_class_cnt(result, b, byref(ccnt))))
+                        for cc in range(ccnt.value):
+                            cidx = c_uint64()
+                            cprob = c_float()
+                            clabel = c_char_p()
+                            _raise_if_error(
+                                c_void_p(
+                                    _crequest_infer_ctx_result_next_class(
+                                        result, b, byref(cidx), byref(cprob), byref(clabel))))
+                            label = None if clabel.value is None else clabel.value.decode('utf-8')
+                            classes.append((cidx.value, cprob.value, label))
+                        results[output_name].append(classes)
+                else:
+                    _raise_error("unrecognized output format")
+            finally:
+                if result is not None:
+                    _crequest_infer_ctx_result_del(result)
+
+        return results
+
+    def _get_shared_memory_result(self, result, tensor, batch_size):
+        # The server wrote the values of the entire batch to the
+        # region so return them as a view of the region instead of
+        # copying them. String values must be deserialized.
+        result_dtype = self._get_result_numpy_dtype(result)
+        shape = [ max(1, batch_size) ] + self._get_result_shape(result)
+        if result_dtype != np.object:
+            return _shared_memory_array(tensor, result_dtype, shape)
+
+        val_buf = _shared_memory_array(tensor, np.uint8, (tensor.byte_size,))
+        return np.reshape(_deserialize_string_tensor(val_buf), shape)
+
+    def _get_batch_class_result(self, output_name, result, batch_size, k):
+        # Get the top 'k' classes of every batch entry with a single
+        # call. Class labels are interned per output, the first
+        # response containing a class index reads the label for that
+        # index.
+        shape = (max(1, batch_size), k)
+        idx = np.empty(shape, dtype=np.int64)
+        value = np.empty(shape, dtype=np.float32)
+        label_ptrs = np.empty(shape, dtype=np.uintp)
+        count = np.empty(shape[0], dtype=np.uint64)
+        _raise_if_error(
+            c_void_p(
+                _crequest_infer_ctx_result_class_batch(
+                    result, shape[0], k, idx, value, label_ptrs, count)))
+
+        labels = self._class_labels.get(output_name)
+        if labels is None:
+            labels = _ClassLabels()
+            self._class_labels[output_name] = labels
+        label_id = labels.intern(idx, label_ptrs)
+
+        batch_result = np.empty(shape, dtype=_CLASS_BATCH_DTYPE)
+        batch_result['idx'] = idx
+        batch_result['value'] = value
+        batch_result['label_id'] = label_id
+        return batch_result
+
+    def _get_result_shape(self, result):
+        # Get the shape of each result tensor, which does not include
+        # the batch dimension.
+        max_shape_dims = 16
+        shape_array = np.zeros(max_shape_dims, dtype=np.int64)
+        shape_len = c_uint64()
+        _raise_if_error(
+            c_void_p(
+                _crequest_infer_ctx_result_shape(
+                    result, c_uint64(max_shape_dims),
+                    shape_array, byref(shape_len))))
+        return np.resize(shape_array, shape_len.value).tolist()
+
+    def _get_batch_raw_result(self, result, result_dtype, batch_size, view):
+        # Get the results for the entire batch with a single call.
+        # Returns the array and True if the array took ownership of
+        # 'result', in which case the caller must not delete it.
+        shape = [ max(1, batch_size) ] + self._get_result_shape(result)
+        cval = c_char_p()
+        cval_len = c_uint64()
+        _raise_if_error(
+            c_void_p(
+                _crequest_infer_ctx_result_raw_batch(
+                    result, max(1, batch_size), byref(cval), byref(cval_len))))
+        if cval_len.value == 0:
+            return np.empty(shape, dtype=result_dtype), False
+
+        val_buf = cast(cval, POINTER(c_byte * cval_len.value))[0]
+        if result_dtype == np.object:
+            return np.reshape(_deserialize_string_tensor(val_buf), shape), False
+
+        if not view:
+            return np.reshape(np.frombuffer(val_buf, dtype=result_dtype).copy(), shape), False
+
+        val = np.frombuffer(val_buf, dtype=result_dtype).reshape(shape)
+        val.flags.writeable = False
+        # The array references 'val_buf' so the result (which owns
+        # the underlying memory) is released only once 'val_buf' is
+        # no longer referenced by any array. The finalizer is
+        # registered last so that if building the array fails the
+        # result is deleted only by the caller.
+        finalizer = weakref.finalize(val_buf, _crequest_infer_ctx_result_del, result)
+        finalizer.atexit = False
+        return val, True
+
+    def _submit_future(self, request_id):
+        # Must be called with 'lock' held. Register a Future for the
+        # sent request with the completion thread, starting the
+        # thread if it is not running.
+        # Imported here since concurrent.futures is slow to import.
+        from concurrent.futures import Future
+        future = Future()
+        future.timing = None
+        future.set_running_or_notify_cancel()
+        self._completion_pending[request_id] = future
+        if self._completion_thread is None:
+            # Requests already in flight must now be completed by
+            # the thread as well.
+            for pending_id in self._requested_outputs_dict:
+                self._completion_pending.setdefault(pending_id, None)
+            self._completion_thread = threading.Thread(
+                target=self._complete_async_requests)
+            self._completion_thread.daemon = True
+            self._completion_thread.start()
+        return future
+
+    def _complete_async_requests(self):
+        # Completion thread. Wait for any in-flight request to
+        # complete and read its results, until no requests remain.
+        # The wait is done without holding 'lock' so that requests
+        # can be sent while waiting.
+        while True:
+            with self._completion_cv:
+                if len(self._completion_pending) == 0:
+                    self._completion_thread = None
+                    return
+
+            c_is_ready = c_bool()
+            c_request_id = c_uint64()
+            err = c_void_p(_crequest_infer_ctx_get_ready_async_request(
+                self._ctx, byref(c_is_ready), byref(c_request_id), True))
+
+            completed = list()
+            with self._completion_cv:
+                try:
+                    _raise_if_error(err)
+                    request_id = c_request_id.value
+                    future = self._completion_pending.pop(request_id)
+                    try:
+                        completed.append(
+                            (request_id, future,
+                             self._get_async_run_results(request_id, False), None))
+                        if future is not None:
+                            future.timing = self._async_timings.pop(request_id, None)
+                    except InferenceServerException as ex:
+                        completed.append((request_id, future, None, ex))
+                except InferenceServerException as ex:
+                    # Unable to wait on the requests so none of them
+                    # can complete, fail all of them.
+                    for request_id, future in iteritems(self._completion_pending):
+                        completed.append((request_id, future, None, ex))
+                        requested_outputs = self._requested_outputs_dict.get(request_id)
+                        if (requested_outputs is not None) and \
+                           (requested_outputs[5] is not None):
+                            requested_outputs[5].fail(ex, request_id)
+                    self._completion_pending.clear()
+
+                for request_id, future, results, ex in completed:
+                    if future is None:
+                        self._completion_results[request_id] = (results, ex)
+                self._completion_cv.notify_all()
+
+            # Resolve futures without holding 'lock' since their
+            # callbacks may use the context.
+            for request_id, future, results, ex in completed:
+                if future is not None:
+                    if ex is None:
+                        future.set_result(results)
+                    else:
+                        future.set_exception(ex)
+
+    def close(self):
+        """Close the context. Any future calls to object will result in an
+        Error.
+
+        If any async_run_future() or async_run() with callback
+        requests are in flight, wait for them to complete before
+        closing.
+
+        Raises
+        ------
+        InferenceServerException
+            If called from a completion callback.
+
+        """
+        thread = self._completion_thread
+        if thread is not None:
+            if thread is threading.current_thread():
+                _raise_error("close() cannot be called from an async_run() callback")
+            thread.join()
+
+        _crequest_infer_ctx_del(self._ctx)
+        self._ctx = None
+
+    def correlation_id(self):
+        """Get the correlation ID associated with the context.
+
+        Returns
+        -------
+        int
+            The correlation ID.
+
+        """
+        return self._correlation_id
+
+    def run(self, inputs, outputs, batch_size=1, flags=0):
+        """Run inference using the supplied 'inputs' to calculate the outputs
+        specified by 'outputs'.
+
+        Parameters
+        ----------
+        inputs : dict
+            Dictionary from input name to the value(s) for that
+            input. An input value is specified as a numpy array. Each
+            input in the dictionary maps to a list of values (i.e. a
+            list of numpy array objects), where the length of the list
+            must equal the 'batch_size'. Alternatively an input may
+            map to a single numpy array holding the entire batch,
+            where the first dimension must equal the 'batch_size'.
+            Providing the entire batch as a single array avoids
+            per-batch-entry overhead when setting the input. An input
+            whose values are held in a registered shared memory region
+            maps to a SharedMemoryTensor.
+
+        outputs : dict
+            Dictionary from output name to a value indicating the
+            ResultFormat that should be used for that output. For RAW
+            the value should be ResultFormat.RAW. For CLASS the value
+            should be a tuple (ResultFormat.CLASS, k), where 'k'
+            indicates how many classification results should be
+            returned for the output. For RAW_BATCH and RAW_BATCH_VIEW
+            the value should be ResultFormat.RAW_BATCH or
+            ResultFormat.RAW_BATCH_VIEW. For an output that the server
+            should write to a registered shared memory region the
+            value should be a SharedMemoryTensor.
+
+        batch_size : int
+            The batch size of the inference. Each input must provide
+            an appropriately sized batch of inputs.
+
+        flags : int
+            The flags to use for the inference. The bitwise-or of
+            InferRequestHeader.Flag values.
+
+        Returns
+        -------
+        dict
+            A dictionary from output name to the list of values for
+            that output (one list element for each entry of the
+            batch). The format of a value returned for an output
+            depends on the output format specified in 'outputs'. For
+            format RAW a value is a numpy array of the appropriate
+            type and shape for the output. For format CLASS a value is
+            the top 'k' output values returned as an array of (class
+            index, class value, class label) tuples. For formats
+            RAW_BATCH and RAW_BATCH_VIEW the output maps directly to a
+            single numpy array holding the entire batch instead of to
+            a list. An output written to shared memory maps to a
+            single numpy array that views the shared memory region.
+
+        Raises
+        ------
+        InferenceServerException
+            If all inputs are not specified, if the size of input data
+            does not match expectations, if unknown output names are
+            specified or if server fails to perform inference.
+
+        """
+        self._last_request_id = None
+        self._last_request_model_name = None
+        self._last_request_model_version = None
+
+        cache = self._result_cache
+        if (cache is not None) and _uses_shared_memory(inputs, outputs):
+            cache = None
+        if cache is not None:
+            cache_key = _result_cache_key(self._model_name, self._model_version,
+                                          inputs, outputs, batch_size, flags)
+            results = cache._get(cache_key)
+            if results is not None:
+                return results
+
+        # The input values must be contiguous and the lifetime of those
+        # contiguous copies must span until the inference completes
+        # so grab a reference to them at this scope.
+        contiguous_input = list()
+
+        with self._lock:
+            trace = None
+            if self._trace_hook is not None:
+                trace = self._start_trace()
+            try:
+                # Set run option and input values
+                self._prepare_request(inputs, outputs, flags, batch_size, contiguous_input)
+                if trace is not None:
+                    trace.mark(TraceEventType.PREPARE_END)
+                    trace.mark(TraceEventType.SEND)
+
+                # Run inference...
+                self._last_request_id = _raise_if_error(
+                    c_void_p(_crequest_infer_ctx_run(self._ctx)))
+                if trace is not None:
+                    trace.mark(TraceEventType.RESPONSE)
+
+                results = self._get_results(outputs, batch_size)
+            except InferenceServerException as ex:
+                if trace is not None:
+                    trace.fail(ex)
+                raise
+
+        if trace is not None:
+            trace.mark(TraceEventType.DECODED)
+            trace.emit(self._last_request_id)
+
+        if cache is not None:
+            cache._put(cache_key, results)
+        return results
+
+    def prepare(self, inputs_spec, outputs, batch_size=1, flags=0):
+        """Create a plan for repeatedly running inference with the same
+        input shapes, outputs, batch size and flags. The plan creates
+        the run options and input handles once and caches the
+        output datatypes so that each run of the plan only needs to
+        set the input data.
+
+        Parameters
+        ----------
+        inputs_spec : dict
+            Dictionary from input name to the shape of that input
+            for a single batch entry, i.e. not including the batch
+            dimension.
+
+        outputs : dict
+            Dictionary from output name to a value indicating the
+            ResultFormat that should be used for that output, as for
+            run().
+
+        batch_size : int
+            The batch size of the inference.
+
+        flags : int
+            The flags to use for the inference. The bitwise-or of
+            InferRequestHeader.Flag values.
+
+        Returns
+        -------
+        InferPlan
+            The plan, which can only be used with this context.
+
+        Raises
+        ------
+        InferenceServerException
+            If unknown input or output names are specified or if the
+            shape of an input is not valid.
+
+        """
+        return InferPlan(self, inputs_spec, outputs, batch_size, flags)
+
+    def async_run(self, inputs, outputs, batch_size=1, flags=0, callback=None):
+        """Run inference using the supplied 'inputs' to calculate the outputs
+        specified by 'outputs'.
+
+        Unlike run(), async_run() returns immediately after sending
+        the inference request to the server. The returned integer
+        identifier must be used subsequently to wait on and retrieve
+        the actual inference results.
+
+        Parameters
+        ----------
+        inputs : dict
+            Dictionary from input name to the value(s) for that
+            input. An input value is specified as a numpy array. Each
+            input in the dictionary maps to a list of values (i.e. a
+            list of numpy array objects), where the length of the list
+            must equal the 'batch_size'. Alternatively an input may
+            map to a single numpy array holding the entire batch,
+            where the first dimension must equal the 'batch_size'.
+            Providing the entire batch as a single array avoids
+            per-batch-entry overhead when setting the input. An input
+            whose values are held in a registered shared memory region
+            maps to a SharedMemoryTensor.
+
+        outputs : dict
+            Dictionary from output name to a value indicating the
+            ResultFormat that should be used for that output. For RAW
+            the value should be ResultFormat.RAW. For CLASS the value
+            should be a tuple (ResultFormat.CLASS, k), where 'k'
+            indicates how many classification results should be
+            returned for the output. For RAW_BATCH and RAW_BATCH_VIEW
+            the value should be ResultFormat.RAW_BATCH or
+            ResultFormat.RAW_BATCH_VIEW. For an output that the server
+            should write to a registered shared memory region the
+            value should be a SharedMemoryTensor.
+
+        batch_size : int
+            The batch size of the inference. Each input must provide
+            an appropriately sized batch of inputs.
+
+        flags : int
+            The flags to use for the inference. The bitwise-or of
+            InferRequestHeader.Flag values.
+
+        callback : function
+            If specified, the results are not retrieved with
+            get_async_run_results(). Instead 'callback' is called
+            with a concurrent.futures.Future holding the results (or
+            the exception) once the request completes. See
+            async_run_future().
+
+        Returns
+        -------
+        int
+            Integer identifier which must be passed to
+            get_async_run_results() to wait on and retrieve the
+            inference results, and to get_async_run_timing() to get
+            the timing of the request once the results are retrieved.
+
+        Raises
+        ------
+        InferenceServerException
+            If all inputs are not specified, if the size of input data
+            does not match expectations, if unknown output names are
+            specified or if server fails to perform inference.
+
+        """
+        enqueue_ns = _monotonic_ns()
+        with self._lock:
+            if callback is None:
+                return self._register_async_run(
+                    self._async_run(inputs, outputs, batch_size, flags, enqueue_ns))
+
+            request_id = self._async_run(inputs, outputs, batch_size, flags, enqueue_ns)
+            future = self._submit_future(request_id)
+
+        future.add_done_callback(callback)
+        return request_id
+
+    def async_run_future(self, inputs, outputs, batch_size=1, flags=0):
+        """Run inference using the supplied 'inputs' to calculate the outputs
+        specified by 'outputs'.
+
+        Like async_run(), async_run_future() returns immediately after
+        sending the inference request to the server. The results are
+        delivered through the returned concurrent.futures.Future. A
+        completion thread, running while any such request is in
+        flight, resolves the futures in the order that the requests
+        complete, which is not necessarily the order that they were
+        sent. Callbacks added to the future are called from that
+        thread.
+
+        Parameters
+        ----------
+        inputs : dict
+            Dictionary from input name to the value(s) for that
+            input. An input value is specified as a numpy array. Each
+            input in the dictionary maps to a list of values (i.e. a
+            list of numpy array objects), where the length of the list
+            must equal the 'batch_size'. Alternatively an input may
+            map to a single numpy array holding the entire batch,
+            where the first dimension must equal the 'batch_size'.
+            Providing the entire batch as a single array avoids
+            per-batch-entry overhead when setting the input. An input
+            whose values are held in a registered shared memory region
+            maps to a SharedMemoryTensor.
+
+        outputs : dict
+            Dictionary from output name to a value indicating the
+            ResultFormat that should be used for that output. For RAW
+            the value should be ResultFormat.RAW. For CLASS the value
+            should be a tuple (ResultFormat.CLASS, k), where 'k'
+            indicates how many classification results should be
+            returned for the output. For RAW_BATCH and RAW_BATCH_VIEW
+            the value should be ResultFormat.RAW_BATCH or
+            ResultFormat.RAW_BATCH_VIEW. For an output that the server
+            should write to a registered shared memory region the
+            value should be a SharedMemoryTensor.
+
+        batch_size : int
+            The batch size of the inference. Each input must provide
+            an appropriately sized batch of inputs.
+
+        flags : int
+            The flags to use for the inference. The bitwise-or of
+            InferRequestHeader.Flag values.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            The future whose result is the dictionary from output
+            name to the output values, as returned by run(). If the
+            server fails to perform inference the future holds the
+            InferenceServerException. Once the request completes
+            successfully the 'timing' attribute of the future holds
+            the RequestTiming of the request, it is None for a
+            failed request or for results from the result cache.
+
+        Raises
+        ------
+        InferenceServerException
+            If all inputs are not specified, if the size of input data
+            does not match expectations, if unknown output names are
+            specified or if the request cannot be sent.
+
+        """
+        enqueue_ns = _monotonic_ns()
+        cache = self._result_cache
+        if (cache is None) or _uses_shared_memory(inputs, outputs):
+            with self._lock:
+                return self._submit_future(
+                    self._async_run(inputs, outputs, batch_size, flags, enqueue_ns))
+
+        cache_key = _result_cache_key(self._model_name, self._model_version,
+                                      inputs, outputs, batch_size, flags)
+        results = cache._get(cache_key)
+        if results is not None:
+            # Imported here since concurrent.futures is slow to import.
+            from concurrent.futures import Future
+            future = Future()
+            future.timing = None
+            future.set_running_or_notify_cancel()
+            future.set_result(results)
+            return future
+
+        with self._lock:
+            future = self._submit_future(
+                self._async_run(inputs, outputs, batch_size, flags, enqueue_ns))
+
+        def cache_results(future):
+            if future.exception() is None:
+                cache._put(cache_key, future.result())
+
+        future.add_done_callback(cache_results)
+        return future
+
+    def stream(self, requests, window=8):
+        """Run inference for each request of 'requests', keeping up to
+        'window' requests in flight, and generate the results in the
+        order of the requests. For a streaming context the requests
+        are sent on its gRPC stream.
+
+        The next request is taken from 'requests' only when fewer
+        than 'window' requests are in flight, so a producer that
+        generates requests lazily never runs more than 'window'
+        requests ahead of the consumer of the results.
+
+        Parameters
+        ----------
+        requests : iterable
+            The requests. Each request is a tuple holding the
+            arguments of run(), (inputs, outputs), (inputs, outputs,
+            batch_size) or (inputs, outputs, batch_size, flags).
+
+        window : int
+            The maximum number of requests in flight.
+
+        Returns
+        -------
+        generator
+            Generates, for each request, the dictionary from output
+            name to the output values, as returned by run().
+
+        Raises
+        ------
+        InferenceServerException
+            If 'window' is not positive, or for the first request
+            that cannot be sent or that the server fails to perform.
+            Requests in flight when the exception is raised, or when
+            the generator is closed, complete in the background and
+            their results are discarded.
+
+        """
+        for _, results in self._run_window(requests, window):
+            yield results
+
+    def imap(self, input_iter, outputs, window=8, ordered=True, batch_size=1, flags=0):
+        """Run inference for each inputs of 'input_iter', keeping up to
+        'window' requests in flight, and generate the results as a
+        stream. The next inputs are taken from 'input_iter' only when
+        fewer than 'window' requests are in flight, and the input
+        buffers of a request are released as soon as it completes, so
+        memory use is bounded by 'window' regardless of the number of
+        inputs.
+
+        Parameters
+        ----------
+        input_iter : iterable
+            The inputs of each request, each a dictionary from input
+            name to the value(s) for that input as described for
+            run().
+
+        outputs : dict
+            Dictionary from output name to a value indicating the
+            ResultFormat that should be used for that output, as
+            described for run(). The same for every request.
+
+        window : int
+            The maximum number of requests in flight.
+
+        ordered : bool
+            If True generate the results in the order of the inputs.
+            If False generate the results in the order that the
+            requests complete.
+
+        batch_size : int
+            The batch size of each inference.
+
+        flags : int
+            The flags to use for each inference. The bitwise-or of
+            InferRequestHeader.Flag values.
+
+        Returns
+        -------
+        generator
+            If 'ordered' is True, generates for each inputs the
+            dictionary from output name to the output values, as
+            returned by run(). If 'ordered' is False, generates for
+            each inputs a tuple (index, results) where 'index' is the
+            position of the inputs in 'input_iter' and 'results' is
+            the dictionary.
+
+        Raises
+        ------
+        InferenceServerException
+            If 'window' is not positive, or for the first request
+            that cannot be sent or that the server fails to perform.
+            Requests in flight when the exception is raised, or when
+            the generator is closed, complete in the background and
+            their results are discarded.
+
+        """
+        requests = ((inputs, outputs, batch_size, flags) for inputs in input_iter)
+        if not ordered:
+            return self._run_window(requests, window, False)
+        return (results for _, results in self._run_window(requests, window, True))
+
+    def _run_window(self, requests, window, ordered=True):
+        # Generate (index, results) for each of 'requests', with up
+        # to 'window' requests in flight, in the order of the
+        # requests if 'ordered' is True and otherwise in completion
+        # order. The futures hold the only references to the
+        # requests' input buffers, which are released when the
+        # completion thread reads the results.
+        if window < 1:
+            _raise_error("window must be at least 1, got " + str(window))
+
+        in_flight = deque()
+        for index, request in enumerate(requests):
+            if len(in_flight) >= window:
+                for completed_index, future in self._pop_completed(in_flight, ordered):
+                    yield completed_index, future.result()
+            in_flight.append((index, self.async_run_future(*request)))
+            request = None
+
+        while in_flight:
+            for completed_index, future in self._pop_completed(in_flight, ordered):
+                yield completed_index, future.result()
+
+    def _pop_completed(self, in_flight, ordered):
+        # Wait for and remove from 'in_flight' the first of its
+        # (index, future) entries if 'ordered' is True, and otherwise
+        # all entries that have completed once any has completed.
+        if ordered:
+            return [ in_flight.popleft() ]
+
+        # Imported here since concurrent.futures is slow to import.
+        from concurrent.futures import FIRST_COMPLETED, wait
+        done, _ = wait([ future for _, future in in_flight ],
+                       return_when=FIRST_COMPLETED)
+        completed = [ entry for entry in in_flight if entry[1] in done ]
+        for entry in completed:
+            in_flight.remove(entry)
+        return completed
+
+    def _register_async_run(self, request_id):
+        # Must be called with 'lock' held. While the completion
+        # thread is running it reads the results of every request.
+        if self._completion_thread is not None:
+            self._completion_pending[request_id] = None
+        return request_id
+
+    def _async_run(self, inputs, outputs, batch_size, flags, enqueue_ns=None):
+        # Must be called with 'lock' held.
+
+        # Same situation as in run(), but the list will be kept inside
+        # the object given that the request is asynchronous
+        contiguous_input = list()
+
+        trace = None
+        if self._trace_hook is not None:
+            trace = self._start_trace()
+
+        # Set run option and input values
+        try:
+            self._prepare_request(inputs, outputs, flags, batch_size, contiguous_input)
+        except InferenceServerException as ex:
+            if trace is not None:
+                trace.fail(ex)
+            raise
+        if trace is not None:
+            trace.mark(TraceEventType.PREPARE_END)
+
+        return self._send_async_run(outputs, batch_size, contiguous_input,
+                                    enqueue_ns=enqueue_ns, trace=trace)
+
+    def _send_async_run(self, outputs, batch_size, contiguous_input, result_dtypes=None,
+                        enqueue_ns=None, trace=None):
+        # Must be called with 'lock' held and the request prepared.
+        # The events of 'trace' are reported once the request is sent
+        # and again once its results are read.
+        if enqueue_ns is None:
+            enqueue_ns = _monotonic_ns()
+        if trace is not None:
+            trace.mark(TraceEventType.SEND)
+
+        # Run asynchronous inference...
+        c_request_id = c_uint64()
+        try:
+            _raise_if_error(
+                c_void_p(
+                    _crequest_infer_ctx_async_run(self._ctx, byref(c_request_id))))
+        except InferenceServerException as ex:
+            if trace is not None:
+                trace.fail(ex)
+            raise
+
+        self._requested_outputs_dict[c_request_id.value] = (
+            outputs, batch_size, contiguous_input, result_dtypes, enqueue_ns, trace)
+        if trace is not None:
+            trace.emit(c_request_id.value)
+
+        return c_request_id.value
+
+    def get_async_run_results(self, request_id, wait):
+        """Retrieve the results of a previous async_run() using the supplied
+        'request_id'
+
+        Parameters
+        ----------
+        request_id : int
+            The integer ID of the asynchronous request returned by async_run().
+
+        wait : bool
+            If True block until the request results are ready. If False return
+            immediately even if results are not ready.
+
+        Returns
+        -------
+        dict
+            None if the results are not ready and 'wait' is False. A
+            dictionary from output name to the list of values for that
+            output (one list element for each entry of the batch). The
+            format of a value returned for an output depends on the
+            output format specified in 'outputs'. For format RAW a
+            value is a numpy array of the appropriate type and shape
+            for the output. For format CLASS a value is the top 'k'
+            output values returned as an array of (class index, class
+            value, class label) tuples. For formats RAW_BATCH and
+            RAW_BATCH_VIEW the output maps directly to a single numpy
+            array holding the entire batch instead of to a list.
 
-                result_dtype = self._get_result_numpy_dtype(result)
-                results[output_name] = list()
-                if output_format == InferContext.ResultFormat.RAW:
-                    # Get the shape of each result tensor
-                    max_shape_dims = 16
-                    shape_array = np.zeros(max_shape_dims, dtype=np.int64)
-                    shape_len = c_uint64()
-                    _raise_if_error(
-                        c_void_p(
-                            _crequest_infer_ctx_result_shape(
-                                result, c_uint64(max_shape_dims),
-                                shape_array, byref(shape_len))))
-                    shape = np.resize(shape_array, shape_len.value).tolist()
+        Raises
+        ------
+        InferenceServerException
+            If the request ID supplied is not valid, if the request
+            was sent with async_run_future() or with a callback, or
+            if the server fails to perform inference.
 
-                    for b in range(batch_size):
-                        # Get the result value into a 1-dim np array
-                        # of the appropriate type
-                        cval = c_char_p()
-                        cval_len = c_uint64()
-                        _raise_if_error(
-                            c_void_p(
-                                _crequest_infer_ctx_result_next_raw(
-                                    result, b, byref(cval), byref(cval_len))))
-                        if cval_len.value == 0:
-                            val = np.empty(shape, dtype=result_dtype)
-                            results[output_name].append(val)
-                        else:
-                            val_buf = cast(cval, POINTER(c_byte * cval_len.value))[0]
+        """
+        with self._completion_cv:
+            if request_id in self._completion_pending:
+                if self._completion_pending[request_id] is not None:
+                    _raise_error("results of request " + str(request_id) +
+                                 " are delivered to its future")
+                if not wait:
+                    return None
+                # The completion thread reads the results
+                while request_id not in self._completion_results:
+                    self._completion_cv.wait()
+
+            if request_id in self._completion_results:
+                results, ex = self._completion_results.pop(request_id)
+                if ex is not None:
+                    raise ex
+                return results
+
+            return self._get_async_run_results(request_id, wait)
+
+    def _get_async_run_results(self, request_id, wait):
+        # Must be called with 'lock' held.
 
-                            # If the result is not a string datatype
-                            # then convert directly. Otherwise parse
-                            # 'val_buf' into an array of strings and
-                            # from that into a numpy array of string
-                            # objects.
-                            if result_dtype != np.object:
-                                val = np.frombuffer(val_buf, dtype=result_dtype)
-                            else:
-                                # String results contain a 4-byte
-                                # string length followed by the actual
-                                # string characters.
-                                strs = list()
-                                offset = 0
-                                while offset < len(val_buf):
-                                    l = struct.unpack_from("<I", val_buf, offset)[0]
-                                    offset += 4
-                                    sb = struct.unpack_from("<{}s".format(l), val_buf, offset)[0]
-                                    offset += l
-                                    strs.append(sb)
-                                val = np.array(strs, dtype=object)
+        # Get async run results
+        c_is_ready = c_bool()
+        err = c_void_p(_crequest_infer_ctx_get_async_run_results(
+            self._ctx, byref(c_is_ready), request_id, wait))
 
-                            # Reshape the result to the appropriate shape
-                            shaped = np.reshape(np.copy(val), shape)
-                            results[output_name].append(shaped)
+        try:
+            self._last_request_id = _raise_if_error(err)
+        except InferenceServerException as ex:
+            requested_outputs = self._requested_outputs_dict.get(request_id)
+            if (requested_outputs is not None) and (requested_outputs[5] is not None):
+                requested_outputs[5].fail(ex, request_id)
+            raise
 
-                elif (isinstance(output_format, (list, tuple)) and
-                      (output_format[0] == InferContext.ResultFormat.CLASS)):
-                    for b in range(batch_size):
-                        classes = list()
-                        ccnt = c_uint64()
-                        _raise_if_error(
-                           c_void_p(_crequest_infer_ctx_result_class_cnt(result, b, byref(ccnt))))
-                        for cc in range(ccnt.value):
-                            cidx = c_uint64()
-                            cprob = c_float()
-                            clabel = c_char_p()
-                            _raise_if_error(
-                                c_void_p(
-                                    _crequest_infer_ctx_result_next_class(
-                                        result, b, byref(cidx), byref(cprob), byref(clabel))))
-                            label = None if clabel.value is None else clabel.value.decode('utf-8')
-                            classes.append((cidx.value, cprob.value, label))
-                        results[output_name].append(classes)
-                else:
-                    _raise_error("unrecognized output format")
-            finally:
-                _crequest_infer_ctx_result_del(result)
+        if not c_is_ready.value:
+            return None
+
+        requested_outputs = self._requested_outputs_dict[request_id]
+        del self._requested_outputs_dict[request_id]
+        trace = requested_outputs[5]
+
+        deserialize_start_ns = _monotonic_ns()
+        try:
+            results = self._get_results(requested_outputs[0], requested_outputs[1],
+                                        requested_outputs[3])
+        except InferenceServerException as ex:
+            if trace is not None:
+                trace.fail(ex, request_id)
+            raise
+        deserialize_end_ns = _monotonic_ns()
+
+        timing = [ c_uint64() for _ in range(6) ]
+        _raise_if_error(c_void_p(_crequest_infer_ctx_get_async_run_timing(
+            self._ctx, *[ byref(t) for t in timing ])))
+        (request_start_ns, request_end_ns, send_start_ns, send_end_ns,
+         receive_start_ns, receive_end_ns) = [ t.value for t in timing ]
+        self._async_timings[request_id] = RequestTiming(
+            requested_outputs[4], request_start_ns, send_start_ns, send_end_ns,
+            receive_start_ns, receive_end_ns, request_end_ns,
+            deserialize_start_ns, deserialize_end_ns)
+        if len(self._async_timings) > _MAX_ASYNC_TIMINGS:
+            self._async_timings.popitem(last=False)
+
+        if trace is not None:
+            trace.mark(TraceEventType.RESPONSE,
+                       receive_end_ns if receive_end_ns != 0 else deserialize_start_ns)
+            trace.mark(TraceEventType.DECODED, deserialize_end_ns)
+            trace.emit(request_id)
 
         return results
 
+    def get_ready_async_request(self, wait):
+        """Get the request ID of an async_run() request that has completed but
+        not yet had results read with get_async_run_results().
+
+        Parameters
+        ----------
+        wait : bool
+            If True block until an async request is ready. If False return
+            immediately even if results are not ready.
+
+        Requests sent with async_run_future() or with a callback are
+        never returned.
+
+        Returns
+        -------
+        int
+            None if no asynchronous results are ready and 'wait' is
+            False. An integer identifier which must be passed to
+            get_async_run_results() to wait on and retrieve the
+            inference results.
+
+        Raises
+        ------
+        InferenceServerException
+            If no asynchronous request is in flight or completed.
+
+        """
+        with self._completion_cv:
+            # While the completion thread is running it reads the
+            # results of all requests, so get the request from those.
+            if (self._completion_thread is not None) or self._completion_results:
+                while not self._completion_results:
+                    if ((self._completion_thread is None) or
+                            (None not in self._completion_pending.values())):
+                        _raise_error("No asynchronous requests have been sent")
+                    if not wait:
+                        return None
+                    self._completion_cv.wait()
+                return next(iter(self._completion_results))
+
+            # Get async run results
+            c_is_ready = c_bool()
+            c_request_id = c_uint64()
+            err = c_void_p(_crequest_infer_ctx_get_ready_async_request(
+                self._ctx, byref(c_is_ready), byref(c_request_id), wait))
+
+            _raise_if_error(err)
+
+            if not c_is_ready.value:
+                return None
+
+            return c_request_id.value
+
+    def get_class_labels(self, output_name):
+        """Get the labels of the classes returned for an output in
+        CLASS_BATCH format.
+
+        Parameters
+        ----------
+        output_name : str
+            The name of the output.
+
+        Returns
+        -------
+        list of str
+            The labels, indexed by the 'label_id' of the CLASS_BATCH
+            results. The list grows as results with new classes are
+            received.
+
+        """
+        labels = self._class_labels.get(output_name)
+        return list() if labels is None else labels.labels
+
+    def set_result_cache(self, cache):
+        """Set the cache used by run() and async_run_future() (including
+        stream() and imap()) for the results of this context's
+        requests. A request that matches a cached request, by model
+        name and version, input values and shapes, outputs, batch
+        size and flags, returns the cached results without being sent
+        to the server. Only use a cache for deterministic models,
+        i.e. models whose results depend on nothing but the request.
+
+        Parameters
+        ----------
+        cache : InferResultCache
+            The cache, or None to stop caching.
+
+        Raises
+        ------
+        InferenceServerException
+            If the context has a correlation ID, since the results of
+            a sequence depend on the sequence's earlier requests.
+
+        """
+        if (cache is not None) and (self._correlation_id != 0):
+            _raise_error("results cannot be cached for a context with a correlation ID")
+        self._result_cache = cache
+
+    def set_completion_fd(self, fd):
+        """Set a file descriptor that is signaled each time an async_run()
+        request completes. Each signal is an 8-byte write so 'fd' may
+        be an eventfd or the write end of a pipe, and it should be
+        non-blocking. A signal indicates that get_ready_async_request()
+        will return a completed request, which allows an event loop to
+        wait for completions without polling.
+
+        Parameters
+        ----------
+        fd : int
+            The file descriptor, or -1 to stop signaling. The caller
+            retains ownership of 'fd' and must keep it open until
+            signaling is stopped or the context is closed.
+
+        Raises
+        ------
+        InferenceServerException
+            If unable to set the file descriptor.
+
+        """
+        _raise_if_error(c_void_p(_crequest_infer_ctx_set_completion_fd(self._ctx, fd)))
+
+    def set_trace_hook(self, hook):
+        """Set the hook that receives the lifecycle events of the
+        requests made by this context and its InferPlans:
+        PREPARE_START and PREPARE_END around setting the options and
+        inputs of the request, SEND, RESPONSE and DECODED, or ERROR if
+        the request fails. Results returned from the result cache are
+        not traced. When no hook is set requests have no tracing
+        overhead.
+
+        The events of a request are reported once its request ID is
+        known, i.e. when run() completes, or when an asynchronous
+        request is sent and again when its results are read. Each
+        event holds the time it occurred. The hook is called by the
+        thread making the request or reading its results, which may
+        be the thread completing async_run_future() requests, and may
+        be called with the context locked so it must not use the
+        context. It should return quickly since it delays the
+        request.
+
+        Parameters
+        ----------
+        hook : callable
+            Called with a TraceEvent for each event, or None to stop
+            tracing. See tensorrtserver.api.trace.TraceRecorder.
+
+        """
+        with self._lock:
+            self._trace_hook = hook
+
+    def get_async_run_timing(self, request_id):
+        """Get the timing of an async_run() request whose results have
+        been retrieved. The timing of a request can be retrieved once,
+        only the timings of the most recent requests are kept. The
+        timing of an async_run_future() request is instead held by
+        its future.
+
+        Parameters
+        ----------
+        request_id : int
+            The integer ID of the asynchronous request returned by
+            async_run().
+
+        Returns
+        -------
+        RequestTiming
+            The timing of the request, or None if the results of the
+            request have not been retrieved successfully, or if the
+            timing was already retrieved or is no longer kept.
+
+        """
+        with self._lock:
+            return self._async_timings.pop(request_id, None)
+
+    def get_stat(self):
+        """Get the cumulative statistics of the requests completed by
+        the context. For gRPC the send time is the time to marshal
+        the requests and the receive time is the time to unmarshal
+        the responses.
+
+        Returns
+        -------
+        dict
+            Dictionary with 'completed_request_count', the number of
+            requests completed, 'cumulative_total_request_time_ns',
+            the total time from the start of each request until its
+            response was completely received,
+            'cumulative_send_time_ns', the total time from the start
+            of each request until it was completely sent, and
+            'cumulative_receive_time_ns', the total time from
+            receiving the first byte of each response until it was
+            completely received.
+
+        Raises
+        ------
+        InferenceServerException
+            If unable to get the statistics.
+
+        """
+        stat = [ c_uint64() for _ in range(4) ]
+        _raise_if_error(c_void_p(_crequest_infer_ctx_get_stat(
+            self._ctx, *[ byref(v) for v in stat ])))
+        return { 'completed_request_count' : stat[0].value,
+                 'cumulative_total_request_time_ns' : stat[1].value,
+                 'cumulative_send_time_ns' : stat[2].value,
+                 'cumulative_receive_time_ns' : stat[3].value }
+
+    def get_last_request_id(self):
+        """Get the request ID of the most recent run() request.
+
+        Returns
+        -------
+        int
+            The request ID, or None if a request has not yet been made
+            or if the last request was not successful.
+
+        """
+        return self._last_request_id
+
+    def get_last_request_model_name(self):
+        """Get the model name used in the most recent run() request.
+
+        Returns
+        -------
+        str
+            The model name, or None if a request has not yet been made
+            or if the last request was not successful.
+
+        """
+        return self._last_request_model_name
+
+    def get_last_request_model_version(self):
+        """Get the model version used in the most recent run() request.
+
+        Returns
+        -------
+        int
+            The model version, or None if a request has not yet been made
+            or if the last request was not successful.
+
+        """
+        return self._last_request_model_version
+
+
+class InferPlan:
+    """An InferPlan runs inference on an InferContext using the input
+    shapes, outputs, batch size and flags given to
+    InferContext.prepare(). Requests made directly on the context may
+    be interleaved with runs of the plan.
+
+    """
+    def __init__(self, ctx, inputs_spec, outputs, batch_size, flags):
+        self._ctx = ctx
+        self._outputs = dict(outputs)
+        self._batch_size = batch_size
+        self._result_dtypes = dict()
+        self._options = None
+        self._inputs = list()
+
+        with ctx._lock:
+            self._options = ctx._new_options(self._outputs, flags, batch_size)
+            effective_batch_size = max(1, batch_size)
+            for (input_name, shape) in iteritems(inputs_spec):
+                input = c_void_p()
+                _raise_if_error(
+                    c_void_p(_crequest_infer_ctx_input_new(byref(input), ctx._ctx, input_name)))
+                self._inputs.append(
+                    (input_name, input, (effective_batch_size,) + tuple(shape),
+                     np.asarray(shape, dtype=np.int64)))
+            self._activate()
+
+    def __del__(self):
+        # when module is unloading may get called after
+        # _crequest_infer_ctx_options_del has been released
+        if _crequest_infer_ctx_options_del is not None:
+            self.close()
+
+    def _activate(self):
+        # Must be called with the context's lock held. Set the plan's
+        # options and input shapes in the context unless they are
+        # already set.
+        ctx = self._ctx
+        if ctx._active_plan is self:
+            return
+        if self._options is None:
+            _raise_error("InferPlan is closed")
+        ctx._active_plan = None
+        _raise_if_error(c_void_p(_crequest_infer_ctx_set_options(ctx._ctx, self._options)))
+        for (_, input, _, shape_value) in self._inputs:
+            _raise_if_error(
+                c_void_p(
+                    _crequest_infer_ctx_input_set_shape(
+                        input, shape_value, c_uint64(shape_value.size))))
+        ctx._active_plan = self
+
+    def _set_inputs(self, inputs, contiguous_input_values):
+        # Must be called with the context's lock held. Return the
+        # _RequestTrace of the request, or None if the context has no
+        # trace hook.
+        ctx = self._ctx
+        trace = None
+        if ctx._trace_hook is not None:
+            trace = ctx._start_trace()
+        try:
+            self._activate()
+            for (input_name, input, shape, _) in self._inputs:
+                input_value = inputs.get(input_name)
+                if input_value is None:
+                    _raise_error("input '" + input_name + "' is not specified")
+                if not isinstance(input_value, np.ndarray):
+                    # A list holds the value of each batch entry, as
+                    # for InferContext.run().
+                    try:
+                        input_value = np.stack(input_value)
+                    except (TypeError, ValueError):
+                        _raise_error("input '" + input_name + "' must be a numpy array " +
+                                     "or a list of numpy arrays of the same shape")
+                if input_value.shape != shape:
+                    _raise_error("input '" + input_name + "' expected shape " +
+                                 str(list(shape)) + ", got shape " +
+                                 str(list(input_value.shape)))
+                ctx._set_batch_data(input, input_value, contiguous_input_values)
+        except InferenceServerException as ex:
+            if trace is not None:
+                trace.fail(ex)
+            raise
+        if trace is not None:
+            trace.mark(TraceEventType.PREPARE_END)
+        return trace
+
     def close(self):
-        """Close the context. Any future calls to object will result in an
-        Error.
+        """Release the options and input handles of the plan. Any future
+        calls to object will result in an Error.
+
+        """
+        if self._options is None:
+            return
+        ctx = self._ctx
+        if ctx._active_plan is self:
+            ctx._active_plan = None
+        for (_, input, _, _) in self._inputs:
+            _crequest_infer_ctx_input_del(input)
+        self._inputs = list()
+        _crequest_infer_ctx_options_del(self._options)
+        self._options = None
+
+    def run(self, inputs):
+        """Run inference using the supplied 'inputs'.
+
+        Parameters
+        ----------
+        inputs : dict
+            Dictionary from input name to a numpy array holding the
+            value of that input for the entire batch. The shape of
+            the array must be the batch size followed by the shape
+            given for the input when preparing the plan. A list of
+            numpy arrays, one for each batch entry, is also accepted.
+
+        Returns
+        -------
+        dict
+            A dictionary from output name to the values for that
+            output, as returned by InferContext.run().
+
+        Raises
+        ------
+        InferenceServerException
+            If all inputs are not specified, if the shape of an input
+            does not match the plan or if server fails to perform
+            inference.
+
+        """
+        ctx = self._ctx
+        ctx._last_request_id = None
+        ctx._last_request_model_name = None
+        ctx._last_request_model_version = None
+
+        contiguous_input = list()
+        with ctx._lock:
+            trace = self._set_inputs(inputs, contiguous_input)
+            if trace is not None:
+                trace.mark(TraceEventType.SEND)
+            try:
+                ctx._last_request_id = _raise_if_error(
+                    c_void_p(_crequest_infer_ctx_run(ctx._ctx)))
+                if trace is not None:
+                    trace.mark(TraceEventType.RESPONSE)
+                results = ctx._get_results(self._outputs, self._batch_size,
+                                           self._result_dtypes)
+            except InferenceServerException as ex:
+                if trace is not None:
+                    trace.fail(ex)
+                raise
+
+        if trace is not None:
+            trace.mark(TraceEventType.DECODED)
+            trace.emit(ctx._last_request_id)
+        return results
+
+    def async_run(self, inputs):
+        """Run inference asynchronously using the supplied 'inputs'. See
+        run() for a description of 'inputs'.
+
+        Returns
+        -------
+        int
+            Integer identifier which must be passed to
+            InferContext.get_async_run_results() to wait on and
+            retrieve the inference results.
+
+        Raises
+        ------
+        InferenceServerException
+            If all inputs are not specified, if the shape of an input
+            does not match the plan or if server fails to perform
+            inference.
+
+        """
+        enqueue_ns = _monotonic_ns()
+        ctx = self._ctx
+        contiguous_input = list()
+        with ctx._lock:
+            trace = self._set_inputs(inputs, contiguous_input)
+            return ctx._register_async_run(
+                ctx._send_async_run(self._outputs, self._batch_size,
+                                    contiguous_input, self._result_dtypes, enqueue_ns,
+                                    trace))
+
+    def async_run_future(self, inputs):
+        """Run inference asynchronously using the supplied 'inputs'. See
+        run() for a description of 'inputs' and
+        InferContext.async_run_future() for how results are
+        delivered.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            The future whose result is the dictionary from output
+            name to the output values.
+
+        Raises
+        ------
+        InferenceServerException
+            If all inputs are not specified, if the shape of an input
+            does not match the plan or if the request cannot be sent.
+
+        """
+        enqueue_ns = _monotonic_ns()
+        ctx = self._ctx
+        contiguous_input = list()
+        with ctx._lock:
+            trace = self._set_inputs(inputs, contiguous_input)
+            return ctx._submit_future(
+                ctx._send_async_run(self._outputs, self._batch_size,
+                                    contiguous_input, self._result_dtypes, enqueue_ns,
+                                    trace))
+
+class InferContextPool:
+    """An InferContextPool holds InferContext objects for reuse across
+    threads. Creating an InferContext requires a status request to the
+    server and starts a worker thread, so reusing contexts avoids that
+    cost for every request burst.
+
+    Contexts are pooled by (url, protocol, model name, model
+    version). A thread uses checkout() to get exclusive use of a
+    context and checkin() to return it to the pool, or uses the
+    context() context-manager to do both. The pool itself is
+    thread-safe, the contexts are not, so a context must not be used
+    after it is returned to the pool. A context must not have async
+    requests in flight when it is returned. Pooled contexts have no
+    correlation ID and are not streaming.
+
+    Parameters
+    ----------
+    max_size : int
+        The maximum number of contexts for each (url, protocol, model
+        name, model version). When that many contexts are checked out
+        checkout() waits for one to be returned.
+
+    idle_timeout_s : float
+        Contexts that are not used for this many seconds are closed
+        and removed from the pool. None indicates that idle contexts
+        are never evicted.
+
+    verbose : bool
+        If True the contexts generate verbose output.
+
+    """
+    def __init__(self, max_size=8, idle_timeout_s=60.0, verbose=False):
+        if max_size < 1:
+            _raise_error("max_size must be at least 1")
+        self._max_size = max_size
+        self._idle_timeout_s = idle_timeout_s
+        self._verbose = verbose
+        self._cv = threading.Condition()
+        # Map from key to deque of (context, time of checkin), the
+        # most recently returned context is at the right.
+        self._idle = dict()
+        # Map from key to number of contexts of that key that exist.
+        self._size = dict()
+        # Map from id of a checked out context to (context, key).
+        self._checked_out = dict()
+        self._closed = False
+        self._hits = 0
+        self._misses = 0
+        self._waits = 0
+        self._evictions = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def _evict_idle(self, now):
+        # Must be called with 'cv' held. Return the contexts to
+        # close. The oldest contexts are at the left of each deque.
+        if self._idle_timeout_s is None:
+            return list()
+        evicted = list()
+        for key in list(self._idle.keys()):
+            idle = self._idle[key]
+            while idle and ((now - idle[0][1]) >= self._idle_timeout_s):
+                evicted.append(idle.popleft()[0])
+                self._size[key] -= 1
+            if not idle:
+                del self._idle[key]
+            if self._size[key] == 0:
+                del self._size[key]
+        self._evictions += len(evicted)
+        if evicted:
+            self._cv.notify_all()
+        return evicted
+
+    def checkout(self, url, protocol, model_name, model_version=None, timeout=None):
+        """Get exclusive use of a context for a model, creating the
+        context if no idle context is available.
+
+        Parameters
+        ----------
+        url : str
+            The inference server URL, e.g. localhost:8000.
+
+        protocol : ProtocolType
+            The protocol used to communicate with the server.
 
-        """
-        _crequest_infer_ctx_del(self._ctx)
-        self._ctx = None
+        model_name : str
+            The name of the model to use for inference.
 
-    def correlation_id(self):
-        """Get the correlation ID associated with the context.
+        model_version : int
+            The version of the model to use for inference,
+            or None to indicate that the latest (i.e. highest version number)
+            version should be used.
+
+        timeout : float
+            The number of seconds to wait for a context when 'max_size'
+            contexts are checked out. None indicates to wait forever.
 
         Returns
         -------
-        int
-            The correlation ID.
+        InferContext
+            The context, which must be returned with checkin().
+
+        Raises
+        ------
+        InferenceServerException
+            If the pool is closed, if no context becomes available
+            before 'timeout' or if unable to create the context.
 
         """
-        return self._correlation_id
+        key = (url, int(protocol), model_name, model_version)
+        deadline = None if timeout is None else time.time() + timeout
+        # Evicted contexts are closed without holding the lock, also
+        # when no context can be checked out.
+        evicted = list()
+        try:
+            with self._cv:
+                evicted = self._evict_idle(time.time())
+                waited = False
+                while True:
+                    if self._closed:
+                        _raise_error("InferContextPool is closed")
+                    idle = self._idle.get(key)
+                    if idle:
+                        ctx = idle.pop()[0]
+                        if not idle:
+                            del self._idle[key]
+                        self._hits += 1
+                        self._checked_out[id(ctx)] = (ctx, key)
+                        break
+                    if self._size.get(key, 0) < self._max_size:
+                        # Reserve the slot and create the context without
+                        # holding the lock.
+                        self._size[key] = self._size.get(key, 0) + 1
+                        self._misses += 1
+                        ctx = None
+                        break
+                    if not waited:
+                        waited = True
+                        self._waits += 1
+                    remaining = None if deadline is None else deadline - time.time()
+                    if (remaining is not None) and (remaining <= 0):
+                        _raise_error("timed out waiting for a context of model '" +
+                                     model_name + "'")
+                    self._cv.wait(remaining)
+        finally:
+            for evicted_ctx in evicted:
+                evicted_ctx.close()
 
-    def run(self, inputs, outputs, batch_size=1, flags=0):
-        """Run inference using the supplied 'inputs' to calculate the outputs
-        specified by 'outputs'.
+        if ctx is None:
+            try:
+                ctx = InferContext(url, protocol, model_name, model_version,
+                                   self._verbose)
+            except:
+                with self._cv:
+                    self._size[key] -= 1
+                    if self._size[key] == 0:
+                        del self._size[key]
+                    self._cv.notify_all()
+                raise
+            with self._cv:
+                self._checked_out[id(ctx)] = (ctx, key)
+
+        return ctx
+
+    def checkin(self, ctx, discard=False):
+        """Return a context obtained from checkout() to the pool.
 
         Parameters
         ----------
-        inputs : dict
-            Dictionary from input name to the value(s) for that
-            input. An input value is specified as a numpy array. Each
-            input in the dictionary maps to a list of values (i.e. a
-            list of numpy array objects), where the length of the list
-            must equal the 'batch_size'.
+        ctx : InferContext
+            The context.
 
-        outputs : dict
-            Dictionary from output name to a value indicating the
-            ResultFormat that should be used for that output. For RAW
-            the value should be ResultFormat.RAW. For CLASS the value
-            should be a tuple (ResultFormat.CLASS, k), where 'k'
-            indicates how many classification results should be
-            returned for the output.
+        discard : bool
+            If True close the context instead of returning it for
+            reuse, for example after an error left the context in an
+            unknown state.
 
-        batch_size : int
-            The batch size of the inference. Each input must provide
-            an appropriately sized batch of inputs.
+        Raises
+        ------
+        InferenceServerException
+            If 'ctx' is not checked out from this pool.
 
-        flags : int
-            The flags to use for the inference. The bitwise-or of
-            InferRequestHeader.Flag values.
+        """
+        with self._cv:
+            entry = self._checked_out.pop(id(ctx), None)
+            if entry is None:
+                _raise_error("context is not checked out from this InferContextPool")
+            key = entry[1]
+            now = time.time()
+            if discard or self._closed:
+                self._size[key] -= 1
+                if self._size[key] == 0:
+                    del self._size[key]
+            else:
+                self._idle.setdefault(key, deque()).append((ctx, now))
+                ctx = None
+            evicted = self._evict_idle(now)
+            self._cv.notify_all()
+
+        if ctx is not None:
+            ctx.close()
+        for evicted_ctx in evicted:
+            evicted_ctx.close()
+
+    @contextmanager
+    def context(self, url, protocol, model_name, model_version=None, timeout=None):
+        """Context-manager that checks out a context for a model and returns
+        it to the pool on exit. If exiting due to an
+        InferenceServerException the context is discarded instead.
+        See checkout() for a description of the parameters.
+
+        """
+        ctx = self.checkout(url, protocol, model_name, model_version, timeout)
+        try:
+            yield ctx
+        except InferenceServerException:
+            self.checkin(ctx, discard=True)
+            raise
+        except:
+            self.checkin(ctx)
+            raise
+        self.checkin(ctx)
+
+    def evict_idle(self):
+        """Close the contexts that have been idle for longer than
+        'idle_timeout_s'. Idle contexts are also evicted by checkout()
+        and checkin() so calling this is only needed to release
+        contexts of a pool that is no longer being used.
+
+        """
+        with self._cv:
+            evicted = self._evict_idle(time.time())
+        for ctx in evicted:
+            ctx.close()
+
+    def get_stats(self):
+        """Get the pool metrics.
 
         Returns
         -------
         dict
-            A dictionary from output name to the list of values for
-            that output (one list element for each entry of the
-            batch). The format of a value returned for an output
-            depends on the output format specified in 'outputs'. For
-            format RAW a value is a numpy array of the appropriate
-            type and shape for the output. For format CLASS a value is
-            the top 'k' output values returned as an array of (class
-            index, class value, class label) tuples.
+            Dictionary with 'hits', the number of checkouts that
+            reused an idle context, 'misses', the number of checkouts
+            that created a context, 'waits', the number of checkouts
+            that waited because 'max_size' contexts were checked out,
+            'evictions', the number of idle contexts closed, 'idle',
+            the number of contexts currently idle and 'checked_out',
+            the number of contexts currently checked out.
 
-        Raises
-        ------
-        InferenceServerException
-            If all inputs are not specified, if the size of input data
-            does not match expectations, if unknown output names are
-            specified or if server fails to perform inference.
+        """
+        with self._cv:
+            return { 'hits' : self._hits,
+                     'misses' : self._misses,
+                     'waits' : self._waits,
+                     'evictions' : self._evictions,
+                     'idle' : sum(len(idle) for idle in self._idle.values()),
+                     'checked_out' : len(self._checked_out) }
+
+    def close(self):
+        """Close all idle contexts. Contexts that are checked out are
+        closed when they are returned. Any future checkout() will
+        result in an Error.
 
         """
-        self._last_request_id = None
-        self._last_request_model_name = None
-        self._last_request_model_version = None
+        with self._cv:
+            self._closed = True
+            idle = self._idle
+            self._idle = dict()
+            for key, contexts in iteritems(idle):
+                self._size[key] -= len(contexts)
+                if self._size[key] == 0:
+                    del self._size[key]
+            self._cv.notify_all()
+
+        for contexts in idle.values():
+            for ctx, _ in contexts:
+                ctx.close()
+
+class _BatchingRequest:
+    # A single-sample request waiting in a BatchingInferClient.
+    def __init__(self, inputs, outputs, flags):
+        self.inputs = inputs
+        self.outputs = outputs
+        self.flags = flags
+        from concurrent.futures import Future
+        self.future = Future()
+        self.future.set_running_or_notify_cancel()
+        self.queue_time = time.time()
+        # Requests can only be batched together if they have the same
+        # input shapes and types, outputs and flags.
+        self.batch_key = (
+            tuple(sorted((name, value.shape, value.dtype.str)
+                         for name, value in iteritems(inputs))),
+            tuple(sorted(iteritems(outputs))),
+            flags)
+
+class BatchingInferClient:
+    """A BatchingInferClient coalesces single-sample inference requests
+    made concurrently from many threads (or from coroutines using
+    asyncio.wrap_future() with run_future()) into batched requests,
+    reducing the per-request overhead of sending many batch-1
+    requests. The batches are formed the same way as the server's
+    dynamic batcher forms them: a batch is sent as soon as the
+    pending requests make a preferred batch size or reach the largest
+    batch size, otherwise the batch is sent once the oldest pending
+    request has waited for the maximum delay. Multiple batches can be
+    in flight at the same time.
+
+    Requests are only batched together if they have the same input
+    shapes and datatypes, the same outputs and the same flags.
 
-        # The input values must be contiguous and the lifetime of those
-        # contiguous copies must span until the inference completes
-        # so grab a reference to them at this scope.
-        contiguous_input = list()
+    Parameters
+    ----------
+    url : str
+        The inference server URL, e.g. localhost:8000.
 
-        # Set run option and input values
-        self._prepare_request(inputs, outputs, flags, batch_size, contiguous_input)
+    protocol : ProtocolType
+        The protocol used to communicate with the server.
+
+    model_name : str
+        The name of the model to use for inference. The model must
+        support batching.
+
+    model_version : int
+        The version of the model to use for inference,
+        or None to indicate that the latest (i.e. highest version number)
+        version should be used.
 
-        # Run inference...
-        self._last_request_id = _raise_if_error(c_void_p(_crequest_infer_ctx_run(self._ctx)))
+    preferred_batch_sizes : list of int
+        The batch sizes to prefer. If None use the
+        dynamic_batching.preferred_batch_size of the model's
+        configuration, read through ModelMetadataCache. Sizes
+        larger than the model's max_batch_size are ignored.
 
-        return self._get_results(outputs, batch_size)
+    max_delay_us : int
+        The maximum time, in microseconds, that a request waits for
+        other requests to batch with. If None use the
+        dynamic_batching.max_queue_delay_microseconds of the model's
+        configuration, or 0 if the model doesn't use dynamic batching.
+        With 0 a batch is formed from whatever requests are pending
+        when the previous batch is sent.
 
-    def async_run(self, inputs, outputs, batch_size=1, flags=0):
-        """Run inference using the supplied 'inputs' to calculate the outputs
-        specified by 'outputs'.
+    verbose : bool
+        If True generate verbose output.
 
-        Unlike run(), async_run() returns immediately after sending
-        the inference request to the server. The returned integer
-        identifier must be used subsequently to wait on and retrieve
-        the actual inference results.
+    """
+    def __init__(self, url, protocol, model_name, model_version=None,
+                 preferred_batch_sizes=None, max_delay_us=None, verbose=False):
+        config = ModelMetadataCache.instance().get(
+            url, protocol, model_name, model_version).config
+        if config.max_batch_size <= 0:
+            _raise_error("model '" + model_name + "' does not support batching")
+
+        if preferred_batch_sizes is None:
+            preferred_batch_sizes = config.dynamic_batching.preferred_batch_size
+        self._preferred_batch_sizes = set(
+            size for size in preferred_batch_sizes
+            if 0 < size <= config.max_batch_size)
+        self._max_batch_size = config.max_batch_size
+        if self._preferred_batch_sizes:
+            self._max_batch_size = max(self._preferred_batch_sizes)
+
+        if max_delay_us is None:
+            max_delay_us = config.dynamic_batching.max_queue_delay_microseconds
+        self._max_delay_s = max_delay_us / 1000000.0
+
+        self._ctx = InferContext(url, protocol, model_name, model_version, verbose)
+        self._cv = threading.Condition()
+        self._queue = deque()
+        self._closed = False
+        self._batch_count = 0
+        self._request_count = 0
+        self._dispatch_thread = threading.Thread(target=self._dispatch)
+        self._dispatch_thread.daemon = True
+        self._dispatch_thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def _next_batch(self):
+        # Must be called with 'cv' held and 'queue' not empty. Return
+        # the number of requests at the front of the queue to send as
+        # a batch, or 0 and the number of seconds to wait before the
+        # batch must be sent.
+        batch_key = self._queue[0].batch_key
+        send_now = False
+        batch_cnt = 0
+        best_preferred_batch_cnt = 0
+        for request in self._queue:
+            if batch_cnt > 0:
+                if ((batch_cnt + 1) > self._max_batch_size or
+                        (request.batch_key != batch_key)):
+                    send_now = True
+                    break
+            batch_cnt += 1
+            if batch_cnt in self._preferred_batch_sizes:
+                best_preferred_batch_cnt = batch_cnt
+
+        if best_preferred_batch_cnt != 0:
+            return best_preferred_batch_cnt, 0
+
+        if (send_now or (self._max_delay_s == 0) or
+                (batch_cnt >= self._max_batch_size) or self._closed):
+            return batch_cnt, 0
+
+        wait_s = self._queue[0].queue_time + self._max_delay_s - time.time()
+        if wait_s <= 0:
+            return batch_cnt, 0
+        return 0, wait_s
+
+    def _dispatch(self):
+        while True:
+            with self._cv:
+                while not self._queue:
+                    if self._closed:
+                        return
+                    self._cv.wait()
+                batch_cnt, wait_s = self._next_batch()
+                if batch_cnt == 0:
+                    # A new request or close() will wake the thread
+                    # before the delay expires.
+                    self._cv.wait(wait_s)
+                    continue
+                batch = [ self._queue.popleft() for _ in range(batch_cnt) ]
+                self._batch_count += 1
+                self._request_count += batch_cnt
+
+            self._send_batch(batch)
+
+    def _send_batch(self, batch):
+        first = batch[0]
+        inputs = { name : np.stack([ request.inputs[name] for request in batch ])
+                   for name in first.inputs }
+        try:
+            future = self._ctx.async_run_future(inputs, first.outputs,
+                                                len(batch), first.flags)
+        except InferenceServerException as ex:
+            for request in batch:
+                request.future.set_exception(ex)
+            return
+
+        def split_results(future):
+            ex = future.exception()
+            if ex is not None:
+                for request in batch:
+                    request.future.set_exception(ex)
+                return
+            results = future.result()
+            for idx, request in enumerate(batch):
+                request.future.set_result(
+                    { name : value[idx] for name, value in iteritems(results) })
+
+        future.add_done_callback(split_results)
+
+    def run_future(self, inputs, outputs, flags=0):
+        """Queue a single-sample inference request to be batched with other
+        requests.
 
         Parameters
         ----------
         inputs : dict
-            Dictionary from input name to the value(s) for that
-            input. An input value is specified as a numpy array. Each
-            input in the dictionary maps to a list of values (i.e. a
-            list of numpy array objects), where the length of the list
-            must equal the 'batch_size'.
+            Dictionary from input name to the value for that input.
+            The value is a numpy array for a single sample, i.e. it
+            does not include the batch dimension.
 
         outputs : dict
             Dictionary from output name to a value indicating the
-            ResultFormat that should be used for that output. For RAW
-            the value should be ResultFormat.RAW. For CLASS the value
-            should be a tuple (ResultFormat.CLASS, k), where 'k'
-            indicates how many classification results should be
-            returned for the output.
-
-        batch_size : int
-            The batch size of the inference. Each input must provide
-            an appropriately sized batch of inputs.
+            ResultFormat that should be used for that output, as for
+            InferContext.run().
 
         flags : int
             The flags to use for the inference. The bitwise-or of
@@ -913,154 +3946,499 @@ class InferContext:
 
         Returns
         -------
-        int
-            Integer identifier which must be passed to
-            get_async_run_results() to wait on and retrieve the
-            inference results.
+        concurrent.futures.Future
+            The future whose result is a dictionary from output name
+            to the value of that output for this sample. The value
+            has the format of a single batch entry of the results of
+            InferContext.run().
 
         Raises
         ------
         InferenceServerException
-            If all inputs are not specified, if the size of input data
-            does not match expectations, if unknown output names are
-            specified or if server fails to perform inference.
+            If the client is closed.
 
         """
-        # Same situation as in run(), but the list will be kept inside
-        # the object given that the request is asynchronous
-        contiguous_input = list()
-
-        # Set run option and input values
-        self._prepare_request(inputs, outputs, flags, batch_size, contiguous_input)
-
-        # Run asynchronous inference...
-        c_request_id = c_uint64()
-        _raise_if_error(
-            c_void_p(
-                _crequest_infer_ctx_async_run(self._ctx, byref(c_request_id))))
-
-        self._requested_outputs_dict[c_request_id.value] = (outputs, batch_size, contiguous_input)
+        request = _BatchingRequest(
+            { name : np.asarray(value) for name, value in iteritems(inputs) },
+            outputs, flags)
+        with self._cv:
+            if self._closed:
+                _raise_error("BatchingInferClient is closed")
+            self._queue.append(request)
+            self._cv.notify()
+        return request.future
+
+    def run(self, inputs, outputs, flags=0):
+        """Run a single-sample inference request, batched with other
+        requests, and wait for the results. See run_future() for a
+        description of the parameters and return value.
 
-        return c_request_id.value
-
-    def get_async_run_results(self, request_id, wait):
-        """Retrieve the results of a previous async_run() using the supplied
-        'request_id'
+        Raises
+        ------
+        InferenceServerException
+            If the client is closed, if all inputs are not specified,
+            if the size of input data does not match expectations, if
+            unknown output names are specified or if server fails to
+            perform inference.
 
-        Parameters
-        ----------
-        request_id : int
-            The integer ID of the asynchronous request returned by async_run().
+        """
+        return self.run_future(inputs, outputs, flags).result()
 
-        wait : bool
-            If True block until the request results are ready. If False return
-            immediately even if results are not ready.
+    def get_stats(self):
+        """Get the batching metrics.
 
         Returns
         -------
         dict
-            None if the results are not ready and 'wait' is False. A
-            dictionary from output name to the list of values for that
-            output (one list element for each entry of the batch). The
-            format of a value returned for an output depends on the
-            output format specified in 'outputs'. For format RAW a
-            value is a numpy array of the appropriate type and shape
-            for the output. For format CLASS a value is the top 'k'
-            output values returned as an array of (class index, class
-            value, class label) tuples.
+            Dictionary with 'batches', the number of batched requests
+            sent, and 'requests', the number of single-sample
+            requests included in those batches.
 
-        Raises
-        ------
-        InferenceServerException
-            If the request ID supplied is not valid, or if the server
-            fails to perform inference.
+        """
+        with self._cv:
+            return { 'batches' : self._batch_count,
+                     'requests' : self._request_count }
+
+    def close(self):
+        """Close the client. Requests that are already queued are sent
+        and completed before closing. Any future calls to object will
+        result in an Error.
 
         """
-        # Get async run results
-        c_is_ready = c_bool()
-        err = c_void_p(_crequest_infer_ctx_get_async_run_results(
-            self._ctx, byref(c_is_ready), request_id, wait))
+        with self._cv:
+            if self._closed:
+                return
+            self._closed = True
+            self._cv.notify()
+        self._dispatch_thread.join()
+        self._ctx.close()
+
+# The number of most recent request latencies that the hedging
+# threshold of a LoadBalancedInferContext is computed from, and the
+# number of new latencies after which it is recomputed.
+_HEDGE_LATENCY_SAMPLES = 1000
+_HEDGE_RECOMPUTE_SAMPLES = 32
+
+class _LoadBalancedServer:
+    # A server of a LoadBalancedInferContext. 'ctx' is None until an
+    # InferContext has been created for the server, which requires
+    # the server to be reachable.
+    def __init__(self, url):
+        self.url = url
+        self.ctx = None
+        self.health_ctx = None
+        self.healthy = False
+        self.outstanding = 0
+        self.request_count = 0
+        self.admission_count = 0
+        self.ejection_count = 0
+        self.probe_failures = 0
+        self.probe_successes = 0
+
+class _HedgedRequest:
+    # A request of a LoadBalancedInferContext that may be hedged.
+    # 'pending' is the number of copies of the request in flight.
+    def __init__(self, request, server):
+        self.request = request
+        self.server = server
+        self.start_time = time.time()
+        self.pending = 1
+        self.done = False
+        from concurrent.futures import Future
+        self.future = Future()
+        self.future.set_running_or_notify_cancel()
+
+class LoadBalancedInferContext:
+    """A LoadBalancedInferContext runs inference for a model that is
+    served by several inference servers. Each request is sent to the
+    healthy server with the fewest outstanding requests from this
+    context.
+
+    A background thread probes each server with
+    ServerHealthContext.is_ready(). A server is ejected, and receives
+    no new requests, after 'eject_threshold' consecutive failed
+    probes and is re-admitted after 'readmit_threshold' consecutive
+    successful probes. Requests already sent to an ejected server
+    complete normally.
+
+    Requests can optionally be hedged: if a request has not completed
+    within the 'hedge_percentile' percentile of the model's recent
+    request latencies, a duplicate is sent to a different server and
+    the first successful response is used, the other is discarded.
+    Only enable hedging for models where running a request twice has
+    no side effects, for example not for sequence models.
 
+    Parameters
+    ----------
+    urls : list of str
+        The inference server URLs, e.g. ['host0:8000', 'host1:8000'].
 
-        self._last_request_id = _raise_if_error(err)
+    protocol : ProtocolType
+        The protocol used to communicate with the servers.
 
-        if not c_is_ready.value:
-            return None
+    model_name : str
+        The name of the model to use for inference.
 
-        requested_outputs = self._requested_outputs_dict[request_id]
-        del self._requested_outputs_dict[request_id]
+    model_version : int
+        The version of the model to use for inference,
+        or None to indicate that the latest (i.e. highest version number)
+        version should be used.
 
-        return self._get_results(requested_outputs[0], requested_outputs[1])
+    verbose : bool
+        If True generate verbose output.
 
-    def get_ready_async_request(self, wait):
-        """Get the request ID of an async_run() request that has completed but
-        not yet had results read with get_async_run_results().
+    probe_interval_s : float
+        The number of seconds between health probes of each server.
 
-        Parameters
-        ----------
-        wait : bool
-            If True block until an async request is ready. If False return
-            immediately even if results are not ready.
+    eject_threshold : int
+        The number of consecutive failed probes that eject a server.
 
-        Returns
-        -------
-        int
-            None if no asynchronous results are ready and 'wait' is
-            False. An integer identifier which must be passed to
-            get_async_run_results() to wait on and retrieve the
-            inference results.
+    readmit_threshold : int
+        The number of consecutive successful probes that re-admit an
+        ejected server.
+
+    hedge_percentile : float
+        The latency percentile, between 0 and 100, after which a
+        request is hedged, or None to disable hedging.
+
+    hedge_min_samples : int
+        The number of request latencies that must be measured before
+        requests are hedged. The percentile is computed over the
+        latencies of the most recent _HEDGE_LATENCY_SAMPLES requests.
+
+    Raises
+    ------
+    InferenceServerException
+        If no server is reachable.
+
+    """
+    def __init__(self, urls, protocol, model_name, model_version=None, verbose=False,
+                 probe_interval_s=1.0, eject_threshold=1, readmit_threshold=2,
+                 hedge_percentile=None, hedge_min_samples=100):
+        if not urls:
+            _raise_error("at least one server URL must be specified")
+        self._protocol = protocol
+        self._model_name = model_name
+        self._model_version = model_version
+        self._verbose = verbose
+        self._probe_interval_s = probe_interval_s
+        self._eject_threshold = eject_threshold
+        self._readmit_threshold = readmit_threshold
+
+        # 'lock' protects the health and request counts of the
+        # servers. 'next_server' rotates the server that is chosen
+        # first among those with the fewest outstanding requests.
+        self._lock = threading.Lock()
+        self._next_server = 0
+        self._servers = [ _LoadBalancedServer(url) for url in urls ]
+        self._closed = threading.Event()
+
+        # Hedging state, also protected by 'lock'. 'hedge_queue' is a
+        # heap of the (deadline, sequence number, _HedgedRequest) of
+        # each request to hedge once its deadline passes. The hedge
+        # threshold is recomputed from 'latencies' every
+        # _HEDGE_RECOMPUTE_SAMPLES requests.
+        self._hedge_percentile = hedge_percentile
+        self._hedge_min_samples = hedge_min_samples
+        self._hedge_cv = threading.Condition(self._lock)
+        self._hedge_queue = list()
+        self._hedge_seq = 0
+        self._hedge_thread = None
+        self._hedge_threshold_s = None
+        self._latencies = deque(maxlen=_HEDGE_LATENCY_SAMPLES)
+        self._new_latency_cnt = 0
+        self._hedges_sent = 0
+        self._hedges_won = 0
+
+        last_ex = None
+        for server in self._servers:
+            server.health_ctx = ServerHealthContext(server.url, protocol, verbose)
+            try:
+                self._admit(server)
+            except InferenceServerException as ex:
+                last_ex = ex
+        if not any(server.healthy for server in self._servers):
+            self._close_servers()
+            raise last_ex
+
+        self._probe_thread = threading.Thread(target=self._probe)
+        self._probe_thread.daemon = True
+        self._probe_thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def _admit(self, server):
+        # Create the context for 'server' if needed and start sending
+        # requests to it.
+        if server.ctx is None:
+            server.ctx = InferContext(server.url, self._protocol, self._model_name,
+                                      self._model_version, self._verbose)
+        with self._lock:
+            server.healthy = True
+            server.probe_failures = 0
+            server.admission_count += 1
+
+    def _probe(self):
+        while not self._closed.wait(self._probe_interval_s):
+            for server in self._servers:
+                try:
+                    ready = server.health_ctx.is_ready()
+                except InferenceServerException:
+                    ready = False
+                self._update_health(server, ready)
+
+    def _update_health(self, server, ready):
+        with self._lock:
+            if ready:
+                server.probe_failures = 0
+                server.probe_successes += 1
+                readmit = ((not server.healthy) and
+                           (server.probe_successes >= self._readmit_threshold))
+            else:
+                server.probe_successes = 0
+                server.probe_failures += 1
+                readmit = False
+                if server.healthy and (server.probe_failures >= self._eject_threshold):
+                    server.healthy = False
+                    server.ejection_count += 1
+
+        if readmit:
+            try:
+                self._admit(server)
+            except InferenceServerException:
+                with self._lock:
+                    server.probe_successes = 0
+
+    def _choose_server(self, exclude=None):
+        # Must be called with 'lock' held. Choose a server other than
+        # 'exclude'.
+        server_cnt = len(self._servers)
+        chosen_idx = None
+        for offset in range(server_cnt):
+            idx = (self._next_server + offset) % server_cnt
+            server = self._servers[idx]
+            if server is exclude:
+                continue
+            if server.healthy and ((chosen_idx is None) or
+                                   (server.outstanding <
+                                    self._servers[chosen_idx].outstanding)):
+                chosen_idx = idx
+        if chosen_idx is None:
+            _raise_error("no healthy server for model '" + self._model_name + "'")
+        self._next_server = (chosen_idx + 1) % server_cnt
+        return self._servers[chosen_idx]
+
+    def _request_done(self, server):
+        with self._lock:
+            server.outstanding -= 1
+
+    def async_run_future(self, inputs, outputs, batch_size=1, flags=0):
+        """Run inference using the supplied 'inputs' to calculate the outputs
+        specified by 'outputs' on the healthy server with the fewest
+        outstanding requests. See InferContext.async_run_future() for
+        a description of the parameters and return value.
 
         Raises
         ------
         InferenceServerException
-            If no asynchronous request is in flight or completed.
+            If there is no healthy server, if the context is closed,
+            if all inputs are not specified, if the size of input
+            data does not match expectations, if unknown output names
+            are specified or if the request cannot be sent.
 
         """
-        # Get async run results
-        c_is_ready = c_bool()
-        c_request_id = c_uint64()
-        err = c_void_p(_crequest_infer_ctx_get_ready_async_request(
-            self._ctx, byref(c_is_ready), byref(c_request_id), wait))
-
-        _raise_if_error(err)
+        with self._lock:
+            if self._closed.is_set():
+                _raise_error("LoadBalancedInferContext is closed")
+
+        request = (inputs, outputs, batch_size, flags)
+        server, future = self._send(request)
+        if self._hedge_percentile is None:
+            return future
+
+        hedged = _HedgedRequest(request, server)
+        future.add_done_callback(lambda f: self._hedged_request_done(hedged, f, False))
+        with self._lock:
+            if (self._hedge_threshold_s is not None) and not hedged.done:
+                heapq.heappush(self._hedge_queue,
+                               (hedged.start_time + self._hedge_threshold_s,
+                                self._hedge_seq, hedged))
+                self._hedge_seq += 1
+                if self._hedge_thread is None:
+                    self._hedge_thread = threading.Thread(target=self._hedge)
+                    self._hedge_thread.daemon = True
+                    self._hedge_thread.start()
+                self._hedge_cv.notify()
+        return hedged.future
+
+    def _send(self, request, exclude=None):
+        # Send 'request' to the chosen server other than 'exclude' and
+        # return the server and the future of the request.
+        with self._lock:
+            server = self._choose_server(exclude)
+            server.outstanding += 1
+            server.request_count += 1
 
-        if not c_is_ready.value:
-            return None
+        try:
+            future = server.ctx.async_run_future(*request)
+        except:
+            self._request_done(server)
+            raise
+        future.add_done_callback(lambda f: self._request_done(server))
+        return server, future
+
+    def _hedged_request_done(self, hedged, future, is_hedge):
+        # Complete 'hedged' with the first successful response, or
+        # with the last error if no copy of the request succeeds.
+        ex = future.exception()
+        with self._lock:
+            hedged.pending -= 1
+            if hedged.done or ((ex is not None) and (hedged.pending > 0)):
+                return
+            hedged.done = True
+            hedged.request = None
+            if ex is None:
+                if is_hedge:
+                    self._hedges_won += 1
+                self._add_latency(time.time() - hedged.start_time)
+
+        if ex is not None:
+            hedged.future.set_exception(ex)
+        else:
+            hedged.future.set_result(future.result())
+
+    def _add_latency(self, latency_s):
+        # Must be called with 'lock' held.
+        self._latencies.append(latency_s)
+        self._new_latency_cnt += 1
+        if ((len(self._latencies) >= self._hedge_min_samples) and
+                ((self._hedge_threshold_s is None) or
+                 (self._new_latency_cnt >= _HEDGE_RECOMPUTE_SAMPLES))):
+            self._hedge_threshold_s = float(
+                np.percentile(self._latencies, self._hedge_percentile))
+            self._new_latency_cnt = 0
+
+    def _hedge(self):
+        while True:
+            with self._hedge_cv:
+                while True:
+                    if self._closed.is_set():
+                        return
+                    if self._hedge_queue:
+                        wait_s = self._hedge_queue[0][0] - time.time()
+                        if wait_s <= 0:
+                            break
+                    else:
+                        wait_s = None
+                    self._hedge_cv.wait(wait_s)
+                _, _, hedged = heapq.heappop(self._hedge_queue)
+                if hedged.done:
+                    continue
+                hedged.pending += 1
+                request = hedged.request
 
-        return c_request_id.value
+            try:
+                _, future = self._send(request, hedged.server)
+            except InferenceServerException:
+                # No other server to hedge to
+                with self._lock:
+                    hedged.pending -= 1
+                continue
+
+            with self._lock:
+                self._hedges_sent += 1
+            future.add_done_callback(lambda f, hedged=hedged:
+                                     self._hedged_request_done(hedged, f, True))
 
-    def get_last_request_id(self):
-        """Get the request ID of the most recent run() request.
+    def run(self, inputs, outputs, batch_size=1, flags=0):
+        """Run inference using the supplied 'inputs' to calculate the outputs
+        specified by 'outputs' on the healthy server with the fewest
+        outstanding requests, and wait for the results. See
+        InferContext.run() for a description of the parameters and
+        return value.
 
-        Returns
-        -------
-        int
-            The request ID, or None if a request has not yet been made
-            or if the last request was not successful.
+        Raises
+        ------
+        InferenceServerException
+            If there is no healthy server, if the context is closed,
+            if all inputs are not specified, if the size of input
+            data does not match expectations, if unknown output names
+            are specified or if server fails to perform inference.
 
         """
-        return self._last_request_id
+        return self.async_run_future(inputs, outputs, batch_size, flags).result()
 
-    def get_last_request_model_name(self):
-        """Get the model name used in the most recent run() request.
+    def get_stats(self):
+        """Get the state of each server.
 
         Returns
         -------
-        str
-            The model name, or None if a request has not yet been made
-            or if the last request was not successful.
+        dict
+            Dictionary from server URL to a dictionary with
+            'healthy', True if the server receives requests,
+            'outstanding', the number of requests in flight,
+            'requests', the number of requests sent, 'admissions',
+            the number of times the server was admitted, initially or
+            after an ejection, and 'ejections', the number of times
+            the server was ejected.
 
         """
-        return self._last_request_model_name
+        with self._lock:
+            return { server.url : { 'healthy' : server.healthy,
+                                    'outstanding' : server.outstanding,
+                                    'requests' : server.request_count,
+                                    'admissions' : server.admission_count,
+                                    'ejections' : server.ejection_count }
+                     for server in self._servers }
 
-    def get_last_request_model_version(self):
-        """Get the model version used in the most recent run() request.
+    def get_hedge_stats(self):
+        """Get the hedging metrics.
 
         Returns
         -------
-        int
-            The model version, or None if a request has not yet been made
-            or if the last request was not successful.
+        dict
+            Dictionary with 'hedges_sent', the number of duplicate
+            requests sent, 'hedges_won', the number of those that
+            completed before the original request, and 'threshold_s',
+            the current latency, in seconds, after which a request is
+            hedged or None if requests are not yet hedged.
 
         """
-        return self._last_request_model_version
+        with self._lock:
+            return { 'hedges_sent' : self._hedges_sent,
+                     'hedges_won' : self._hedges_won,
+                     'threshold_s' : self._hedge_threshold_s }
+
+    def _close_servers(self):
+        for server in self._servers:
+            if server.ctx is not None:
+                server.ctx.close()
+                server.ctx = None
+            if server.health_ctx is not None:
+                server.health_ctx.close()
+                server.health_ctx = None
+
+    def close(self):
+        """Close the context, waiting for requests in flight to complete.
+        Any future calls to object will result in an Error.
+
+        """
+        with self._lock:
+            if self._closed.is_set():
+                return
+            self._closed.set()
+            self._hedge_cv.notify()
+            hedge_thread = self._hedge_thread
+        self._probe_thread.join()
+        if hedge_thread is not None:
+            hedge_thread.join()
+        self._close_servers()
+
+# Export the public names, including the protobuf messages that are
+# imported on first use.
+__all__ = [ name for name in list(globals().keys()) if not name.startswith('_') ]
+__all__ += [ name for name in _PROTOBUF_NAMES if name not in __all__ ]
@@ -0,0 +1,390 @@
+# Copyright (c) 2019, NVIDIA CORPORATION. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#  * Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#  * Neither the name of NVIDIA CORPORATION nor the names of its
+#    contributors may be used to endorse or promote products derived
+#    from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS ``AS IS'' AND ANY
+# EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY
+# OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Asyncio support for the TensorRT Inference Server client API.
+
+This module requires Python 3.5 or later.
+
+"""
+
+import asyncio
+import os
+import weakref
+import grpc
+
+from tensorrtserver.api import InferContext, InferenceServerException, TraceEventType
+from tensorrtserver.api import _RequestTrace, _raise_error
+from tensorrtserver.api import grpc_service_pb2
+from tensorrtserver.api import grpc_transport
+
+# Map from event loop to the map from (url, options) to the grpc.aio
+# channel shared by all contexts of that loop using that URL and
+# those options. A grpc.aio channel can only be used from the loop
+# it was created on.
+_aio_channels = weakref.WeakKeyDictionary()
+
+def get_aio_channel(url, options=None, loop=None):
+    """Get the grpc.aio channel to an inference server. The same channel
+    is returned for every call with the same 'url', 'options' and
+    event loop so that contexts using it share one connection to the
+    server. See tensorrtserver.api.grpc_transport.get_channel().
+
+    Parameters
+    ----------
+    url : str
+        The inference server URL, e.g. localhost:8001.
+
+    options : list of (str, value) tuples
+        The grpcio channel options.
+
+    loop : asyncio.AbstractEventLoop
+        The event loop the channel is used from. If not specified
+        the current event loop is used.
+
+    Returns
+    -------
+    grpc.aio.Channel
+        The channel. The channel must not be closed by the caller.
+
+    """
+    loop = loop if loop is not None else asyncio.get_event_loop()
+    channel_options = grpc_transport._channel_options(options)
+    key = (url, tuple(channel_options))
+    channels = _aio_channels.setdefault(loop, dict())
+    channel = channels.get(key)
+    if channel is None:
+        channel = grpc.aio.insecure_channel(url, options=channel_options)
+        channels[key] = channel
+    return channel
+
+class AsyncInferContext:
+    """An AsyncInferContext performs inference requests from an asyncio
+    event loop. Each run() is sent using the asynchronous API of an
+    underlying InferContext and the returned coroutine completes when
+    the request's results are available. The worker thread of the
+    InferContext signals a pipe that is registered with the event loop
+    as each request completes, so the event loop never blocks or polls
+    waiting for results. Requests may complete in a different order
+    than they were sent.
+
+    Parameters
+    ----------
+    url : str
+        The inference server URL, e.g. localhost:8000.
+
+    protocol : ProtocolType
+        The protocol used to communicate with the server.
+
+    model_name : str
+        The name of the model to use for inference.
+
+    model_version : int
+        The version of the model to use for inference,
+        or None to indicate that the latest (i.e. highest version number)
+        version should be used.
+
+    verbose : bool
+        If True generate verbose output.
+
+    correlation_id : int
+        The correlation ID for the inference. If not specified (or if
+        specified as 0), the inference will have no correlation ID.
+
+    streaming : bool
+        If True create streaming context. Streaming is only allowed with
+        gRPC protocol.
+
+    loop : asyncio.AbstractEventLoop
+        The event loop used to wait for completions. If not specified
+        the current event loop is used.
+
+    """
+    def __init__(self, url, protocol, model_name, model_version=None,
+                 verbose=False, correlation_id=0, streaming=False, loop=None):
+        self._ctx = None
+        self._loop = loop if loop is not None else asyncio.get_event_loop()
+        self._ctx = InferContext(url, protocol, model_name, model_version,
+                                 verbose, correlation_id, streaming)
+        self._pending = dict()
+        self._rfd, self._wfd = os.pipe()
+        os.set_blocking(self._rfd, False)
+        os.set_blocking(self._wfd, False)
+        self._ctx.set_completion_fd(self._wfd)
+        self._loop.add_reader(self._rfd, self._on_completion)
+
+    def __del__(self):
+        self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def close(self):
+        """Close the context. Any requests that have not completed are
+        cancelled. Any future calls to object will result in an Error.
+
+        """
+        if self._ctx is None:
+            return
+        self._loop.remove_reader(self._rfd)
+        self._ctx.set_completion_fd(-1)
+        self._ctx.close()
+        self._ctx = None
+        os.close(self._rfd)
+        os.close(self._wfd)
+        for future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+
+    def context(self):
+        """Get the underlying InferContext, for example to query the
+        model's inputs and outputs.
+
+        Returns
+        -------
+        InferContext
+            The context used to send requests.
+
+        """
+        return self._ctx
+
+    def set_trace_hook(self, hook):
+        """Set the trace hook of the underlying InferContext, see
+        InferContext.set_trace_hook(). The hook is called from the
+        event loop.
+
+        Parameters
+        ----------
+        hook : callable
+            Called with a TraceEvent for each event, or None to stop
+            tracing.
+
+        """
+        if self._ctx is None:
+            _raise_error("AsyncInferContext is closed")
+        self._ctx.set_trace_hook(hook)
+
+    async def run(self, inputs, outputs, batch_size=1, flags=0):
+        """Run inference using the supplied 'inputs' to calculate the outputs
+        specified by 'outputs'. See InferContext.run() for a description
+        of the parameters and return value.
+
+        Must be called from the event loop that was used to create the
+        context.
+
+        Raises
+        ------
+        InferenceServerException
+            If all inputs are not specified, if the size of input data
+            does not match expectations, if unknown output names are
+            specified or if server fails to perform inference.
+
+        """
+        if self._ctx is None:
+            _raise_error("AsyncInferContext is closed")
+
+        # If the awaiting task is cancelled the future stays pending
+        # so that the results are still collected, and discarded,
+        # when the request completes.
+        request_id = self._ctx.async_run(inputs, outputs, batch_size, flags)
+        future = self._loop.create_future()
+        self._pending[request_id] = future
+        return await future
+
+    def _on_completion(self):
+        # Drain the pipe, each 8-byte signal is a completed request
+        # but all ready requests are collected below regardless of
+        # how many signals are read.
+        try:
+            while os.read(self._rfd, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+        while self._pending:
+            request_id = self._ctx.get_ready_async_request(False)
+            if request_id is None:
+                break
+            future = self._pending.pop(request_id)
+            try:
+                results = self._ctx.get_async_run_results(request_id, False)
+            except InferenceServerException as ex:
+                if not future.done():
+                    future.set_exception(ex)
+                continue
+            if not future.done():
+                future.set_result(results)
+
+
+class AsyncGrpcInferContext:
+    """An AsyncGrpcInferContext performs inference requests from an
+    asyncio event loop using grpc.aio, without a worker thread or
+    libcrequest. Requests are encoded and decoded as described for
+    tensorrtserver.api.grpc_transport.GrpcInferContext. The model
+    metadata needed to decode results is read with the first run().
+    Requires a version of grpcio that provides grpc.aio.
+
+    Parameters
+    ----------
+    url : str
+        The inference server URL, e.g. localhost:8001.
+
+    model_name : str
+        The name of the model to use for inference.
+
+    model_version : int
+        The version of the model to use for inference,
+        or None to indicate that the latest (i.e. highest version number)
+        version should be used.
+
+    correlation_id : int
+        The correlation ID for the inference. If not specified (or if
+        specified as 0), the inference will have no correlation ID.
+
+    channel : grpc.aio.Channel
+        The channel used to communicate with the server, or None to
+        use the channel returned by get_aio_channel() for 'url' and
+        'channel_options'.
+
+    channel_options : list of (str, value) tuples
+        The grpcio channel options used if 'channel' is None.
+
+    loop : asyncio.AbstractEventLoop
+        The event loop the context is used from. If not specified
+        the current event loop is used.
+
+    """
+    def __init__(self, url, model_name, model_version=None, correlation_id=0,
+                 channel=None, channel_options=None, loop=None):
+        self._model_name = model_name
+        self._model_version = model_version
+        self._correlation_id = correlation_id
+        self._metadata = None
+        self._trace_hook = None
+        if channel is None:
+            channel = get_aio_channel(url, channel_options, loop)
+        self._infer = channel.unary_unary(
+            grpc_transport._INFER_METHOD, request_serializer=None,
+            response_deserializer=grpc_service_pb2.InferResponse.FromString)
+        self._status = channel.unary_unary(
+            grpc_transport._STATUS_METHOD,
+            request_serializer=grpc_service_pb2.StatusRequest.SerializeToString,
+            response_deserializer=grpc_service_pb2.StatusResponse.FromString)
+
+    def close(self):
+        """Close the context. Any future calls to object will result in an
+        Error. The shared channel is not closed.
+
+        """
+        self._infer = None
+
+    def set_trace_hook(self, hook):
+        """Set the hook that receives the lifecycle events of the
+        requests made by this context, see
+        InferContext.set_trace_hook(). The events of a request are
+        reported from the event loop once its response is decoded,
+        with the request ID assigned by the server.
+
+        Parameters
+        ----------
+        hook : callable
+            Called with a TraceEvent for each event, or None to stop
+            tracing.
+
+        """
+        self._trace_hook = hook
+
+    async def model_metadata(self):
+        """Get the metadata of the model, reading it from the server if it
+        has not been read.
+
+        Returns
+        -------
+        ModelMetadata
+            The metadata of the model.
+
+        Raises
+        ------
+        InferenceServerException
+            If unable to get the status of the model.
+
+        """
+        if self._metadata is None:
+            try:
+                status_response = await self._status(
+                    grpc_service_pb2.StatusRequest(model_name=self._model_name))
+            except grpc.RpcError as rpc_error:
+                grpc_transport._raise_rpc_error(rpc_error)
+            self._metadata = grpc_transport._model_metadata(
+                status_response, self._model_name, self._model_version)
+        return self._metadata
+
+    async def run(self, inputs, outputs, batch_size=1, flags=0):
+        """Run inference using the supplied 'inputs' to calculate the outputs
+        specified by 'outputs'. See InferContext.run() for a description
+        of the parameters and return value.
+
+        Raises
+        ------
+        InferenceServerException
+            If all inputs are not specified, if the size of input data
+            does not match expectations, if unknown output names are
+            specified or if server fails to perform inference.
+
+        """
+        if self._infer is None:
+            grpc_transport._raise_error("AsyncGrpcInferContext is closed")
+        metadata = await self.model_metadata()
+
+        trace = None
+        if self._trace_hook is not None:
+            trace = _RequestTrace(self._trace_hook, self, self._model_name)
+            trace.mark(TraceEventType.PREPARE_START)
+        try:
+            request = grpc_transport._build_request(
+                self._model_name, -1 if self._model_version is None else self._model_version,
+                self._correlation_id, inputs, outputs, batch_size, flags)
+            if trace is not None:
+                trace.mark(TraceEventType.PREPARE_END)
+                trace.mark(TraceEventType.SEND)
+            try:
+                response = await self._infer(request)
+            except grpc.RpcError as rpc_error:
+                grpc_transport._raise_rpc_error(rpc_error)
+            if trace is not None:
+                trace.mark(TraceEventType.RESPONSE)
+            request_id = grpc_transport._raise_if_status_error(response.request_status)
+            results = grpc_transport._decode_response(response, metadata, outputs, batch_size)
+        except InferenceServerException as ex:
+            if trace is not None:
+                trace.fail(ex)
+            raise
+        if trace is not None:
+            trace.mark(TraceEventType.DECODED)
+            trace.emit(request_id)
+        return results
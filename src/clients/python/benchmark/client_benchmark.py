@@ -0,0 +1,440 @@
+#!/usr/bin/python
+
+# Copyright (c) 2019, NVIDIA CORPORATION. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#  * Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#  * Neither the name of NVIDIA CORPORATION nor the names of its
+#    contributors may be used to endorse or promote products derived
+#    from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS ``AS IS'' AND ANY
+# EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY
+
+# Microbenchmarks of the InferContext request preparation and result
+# handling, run against the in-memory fake of libcrequest in
+# fake_crequest.py so that only the client-side cost is measured. The
+# measurements can be saved as a JSON baseline and later runs
+# compared against the baseline, in which case the benchmark fails if
+# any case is slower than the baseline by more than the threshold.
+
+import argparse
+import json
+import platform
+import re
+import sys
+import time
+import numpy as np
+from builtins import range
+
+import fake_crequest
+fake_crequest.install()
+
+from tensorrtserver.api import *
+from tensorrtserver.api import _get_numpy_dtype, model_config_pb2
+
+FLAGS = None
+
+_BASELINE_VERSION = 1
+
+_now = getattr(time, 'perf_counter', time.time)
+
+_DATA_TYPES = (
+    model_config_pb2.TYPE_BOOL, model_config_pb2.TYPE_UINT8,
+    model_config_pb2.TYPE_UINT16, model_config_pb2.TYPE_UINT32,
+    model_config_pb2.TYPE_UINT64, model_config_pb2.TYPE_INT8,
+    model_config_pb2.TYPE_INT16, model_config_pb2.TYPE_INT32,
+    model_config_pb2.TYPE_INT64, model_config_pb2.TYPE_FP16,
+    model_config_pb2.TYPE_FP32, model_config_pb2.TYPE_FP64,
+    model_config_pb2.TYPE_STRING)
+
+class Case:
+    """A single benchmarked request: one input and one output of the
+    same datatype and shape.
+
+    Parameters
+    ----------
+    name : str
+        The name of the case, unique within the suite.
+
+    data_type : int
+        The model_config DataType of the input and output.
+
+    shape : list of int
+        The shape of each batch entry.
+
+    batch_size : int
+        The batch size of the request.
+
+    batched_input : bool
+        If True the input is given as a single array holding the
+        entire batch, otherwise as a list of arrays.
+
+    output_format : InferContext.ResultFormat
+        The format of the output.
+
+    k : int
+        The number of classes requested if 'output_format' is CLASS or
+        CLASS_BATCH.
+
+    """
+    def __init__(self, name, data_type, shape, batch_size, batched_input,
+                 output_format, k=0):
+        self.name = name
+        self.data_type = data_type
+        self.shape = list(shape)
+        self.batch_size = batch_size
+        self.batched_input = batched_input
+        self.output_format = output_format
+        self.k = k
+
+    def _values(self):
+        shape = [ self.batch_size ] + self.shape
+        if self.data_type == model_config_pb2.TYPE_STRING:
+            # 16 character strings.
+            values = np.random.randint(0, 1 << 30, size=shape)
+            return np.array([ ('%016d' % v).encode('utf-8') for v in values.flat ],
+                            dtype=np.object).reshape(shape)
+        dtype = np.dtype(_get_numpy_dtype(self.data_type))
+        if dtype == np.bool_:
+            return np.random.randint(0, 2, size=shape).astype(np.bool_)
+        if dtype.kind == 'f':
+            return np.random.random_sample(shape).astype(dtype)
+        return np.random.randint(0, 100, size=shape).astype(dtype)
+
+    def setup(self):
+        """Create the context, inputs and outputs of the case."""
+        self.ctx = InferContext("localhost:8000", ProtocolType.HTTP, "benchmark")
+        self.values = self._values()
+        fake_crequest.set_results(self.ctx, { "OUTPUT0" : self.data_type },
+                                  { "OUTPUT0" : self.values })
+        if self.batched_input:
+            self.inputs = { "INPUT0" : self.values }
+        else:
+            self.inputs = { "INPUT0" : [ v for v in self.values ] }
+        if self.output_format in (InferContext.ResultFormat.CLASS,
+                                  InferContext.ResultFormat.CLASS_BATCH):
+            self.outputs = { "OUTPUT0" : (self.output_format, self.k) }
+        else:
+            self.outputs = { "OUTPUT0" : self.output_format }
+
+    def teardown(self):
+        self.ctx.close()
+        self.ctx = None
+        self.values = None
+        self.inputs = None
+
+    def prepare(self):
+        self.ctx._prepare_request(self.inputs, self.outputs, 0, self.batch_size, list())
+
+    def get_results(self):
+        # As run(), the model name and version are read for every
+        # request.
+        self.ctx._last_request_model_name = None
+        self.ctx._last_request_model_version = None
+        return self.ctx._get_results(self.outputs, self.batch_size)
+
+    def check(self, results):
+        """Return an error message if 'results' are not the expected
+        results of the case, None if they are."""
+        result = results["OUTPUT0"]
+        fmt = self.output_format
+        if fmt in (InferContext.ResultFormat.RAW_BATCH,
+                   InferContext.ResultFormat.RAW_BATCH_VIEW):
+            ok = np.array_equal(result, self.values)
+        elif fmt == InferContext.ResultFormat.RAW:
+            ok = ((len(result) == self.batch_size) and
+                  all(np.array_equal(r, v) for r, v in zip(result, self.values)))
+        else:
+            flat = self.values.reshape(self.batch_size, -1).astype(np.float32)
+            expected = np.argsort(-flat, axis=1, kind='mergesort')[:, :self.k]
+            if fmt == InferContext.ResultFormat.CLASS:
+                idx = np.array([ [ c[0] for c in classes ] for classes in result ])
+            else:
+                idx = result['idx']
+            ok = np.array_equal(idx, expected)
+        if not ok:
+            return "incorrect results"
+        return None
+
+def _type_name(data_type):
+    return model_config_pb2.DataType.Name(data_type)[len('TYPE_'):]
+
+def _size_name(byte_size):
+    for unit, scale in (('MB', 1 << 20), ('KB', 1 << 10)):
+        if byte_size >= scale:
+            return str(byte_size // scale) + unit
+    return str(byte_size) + 'B'
+
+def _raw_cases(prefix, data_type, shape, batch_size):
+    # A case for each combination of list and batched input with the
+    # matching RAW and RAW_BATCH output.
+    return [ Case(prefix + '/list-raw', data_type, shape, batch_size, False,
+                  InferContext.ResultFormat.RAW),
+             Case(prefix + '/batch-raw_batch', data_type, shape, batch_size, True,
+                  InferContext.ResultFormat.RAW_BATCH) ]
+
+def suite(quick):
+    """Return the list of Case of the suite. If 'quick' is True the
+    largest tensors and batch sizes are not included."""
+    cases = list()
+
+    # Every datatype, 1 KB (or 64 strings) per batch entry.
+    for data_type in _DATA_TYPES:
+        if data_type == model_config_pb2.TYPE_STRING:
+            shape = [ 64 ]
+        else:
+            shape = [ 1024 // np.dtype(_get_numpy_dtype(data_type)).itemsize ]
+        for batch_size in (1, 8):
+            cases += _raw_cases('dtype/' + _type_name(data_type) + '/b' + str(batch_size),
+                                data_type, shape, batch_size)
+
+    # Tensor sizes from 16 bytes to 64 MB for the entire request.
+    max_byte_size = (1 << 20) if quick else (64 << 20)
+    byte_size = 16
+    while byte_size <= max_byte_size:
+        for batch_size in (1, 64):
+            if byte_size // batch_size < 4:
+                continue
+            cases += _raw_cases('size/' + _size_name(byte_size) + '/b' + str(batch_size),
+                                model_config_pb2.TYPE_FP32,
+                                [ byte_size // batch_size // 4 ], batch_size)
+        byte_size *= 16 if byte_size < (1 << 20) else 4
+
+    # Batch sizes from 1 to 256, 1 KB per batch entry.
+    for batch_size in ((1, 8, 64) if quick else (1, 2, 8, 32, 128, 256)):
+        cases += _raw_cases('batch/b' + str(batch_size), model_config_pb2.TYPE_FP32,
+                            [ 256 ], batch_size)
+
+    # Classification of 1000 classes.
+    for batch_size in ((1, 8) if quick else (1, 8, 64, 256)):
+        for k in (1, 5):
+            for fmt, fmt_name in ((InferContext.ResultFormat.CLASS, 'class'),
+                                  (InferContext.ResultFormat.CLASS_BATCH, 'class_batch')):
+                cases.append(Case('class/b' + str(batch_size) + '/k' + str(k) + '/' + fmt_name,
+                                  model_config_pb2.TYPE_FP32, [ 1000 ], batch_size, True,
+                                  fmt, k))
+
+    # String tensors of 16 character strings.
+    for count in ((16, 1024) if quick else (16, 1024, 16384)):
+        for batch_size in (1, 64):
+            cases += _raw_cases('string/' + str(count) + '/b' + str(batch_size),
+                                model_config_pb2.TYPE_STRING,
+                                [ max(1, count // batch_size) ], batch_size)
+
+    return cases
+
+def _time(fn, min_time, min_iterations, max_iterations):
+    # Return the sorted times, in microseconds, of calls of 'fn' made
+    # for at least 'min_time' seconds.
+    times = list()
+    start = _now()
+    while ((len(times) < min_iterations) or
+           ((len(times) < max_iterations) and ((_now() - start) < min_time))):
+        call_start = _now()
+        fn()
+        times.append((_now() - call_start) * 1e6)
+    times.sort()
+    return times
+
+def _percentile(times, p):
+    return times[min(len(times) - 1, int(len(times) * p / 100.0))]
+
+def run_case(case, min_time, min_iterations, max_iterations):
+    """Measure a case, returning a dict of its results.
+
+    Raises
+    ------
+    InferenceServerException
+        If the results of the case are not correct.
+
+    """
+    case.setup()
+    try:
+        case.prepare()
+        error = case.check(case.get_results())
+        if error is not None:
+            raise InferenceServerException(None, msg=case.name + ': ' + error)
+        prepare = _time(case.prepare, min_time, min_iterations, max_iterations)
+        results = _time(case.get_results, min_time, min_iterations, max_iterations)
+    finally:
+        case.teardown()
+
+    # The best time is compared against the baseline, it is much less
+    # sensitive than the median to other load on the machine.
+    return {
+        'iterations' : len(prepare),
+        'prepare_us' : prepare[0],
+        'prepare_median_us' : _percentile(prepare, 50),
+        'prepare_p90_us' : _percentile(prepare, 90),
+        'results_us' : results[0],
+        'results_median_us' : _percentile(results, 50),
+        'results_p90_us' : _percentile(results, 90),
+    }
+
+def compare(measurements, baseline, threshold, min_delta_us):
+    """Compare 'measurements' against 'baseline'. A case regresses if
+    the best time to prepare a request or to get its results exceeds
+    the baseline by more than 'threshold' (a fraction of the baseline
+    time) and by more than 'min_delta_us' microseconds. The baseline
+    may give a 'threshold' for individual cases.
+
+    Returns
+    -------
+    list
+        The list of (case name, metric, baseline us, measured us) of
+        each regression.
+
+    """
+    regressions = list()
+    base_cases = baseline.get('cases', dict())
+    for name, measured in measurements.items():
+        base = base_cases.get(name)
+        if base is None:
+            continue
+        case_threshold = base.get('threshold', threshold)
+        for metric in ('prepare_us', 'results_us'):
+            limit = max(base[metric] * (1.0 + case_threshold), base[metric] + min_delta_us)
+            if measured[metric] > limit:
+                regressions.append((name, metric, base[metric], measured[metric]))
+    return regressions
+
+def _delta(measured, base):
+    if (base is None) or (base == 0):
+        return ''
+    return '{:+.1f}%'.format((measured - base) * 100.0 / base)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-q', '--quick', action="store_true", required=False, default=False,
+                        help='Leave out the largest tensors and batch sizes, and ' +
+                        'measure each case for a shorter time.')
+    parser.add_argument('-k', '--filter', type=str, required=False, default=None,
+                        help='Only run the cases whose name matches this regular ' +
+                        'expression, e.g. "^string/".')
+    parser.add_argument('-l', '--list', action="store_true", required=False, default=False,
+                        help='List the names of the cases and exit.')
+    parser.add_argument('-t', '--min-time', type=float, required=False, default=None,
+                        help='Minimum time, in seconds, to measure each of request ' +
+                        'preparation and result handling of a case. Default is 0.5, ' +
+                        'or 0.1 with --quick.')
+    parser.add_argument('-o', '--output', type=str, required=False, default=None,
+                        help='Write the measurements as JSON to this file. The file ' +
+                        'can be used as the --baseline of later runs.')
+    parser.add_argument('-b', '--baseline', type=str, required=False, default=None,
+                        help='Compare the measurements against this JSON baseline and ' +
+                        'exit with an error if any case regresses.')
+    parser.add_argument('--threshold', type=float, required=False, default=None,
+                        help='Fraction by which the best time may exceed the ' +
+                        'baseline before it is a regression. Default is the ' +
+                        'threshold recorded in the baseline, or 0.25.')
+    parser.add_argument('--min-delta-us', type=float, required=False, default=None,
+                        help='Differences from the baseline smaller than this, in ' +
+                        'microseconds, are never a regression. Default is the value ' +
+                        'recorded in the baseline, or 5.')
+    parser.add_argument('-r', '--repeat', type=int, required=False, default=3,
+                        help='Number of rounds in which every case is measured. ' +
+                        'Default is 3.')
+    parser.add_argument('-v', '--verbose', action="store_true", required=False, default=False,
+                        help='Enable verbose output')
+    parser.add_argument('-s', '--seed', type=int, required=False, default=0,
+                        help='Seed of the generated tensor values. Default is 0.')
+    FLAGS = parser.parse_args()
+
+    cases = suite(FLAGS.quick)
+    if FLAGS.filter is not None:
+        pattern = re.compile(FLAGS.filter)
+        cases = [ case for case in cases if pattern.search(case.name) ]
+    if FLAGS.list:
+        for case in cases:
+            print(case.name)
+        sys.exit(0)
+
+    baseline = None
+    if FLAGS.baseline is not None:
+        with open(FLAGS.baseline, 'r') as f:
+            baseline = json.load(f)
+        if baseline.get('version') != _BASELINE_VERSION:
+            print("error: unsupported baseline version " + str(baseline.get('version')))
+            sys.exit(1)
+    threshold = FLAGS.threshold
+    if threshold is None:
+        threshold = 0.25 if baseline is None else baseline.get('threshold', 0.25)
+    min_delta_us = FLAGS.min_delta_us
+    if min_delta_us is None:
+        min_delta_us = 5.0 if baseline is None else baseline.get('min_delta_us', 5.0)
+    min_time = FLAGS.min_time
+    if min_time is None:
+        min_time = 0.1 if FLAGS.quick else 0.5
+
+    np.random.seed(FLAGS.seed)
+    base_cases = dict() if baseline is None else baseline.get('cases', dict())
+    # Each round measures every case, the best of each statistic
+    # across the rounds is kept. Spreading the measurements of a case
+    # over time makes them less sensitive to bursts of other load.
+    measurements = dict()
+    for round_idx in range(FLAGS.repeat):
+        for case in cases:
+            try:
+                measured = run_case(case, min_time, 5, 100000)
+            except InferenceServerException as ex:
+                print("error: " + ex.message())
+                sys.exit(1)
+            previous = measurements.get(case.name)
+            if previous is not None:
+                for key, value in previous.items():
+                    if key == 'iterations':
+                        measured[key] += value
+                    else:
+                        measured[key] = min(measured[key], value)
+            measurements[case.name] = measured
+        if FLAGS.verbose:
+            print("completed round " + str(round_idx + 1) + " of " + str(FLAGS.repeat))
+
+    print("{:<36} {:>8} {:>12} {:>9} {:>12} {:>9}".format(
+        "case", "iters", "prepare us", "", "results us", ""))
+    print("{:<36} {:>8} {:>12} {:>9} {:>12} {:>9}".format(
+        "", "", "(best)", "", "(best)", ""))
+    for case in cases:
+        measured = measurements[case.name]
+        base = base_cases.get(case.name, dict())
+        print("{:<36} {:>8} {:>12.1f} {:>9} {:>12.1f} {:>9}".format(
+            case.name, measured['iterations'],
+            measured['prepare_us'], _delta(measured['prepare_us'], base.get('prepare_us')),
+            measured['results_us'], _delta(measured['results_us'], base.get('results_us'))))
+
+    if FLAGS.output is not None:
+        with open(FLAGS.output, 'w') as f:
+            json.dump({
+                'version' : _BASELINE_VERSION,
+                'threshold' : threshold,
+                'min_delta_us' : min_delta_us,
+                'environment' : {
+                    'python' : platform.python_version(),
+                    'numpy' : np.__version__,
+                    'machine' : platform.machine(),
+                    'platform' : platform.platform(),
+                },
+                'cases' : measurements,
+            }, f, indent=2, sort_keys=True)
+
+    if baseline is not None:
+        regressions = compare(measurements, baseline, threshold, min_delta_us)
+        for name, metric, base_us, measured_us in regressions:
+            print("regression: {} {} {:.1f} us, baseline {:.1f} us ({})".format(
+                name, metric, measured_us, base_us, _delta(measured_us, base_us)))
+        if len(regressions) > 0:
+            sys.exit(1)
+        print("no regressions against " + FLAGS.baseline)
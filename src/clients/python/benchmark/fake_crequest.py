@@ -0,0 +1,385 @@
+# Copyright (c) 2019, NVIDIA CORPORATION. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#  * Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#  * Neither the name of NVIDIA CORPORATION nor the names of its
+#    contributors may be used to endorse or promote products derived
+#    from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS ``AS IS'' AND ANY
+# EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY
+# OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""In-memory fake of the libcrequest InferContext API.
+
+install() replaces the libcrequest functions used by
+tensorrtserver.api with Python functions that keep requests and
+results in memory, so that the client's request preparation and
+result handling can be measured without a server or the native
+library. The functions follow the calling conventions of
+libcrequest: handles are passed as c_void_p, outputs through byref()
+and arrays as numpy arrays. An error is returned as a handle, success
+as None.
+
+Results are not computed from the inputs. Use set_results() to give
+the values of each output, the fake returns them for every request
+until they are changed. Functions that are not needed to prepare
+requests and read results return an error.
+
+"""
+
+from ctypes import *
+import numpy as np
+import struct
+
+# Map from handle to the object it refers to.
+_handles = dict()
+_next_handle = [ 1 ]
+
+def _new_handle(obj):
+    handle = _next_handle[0]
+    _next_handle[0] += 1
+    _handles[handle] = obj
+    return handle
+
+def _get(handle):
+    if isinstance(handle, c_void_p):
+        handle = handle.value
+    return _handles.get(handle)
+
+def _del(handle):
+    if isinstance(handle, c_void_p):
+        handle = handle.value
+    _handles.pop(handle, None)
+
+def _value(arg):
+    # The value of a ctypes scalar or of a Python value.
+    return arg.value if hasattr(arg, 'value') else arg
+
+def _str(arg):
+    return arg.decode('utf-8') if isinstance(arg, bytes) else arg
+
+def _set_out(ref, value):
+    # Set the object referenced by a byref() argument.
+    ref._obj.value = value
+
+def _set_out_ptr(ref, address):
+    # Set a byref(c_char_p) argument to point at 'address'.
+    c_void_p.from_buffer(ref._obj).value = address
+
+class _Error:
+    def __init__(self, msg):
+        self.msg = msg.encode('utf-8')
+
+def _error(msg):
+    return _new_handle(_Error(msg))
+
+class _Context:
+    def __init__(self, model_name):
+        self.model_name = model_name
+        self.model_name_buf = create_string_buffer(model_name.encode('utf-8'))
+        self.options = None
+        self.outputs = dict()
+        self.inputs = dict()
+
+class _Options:
+    def __init__(self, flags, batch_size):
+        self.flags = flags
+        self.batch_size = batch_size
+        # Map from output name to the number of classes requested, 0
+        # for RAW.
+        self.outputs = dict()
+
+class _Input:
+    def __init__(self, ctx, name):
+        self.ctx = ctx
+        self.name = name
+        self.shape = None
+        self.buffers = list()
+
+class _Output:
+    # The values of an output for the entire batch, as returned by
+    # the fake for every request.
+    def __init__(self, data_type, values):
+        self.data_type = data_type
+        self.shape = list(values.shape[1:])
+        self.batch_size = values.shape[0]
+        self.values = values
+        # Serialized values of each batch entry laid out contiguously
+        # in a single buffer, as the C++ client holds a response.
+        if values.dtype == np.object:
+            entries = list()
+            for entry in values.reshape(self.batch_size, -1):
+                parts = list()
+                for s in entry:
+                    s = s if isinstance(s, bytes) else str(s).encode('utf-8')
+                    parts.append(struct.pack('<I', len(s)))
+                    parts.append(s)
+                entries.append(b''.join(parts))
+        else:
+            contiguous = np.ascontiguousarray(values)
+            entry_byte_size = contiguous.nbytes // max(1, self.batch_size)
+            data = contiguous.tobytes()
+            entries = [ data[b * entry_byte_size:(b + 1) * entry_byte_size]
+                        for b in range(self.batch_size) ]
+        self.buffer = create_string_buffer(b''.join(entries), max(1, sum(len(e) for e in entries)))
+        self.offsets = list()
+        self.byte_sizes = list()
+        offset = 0
+        for entry in entries:
+            self.offsets.append(offset)
+            self.byte_sizes.append(len(entry))
+            offset += len(entry)
+        # Map from k to the top-k classes of every batch entry.
+        self.classes = dict()
+        self.labels = dict()
+
+    def address(self, batch_idx):
+        return addressof(self.buffer) + self.offsets[batch_idx]
+
+    def get_classes(self, k):
+        # Return (idx, value, label_ptrs, count), each [ batch_size, k ],
+        # for the top 'k' values of each batch entry.
+        classes = self.classes.get(k)
+        if classes is None:
+            values = self.values.reshape(self.batch_size, -1).astype(np.float32)
+            k = min(k, values.shape[1])
+            idx = np.argsort(-values, axis=1, kind='mergesort')[:, :k].astype(np.int64)
+            value = values[np.arange(self.batch_size)[:, None], idx]
+            label_ptrs = np.empty(idx.shape, dtype=np.uintp)
+            for pos, class_idx in np.ndenumerate(idx):
+                label = self.labels.get(class_idx)
+                if label is None:
+                    label = create_string_buffer(('label' + str(class_idx)).encode('utf-8'))
+                    self.labels[class_idx] = label
+                label_ptrs[pos] = addressof(label)
+            count = np.full(self.batch_size, k, dtype=np.uint64)
+            classes = (idx, value, label_ptrs, count)
+            self.classes[k] = classes
+        return classes
+
+class _Result:
+    def __init__(self, ctx, output, k):
+        self.ctx = ctx
+        self.output = output
+        self.k = k
+        # The class cursor of each batch entry.
+        self.cursors = dict()
+
+def set_results(ctx, data_types, values):
+    """Set the values returned for the outputs of a context.
+
+    Parameters
+    ----------
+    ctx : InferContext
+        The context.
+
+    data_types : dict
+        Map from output name to the model_config DataType of the
+        output.
+
+    values : dict
+        Map from output name to a numpy array holding the values of
+        the output for the entire batch, with shape [ batch_size, ...
+        ]. Values of a TYPE_STRING output are given as an array of
+        bytes objects.
+
+    """
+    fake_ctx = _get(ctx._ctx)
+    fake_ctx.outputs = { name : _Output(data_types[name], value)
+                         for name, value in values.items() }
+
+def ErrorNew(msg):
+    return _error(_str(msg))
+
+def ErrorDelete(err):
+    _del(err)
+
+def ErrorIsOk(err):
+    return False
+
+def ErrorMessage(err):
+    return _get(err).msg
+
+def ErrorServerId(err):
+    return None
+
+def ErrorRequestId(err):
+    return 0
+
+def InferContextNew(ctx, url, protocol, model_name, model_version, correlation_id,
+                    streaming, verbose):
+    _set_out(ctx, _new_handle(_Context(_str(model_name))))
+    return None
+
+def InferContextDelete(ctx):
+    _del(ctx)
+
+def InferContextSetOptions(ctx, options):
+    _get(ctx).options = _get(options)
+    return None
+
+def InferContextRun(ctx):
+    return None
+
+def InferContextOptionsNew(options, flags, batch_size):
+    _set_out(options, _new_handle(_Options(_value(flags), _value(batch_size))))
+    return None
+
+def InferContextOptionsDelete(options):
+    _del(options)
+
+def InferContextOptionsAddRaw(ctx, options, output_name):
+    _get(options).outputs[_str(output_name)] = 0
+    return None
+
+def InferContextOptionsAddClass(ctx, options, output_name, k):
+    _get(options).outputs[_str(output_name)] = _value(k)
+    return None
+
+def InferContextInputNew(input, ctx, input_name):
+    _set_out(input, _new_handle(_Input(_get(ctx), _str(input_name))))
+    return None
+
+def InferContextInputDelete(input):
+    _del(input)
+
+def InferContextInputSetShape(input, shape, shape_len):
+    _get(input).shape = shape[:_value(shape_len)].tolist()
+    return None
+
+def InferContextInputSetRaw(input, data, byte_size):
+    # Like the C++ client, only a reference to the data is kept.
+    fake_input = _get(input)
+    fake_input.buffers.append((_value(data), _value(byte_size)))
+    fake_input.ctx.inputs[fake_input.name] = fake_input
+    return None
+
+def InferContextInputSetRawBatch(input, data, byte_sizes, batch_size):
+    fake_input = _get(input)
+    fake_input.buffers = [ (_value(data), byte_sizes[:_value(batch_size)].sum()) ]
+    fake_input.ctx.inputs[fake_input.name] = fake_input
+    return None
+
+def InferContextResultNew(result, ctx, output_name):
+    fake_ctx = _get(ctx)
+    name = _str(output_name)
+    output = fake_ctx.outputs.get(name)
+    if output is None:
+        return _error("unable to find result for output '" + name + "'")
+    k = 0
+    if fake_ctx.options is not None:
+        k = fake_ctx.options.outputs.get(name, 0)
+    _set_out(result, _new_handle(_Result(fake_ctx, output, k)))
+    return None
+
+def InferContextResultDelete(result):
+    _del(result)
+
+def InferContextResultModelName(result, model_name):
+    _set_out_ptr(model_name, addressof(_get(result).ctx.model_name_buf))
+    return None
+
+def InferContextResultModelVersion(result, model_version):
+    _set_out(model_version, 1)
+    return None
+
+def InferContextResultDataType(result, dtype):
+    _set_out(dtype, _get(result).output.data_type)
+    return None
+
+def InferContextResultShape(result, max_dims, shape, shape_len):
+    output_shape = _get(result).output.shape
+    if len(output_shape) > _value(max_dims):
+        return _error("number of dimensions in result shape exceeds maximum of " +
+                      str(_value(max_dims)))
+    shape[:len(output_shape)] = output_shape
+    _set_out(shape_len, len(output_shape))
+    return None
+
+def InferContextResultNextRaw(result, batch_idx, val, val_len):
+    output = _get(result).output
+    batch_idx = _value(batch_idx)
+    _set_out_ptr(val, output.address(batch_idx))
+    _set_out(val_len, output.byte_sizes[batch_idx])
+    return None
+
+def InferContextResultRawBatch(result, batch_size, val, val_len):
+    output = _get(result).output
+    batch_size = _value(batch_size)
+    _set_out_ptr(val, output.address(0))
+    _set_out(val_len, sum(output.byte_sizes[:batch_size]))
+    return None
+
+def InferContextResultClassCount(result, batch_idx, count):
+    fake_result = _get(result)
+    _set_out(count, int(fake_result.output.get_classes(fake_result.k)[3][_value(batch_idx)]))
+    return None
+
+def InferContextResultNextClass(result, batch_idx, idx, prob, label):
+    fake_result = _get(result)
+    batch_idx = _value(batch_idx)
+    class_idx, value, label_ptrs, count = fake_result.output.get_classes(fake_result.k)
+    cursor = fake_result.cursors.get(batch_idx, 0)
+    if cursor >= count[batch_idx]:
+        return _error("no more classes available for batch entry " + str(batch_idx))
+    fake_result.cursors[batch_idx] = cursor + 1
+    _set_out(idx, int(class_idx[batch_idx, cursor]))
+    _set_out(prob, float(value[batch_idx, cursor]))
+    _set_out_ptr(label, int(label_ptrs[batch_idx, cursor]))
+    return None
+
+def InferContextResultClassBatch(result, batch_size, k, idx, prob, label, count):
+    fake_result = _get(result)
+    batch_size = _value(batch_size)
+    k = _value(k)
+    class_idx, value, label_ptrs, class_count = fake_result.output.get_classes(k)
+    n = class_idx.shape[1]
+    idx[:, :n] = class_idx[:batch_size]
+    idx[:, n:] = -1
+    prob[:, :n] = value[:batch_size]
+    prob[:, n:] = 0
+    label[:, :n] = label_ptrs[:batch_size]
+    label[:, n:] = 0
+    count[:] = class_count[:batch_size]
+    return None
+
+def _unsupported(name):
+    def unsupported(*args):
+        return _error(name + " is not supported by the fake libcrequest")
+    return unsupported
+
+def install():
+    """Replace libcrequest in tensorrtserver.api with the fake. Must be
+    called before any use of the library.
+
+    Raises
+    ------
+    RuntimeError
+        If libcrequest is already loaded.
+
+    """
+    import tensorrtserver.api as api
+    if not isinstance(api._crequest, api._LazyCrequest):
+        raise RuntimeError("libcrequest is already loaded")
+    functions = globals()
+    for name, value in list(vars(api).items()):
+        if isinstance(value, api._CrequestFunction):
+            function = functions.get(value.name)
+            if (function is None) or (not value.name[0].isupper()):
+                function = _unsupported(value.name)
+            setattr(api, name, function)
@@ -0,0 +1,121 @@
+#!/usr/bin/python
+
+# Copyright (c) 2019, NVIDIA CORPORATION. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#  * Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#  * Neither the name of NVIDIA CORPORATION nor the names of its
+#    contributors may be used to endorse or promote products derived
+#    from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS ``AS IS'' AND ANY
+# EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY
+# OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import argparse
+import sys
+import numpy as np
+import time
+from builtins import range
+from tensorrtserver.api import *
+from tensorrtserver.api.grpc_transport import GrpcInferContext
+
+FLAGS = None
+
+def _make_inputs(metadata, batch_size):
+    # Random values for each input of the model, as a single batched
+    # array per input. Variable-size dimensions are given size 1.
+    inputs = dict()
+    for name, io in metadata.inputs.items():
+        shape = [ batch_size ] + [ max(1, d) for d in io.dims ]
+        if io.dtype == np.object:
+            inputs[name] = np.array([ str(i) for i in range(int(np.prod(shape))) ],
+                                    dtype=object).reshape(shape)
+        else:
+            inputs[name] = (np.random.random(shape) * 100).astype(io.dtype)
+    return inputs
+
+def _latency(ctx, inputs, outputs, batch_size, iterations):
+    # Return the latency, in seconds, of each of 'iterations'
+    # sequential requests.
+    latencies = list()
+    for _ in range(iterations):
+        start = time.time()
+        ctx.run(inputs, outputs, batch_size)
+        latencies.append(time.time() - start)
+    return latencies
+
+def _throughput(ctx, inputs, outputs, batch_size, iterations, concurrency):
+    # Return the inferences per second achieved with 'concurrency'
+    # requests in flight using async_run_future().
+    start = time.time()
+    in_flight = list()
+    for _ in range(iterations):
+        if len(in_flight) >= concurrency:
+            in_flight.pop(0).result()
+        in_flight.append(ctx.async_run_future(inputs, outputs, batch_size))
+    for future in in_flight:
+        future.result()
+    return (iterations * batch_size) / (time.time() - start)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-u', '--url', type=str, required=False, default='localhost:8001',
+                        help='Inference server gRPC URL. Default is localhost:8001.')
+    parser.add_argument('-m', '--model-name', type=str, required=True,
+                        help='Name of model.')
+    parser.add_argument('-x', '--model-version', type=int, required=False,
+                        help='Version of model. Default is to use latest version.')
+    parser.add_argument('-b', '--batch-size', type=int, required=False, default=1,
+                        help='Batch size. Default is 1.')
+    parser.add_argument('-n', '--iterations', type=int, required=False, default=1000,
+                        help='Number of requests for each measurement. Default is 1000.')
+    parser.add_argument('-c', '--concurrency', type=int, required=False, default=8,
+                        help='Number of requests in flight when measuring throughput. ' +
+                        'Default is 8.')
+    parser.add_argument('-w', '--warmup', type=int, required=False, default=50,
+                        help='Number of untimed requests sent first. Default is 50.')
+    FLAGS = parser.parse_args()
+
+    grpc_ctx = GrpcInferContext(FLAGS.url, FLAGS.model_name, FLAGS.model_version)
+    metadata = grpc_ctx.model_metadata()
+    inputs = _make_inputs(metadata, FLAGS.batch_size)
+    outputs = { name : InferContext.ResultFormat.RAW_BATCH for name in metadata.outputs }
+
+    # The transports must produce the same results
+    ctypes_ctx = InferContext(FLAGS.url, ProtocolType.GRPC, FLAGS.model_name,
+                              FLAGS.model_version)
+    expected = ctypes_ctx.run(inputs, outputs, FLAGS.batch_size)
+    actual = grpc_ctx.run(inputs, outputs, FLAGS.batch_size)
+    for name in outputs:
+        if not np.array_equal(expected[name], actual[name]):
+            print("error: transports produce different values for output '" + name + "'")
+            sys.exit(1)
+
+    print("{:>10} {:>12} {:>12} {:>12} {:>14}".format(
+        "transport", "p50 ms", "p90 ms", "p99 ms", "infer/sec"))
+    for transport, ctx in (("ctypes", ctypes_ctx), ("grpcio", grpc_ctx)):
+        _latency(ctx, inputs, outputs, FLAGS.batch_size, FLAGS.warmup)
+        latencies = _latency(ctx, inputs, outputs, FLAGS.batch_size, FLAGS.iterations)
+        throughput = _throughput(ctx, inputs, outputs, FLAGS.batch_size,
+                                 FLAGS.iterations, FLAGS.concurrency)
+        p50, p90, p99 = np.percentile(latencies, [50, 90, 99]) * 1000
+        print("{:>10} {:>12.3f} {:>12.3f} {:>12.3f} {:>14.1f}".format(
+            transport, p50, p90, p99, throughput))
+
+    ctypes_ctx.close()
+    grpc_ctx.close()
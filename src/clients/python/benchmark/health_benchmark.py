@@ -0,0 +1,88 @@
+#!/usr/bin/python
+
+# Copyright (c) 2019, NVIDIA CORPORATION. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#  * Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#  * Neither the name of NVIDIA CORPORATION nor the names of its
+#    contributors may be used to endorse or promote products derived
+#    from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS ``AS IS'' AND ANY
+# EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY
+# OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import argparse
+import numpy as np
+import time
+from builtins import range
+from tensorrtserver.api import *
+
+FLAGS = None
+
+def _latencies(fn, iterations):
+    # Return the latency, in seconds, of each of 'iterations' calls
+    # of 'fn'.
+    latencies = list()
+    for _ in range(iterations):
+        start = time.time()
+        fn()
+        latencies.append(time.time() - start)
+    return latencies
+
+def _new_health_ctx_is_ready():
+    with ServerHealthContext(FLAGS.url, protocol) as ctx:
+        return ctx.is_ready()
+
+def _new_status_ctx_get_server_status():
+    with ServerStatusContext(FLAGS.url, protocol, FLAGS.model_name) as ctx:
+        return ctx.get_server_status()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-u', '--url', type=str, required=False, default='localhost:8000',
+                        help='Inference server URL. Default is localhost:8000.')
+    parser.add_argument('-i', '--protocol', type=str, required=False, default='HTTP',
+                        help='Protocol (HTTP/gRPC) used to ' +
+                        'communicate with inference service. Default is HTTP.')
+    parser.add_argument('-m', '--model-name', type=str, required=False, default=None,
+                        help='Name of model whose status is requested. ' +
+                        'Default is the status of all models.')
+    parser.add_argument('-n', '--iterations', type=int, required=False, default=1000,
+                        help='Number of requests for each measurement. Default is 1000.')
+    FLAGS = parser.parse_args()
+
+    protocol = ProtocolType.from_str(FLAGS.protocol)
+
+    # A context reuses its connection to the server for every request,
+    # a new context per request must connect for each request.
+    health_ctx = ServerHealthContext(FLAGS.url, protocol)
+    status_ctx = ServerStatusContext(FLAGS.url, protocol, FLAGS.model_name)
+    measurements = (
+        ("is_ready, reused context", health_ctx.is_ready),
+        ("is_ready, new context", _new_health_ctx_is_ready),
+        ("get_server_status, reused context", status_ctx.get_server_status),
+        ("get_server_status, new context", _new_status_ctx_get_server_status))
+
+    print("{:>36} {:>10} {:>10} {:>10}".format("request", "p50 ms", "p90 ms", "p99 ms"))
+    for name, fn in measurements:
+        fn()
+        p50, p90, p99 = np.percentile(_latencies(fn, FLAGS.iterations), [50, 90, 99]) * 1000
+        print("{:>36} {:>10.3f} {:>10.3f} {:>10.3f}".format(name, p50, p90, p99))
+
+    health_ctx.close()
+    status_ctx.close()
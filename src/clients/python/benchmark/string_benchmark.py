@@ -0,0 +1,96 @@
+#!/usr/bin/python
+
+# Copyright (c) 2019, NVIDIA CORPORATION. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#  * Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#  * Neither the name of NVIDIA CORPORATION nor the names of its
+#    contributors may be used to endorse or promote products derived
+#    from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS ``AS IS'' AND ANY
+# EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY
+# OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import argparse
+import sys
+import numpy as np
+import struct
+import time
+from builtins import range
+from tensorrtserver.api import _serialize_string_tensor, _deserialize_string_tensor
+
+FLAGS = None
+
+def _reference_serialize(input_value):
+    # Element-at-a-time serialization, used to verify the serialized
+    # buffer produced by _serialize_string_tensor().
+    flattened = bytes()
+    for obj in np.nditer(input_value, flags=["refs_ok"], order='C'):
+        s = str(obj).encode('utf-8')
+        flattened += struct.pack("<I", len(s))
+        flattened += s
+    return flattened
+
+def _time(fn, iterations):
+    # Return the best time, in seconds, of 'iterations' calls of 'fn'.
+    best = None
+    for _ in range(iterations):
+        start = time.time()
+        fn()
+        elapsed = time.time() - start
+        if (best is None) or (elapsed < best):
+            best = elapsed
+    return best
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--counts', type=int, nargs='+', required=False,
+                        default=[1000, 10000, 100000, 1000000],
+                        help='Number of strings in the benchmarked tensors. ' +
+                        'Default is 1000 10000 100000 1000000.')
+    parser.add_argument('-l', '--max-length', type=int, required=False, default=16,
+                        help='Maximum length of each string. Default is 16.')
+    parser.add_argument('-r', '--iterations', type=int, required=False, default=3,
+                        help='Number of timed iterations, the best is reported. ' +
+                        'Default is 3.')
+    parser.add_argument('-c', '--check', action="store_true", required=False, default=False,
+                        help='Verify the serialization against an element-at-a-time ' +
+                        'reference for counts up to 10000.')
+    FLAGS = parser.parse_args()
+
+    print("{:>10} {:>14} {:>14} {:>14}".format(
+        "strings", "bytes", "serialize ms", "deserialize ms"))
+    for cnt in FLAGS.counts:
+        lengths = np.random.randint(low=0, high=FLAGS.max_length + 1, size=cnt)
+        tensor = np.array([ 'x' * l for l in lengths ], dtype=object)
+
+        serialized = _serialize_string_tensor(tensor)
+        if FLAGS.check and (cnt <= 10000):
+            if serialized.tobytes() != _reference_serialize(tensor):
+                print("error: incorrect serialization for " + str(cnt) + " strings")
+                sys.exit(1)
+        deserialized = _deserialize_string_tensor(serialized)
+        if (deserialized.size != cnt) or \
+           (deserialized[-1] != tensor[-1].encode('utf-8')):
+            print("error: incorrect deserialization for " + str(cnt) + " strings")
+            sys.exit(1)
+
+        ser_time = _time(lambda: _serialize_string_tensor(tensor), FLAGS.iterations)
+        deser_time = _time(lambda: _deserialize_string_tensor(serialized), FLAGS.iterations)
+        print("{:>10} {:>14} {:>14.3f} {:>14.3f}".format(
+            cnt, serialized.nbytes, ser_time * 1000, deser_time * 1000))
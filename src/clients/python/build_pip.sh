@@ -75,9 +75,13 @@ function main() {
   cp bazel-bin/src/clients/python/libcrequest.so \
     "${TMPDIR}/tensorrtserver/api/."
 
-  cp src/clients/python/__init__.py \
+  cp src/clients/python/__init__.py src/clients/python/aio.py \
+    src/clients/python/grpc_transport.py src/clients/python/trace.py \
     "${TMPDIR}/tensorrtserver/api/."
 
+  cp src/clients/python/perf.py src/clients/python/monitor.py \
+    "${TMPDIR}/tensorrtserver/."
+
   cp src/clients/python/setup.py "${TMPDIR}"
 	touch ${TMPDIR}/tensorrtserver/__init__.py
 
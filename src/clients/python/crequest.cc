@@ -26,6 +26,7 @@
 
 #include "src/clients/python/crequest.h"
 
+#include <algorithm>
 #include <iostream>
 #include "src/clients/c++/request_grpc.h"
 #include "src/clients/c++/request_http.h"
@@ -228,11 +229,92 @@ ServerStatusContextGetServerStatus(
   return new nic::Error(err);
 }
 
+//==============================================================================
+struct SharedMemoryControlContextCtx {
+  std::unique_ptr<nic::SharedMemoryControlContext> ctx;
+};
+
+nic::Error*
+SharedMemoryControlContextNew(
+    SharedMemoryControlContextCtx** ctx, const char* url, int protocol_int,
+    bool verbose)
+{
+  nic::Error err;
+  ProtocolType protocol;
+  err = ParseProtocol(&protocol, protocol_int);
+  if (err.IsOk()) {
+    SharedMemoryControlContextCtx* lctx = new SharedMemoryControlContextCtx;
+    if (protocol == ProtocolType::HTTP) {
+      err = nic::SharedMemoryControlHttpContext::Create(
+          &(lctx->ctx), std::string(url), verbose);
+    } else {
+      err = nic::SharedMemoryControlGrpcContext::Create(
+          &(lctx->ctx), std::string(url), verbose);
+    }
+
+    if (err.IsOk()) {
+      *ctx = lctx;
+      return nullptr;
+    }
+
+    delete lctx;
+  }
+
+  *ctx = nullptr;
+  return new nic::Error(err);
+}
+
+void
+SharedMemoryControlContextDelete(SharedMemoryControlContextCtx* ctx)
+{
+  delete ctx;
+}
+
+nic::Error*
+SharedMemoryControlContextRegister(
+    SharedMemoryControlContextCtx* ctx, const char* name, const char* shm_key,
+    uint64_t offset, uint64_t byte_size)
+{
+  nic::Error err = ctx->ctx->RegisterSharedMemory(
+      std::string(name), std::string(shm_key), offset, byte_size);
+  if (err.IsOk()) {
+    return nullptr;
+  }
+
+  return new nic::Error(err);
+}
+
+nic::Error*
+SharedMemoryControlContextUnregister(
+    SharedMemoryControlContextCtx* ctx, const char* name)
+{
+  nic::Error err = ctx->ctx->UnregisterSharedMemory(std::string(name));
+  if (err.IsOk()) {
+    return nullptr;
+  }
+
+  return new nic::Error(err);
+}
+
+nic::Error*
+SharedMemoryControlContextUnregisterAll(SharedMemoryControlContextCtx* ctx)
+{
+  nic::Error err = ctx->ctx->UnregisterAllSharedMemory();
+  if (err.IsOk()) {
+    return nullptr;
+  }
+
+  return new nic::Error(err);
+}
+
 //==============================================================================
 struct InferContextCtx {
   std::unique_ptr<nic::InferContext> ctx;
   std::map<std::string, std::unique_ptr<nic::InferContext::Result>> results;
   std::vector<std::shared_ptr<nic::InferContext::Request>> requests;
+  // Timing of the request whose results were most recently retrieved
+  // with InferContextGetAsyncRunResults().
+  nic::InferContext::Request::Timing async_timing;
 };
 
 nic::Error*
@@ -318,6 +400,7 @@ InferContextGetAsyncRunResults(
       nic::Error err =
           ctx->ctx->GetAsyncRunResults(&ctx->results, is_ready, *itr, wait);
       if (*is_ready) {
+        (*itr)->GetTiming(&ctx->async_timing);
         ctx->requests.erase(itr);
       }
       return new nic::Error(err);
@@ -342,6 +425,48 @@ InferContextGetReadyAsyncRequest(
   return new nic::Error(err);
 }
 
+nic::Error*
+InferContextSetCompletionFd(InferContextCtx* ctx, int fd)
+{
+  nic::Error err = ctx->ctx->SetCompletionFd(fd);
+  return new nic::Error(err);
+}
+
+nic::Error*
+InferContextGetAsyncRunTiming(
+    InferContextCtx* ctx, uint64_t* request_start_ns, uint64_t* request_end_ns,
+    uint64_t* send_start_ns, uint64_t* send_end_ns, uint64_t* receive_start_ns,
+    uint64_t* receive_end_ns)
+{
+  const nic::InferContext::Request::Timing& timing = ctx->async_timing;
+  *request_start_ns = timing.request_start_ns;
+  *request_end_ns = timing.request_end_ns;
+  *send_start_ns = timing.send_start_ns;
+  *send_end_ns = timing.send_end_ns;
+  *receive_start_ns = timing.receive_start_ns;
+  *receive_end_ns = timing.receive_end_ns;
+  return nullptr;
+}
+
+nic::Error*
+InferContextGetStat(
+    InferContextCtx* ctx, uint64_t* completed_request_count,
+    uint64_t* cumulative_total_request_time_ns,
+    uint64_t* cumulative_send_time_ns, uint64_t* cumulative_receive_time_ns)
+{
+  nic::InferContext::Stat stat;
+  nic::Error err = ctx->ctx->GetStat(&stat);
+  if (err.IsOk()) {
+    *completed_request_count = stat.completed_request_count;
+    *cumulative_total_request_time_ns = stat.cumulative_total_request_time_ns;
+    *cumulative_send_time_ns = stat.cumulative_send_time_ns;
+    *cumulative_receive_time_ns = stat.cumulative_receive_time_ns;
+    return nullptr;
+  }
+
+  return new nic::Error(err);
+}
+
 //==============================================================================
 nic::Error*
 InferContextOptionsNew(
@@ -394,6 +519,22 @@ InferContextOptionsAddClass(
   return new nic::Error(err);
 }
 
+nic::Error*
+InferContextOptionsAddSharedMemory(
+    InferContextCtx* infer_ctx, nic::InferContext::Options* ctx,
+    const char* output_name, const char* name, uint64_t offset,
+    uint64_t byte_size)
+{
+  std::shared_ptr<nic::InferContext::Output> output;
+  nic::Error err = infer_ctx->ctx->GetOutput(std::string(output_name), &output);
+  if (err.IsOk()) {
+    err = ctx->AddSharedMemoryResult(
+        output, std::string(name), offset, byte_size);
+  }
+
+  return new nic::Error(err);
+}
+
 //==============================================================================
 struct InferContextInputCtx {
   std::shared_ptr<nic::InferContext::Input> input;
@@ -443,10 +584,50 @@ InferContextInputSetRaw(
   return new nic::Error(err);
 }
 
+nic::Error*
+InferContextInputSetRawBatch(
+    InferContextInputCtx* ctx, const void* data, const uint64_t* byte_sizes,
+    uint64_t batch_size)
+{
+  // 'data' holds the values for the entire batch in a single
+  // contiguous buffer, 'byte_sizes' gives the size of each batch
+  // entry within that buffer. It replaces any values previously set
+  // for the input so that a reused input handle can be set again.
+  ctx->input->Reset();
+  const uint8_t* base = reinterpret_cast<const uint8_t*>(data);
+  for (uint64_t b = 0; b < batch_size; ++b) {
+    nic::Error err = ctx->input->SetRaw(base, byte_sizes[b]);
+    if (!err.IsOk()) {
+      return new nic::Error(err);
+    }
+    if (base != nullptr) {
+      base += byte_sizes[b];
+    }
+  }
+
+  return nullptr;
+}
+
+nic::Error*
+InferContextInputSetSharedMemory(
+    InferContextInputCtx* ctx, const char* name, uint64_t offset,
+    uint64_t byte_size)
+{
+  nic::Error err =
+      ctx->input->SetSharedMemory(std::string(name), offset, byte_size);
+  if (err.IsOk()) {
+    return nullptr;
+  }
+
+  return new nic::Error(err);
+}
+
 //==============================================================================
 struct InferContextResultCtx {
   std::unique_ptr<nic::InferContext::Result> result;
   nic::InferContext::Result::ClassResult cr;
+  std::vector<uint8_t> batch_buf;
+  std::vector<std::string> class_labels;
 };
 
 nic::Error*
@@ -571,6 +752,57 @@ InferContextResultNextRaw(
   return new nic::Error(err);
 }
 
+nic::Error*
+InferContextResultRawBatch(
+    InferContextResultCtx* ctx, size_t batch_size, const char** val,
+    uint64_t* val_len)
+{
+  if (ctx->result == nullptr) {
+    return new nic::Error(
+        ni::RequestStatusCode::INTERNAL,
+        "no raw result available for empty result");
+  }
+
+  // If the result for every batch entry is already laid out
+  // contiguously (as is the case when the result is used in-place
+  // from the response) then return the entire batch without copying.
+  std::vector<const uint8_t*> contents(batch_size);
+  std::vector<size_t> content_byte_sizes(batch_size);
+  size_t total_byte_size = 0;
+  bool contiguous = true;
+  for (size_t b = 0; b < batch_size; ++b) {
+    nic::Error err =
+        ctx->result->GetRaw(b, &contents[b], &content_byte_sizes[b]);
+    if (!err.IsOk()) {
+      return new nic::Error(err);
+    }
+    if ((b > 0) && (contents[b] != (contents[0] + total_byte_size))) {
+      contiguous = false;
+    }
+    total_byte_size += content_byte_sizes[b];
+  }
+
+  if (contiguous || (batch_size == 0)) {
+    *val = reinterpret_cast<const char*>(
+        (batch_size == 0) ? nullptr : contents[0]);
+    *val_len = total_byte_size;
+    return nullptr;
+  }
+
+  // Otherwise gather the batch entries into a single buffer owned by
+  // 'ctx'.
+  ctx->batch_buf.clear();
+  ctx->batch_buf.reserve(total_byte_size);
+  for (size_t b = 0; b < batch_size; ++b) {
+    ctx->batch_buf.insert(
+        ctx->batch_buf.end(), contents[b], contents[b] + content_byte_sizes[b]);
+  }
+
+  *val = reinterpret_cast<const char*>(ctx->batch_buf.data());
+  *val_len = total_byte_size;
+  return nullptr;
+}
+
 nic::Error*
 InferContextResultClassCount(
     InferContextResultCtx* ctx, size_t batch_idx, uint64_t* count)
@@ -606,3 +838,55 @@ InferContextResultNextClass(
 
   return new nic::Error(err);
 }
+
+nic::Error*
+InferContextResultClassBatch(
+    InferContextResultCtx* ctx, size_t batch_size, uint64_t k, int64_t* idx,
+    float* prob, const char** label, uint64_t* count)
+{
+  if (ctx->result == nullptr) {
+    return new nic::Error(
+        ni::RequestStatusCode::INTERNAL,
+        "no classes available for empty result");
+  }
+
+  // 'idx', 'prob' and 'label' are [ batch_size, k ] arrays. A batch
+  // entry with fewer than 'k' classes is padded with index -1, value
+  // 0 and a null label. The labels are owned by 'ctx'.
+  ctx->class_labels.clear();
+  ctx->class_labels.resize(batch_size * k);
+  for (size_t b = 0; b < batch_size; ++b) {
+    size_t cnt;
+    nic::Error err = ctx->result->GetClassCount(b, &cnt);
+    if (!err.IsOk()) {
+      return new nic::Error(err);
+    }
+    err = ctx->result->ResetCursor(b);
+    if (!err.IsOk()) {
+      return new nic::Error(err);
+    }
+
+    cnt = std::min(cnt, (size_t)k);
+    count[b] = cnt;
+    for (size_t c = 0; c < k; ++c) {
+      const size_t offset = (b * k) + c;
+      if (c >= cnt) {
+        idx[offset] = -1;
+        prob[offset] = 0;
+        label[offset] = nullptr;
+        continue;
+      }
+
+      err = ctx->result->GetClassAtCursor(b, &ctx->cr);
+      if (!err.IsOk()) {
+        return new nic::Error(err);
+      }
+      idx[offset] = ctx->cr.idx;
+      prob[offset] = ctx->cr.value;
+      ctx->class_labels[offset].swap(ctx->cr.label);
+      label[offset] = ctx->class_labels[offset].c_str();
+    }
+  }
+
+  return nullptr;
+}
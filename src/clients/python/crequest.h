@@ -67,6 +67,21 @@ void ServerStatusContextDelete(ServerStatusContextCtx* ctx);
 nic::Error* ServerStatusContextGetServerStatus(
     ServerStatusContextCtx* ctx, char** status, uint32_t* status_len);
 
+//==============================================================================
+// SharedMemoryControlContext
+typedef struct SharedMemoryControlContextCtx SharedMemoryControlContextCtx;
+nic::Error* SharedMemoryControlContextNew(
+    SharedMemoryControlContextCtx** ctx, const char* url, int protocol_int,
+    bool verbose);
+void SharedMemoryControlContextDelete(SharedMemoryControlContextCtx* ctx);
+nic::Error* SharedMemoryControlContextRegister(
+    SharedMemoryControlContextCtx* ctx, const char* name, const char* shm_key,
+    uint64_t offset, uint64_t byte_size);
+nic::Error* SharedMemoryControlContextUnregister(
+    SharedMemoryControlContextCtx* ctx, const char* name);
+nic::Error* SharedMemoryControlContextUnregisterAll(
+    SharedMemoryControlContextCtx* ctx);
+
 //==============================================================================
 // InferContext
 typedef struct InferContextCtx InferContextCtx;
@@ -83,6 +98,15 @@ nic::Error* InferContextGetAsyncRunResults(
     InferContextCtx* ctx, bool* is_ready, size_t request_id, bool wait);
 nic::Error* InferContextGetReadyAsyncRequest(
     InferContextCtx* ctx, bool* is_ready, size_t* request_id, bool wait);
+nic::Error* InferContextSetCompletionFd(InferContextCtx* ctx, int fd);
+nic::Error* InferContextGetAsyncRunTiming(
+    InferContextCtx* ctx, uint64_t* request_start_ns, uint64_t* request_end_ns,
+    uint64_t* send_start_ns, uint64_t* send_end_ns, uint64_t* receive_start_ns,
+    uint64_t* receive_end_ns);
+nic::Error* InferContextGetStat(
+    InferContextCtx* ctx, uint64_t* completed_request_count,
+    uint64_t* cumulative_total_request_time_ns,
+    uint64_t* cumulative_send_time_ns, uint64_t* cumulative_receive_time_ns);
 
 //==============================================================================
 // InferContext::Options
@@ -95,6 +119,10 @@ nic::Error* InferContextOptionsAddRaw(
 nic::Error* InferContextOptionsAddClass(
     InferContextCtx* infer_ctx, nic::InferContext::Options* ctx,
     const char* output_name, uint64_t count);
+nic::Error* InferContextOptionsAddSharedMemory(
+    InferContextCtx* infer_ctx, nic::InferContext::Options* ctx,
+    const char* output_name, const char* name, uint64_t offset,
+    uint64_t byte_size);
 
 //==============================================================================
 // InferContext::Input
@@ -107,6 +135,12 @@ nic::Error* InferContextInputSetShape(
     InferContextInputCtx* ctx, const int64_t* dims, uint64_t size);
 nic::Error* InferContextInputSetRaw(
     InferContextInputCtx* ctx, const void* data, uint64_t byte_size);
+nic::Error* InferContextInputSetRawBatch(
+    InferContextInputCtx* ctx, const void* data, const uint64_t* byte_sizes,
+    uint64_t batch_size);
+nic::Error* InferContextInputSetSharedMemory(
+    InferContextInputCtx* ctx, const char* name, uint64_t offset,
+    uint64_t byte_size);
 
 //==============================================================================
 // InferContext::Result
@@ -127,11 +161,17 @@ nic::Error* InferContextResultShape(
 nic::Error* InferContextResultNextRaw(
     InferContextResultCtx* ctx, size_t batch_idx, const char** val,
     uint64_t* val_len);
+nic::Error* InferContextResultRawBatch(
+    InferContextResultCtx* ctx, size_t batch_size, const char** val,
+    uint64_t* val_len);
 nic::Error* InferContextResultClassCount(
     InferContextResultCtx* ctx, size_t batch_idx, uint64_t* count);
 nic::Error* InferContextResultNextClass(
     InferContextResultCtx* ctx, size_t batch_idx, uint64_t* idx, float* prob,
     const char** label);
+nic::Error* InferContextResultClassBatch(
+    InferContextResultCtx* ctx, size_t batch_size, uint64_t k, int64_t* idx,
+    float* prob, const char** label, uint64_t* count);
 
 #ifdef __cplusplus
 }
@@ -0,0 +1,677 @@
+# Copyright (c) 2019, NVIDIA CORPORATION. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#  * Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#  * Neither the name of NVIDIA CORPORATION nor the names of its
+#    contributors may be used to endorse or promote products derived
+#    from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS ``AS IS'' AND ANY
+# EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY
+# OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Pure-Python gRPC transport for the InferContext API.
+
+GrpcInferContext provides the same inference API as InferContext but
+talks to the server directly with grpcio instead of going through
+libcrequest. All contexts for the same URL share one gRPC channel so
+their requests are multiplexed over a single HTTP/2 connection, and
+the channel can be tuned with grpcio channel options.
+
+"""
+
+from builtins import range
+from future.utils import iteritems
+import threading
+import grpc
+import numpy as np
+
+from tensorrtserver.api import InferContext, InferenceServerException, ModelMetadata
+from tensorrtserver.api import SharedMemoryTensor, TraceEventType, _RequestTrace
+from tensorrtserver.api import _deserialize_string_tensor, _serialize_string_elements
+from tensorrtserver.api import _shared_memory_array
+from tensorrtserver.api import api_pb2, grpc_service_pb2, request_status_pb2
+
+# Same limit as the C++ client, see MAX_GRPC_MESSAGE_SIZE.
+_MAX_GRPC_MESSAGE_SIZE = 2**31 - 1
+
+_INFER_METHOD = '/nvidia.inferenceserver.GRPCService/Infer'
+_STATUS_METHOD = '/nvidia.inferenceserver.GRPCService/Status'
+
+# Tag of InferRequest.raw_input, field 4 with length-delimited wire
+# type.
+_RAW_INPUT_TAG = b'\x22'
+
+# Map from (url, options) to the channel shared by all contexts
+# using that URL and those options.
+_channels = dict()
+_channels_lock = threading.Lock()
+
+def _raise_error(msg, server_id=None, request_id=0):
+    # Unlike tensorrtserver.api._raise_error this doesn't create the
+    # error with libcrequest, which this transport never loads.
+    raise InferenceServerException(None, msg=msg, server_id=server_id,
+                                   request_id=request_id)
+
+def _raise_rpc_error(rpc_error):
+    _raise_error("gRPC error: " + str(rpc_error.details()))
+
+def _raise_if_status_error(request_status):
+    """
+    Raise InferenceServerException if 'request_status' is non-success.
+    Otherwise return the request ID.
+    """
+    if request_status.code != request_status_pb2.SUCCESS:
+        _raise_error(request_status.msg, request_status.server_id or None,
+                     request_status.request_id)
+    return request_status.request_id
+
+def _channel_options(options):
+    # The message size limits default to those of the C++ client,
+    # any option given in 'options' takes precedence.
+    merged = dict([ ('grpc.max_send_message_length', _MAX_GRPC_MESSAGE_SIZE),
+                    ('grpc.max_receive_message_length', _MAX_GRPC_MESSAGE_SIZE) ])
+    if options is not None:
+        merged.update(options)
+    return sorted(merged.items())
+
+def get_channel(url, options=None):
+    """Get the gRPC channel to an inference server. The same channel is
+    returned for every call with the same 'url' and 'options' so
+    that contexts using it share one connection to the server.
+
+    Parameters
+    ----------
+    url : str
+        The inference server URL, e.g. localhost:8001.
+
+    options : list of (str, value) tuples
+        The grpcio channel options, e.g. [('grpc.keepalive_time_ms',
+        10000)]. The maximum send and receive message sizes default
+        to the largest size supported by the server.
+
+    Returns
+    -------
+    grpc.Channel
+        The channel. The channel must not be closed by the caller.
+
+    """
+    channel_options = _channel_options(options)
+    key = (url, tuple(channel_options))
+    with _channels_lock:
+        channel = _channels.get(key)
+        if channel is None:
+            channel = grpc.insecure_channel(url, options=channel_options)
+            _channels[key] = channel
+        return channel
+
+def _encode_varint(value):
+    encoded = bytearray()
+    while value > 0x7f:
+        encoded.append((value & 0x7f) | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+def _input_buffers(input_name, input_values, effective_batch_size):
+    # Return the shape of each batch entry of the input, not including
+    # the batch dimension, and the list of buffers holding the data
+    # of the entire batch, in order.
+    if isinstance(input_values, np.ndarray):
+        if (input_values.ndim == 0) or (input_values.shape[0] != effective_batch_size):
+            _raise_error("input '" + input_name + "' specified as a numpy array " +
+                         "must have batch dimension " + str(effective_batch_size) +
+                         ", got shape " + str(list(input_values.shape)))
+        shape = input_values.shape[1:]
+        input_values = [ input_values ]
+    elif isinstance(input_values, (list, tuple)):
+        if len(input_values) != effective_batch_size:
+            _raise_error("expected " + str(effective_batch_size) + " values for input '" +
+                         input_name + "', got " + str(len(input_values)))
+        shape = input_values[0].shape if len(input_values) > 0 else ()
+    else:
+        _raise_error("input '" + input_name +
+                     "' values must be specified as a list of numpy arrays " +
+                     "or as a single batched numpy array")
+
+    buffers = list()
+    for input_value in input_values:
+        if input_value.size == 0:
+            continue
+        if input_value.dtype == np.object or input_value.dtype.type == np.bytes_:
+            input_value = _serialize_string_elements(input_value)[0]
+        elif not input_value.flags['C_CONTIGUOUS']:
+            input_value = np.ascontiguousarray(input_value)
+        buffers.append(memoryview(input_value).cast('B'))
+
+    return shape, buffers
+
+def _build_request(model_name, model_version, correlation_id,
+                   inputs, outputs, batch_size, flags):
+    """
+    Serialize the InferRequest for 'inputs' and 'outputs'. The
+    request header is serialized with protobuf but each raw_input is
+    appended directly from the buffer of its numpy array so the input
+    data is copied only once, into the serialized request.
+    """
+    effective_batch_size = max(1, batch_size)
+    header = api_pb2.InferRequestHeader()
+    header.batch_size = batch_size
+    header.flags = flags
+    header.correlation_id = correlation_id
+
+    raw_inputs = list()
+    for (input_name, input_values) in iteritems(inputs):
+        # Values of an input in shared memory have no raw_input entry.
+        if isinstance(input_values, SharedMemoryTensor):
+            header_input = header.input.add()
+            header_input.name = input_name
+            if input_values.shape is not None:
+                header_input.dims.extend(input_values.shape)
+            header_input.batch_byte_size = input_values.byte_size
+            header_input.shared_memory.name = input_values.region_name
+            header_input.shared_memory.offset = input_values.offset
+            header_input.shared_memory.byte_size = input_values.byte_size
+            continue
+
+        shape, buffers = _input_buffers(input_name, input_values, effective_batch_size)
+        byte_size = sum(len(buf) for buf in buffers)
+        header_input = header.input.add()
+        header_input.name = input_name
+        header_input.dims.extend(shape)
+        header_input.batch_byte_size = byte_size
+        raw_inputs.append(_RAW_INPUT_TAG)
+        raw_inputs.append(_encode_varint(byte_size))
+        raw_inputs.extend(buffers)
+
+    for (output_name, output_format) in iteritems(outputs):
+        header_output = header.output.add()
+        header_output.name = output_name
+        if isinstance(output_format, SharedMemoryTensor):
+            header_output.shared_memory.name = output_format.region_name
+            header_output.shared_memory.offset = output_format.offset
+            header_output.shared_memory.byte_size = output_format.byte_size
+            continue
+        if output_format in (InferContext.ResultFormat.RAW,
+                             InferContext.ResultFormat.RAW_BATCH,
+                             InferContext.ResultFormat.RAW_BATCH_VIEW):
+            continue
+        if (isinstance(output_format, (list, tuple)) and
+                (output_format[0] == InferContext.ResultFormat.CLASS)):
+            header_output.cls.count = output_format[1]
+        else:
+            _raise_error("unrecognized output format")
+
+    request = grpc_service_pb2.InferRequest()
+    request.model_name = model_name
+    request.model_version = model_version
+    request.meta_data.CopyFrom(header)
+    return b''.join([ request.SerializeToString() ] + raw_inputs)
+
+def _decode_response(response, metadata, outputs, batch_size):
+    """
+    Create the result map for 'outputs' from an InferResponse, in the
+    same form as returned by InferContext.run().
+    """
+    effective_batch_size = max(1, batch_size)
+    response_outputs = dict()
+    for (idx, output) in enumerate(response.meta_data.output):
+        raw = response.raw_output[idx] if idx < len(response.raw_output) else b''
+        response_outputs[output.name] = (output, raw)
+
+    results = dict()
+    for (output_name, output_format) in iteritems(outputs):
+        if output_name not in response_outputs:
+            _raise_error("unable to find result for output '" + output_name + "'")
+        output, raw = response_outputs[output_name]
+
+        if (isinstance(output_format, (list, tuple)) and
+                (output_format[0] == InferContext.ResultFormat.CLASS)):
+            results[output_name] = [ [ (cls.idx, cls.value, cls.label)
+                                       for cls in batch_classes.cls ]
+                                     for batch_classes in output.batch_classes ]
+            continue
+
+        output_metadata = metadata.outputs.get(output_name)
+        if (output_metadata is None) or (output_metadata.dtype is None):
+            _raise_error("unknown datatype for output '" + output_name + "'")
+        result_dtype = output_metadata.dtype
+        shape = [ effective_batch_size ] + list(output.raw.dims)
+
+        # The values of an output written to shared memory are
+        # returned as a view of the region.
+        if isinstance(output_format, SharedMemoryTensor):
+            if result_dtype != np.object:
+                results[output_name] = _shared_memory_array(output_format, result_dtype, shape)
+            else:
+                val_buf = _shared_memory_array(output_format, np.uint8,
+                                               (output_format.byte_size,))
+                results[output_name] = np.reshape(_deserialize_string_tensor(val_buf), shape)
+            continue
+
+        if len(raw) == 0:
+            val = np.empty(shape, dtype=result_dtype)
+        elif result_dtype == np.object:
+            val = np.reshape(_deserialize_string_tensor(raw), shape)
+        else:
+            # A read-only view of the response buffer, which is kept
+            # alive by the array.
+            val = np.frombuffer(raw, dtype=result_dtype).reshape(shape)
+
+        if output_format == InferContext.ResultFormat.RAW_BATCH_VIEW:
+            results[output_name] = val
+        elif output_format == InferContext.ResultFormat.RAW_BATCH:
+            results[output_name] = val if result_dtype == np.object else val.copy()
+        elif output_format == InferContext.ResultFormat.RAW:
+            results[output_name] = [ np.copy(val[b]) for b in range(effective_batch_size) ]
+        else:
+            _raise_error("unrecognized output format")
+
+    return results
+
+def _model_metadata(status_response, model_name, model_version):
+    # Create the ModelMetadata of the model from a StatusResponse.
+    _raise_if_status_error(status_response.request_status)
+    model_status = status_response.server_status.model_status
+    if model_name not in model_status:
+        _raise_error("unable to find status information for \"" + model_name + "\"")
+    return ModelMetadata(model_name, model_status[model_name], model_version)
+
+
+class GrpcInferContext:
+    """A GrpcInferContext object is used to run inference on an inference
+    server for a specific model using the gRPC protocol. It provides
+    the same API as an InferContext created with ProtocolType.GRPC
+    but sends the requests with grpcio instead of libcrequest.
+
+    Parameters
+    ----------
+    url : str
+        The inference server URL, e.g. localhost:8001.
+
+    model_name : str
+        The name of the model to use for inference.
+
+    model_version : int
+        The version of the model to use for inference,
+        or None to indicate that the latest (i.e. highest version number)
+        version should be used.
+
+    verbose : bool
+        If True generate verbose output.
+
+    correlation_id : int
+        The correlation ID for the inference. If not specified (or if
+        specified as 0), the inference will have no correlation ID.
+
+    channel : grpc.Channel
+        The channel used to communicate with the server, or None to
+        use the channel returned by get_channel() for 'url' and
+        'channel_options'.
+
+    channel_options : list of (str, value) tuples
+        The grpcio channel options used if 'channel' is None, see
+        get_channel().
+
+    """
+    def __init__(self, url, model_name, model_version=None, verbose=False,
+                 correlation_id=0, channel=None, channel_options=None):
+        self._url = url
+        self._model_name = model_name
+        self._model_version = -1 if model_version is None else model_version
+        self._verbose = verbose
+        self._correlation_id = correlation_id
+        self._last_request_id = None
+        self._last_request_model_name = None
+        self._last_request_model_version = None
+        self._trace_hook = None
+
+        # Map from the ID of each async_run() request whose results
+        # have not been read to its (grpc.Future, outputs,
+        # batch_size, _RequestTrace). 'ready' holds the IDs of those
+        # requests that have completed, in completion order.
+        self._cv = threading.Condition()
+        self._next_request_id = 1
+        self._requests = dict()
+        self._ready = list()
+
+        if channel is None:
+            channel = get_channel(url, channel_options)
+        self._infer = channel.unary_unary(
+            _INFER_METHOD, request_serializer=None,
+            response_deserializer=grpc_service_pb2.InferResponse.FromString)
+        status = channel.unary_unary(
+            _STATUS_METHOD,
+            request_serializer=grpc_service_pb2.StatusRequest.SerializeToString,
+            response_deserializer=grpc_service_pb2.StatusResponse.FromString)
+
+        try:
+            status_response = status(grpc_service_pb2.StatusRequest(model_name=model_name))
+        except grpc.RpcError as rpc_error:
+            _raise_rpc_error(rpc_error)
+        self._metadata = _model_metadata(status_response, model_name, model_version)
+        if self._verbose:
+            print("GrpcInferContext for '" + model_name + "' at " + url)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def _check_open(self):
+        if self._infer is None:
+            _raise_error("context is closed")
+
+    def _request(self, inputs, outputs, batch_size, flags):
+        # Return the request and its _RequestTrace, or None for the
+        # trace if the context has no trace hook.
+        self._check_open()
+        hook = self._trace_hook
+        if hook is None:
+            return (_build_request(self._model_name, self._model_version,
+                                   self._correlation_id, inputs, outputs, batch_size, flags),
+                    None)
+
+        trace = _RequestTrace(hook, self, self._model_name)
+        trace.mark(TraceEventType.PREPARE_START)
+        try:
+            request = _build_request(self._model_name, self._model_version,
+                                     self._correlation_id, inputs, outputs, batch_size, flags)
+        except InferenceServerException as ex:
+            trace.fail(ex)
+            raise
+        trace.mark(TraceEventType.PREPARE_END)
+        trace.mark(TraceEventType.SEND)
+        return request, trace
+
+    def _get_traced_results(self, get_response, outputs, batch_size, trace):
+        # Return the results of the response returned by
+        # 'get_response'. The RESPONSE (unless already marked) and
+        # DECODED, or ERROR, events of the request are reported to
+        # 'trace' if not None.
+        try:
+            try:
+                response = get_response()
+            except grpc.RpcError as rpc_error:
+                _raise_rpc_error(rpc_error)
+            if (trace is not None) and (trace.events[-1][0] != TraceEventType.RESPONSE):
+                trace.mark(TraceEventType.RESPONSE)
+            results = self._get_results(response, outputs, batch_size)
+        except InferenceServerException as ex:
+            if trace is not None:
+                trace.fail(ex)
+            raise
+        if trace is not None:
+            trace.mark(TraceEventType.DECODED)
+            trace.emit(self._last_request_id)
+        return results
+
+    def _get_results(self, response, outputs, batch_size):
+        self._last_request_id = _raise_if_status_error(response.request_status)
+        self._last_request_model_name = response.meta_data.model_name
+        self._last_request_model_version = response.meta_data.model_version
+        return _decode_response(response, self._metadata, outputs, batch_size)
+
+    def close(self):
+        """Close the context. Any future calls to object will result in an
+        Error. The shared channel is not closed.
+
+        """
+        self._infer = None
+
+    def correlation_id(self):
+        """Get the correlation ID associated with the context.
+
+        Returns
+        -------
+        int
+            The correlation ID.
+
+        """
+        return self._correlation_id
+
+    def model_metadata(self):
+        """Get the metadata of the model read when the context was created.
+
+        Returns
+        -------
+        ModelMetadata
+            The metadata of the model.
+
+        """
+        return self._metadata
+
+    def run(self, inputs, outputs, batch_size=1, flags=0):
+        """Run inference using the supplied 'inputs' to calculate the outputs
+        specified by 'outputs'. See InferContext.run().
+
+        Raises
+        ------
+        InferenceServerException
+            If all inputs are not specified, if the size of input data
+            does not match expectations, if unknown output names are
+            specified or if server fails to perform inference.
+
+        """
+        self._last_request_id = None
+        self._last_request_model_name = None
+        self._last_request_model_version = None
+
+        request, trace = self._request(inputs, outputs, batch_size, flags)
+        return self._get_traced_results(lambda: self._infer(request), outputs, batch_size,
+                                        trace)
+
+    def async_run(self, inputs, outputs, batch_size=1, flags=0, callback=None):
+        """Run inference using the supplied 'inputs' to calculate the outputs
+        specified by 'outputs'. See InferContext.async_run().
+
+        Returns
+        -------
+        int
+            Integer identifier which must be passed to
+            get_async_run_results() to wait on and retrieve the
+            inference results.
+
+        Raises
+        ------
+        InferenceServerException
+            If all inputs are not specified, if the size of input data
+            does not match expectations or if unknown output names are
+            specified.
+
+        """
+        request, trace = self._request(inputs, outputs, batch_size, flags)
+        if callback is not None:
+            future = self._send_future(request, outputs, batch_size, trace)
+            future.add_done_callback(callback)
+            with self._cv:
+                request_id = self._next_request_id
+                self._next_request_id += 1
+            return request_id
+
+        with self._cv:
+            request_id = self._next_request_id
+            self._next_request_id += 1
+            rpc_future = self._infer.future(request)
+            self._requests[request_id] = (rpc_future, outputs, batch_size, trace)
+
+        rpc_future.add_done_callback(lambda f: self._on_complete(request_id))
+        return request_id
+
+    def _on_complete(self, request_id):
+        with self._cv:
+            if request_id in self._requests:
+                trace = self._requests[request_id][3]
+                if trace is not None:
+                    trace.mark(TraceEventType.RESPONSE)
+                self._ready.append(request_id)
+                self._cv.notify_all()
+
+    def _send_future(self, request, outputs, batch_size, trace=None):
+        # Imported here since concurrent.futures is slow to import.
+        from concurrent.futures import Future
+        future = Future()
+        future.set_running_or_notify_cancel()
+
+        def complete(rpc_future):
+            try:
+                try:
+                    response = rpc_future.result()
+                except grpc.RpcError as rpc_error:
+                    _raise_rpc_error(rpc_error)
+                if trace is not None:
+                    trace.mark(TraceEventType.RESPONSE)
+                request_id = _raise_if_status_error(response.request_status)
+                results = _decode_response(response, self._metadata, outputs, batch_size)
+            except InferenceServerException as ex:
+                if trace is not None:
+                    trace.fail(ex)
+                future.set_exception(ex)
+                return
+            except Exception as ex:
+                future.set_exception(ex)
+                return
+            if trace is not None:
+                trace.mark(TraceEventType.DECODED)
+                trace.emit(request_id)
+            future.set_result(results)
+
+        self._infer.future(request).add_done_callback(complete)
+        return future
+
+    def async_run_future(self, inputs, outputs, batch_size=1, flags=0):
+        """Run inference using the supplied 'inputs' to calculate the outputs
+        specified by 'outputs'. See InferContext.async_run_future().
+        The futures are resolved, and their callbacks called, from a
+        grpcio thread.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            The future whose result is the dictionary from output
+            name to the output values, as returned by run(). If the
+            server fails to perform inference the future holds the
+            InferenceServerException.
+
+        Raises
+        ------
+        InferenceServerException
+            If all inputs are not specified, if the size of input data
+            does not match expectations or if unknown output names are
+            specified.
+
+        """
+        request, trace = self._request(inputs, outputs, batch_size, flags)
+        return self._send_future(request, outputs, batch_size, trace)
+
+    def get_async_run_results(self, request_id, wait):
+        """Retrieve the results of a previous async_run() using the supplied
+        'request_id'. See InferContext.get_async_run_results().
+
+        Raises
+        ------
+        InferenceServerException
+            If the request ID supplied is not valid or if the server
+            fails to perform inference.
+
+        """
+        with self._cv:
+            if request_id not in self._requests:
+                _raise_error("unable to find request with ID " + str(request_id))
+            rpc_future, outputs, batch_size, trace = self._requests[request_id]
+            if not wait and not rpc_future.done():
+                return None
+            del self._requests[request_id]
+            if request_id in self._ready:
+                self._ready.remove(request_id)
+
+        self._last_request_id = None
+        return self._get_traced_results(rpc_future.result, outputs, batch_size, trace)
+
+    def get_ready_async_request(self, wait):
+        """Get the request ID of an async_run() request that has completed but
+        not yet had results read with get_async_run_results(). See
+        InferContext.get_ready_async_request().
+
+        Raises
+        ------
+        InferenceServerException
+            If no asynchronous request is in flight or completed.
+
+        """
+        with self._cv:
+            while not self._ready:
+                if not self._requests:
+                    _raise_error("No asynchronous requests have been sent")
+                if not wait:
+                    return None
+                self._cv.wait()
+            return self._ready[0]
+
+    def set_trace_hook(self, hook):
+        """Set the hook that receives the lifecycle events of the
+        requests made by this context. See
+        InferContext.set_trace_hook(), except that the events of a
+        request are reported once its response is decoded, with the
+        request ID assigned by the server, and that the hook may be
+        called from a grpcio thread.
+
+        Parameters
+        ----------
+        hook : callable
+            Called with a TraceEvent for each event, or None to stop
+            tracing.
+
+        """
+        self._trace_hook = hook
+
+    def get_last_request_id(self):
+        """Get the request ID of the most recent run() request.
+
+        Returns
+        -------
+        int
+            The request ID, or None if a request has not yet been made
+            or if the last request was not successful.
+
+        """
+        return self._last_request_id
+
+    def get_last_request_model_name(self):
+        """Get the model name used in the most recent run() request.
+
+        Returns
+        -------
+        str
+            The model name, or None if a request has not yet been made
+            or if the last request was not successful.
+
+        """
+        return self._last_request_model_name
+
+    def get_last_request_model_version(self):
+        """Get the model version used in the most recent run() request.
+
+        Returns
+        -------
+        int
+            The model version, or None if a request has not yet been made
+            or if the last request was not successful.
+
+        """
+        return self._last_request_model_version
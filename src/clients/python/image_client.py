@@ -27,6 +27,7 @@
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 import argparse
+import collections
 import numpy as np
 import os
 from builtins import range
@@ -67,14 +68,7 @@ def parse_model(url, protocol, model_name, batch_size, verbose=False):
     requirements for an image classification network (as expected by
     this client)
     """
-    ctx = ServerStatusContext(url, protocol, model_name, verbose)
-    server_status = ctx.get_server_status()
-
-    if model_name not in server_status.model_status:
-        raise Exception("unable to get status for '" + model_name + "'")
-
-    status = server_status.model_status[model_name]
-    config = status.config
+    config = ModelMetadataCache.instance().get(url, protocol, model_name).config
 
     if len(config.input) != 1:
         raise Exception("expecting 1 input, got {}".format(len(config.input)))
@@ -209,6 +203,9 @@ if __name__ == '__main__':
                         help='Enable verbose output')
     parser.add_argument('-a', '--async', action="store_true", required=False, default=False,
                         help='Use asynchronous inference API')
+    parser.add_argument('-w', '--window', type=int, required=False, default=8,
+                        help='Maximum number of asynchronous requests in flight. ' +
+                        'Default is 8.')
     parser.add_argument('--streaming', action="store_true", required=False, default=False,
                         help='Use streaming inference API. ' +
                         'The flag is only available with gRPC protocol.')
@@ -256,50 +253,54 @@ if __name__ == '__main__':
 
     filenames.sort()
 
-    # Preprocess the images into input data according to model
-    # requirements
-    image_data = []
-    for filename in filenames:
-        img = Image.open(filename)
-        image_data.append(preprocess(img, format, dtype, c, h, w, FLAGS.scaling))
-
-    # Send requests of FLAGS.batch_size images. If the number of
-    # images isn't an exact multiple of FLAGS.batch_size then just
-    # start over with the first images until the batch is filled.
-    results = []
-    result_filenames = []
-    request_ids = []
-    image_idx = 0
-    last_request = False
-    while not last_request:
-        input_filenames = []
-        input_batch = []
-        for idx in range(FLAGS.batch_size):
-            input_filenames.append(filenames[image_idx])
-            input_batch.append(image_data[image_idx])
-            image_idx = (image_idx + 1) % len(image_data)
-            if image_idx == 0:
-                last_request = True
-
-        result_filenames.append(input_filenames)
-
-        # Send request
-        if not FLAGS.async:
-            results.append(ctx.run(
-                { input_name : input_batch },
-                { output_name : (InferContext.ResultFormat.CLASS, FLAGS.classes) },
-                FLAGS.batch_size))
-        else:
-            request_ids.append(ctx.async_run(
-                { input_name : input_batch },
-                { output_name : (InferContext.ResultFormat.CLASS, FLAGS.classes) },
-                FLAGS.batch_size))
-
-    # For async, retrieve results according to the send order
-    if FLAGS.async:
-        for request_id in request_ids:
-            results.append(ctx.get_async_run_results(request_id, True))
-
-    for idx in range(len(results)):
+    def requests():
+        # Generate the filenames and inputs of requests of
+        # FLAGS.batch_size images, preprocessing the images into input
+        # data according to model requirements only as the requests
+        # are sent. If the number of images isn't an exact multiple of
+        # FLAGS.batch_size then just start over with the first images,
+        # which are kept, until the batch is filled.
+        first_images = []
+        image_idx = 0
+        last_request = False
+        while not last_request:
+            input_filenames = []
+            input_batch = []
+            for idx in range(FLAGS.batch_size):
+                if last_request:
+                    image = first_images[image_idx]
+                else:
+                    img = Image.open(filenames[image_idx])
+                    image = preprocess(img, format, dtype, c, h, w, FLAGS.scaling)
+                    if image_idx < FLAGS.batch_size:
+                        first_images.append(image)
+                input_filenames.append(filenames[image_idx])
+                input_batch.append(image)
+                image_idx = (image_idx + 1) % len(filenames)
+                if image_idx == 0:
+                    last_request = True
+
+            yield input_filenames, { input_name : input_batch }
+
+    outputs = { output_name : (InferContext.ResultFormat.CLASS, FLAGS.classes) }
+
+    # For async, keep up to FLAGS.window requests in flight and
+    # retrieve results according to the send order. The filenames of
+    # the requests sent but not yet completed wait in
+    # 'pending_filenames'.
+    if not FLAGS.async:
+        results = ((input_filenames, ctx.run(inputs, outputs, FLAGS.batch_size))
+                   for input_filenames, inputs in requests())
+    else:
+        pending_filenames = collections.deque()
+        def send_inputs():
+            for input_filenames, inputs in requests():
+                pending_filenames.append(input_filenames)
+                yield inputs
+        results = ((pending_filenames.popleft(), result)
+                   for result in ctx.imap(send_inputs(), outputs, FLAGS.window,
+                                          True, FLAGS.batch_size))
+
+    for idx, (input_filenames, result) in enumerate(results):
         print("Request {}, batch size {}".format(idx, FLAGS.batch_size))
-        postprocess(results[idx], result_filenames[idx], FLAGS.batch_size)
+        postprocess(result, input_filenames, FLAGS.batch_size)
@@ -0,0 +1,731 @@
+# Copyright (c) 2019, NVIDIA CORPORATION. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#  * Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#  * Neither the name of NVIDIA CORPORATION nor the names of its
+#    contributors may be used to endorse or promote products derived
+#    from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS ``AS IS'' AND ANY
+# EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY
+# OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+
+"""Monitor of the inference statistics in the server status.
+
+The ServerStatus reports, for each model, version and batch size,
+cumulative counts and durations of the successful and failed
+requests and of the time they spent queued and computing.
+StatusMonitor polls the status, at a fixed interval on a background
+thread (start()) or when asked (poll()), and keeps the difference of
+each pair of successive snapshots as a StatusInterval in a fixed-size
+history. A StatusInterval gives the throughput, the average request,
+queue and compute time, and the batch-size distribution of the
+requests completed during the interval.
+
+The module can also be run as a script, use 'python -m
+tensorrtserver.monitor --help' for the options.
+
+"""
+
+from __future__ import print_function
+import argparse
+import collections
+import csv
+import json
+import sys
+import threading
+import time
+from builtins import range
+from future.utils import iteritems
+
+from tensorrtserver.api import InferenceServerException, ServerStatusContext
+from tensorrtserver.api import ProtocolType, _raise_error
+
+# Monotonic high-resolution clock where available.
+_now = getattr(time, 'perf_counter', time.time)
+
+# Indices of the counters of a (model, version, batch size) in a
+# snapshot. Each StatDuration of InferRequestStats is a count and a
+# total time.
+_SUCCESS_COUNT, _SUCCESS_NS, _FAILED_COUNT, _FAILED_NS, \
+    _QUEUE_COUNT, _QUEUE_NS, _COMPUTE_COUNT, _COMPUTE_NS = range(8)
+_COUNTERS = 8
+
+def _snapshot(server_status):
+    # Flatten the inference statistics of a ServerStatus to a map from
+    # (model name, version, batch size) to a tuple of the counters.
+    counters = dict()
+    for model_name, model_status in iteritems(server_status.model_status):
+        for version, version_status in iteritems(model_status.version_status):
+            for batch_size, stats in iteritems(version_status.infer_stats):
+                counters[(model_name, version, batch_size)] = (
+                    stats.success.count, stats.success.total_time_ns,
+                    stats.failed.count, stats.failed.total_time_ns,
+                    stats.queue.count, stats.queue.total_time_ns,
+                    stats.compute.count, stats.compute.total_time_ns)
+    return counters
+
+def _diff(current, previous):
+    # Map from each key of 'current' with requests since 'previous'
+    # to the difference of its counters. A counter that decreased
+    # means the model was reloaded, and its statistics restarted from
+    # zero, since 'previous'.
+    deltas = dict()
+    for key, counters in iteritems(current):
+        prev = previous.get(key)
+        if prev == counters:
+            continue
+        if (prev is not None) and all(c >= p for c, p in zip(counters, prev)):
+            counters = tuple(c - p for c, p in zip(counters, prev))
+        if (counters[_SUCCESS_COUNT] > 0) or (counters[_FAILED_COUNT] > 0):
+            deltas[key] = counters
+    return deltas
+
+class ModelStats:
+    """The inference statistics of a model during a StatusInterval.
+
+    Attributes
+    ----------
+    model_name : str
+        The name of the model.
+
+    model_version : int
+        The version of the model, or None if the statistics are the
+        sum of all versions.
+
+    batch_size : int
+        The batch size of the requests, or None if the statistics
+        are the sum of all batch sizes.
+
+    request_count : int
+        The number of requests that completed successfully.
+
+    failed_count : int
+        The number of requests that failed.
+
+    inference_count : int
+        The number of inferences of the successful requests, i.e.
+        the sum of their batch sizes.
+
+    request_rate : float
+        Successful requests per second.
+
+    throughput : float
+        Inferences per second.
+
+    request_avg_us, queue_avg_us, compute_avg_us : float
+        The average time of the successful requests, from when the
+        server received the request until it sent the response, and
+        the average time they spent queued and computing, in
+        microseconds.
+
+    """
+    # The fields in the order used for CSV output.
+    FIELDS = ('model_name', 'model_version', 'batch_size',
+              'request_count', 'failed_count', 'inference_count',
+              'request_rate', 'throughput',
+              'request_avg_us', 'queue_avg_us', 'compute_avg_us')
+
+    def __init__(self, model_name, model_version, batch_size, duration_s,
+                 counters, inference_count):
+        self.model_name = model_name
+        self.model_version = model_version
+        self.batch_size = batch_size
+        self.request_count = counters[_SUCCESS_COUNT]
+        self.failed_count = counters[_FAILED_COUNT]
+        self.inference_count = inference_count
+        if duration_s > 0:
+            self.request_rate = self.request_count / duration_s
+            self.throughput = inference_count / duration_s
+        else:
+            self.request_rate = 0.0
+            self.throughput = 0.0
+        self.request_avg_us = _avg_us(counters[_SUCCESS_NS], counters[_SUCCESS_COUNT])
+        self.queue_avg_us = _avg_us(counters[_QUEUE_NS], counters[_QUEUE_COUNT])
+        self.compute_avg_us = _avg_us(counters[_COMPUTE_NS], counters[_COMPUTE_COUNT])
+
+    def as_dict(self):
+        """Get the statistics as a dict.
+
+        Returns
+        -------
+        dict
+            Map from each name in FIELDS to its value.
+
+        """
+        return { field : getattr(self, field) for field in ModelStats.FIELDS }
+
+    def __str__(self):
+        name = self.model_name
+        if self.model_version is not None:
+            name += ' v' + str(self.model_version)
+        if self.batch_size is not None:
+            name += ' batch ' + str(self.batch_size)
+        return ("{}: {:.1f} infer/sec, {:.1f} req/sec, {} failed, "
+                "request {:.0f} usec (queue {:.0f} + compute {:.0f} usec)").format(
+                    name, self.throughput, self.request_rate, self.failed_count,
+                    self.request_avg_us, self.queue_avg_us, self.compute_avg_us)
+
+def _avg_us(total_ns, count):
+    return (total_ns / (count * 1000.0)) if count > 0 else 0.0
+
+class StatusInterval:
+    """The inference statistics of the requests completed between two
+    polls of the server status.
+
+    Attributes
+    ----------
+    start_time : float
+        The time of the first poll, in seconds since the epoch.
+
+    end_time : float
+        The time of the second poll, in seconds since the epoch.
+
+    duration_s : float
+        The duration of the interval, in seconds, measured with the
+        server uptime when it is available.
+
+    """
+    def __init__(self, start_time, end_time, duration_s, deltas):
+        self.start_time = start_time
+        self.end_time = end_time
+        self.duration_s = duration_s
+        # Map from (model name, version, batch size) to the counters.
+        self._deltas = deltas
+
+    def models(self):
+        """Get the models and versions with requests in the interval.
+
+        Returns
+        -------
+        list of (str, int)
+            The sorted (model name, version) pairs.
+
+        """
+        return sorted(set((key[0], key[1]) for key in self._deltas))
+
+    def stats(self, model_name=None, model_version=None):
+        """Get the statistics of each batch size.
+
+        Parameters
+        ----------
+        model_name : str
+            The name of the model, or None for all models.
+
+        model_version : int
+            The version of the model, or None for all versions.
+
+        Returns
+        -------
+        list of ModelStats
+            The statistics of each model, version and batch size with
+            requests in the interval, sorted by model name, version
+            and batch size.
+
+        """
+        return [ ModelStats(key[0], key[1], key[2], self.duration_s, counters,
+                            counters[_SUCCESS_COUNT] * key[2])
+                 for key, counters in sorted(self._select(model_name, model_version)) ]
+
+    def model_stats(self, model_name, model_version=None):
+        """Get the statistics of a model summed over all batch sizes.
+
+        Parameters
+        ----------
+        model_name : str
+            The name of the model.
+
+        model_version : int
+            The version of the model, or None to sum all versions.
+
+        Returns
+        -------
+        ModelStats
+            The statistics of the model, with a 'batch_size' of None.
+            The counts are zero if the model had no requests.
+
+        """
+        totals = [ 0 ] * _COUNTERS
+        inference_count = 0
+        for key, counters in self._select(model_name, model_version):
+            for i in range(_COUNTERS):
+                totals[i] += counters[i]
+            inference_count += counters[_SUCCESS_COUNT] * key[2]
+        return ModelStats(model_name, model_version, None, self.duration_s,
+                          totals, inference_count)
+
+    def batch_size_distribution(self, model_name, model_version=None):
+        """Get the fraction of the successful requests of a model with
+        each batch size.
+
+        Parameters
+        ----------
+        model_name : str
+            The name of the model.
+
+        model_version : int
+            The version of the model, or None for all versions.
+
+        Returns
+        -------
+        dict
+            Map from batch size to the fraction of the requests with
+            that batch size. Empty if the model had no successful
+            requests.
+
+        """
+        counts = dict()
+        for key, counters in self._select(model_name, model_version):
+            counts[key[2]] = counts.get(key[2], 0) + counters[_SUCCESS_COUNT]
+        total = sum(counts.values())
+        if total == 0:
+            return dict()
+        return { batch_size : count / float(total)
+                 for batch_size, count in iteritems(counts) if count > 0 }
+
+    def as_dict(self):
+        """Get the interval as a dict that can be serialized as JSON.
+
+        Returns
+        -------
+        dict
+            The 'start_time', 'end_time' and 'duration_s' of the
+            interval and a list of 'models', each the dict of
+            the ModelStats of a model and version with a list of
+            the ModelStats of each of its 'batch_sizes' and the
+            'batch_size_distribution'.
+
+        """
+        models = list()
+        for model_name, model_version in self.models():
+            model = self.model_stats(model_name, model_version).as_dict()
+            model['batch_sizes'] = [ stats.as_dict()
+                                     for stats in self.stats(model_name, model_version) ]
+            model['batch_size_distribution'] = {
+                str(batch_size) : fraction for batch_size, fraction in
+                iteritems(self.batch_size_distribution(model_name, model_version)) }
+            models.append(model)
+        return { 'start_time' : self.start_time, 'end_time' : self.end_time,
+                 'duration_s' : self.duration_s, 'models' : models }
+
+    def _select(self, model_name, model_version):
+        return [ (key, counters) for key, counters in iteritems(self._deltas)
+                 if (((model_name is None) or (key[0] == model_name)) and
+                     ((model_version is None) or (key[1] == model_version))) ]
+
+def merge_intervals(intervals):
+    """Combine successive intervals into one.
+
+    Parameters
+    ----------
+    intervals : list of StatusInterval
+        The intervals, oldest first.
+
+    Returns
+    -------
+    StatusInterval
+        The interval from the start of the first to the end of the
+        last interval, or None if 'intervals' is empty.
+
+    """
+    if len(intervals) == 0:
+        return None
+    deltas = dict()
+    for interval in intervals:
+        for key, counters in iteritems(interval._deltas):
+            total = deltas.get(key)
+            deltas[key] = counters if total is None else \
+                tuple(t + c for t, c in zip(total, counters))
+    return StatusInterval(intervals[0].start_time, intervals[-1].end_time,
+                          sum(interval.duration_s for interval in intervals), deltas)
+
+class StatusMonitor:
+    """A StatusMonitor polls the status of an inference server and
+    keeps the inference statistics of the most recent intervals
+    between polls.
+
+    Parameters
+    ----------
+    url : str
+        The inference server URL, e.g. localhost:8000.
+
+    protocol : ProtocolType
+        The protocol used to communicate with the server.
+
+    model_name : str
+        The name of the model to monitor, or None to monitor all
+        models.
+
+    interval_s : float
+        The time, in seconds, between polls made by the background
+        thread.
+
+    history : int
+        The number of intervals kept. When the history is full the
+        oldest interval is discarded.
+
+    callback : function
+        If not None, called with each new StatusInterval. Calls are
+        made on the thread that polled the status, so the callback
+        should return quickly.
+
+    verbose : bool
+        If True generate verbose output.
+
+    """
+    def __init__(self, url, protocol, model_name=None, interval_s=1.0, history=60,
+                 callback=None, verbose=False):
+        if interval_s <= 0:
+            raise ValueError("interval must be positive")
+        if history < 1:
+            raise ValueError("history must be at least 1")
+        self._ctx = ServerStatusContext(url, protocol, model_name, verbose)
+        self._interval_s = interval_s
+        self._callback = callback
+        self._history = collections.deque(maxlen=history)
+
+        # Serializes polls. The history has its own lock so that
+        # reading it does not wait for a poll in progress.
+        self._poll_lock = threading.Lock()
+        self._lock = threading.Lock()
+        # (time, clock, server id, uptime ns, counters) of the last
+        # successful poll.
+        self._last = None
+        self._poll_count = 0
+        self._error_count = 0
+        self._last_error = None
+
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def start(self):
+        """Poll the status every 'interval_s' seconds on a background
+        thread, starting immediately. A failure to get the status is
+        counted and available from get_stats(), and the thread
+        continues with the next poll.
+
+        """
+        if self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run)
+            self._thread.daemon = True
+            self._thread.start()
+
+    def stop(self):
+        """Stop the background thread. Does nothing if the thread is
+        not started.
+
+        """
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        """Stop the background thread and close the status context.
+        Any future calls to poll() will result in an Error. The
+        history is still available.
+
+        """
+        self.stop()
+        with self._poll_lock:
+            if self._ctx is not None:
+                self._ctx.close()
+                self._ctx = None
+
+    def poll(self):
+        """Get the server status and record the interval since the
+        previous poll.
+
+        Returns
+        -------
+        StatusInterval
+            The new interval, or None if this is the first successful
+            poll, or the server restarted since the previous poll, in
+            which case the status is only the start of the next
+            interval.
+
+        Raises
+        ------
+        InferenceServerException
+            If unable to get the server status.
+
+        """
+        with self._poll_lock:
+            if self._ctx is None:
+                _raise_error("StatusMonitor is closed")
+            try:
+                server_status = self._ctx.get_server_status()
+            except InferenceServerException as ex:
+                with self._lock:
+                    self._error_count += 1
+                    self._last_error = ex
+                raise
+            current = (time.time(), _now(), server_status.id,
+                       server_status.uptime_ns, _snapshot(server_status))
+
+            interval = None
+            last = self._last
+            restarted = (last is not None) and \
+                ((current[2] != last[2]) or (current[3] < last[3]))
+            if (last is not None) and not restarted:
+                # The server uptime does not include the latency of
+                # the status requests, use it when reported.
+                if current[3] > last[3]:
+                    duration_s = (current[3] - last[3]) / 1e9
+                else:
+                    duration_s = current[1] - last[1]
+                interval = StatusInterval(last[0], current[0], duration_s,
+                                          _diff(current[4], last[4]))
+            self._last = current
+
+            with self._lock:
+                self._poll_count += 1
+                if interval is not None:
+                    self._history.append(interval)
+
+        if (interval is not None) and (self._callback is not None):
+            self._callback(interval)
+        return interval
+
+    def history(self):
+        """Get the intervals in the history.
+
+        Returns
+        -------
+        list of StatusInterval
+            The intervals, oldest first.
+
+        """
+        with self._lock:
+            return list(self._history)
+
+    def latest(self):
+        """Get the most recent interval.
+
+        Returns
+        -------
+        StatusInterval
+            The most recent interval, or None if the history is
+            empty.
+
+        """
+        with self._lock:
+            return self._history[-1] if len(self._history) > 0 else None
+
+    def summary(self, count=None):
+        """Get the combined statistics of the most recent intervals.
+
+        Parameters
+        ----------
+        count : int
+            The number of intervals to combine, or None to combine the
+            whole history.
+
+        Returns
+        -------
+        StatusInterval
+            The combined interval, or None if the history is empty.
+
+        """
+        intervals = self.history()
+        if count is not None:
+            intervals = intervals[-count:] if count > 0 else []
+        return merge_intervals(intervals)
+
+    def clear(self):
+        """Discard the history. The next poll still records the
+        interval since the previous poll.
+
+        """
+        with self._lock:
+            self._history.clear()
+
+    def get_stats(self):
+        """Get statistics of the monitor.
+
+        Returns
+        -------
+        dict
+            The number of successful 'polls', the number of
+            'poll_errors', the 'last_error' as an
+            InferenceServerException or None, and the number of
+            'intervals' in the history and its 'capacity'.
+
+        """
+        with self._lock:
+            return { 'polls' : self._poll_count,
+                     'poll_errors' : self._error_count,
+                     'last_error' : self._last_error,
+                     'intervals' : len(self._history),
+                     'capacity' : self._history.maxlen }
+
+    def _run(self):
+        deadline = _now()
+        while True:
+            try:
+                self.poll()
+            except InferenceServerException:
+                pass
+            # Keep polls on the interval grid, skipping polls missed
+            # because the status request took too long.
+            deadline += self._interval_s
+            now = _now()
+            if deadline < now:
+                deadline += ((now - deadline) // self._interval_s + 1) * self._interval_s
+            if self._stop_event.wait(deadline - now):
+                break
+
+def _text_lines(interval):
+    lines = list()
+    models = interval.models()
+    if len(models) == 0:
+        lines.append("  no requests")
+    for model_name, model_version in models:
+        lines.append("  " + str(interval.model_stats(model_name, model_version)))
+        distribution = interval.batch_size_distribution(model_name, model_version)
+        if len(distribution) > 0:
+            lines.append("    batch sizes: " + ", ".join(
+                "{}: {:.1f}%".format(batch_size, fraction * 100.0)
+                for batch_size, fraction in sorted(iteritems(distribution))))
+    return lines
+
+class _Writer:
+    # Writes each interval to a file as text, CSV rows or a line of
+    # JSON.
+    def __init__(self, f, format, per_batch_size):
+        self._f = f
+        self._format = format
+        self._per_batch_size = per_batch_size
+        self._csv = None
+        if format == 'csv':
+            self._csv = csv.DictWriter(
+                f, fieldnames=('end_time', 'duration_s') + ModelStats.FIELDS)
+            self._csv.writeheader()
+
+    def write(self, interval):
+        if self._format == 'json':
+            self._f.write(json.dumps(interval.as_dict()) + '\n')
+        elif self._format == 'csv':
+            for model_name, model_version in interval.models():
+                rows = [ interval.model_stats(model_name, model_version) ]
+                if self._per_batch_size:
+                    rows += interval.stats(model_name, model_version)
+                for stats in rows:
+                    row = stats.as_dict()
+                    row['end_time'] = interval.end_time
+                    row['duration_s'] = interval.duration_s
+                    self._csv.writerow(row)
+        else:
+            self._f.write(time.strftime('%H:%M:%S', time.localtime(interval.end_time)) +
+                          " ({:.2f} sec)\n".format(interval.duration_s))
+            for line in _text_lines(interval):
+                self._f.write(line + '\n')
+        self._f.flush()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m tensorrtserver.monitor',
+        description='Monitor the inference statistics of the models of an ' +
+        'inference server.')
+    parser.add_argument('-v', '--verbose', action="store_true", required=False, default=False,
+                        help='Enable verbose output')
+    parser.add_argument('-m', '--model-name', type=str, required=False,
+                        help='Name of model. Default is to monitor all models.')
+    parser.add_argument('-u', '--url', type=str, required=False, default='localhost:8000',
+                        help='Inference server URL. Default is localhost:8000.')
+    parser.add_argument('-i', '--protocol', type=str, required=False, default='HTTP',
+                        help='Protocol (HTTP/gRPC) used to ' +
+                        'communicate with inference service. Default is HTTP.')
+    parser.add_argument('-t', '--interval', type=float, required=False, default=1.0,
+                        help='Time between polls of the server status in sec. ' +
+                        'Default is 1.0.')
+    parser.add_argument('-n', '--count', type=int, required=False, default=0,
+                        help='Number of intervals to report. Default is 0, to ' +
+                        'report until interrupted.')
+    parser.add_argument('--history', type=int, required=False, default=60,
+                        help='Number of intervals summarized at exit. Default is 60.')
+    parser.add_argument('--batch-sizes', action="store_true", required=False, default=False,
+                        help='Also report each batch size in CSV output.')
+    parser.add_argument('-f', '--file', type=str, required=False,
+                        help='Write the intervals to this file. Default is stdout.')
+    parser.add_argument('--format', type=str, required=False, default='text',
+                        choices=('text', 'csv', 'json'),
+                        help='Format of the intervals. Default is text.')
+    FLAGS = parser.parse_args(argv)
+
+    if FLAGS.interval <= 0:
+        parser.error('--interval must be positive')
+    if FLAGS.history < 1:
+        parser.error('--history must be at least 1')
+
+    try:
+        monitor = StatusMonitor(FLAGS.url, ProtocolType.from_str(FLAGS.protocol),
+                                FLAGS.model_name, FLAGS.interval, FLAGS.history,
+                                verbose=FLAGS.verbose)
+    except InferenceServerException as ex:
+        print("error: " + str(ex), file=sys.stderr)
+        return 1
+
+    f = None
+    try:
+        try:
+            monitor.poll()
+        except InferenceServerException as ex:
+            print("error: " + str(ex), file=sys.stderr)
+            return 1
+
+        f = sys.stdout if FLAGS.file is None else open(FLAGS.file, 'w')
+        writer = _Writer(f, FLAGS.format, FLAGS.batch_sizes)
+        reported = 0
+        deadline = _now()
+        while (FLAGS.count <= 0) or (reported < FLAGS.count):
+            deadline += FLAGS.interval
+            time.sleep(max(0.0, deadline - _now()))
+            try:
+                interval = monitor.poll()
+            except InferenceServerException as ex:
+                print("error: " + str(ex), file=sys.stderr)
+                continue
+            if interval is None:
+                print("server restarted", file=sys.stderr)
+                continue
+            writer.write(interval)
+            reported += 1
+    except KeyboardInterrupt:
+        pass
+    finally:
+        monitor.close()
+        if (f is not None) and (f is not sys.stdout):
+            f.close()
+
+    summary = monitor.summary()
+    if summary is not None:
+        print("Summary of the last {} intervals ({:.2f} sec):".format(
+            len(monitor.history()), summary.duration_s), file=sys.stderr)
+        for line in _text_lines(summary):
+            print(line, file=sys.stderr)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
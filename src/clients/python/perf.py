@@ -0,0 +1,1021 @@
+# Copyright (c) 2019, NVIDIA CORPORATION. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#  * Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#  * Neither the name of NVIDIA CORPORATION nor the names of its
+#    contributors may be used to endorse or promote products derived
+#    from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS ``AS IS'' AND ANY
+# EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY
+# OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Performance analyzer for the inference server using the Python
+client API.
+
+Like perf_client, PerfAnalyzer measures the latency and throughput of
+a model, but the requests are sent with InferContext so the results
+include the overhead of the Python client. Two load modes are
+supported: a closed loop that keeps a fixed number of requests in
+flight (measure_concurrency()), and an open loop that sends requests
+at a fixed rate regardless of how quickly they complete
+(measure_rate()). Server-side latency is computed from the difference
+of the model's ServerStatus statistics at the start and end of the
+measurement window.
+
+StandInServer is a local HTTP server implementing an identity model
+with the same protocol as the inference server. It requires no GPU or
+model repository, so the overhead of the Python client can be tracked
+on any machine.
+
+The module can also be run as a script, use 'python -m
+tensorrtserver.perf --help' for the options.
+
+"""
+
+from __future__ import print_function
+import argparse
+import csv
+import json
+import random
+import sys
+import threading
+import time
+from builtins import range
+from future.utils import iteritems
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+import numpy as np
+
+from tensorrtserver.api import InferContext, InferenceServerException
+from tensorrtserver.api import ModelMetadata, ProtocolType, ServerStatusContext
+from tensorrtserver.api import _get_numpy_dtype
+from tensorrtserver.api import api_pb2, model_config_pb2
+from tensorrtserver.api import request_status_pb2, server_status_pb2
+
+# Monotonic high-resolution clock where available.
+_now = getattr(time, 'perf_counter', time.time)
+
+# The latency percentiles reported by PerfMeasurement.
+_PERCENTILES = (50, 90, 95, 99)
+
+class PerfMeasurement:
+    """The result of measuring one load level.
+
+    Attributes
+    ----------
+    mode : str
+        'concurrency' for a closed-loop measurement or 'rate' for an
+        open-loop measurement.
+
+    load : float
+        The number of requests kept in flight for 'concurrency' mode,
+        or the requests per second sent for 'rate' mode.
+
+    batch_size : int
+        The batch size of each request.
+
+    window_s : float
+        The duration of the measurement window, in seconds.
+
+    request_count : int
+        The number of requests that completed successfully.
+
+    failed_count : int
+        The number of requests that failed.
+
+    throughput : float
+        Inferences per second, i.e. successful requests times the
+        batch size, per second of the window.
+
+    latency_avg_us, latency_p50_us, latency_p90_us, latency_p95_us,
+    latency_p99_us : float
+        Average and percentiles of the client-side latency of the
+        successful requests, in microseconds. For 'rate' mode the
+        latency is measured from the time the request was scheduled
+        to be sent, so that a client falling behind the rate is
+        reflected in the latency.
+
+    server_request_count : int
+        The number of successful requests reported by the server
+        for the model during the window.
+
+    server_request_us, server_queue_us, server_compute_us : float
+        The average request, queue and compute time reported by the
+        server, in microseconds.
+
+    client_overhead_us : float
+        The average latency not accounted for by the server, i.e.
+        the time spent in the client and on the network.
+
+    """
+    # The fields in the order used for CSV output.
+    FIELDS = ('mode', 'load', 'batch_size', 'window_s',
+              'request_count', 'failed_count', 'throughput',
+              'latency_avg_us', 'latency_p50_us', 'latency_p90_us',
+              'latency_p95_us', 'latency_p99_us',
+              'server_request_count', 'server_request_us',
+              'server_queue_us', 'server_compute_us', 'client_overhead_us')
+
+    def __init__(self, mode, load, batch_size, window_s, latencies_us,
+                 failed_count, server_stats):
+        self.mode = mode
+        self.load = load
+        self.batch_size = batch_size
+        self.window_s = window_s
+        self.request_count = len(latencies_us)
+        self.failed_count = failed_count
+        self.throughput = (self.request_count * batch_size) / window_s
+
+        if self.request_count > 0:
+            latencies_us = np.asarray(latencies_us, dtype=np.float64)
+            self.latency_avg_us = float(np.mean(latencies_us))
+            percentiles = np.percentile(latencies_us, _PERCENTILES)
+        else:
+            self.latency_avg_us = 0.0
+            percentiles = [ 0.0 ] * len(_PERCENTILES)
+        for p, value in zip(_PERCENTILES, percentiles):
+            setattr(self, 'latency_p' + str(p) + '_us', float(value))
+
+        count, request_ns, queue_ns, compute_ns = server_stats
+        self.server_request_count = count
+        if count > 0:
+            self.server_request_us = request_ns / (count * 1000.0)
+            self.server_queue_us = queue_ns / (count * 1000.0)
+            self.server_compute_us = compute_ns / (count * 1000.0)
+        else:
+            self.server_request_us = 0.0
+            self.server_queue_us = 0.0
+            self.server_compute_us = 0.0
+        self.client_overhead_us = max(0.0, self.latency_avg_us - self.server_request_us)
+
+    def as_dict(self):
+        """Get the measurement as a dict.
+
+        Returns
+        -------
+        dict
+            Map from each name in FIELDS to its value.
+
+        """
+        return { field : getattr(self, field) for field in PerfMeasurement.FIELDS }
+
+    def __str__(self):
+        return ("{}: {:g}, throughput: {:.1f} infer/sec, latency avg {:.0f} usec "
+                "(p50 {:.0f}, p90 {:.0f}, p95 {:.0f}, p99 {:.0f} usec), "
+                "server {:.0f} usec (queue {:.0f} + compute {:.0f} usec), "
+                "client overhead {:.0f} usec").format(
+                    self.mode.capitalize(), self.load, self.throughput,
+                    self.latency_avg_us, self.latency_p50_us, self.latency_p90_us,
+                    self.latency_p95_us, self.latency_p99_us, self.server_request_us,
+                    self.server_queue_us, self.server_compute_us,
+                    self.client_overhead_us)
+
+def _server_stats(model_status):
+    # Sum the success, queue and compute statistics of all versions
+    # and batch sizes of a ModelStatus. Returns (count, request ns,
+    # queue ns, compute ns).
+    count = request_ns = queue_ns = compute_ns = 0
+    for _, version_status in iteritems(model_status.version_status):
+        for _, stats in iteritems(version_status.infer_stats):
+            count += stats.success.count
+            request_ns += stats.success.total_time_ns
+            queue_ns += stats.queue.total_time_ns
+            compute_ns += stats.compute.total_time_ns
+    return (count, request_ns, queue_ns, compute_ns)
+
+class PerfAnalyzer:
+    """A PerfAnalyzer measures the latency and throughput of a model
+    under load generated with InferContext. Each measurement warms up
+    for 'warmup_ms' and then measures the requests sent during the
+    following 'window_ms'.
+
+    Parameters
+    ----------
+    url : str
+        The inference server URL, e.g. localhost:8000.
+
+    protocol : ProtocolType
+        The protocol used to communicate with the server.
+
+    model_name : str
+        The name of the model.
+
+    model_version : int
+        The version of the model, or None to indicate the latest
+        (i.e. highest version number) version.
+
+    batch_size : int
+        The batch size of each request.
+
+    input_shapes : dict
+        Map from input name to the shape, without the batch
+        dimension, to use for an input with variable-size
+        dimensions. Variable-size dimensions of other inputs are
+        given size 1.
+
+    outputs : dict
+        The outputs to request, in the form accepted by
+        InferContext.run(). None requests every output of the model
+        in RAW format.
+
+    window_ms : int
+        The duration of the measurement window, in milliseconds.
+
+    warmup_ms : int
+        The duration of the load generated before each measurement
+        window, in milliseconds.
+
+    verbose : bool
+        If True generate verbose output for requests.
+
+    Raises
+    ------
+    InferenceServerException
+        If unable to get the status of the model.
+
+    """
+    def __init__(self, url, protocol, model_name, model_version=None,
+                 batch_size=1, input_shapes=None, outputs=None,
+                 window_ms=5000, warmup_ms=1000, verbose=False):
+        self._url = url
+        self._protocol = protocol
+        self._model_name = model_name
+        self._model_version = model_version
+        self._batch_size = batch_size
+        self._window_s = window_ms / 1000.0
+        self._warmup_s = warmup_ms / 1000.0
+        self._verbose = verbose
+
+        ctx = ServerStatusContext(url, protocol, model_name, verbose)
+        try:
+            server_status = ctx.get_server_status()
+        finally:
+            ctx.close()
+        if model_name not in server_status.model_status:
+            raise InferenceServerException(
+                None, "unable to get status for '" + model_name + "'")
+        metadata = ModelMetadata(model_name, server_status.model_status[model_name],
+                                 model_version)
+        if ((batch_size < 1) or
+                (batch_size > max(1, metadata.max_batch_size))):
+            raise InferenceServerException(
+                None, "batch size " + str(batch_size) + " is not supported by '" +
+                model_name + "', maximum batch size is " +
+                str(max(1, metadata.max_batch_size)))
+
+        self._inputs = dict()
+        input_shapes = dict() if input_shapes is None else input_shapes
+        for name, io in iteritems(metadata.inputs):
+            dims = input_shapes.get(name, [ max(1, d) for d in io.dims ])
+            shape = [ batch_size ] + list(dims)
+            if io.dtype == np.object:
+                self._inputs[name] = np.array(
+                    [ str(i).encode('utf-8') for i in range(int(np.prod(shape))) ],
+                    dtype=object).reshape(shape)
+            else:
+                self._inputs[name] = (np.random.random(shape) * 100).astype(io.dtype)
+
+        if outputs is None:
+            outputs = { name : InferContext.ResultFormat.RAW for name in metadata.outputs }
+        self._outputs = outputs
+
+    def _new_context(self):
+        return InferContext(self._url, self._protocol, self._model_name,
+                            self._model_version, self._verbose)
+
+    def _get_server_stats(self, ctx):
+        server_status = ctx.get_server_status()
+        if self._model_name not in server_status.model_status:
+            return (0, 0, 0, 0)
+        return _server_stats(server_status.model_status[self._model_name])
+
+    def _measure(self, mode, load, generate):
+        # Run 'generate(records, start_window, stop)', which must
+        # append a (start time, end time, success) record for each
+        # request until 'stop' is set, and summarize the records of
+        # the requests started within the measurement window.
+        status_ctx = ServerStatusContext(self._url, self._protocol,
+                                         self._model_name, self._verbose)
+        try:
+            records = list()
+            stop = threading.Event()
+            window = [ None, None ]
+            server_stats = [ None, None ]
+            errors = list()
+
+            def window_timer():
+                try:
+                    if not stop.wait(self._warmup_s):
+                        server_stats[0] = self._get_server_stats(status_ctx)
+                        window[0] = _now()
+                        if not stop.wait(self._window_s):
+                            window[1] = _now()
+                            server_stats[1] = self._get_server_stats(status_ctx)
+                except InferenceServerException as ex:
+                    errors.append(ex)
+                finally:
+                    stop.set()
+
+            timer = threading.Thread(target=window_timer)
+            timer.daemon = True
+            timer.start()
+            try:
+                generate(records, stop)
+            finally:
+                stop.set()
+                timer.join()
+        finally:
+            status_ctx.close()
+        if errors:
+            raise errors[0]
+        if window[1] is None:
+            raise InferenceServerException(
+                None, "load generation ended before the measurement window")
+
+        start, end = window
+        latencies_us = list()
+        failed_count = 0
+        for request_start, request_end, success in list(records):
+            if (request_start < start) or (request_start >= end):
+                continue
+            if success:
+                latencies_us.append((request_end - request_start) * 1000000.0)
+            else:
+                failed_count += 1
+
+        return PerfMeasurement(
+            mode, load, self._batch_size, end - start, latencies_us, failed_count,
+            tuple(e - s for s, e in zip(server_stats[0], server_stats[1])))
+
+    def measure_concurrency(self, concurrency):
+        """Measure with a closed loop of 'concurrency' threads, each
+        sending its next request as soon as the previous one
+        completes.
+
+        Parameters
+        ----------
+        concurrency : int
+            The number of requests kept in flight.
+
+        Returns
+        -------
+        PerfMeasurement
+            The measurement.
+
+        Raises
+        ------
+        InferenceServerException
+            If unable to create the contexts or to get the server
+            status.
+
+        """
+        # Contexts are created before the load starts so that their
+        # initialization is not measured.
+        contexts = list()
+        try:
+            for _ in range(concurrency):
+                contexts.append(self._new_context())
+
+            def worker(ctx, records, stop):
+                while not stop.is_set():
+                    start = _now()
+                    try:
+                        ctx.run(self._inputs, self._outputs, self._batch_size)
+                        records.append((start, _now(), True))
+                    except InferenceServerException:
+                        records.append((start, _now(), False))
+
+            def generate(records, stop):
+                threads = [ threading.Thread(target=worker, args=(ctx, records, stop))
+                            for ctx in contexts ]
+                for thread in threads:
+                    thread.daemon = True
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+
+            return self._measure('concurrency', concurrency, generate)
+        finally:
+            for ctx in contexts:
+                ctx.close()
+
+    def measure_rate(self, request_rate, poisson=False, max_contexts=16):
+        """Measure with an open loop sending 'request_rate' requests
+        per second using InferContext.async_run_future(), without
+        waiting for earlier requests to complete.
+
+        Parameters
+        ----------
+        request_rate : float
+            The number of requests sent per second.
+
+        poisson : bool
+            If True the intervals between requests are exponentially
+            distributed with mean 1 / request_rate, otherwise they
+            are constant.
+
+        max_contexts : int
+            The number of contexts the requests are distributed
+            over, round robin.
+
+        Returns
+        -------
+        PerfMeasurement
+            The measurement.
+
+        Raises
+        ------
+        InferenceServerException
+            If unable to create the contexts or to get the server
+            status.
+
+        """
+        contexts = list()
+        try:
+            for _ in range(max_contexts):
+                contexts.append(self._new_context())
+
+            def generate(records, stop):
+                # Only the number of requests in flight is kept, not
+                # their futures, so that completed results are
+                # released as soon as they are recorded.
+                in_flight = [ 0 ]
+                in_flight_cv = threading.Condition()
+
+                def complete(future, scheduled):
+                    records.append((scheduled, _now(), future.exception() is None))
+                    with in_flight_cv:
+                        in_flight[0] -= 1
+                        if in_flight[0] == 0:
+                            in_flight_cv.notify_all()
+
+                next_time = _now()
+                index = 0
+                while not stop.is_set():
+                    delay = next_time - _now()
+                    if delay > 0:
+                        stop.wait(delay)
+                        continue
+
+                    scheduled = next_time
+                    ctx = contexts[index % len(contexts)]
+                    index += 1
+                    with in_flight_cv:
+                        in_flight[0] += 1
+                    try:
+                        future = ctx.async_run_future(
+                            self._inputs, self._outputs, self._batch_size)
+                    except InferenceServerException:
+                        records.append((scheduled, _now(), False))
+                        with in_flight_cv:
+                            in_flight[0] -= 1
+                    else:
+                        future.add_done_callback(
+                            lambda f, s=scheduled: complete(f, s))
+
+                    if poisson:
+                        next_time += random.expovariate(request_rate)
+                    else:
+                        next_time += 1.0 / request_rate
+
+                # Requests sent within the window are measured even if
+                # they complete after it.
+                with in_flight_cv:
+                    while in_flight[0] > 0:
+                        in_flight_cv.wait()
+
+            return self._measure('rate', request_rate, generate)
+        finally:
+            for ctx in contexts:
+                ctx.close()
+
+    def sweep_concurrency(self, start, end, step=1):
+        """Measure concurrency 'start' to 'end', inclusive, in steps
+        of 'step'.
+
+        Returns
+        -------
+        list of PerfMeasurement
+            The measurement of each concurrency.
+
+        """
+        return [ self.measure_concurrency(c) for c in range(start, end + 1, step) ]
+
+    def sweep_rate(self, start, end, step, poisson=False, max_contexts=16):
+        """Measure request rates 'start' to 'end', inclusive, in steps
+        of 'step'. See measure_rate() for the other parameters.
+
+        Returns
+        -------
+        list of PerfMeasurement
+            The measurement of each rate.
+
+        """
+        measurements = list()
+        rate = start
+        while rate <= end:
+            measurements.append(self.measure_rate(rate, poisson, max_contexts))
+            rate += step
+        return measurements
+
+def write_csv(measurements, f):
+    """Write measurements as CSV with a header row.
+
+    Parameters
+    ----------
+    measurements : list of PerfMeasurement
+        The measurements to write.
+
+    f : file
+        The file object to write to.
+
+    """
+    writer = csv.writer(f)
+    writer.writerow(PerfMeasurement.FIELDS)
+    for m in measurements:
+        writer.writerow([ getattr(m, field) for field in PerfMeasurement.FIELDS ])
+
+def write_json(measurements, f):
+    """Write measurements as a JSON list of objects.
+
+    Parameters
+    ----------
+    measurements : list of PerfMeasurement
+        The measurements to write.
+
+    f : file
+        The file object to write to.
+
+    """
+    json.dump([ m.as_dict() for m in measurements ], f, indent=2)
+    f.write('\n')
+
+class _StandInHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so that the client keeps its connection alive, and
+    # without Nagle's algorithm so that the response body, written
+    # after the headers, is not delayed.
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if self.server.stand_in._verbose:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+    def _reply(self, code, msg=None, headers=None, body=b''):
+        stand_in = self.server.stand_in
+        status = request_status_pb2.RequestStatus()
+        status.code = code
+        if msg is not None:
+            status.msg = msg
+        status.server_id = stand_in._server_id
+        status.request_id = stand_in._next_request_id()
+
+        self.send_response(200 if code == request_status_pb2.SUCCESS else 400)
+        self.send_header('NV-Status', _text_format(status))
+        for name, value in (headers or []):
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _path(self):
+        path, _, query = self.path.partition('?')
+        return [ p for p in path.split('/') if p ], query
+
+    def do_GET(self):
+        parts, query = self._path()
+        stand_in = self.server.stand_in
+        if parts[:2] == [ 'api', 'health' ]:
+            self._reply(request_status_pb2.SUCCESS)
+        elif parts[:2] == [ 'api', 'status' ]:
+            if (len(parts) > 2) and (parts[2] != stand_in._model_name):
+                self._reply(request_status_pb2.INVALID_ARG,
+                            "no status available for unknown model '" + parts[2] + "'")
+                return
+            server_status = stand_in.get_server_status()
+            if 'format=binary' in query:
+                body = server_status.SerializeToString()
+            else:
+                body = str(server_status).encode('utf-8')
+            self._reply(request_status_pb2.SUCCESS, body=body)
+        else:
+            self._reply(request_status_pb2.NOT_FOUND, "unknown endpoint " + self.path)
+
+    def do_POST(self):
+        parts, _ = self._path()
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        stand_in = self.server.stand_in
+        if parts[:2] != [ 'api', 'infer' ]:
+            self._reply(request_status_pb2.NOT_FOUND, "unknown endpoint " + self.path)
+            return
+        if ((len(parts) < 3) or (parts[2] != stand_in._model_name) or
+                ((len(parts) > 3) and (parts[3] != '1'))):
+            self._reply(request_status_pb2.NOT_FOUND,
+                        "no model available for '" + '/'.join(parts[2:]) + "'")
+            return
+
+        try:
+            header, raw_outputs = stand_in._infer(
+                self.headers.get('NV-InferRequest', ''), body)
+        except ValueError as ex:
+            self._reply(request_status_pb2.INVALID_ARG, str(ex))
+            return
+
+        response_body = b''.join(raw_outputs) + header.SerializeToString()
+        # The HTTP header only describes the outputs, class results
+        # are read from the binary header in the body.
+        http_header = api_pb2.InferResponseHeader()
+        http_header.CopyFrom(header)
+        for output in http_header.output:
+            del output.batch_classes[:]
+        self._reply(request_status_pb2.SUCCESS,
+                    headers=[ ('NV-InferResponse', _text_format(http_header)) ],
+                    body=response_body)
+
+def _text_format(msg):
+    # Single-line text format, as used for protobuf HTTP headers.
+    from google.protobuf import text_format
+    return text_format.MessageToString(msg, as_one_line=True)
+
+class StandInServer:
+    """A StandInServer is a local HTTP server that stands in for the
+    inference server with a single identity model, version 1, whose
+    output OUTPUTi is a copy of its input INPUTi. Only the HTTP
+    protocol is supported. The model has one instance, executions
+    are serialized and 'compute_delay_us' is added to each execution
+    to simulate the model's compute time. The model's statistics are
+    reported in the server status the same way as the inference
+    server so the stand-in can be measured by PerfAnalyzer.
+
+    Parameters
+    ----------
+    model_name : str
+        The name of the model.
+
+    data_type : model_config_pb2.DataType
+        The datatype of the inputs and outputs. TYPE_STRING is not
+        supported.
+
+    dims : list of int
+        The shape of the inputs and outputs, without the batch
+        dimension.
+
+    io_count : int
+        The number of inputs, and outputs, of the model.
+
+    max_batch_size : int
+        The maximum batch size of the model.
+
+    compute_delay_us : int
+        The time, in microseconds, added to each execution.
+
+    port : int
+        The port to listen on, 0 to use any free port.
+
+    verbose : bool
+        If True log each HTTP request.
+
+    """
+    def __init__(self, model_name='identity', data_type=model_config_pb2.TYPE_FP32,
+                 dims=(16,), io_count=1, max_batch_size=8, compute_delay_us=0,
+                 port=0, verbose=False):
+        if data_type == model_config_pb2.TYPE_STRING:
+            raise ValueError("stand-in model does not support TYPE_STRING")
+        self._model_name = model_name
+        self._dtype = _get_numpy_dtype(data_type)
+        self._dims = list(dims)
+        self._max_batch_size = max_batch_size
+        self._compute_delay_s = compute_delay_us / 1000000.0
+        self._verbose = verbose
+        self._server_id = 'inference:0'
+        self._start_ns = None
+
+        self._lock = threading.Lock()
+        self._request_id = 0
+        # Serializes executions of the single model instance.
+        self._instance_lock = threading.Lock()
+
+        self._model_status = server_status_pb2.ModelStatus()
+        config = self._model_status.config
+        config.name = model_name
+        config.platform = 'custom'
+        config.max_batch_size = max_batch_size
+        for i in range(io_count):
+            input = config.input.add()
+            input.name = 'INPUT' + str(i)
+            input.data_type = data_type
+            input.dims.extend(self._dims)
+            output = config.output.add()
+            output.name = 'OUTPUT' + str(i)
+            output.data_type = data_type
+            output.dims.extend(self._dims)
+        self._model_status.version_status[1].ready_state = server_status_pb2.MODEL_READY
+
+        self._httpd = _StandInHTTPServer(('localhost', port), _StandInHandler)
+        self._httpd.stand_in = self
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.stop()
+
+    @property
+    def url(self):
+        """The URL of the server, e.g. localhost:8000."""
+        return 'localhost:' + str(self._httpd.server_address[1])
+
+    def start(self):
+        """Start serving requests on a background thread."""
+        if self._thread is None:
+            self._start_ns = int(time.time() * 1e9)
+            self._thread = threading.Thread(target=self._httpd.serve_forever)
+            self._thread.daemon = True
+            self._thread.start()
+
+    def stop(self):
+        """Stop serving requests and close the listening socket."""
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
+
+    def get_server_status(self):
+        """Get the current status of the stand-in server.
+
+        Returns
+        -------
+        ServerStatus
+            The ServerStatus protobuf, including the statistics of
+            the model.
+
+        """
+        server_status = server_status_pb2.ServerStatus()
+        server_status.id = self._server_id
+        server_status.version = 'stand-in'
+        server_status.ready_state = server_status_pb2.SERVER_READY
+        if self._start_ns is not None:
+            server_status.uptime_ns = int(time.time() * 1e9) - self._start_ns
+        with self._lock:
+            server_status.model_status[self._model_name].CopyFrom(self._model_status)
+        return server_status
+
+    def _next_request_id(self):
+        with self._lock:
+            self._request_id += 1
+            return self._request_id
+
+    def _record(self, batch_size, success, request_ns, queue_ns=0, compute_ns=0):
+        with self._lock:
+            version_status = self._model_status.version_status[1]
+            stats = version_status.infer_stats[batch_size]
+            if not success:
+                stats.failed.count += 1
+                stats.failed.total_time_ns += request_ns
+                return
+            stats.success.count += 1
+            stats.success.total_time_ns += request_ns
+            stats.queue.count += 1
+            stats.queue.total_time_ns += queue_ns
+            stats.compute.count += 1
+            stats.compute.total_time_ns += compute_ns
+            version_status.model_execution_count += 1
+            version_status.model_inference_count += batch_size
+
+    def _infer(self, request_header_text, body):
+        # Return the InferResponseHeader and the raw output buffers
+        # of an HTTP infer request, raising ValueError if the request
+        # is invalid.
+        from google.protobuf import text_format
+        start = _now()
+        request = api_pb2.InferRequestHeader()
+        try:
+            text_format.Parse(request_header_text, request)
+        except text_format.ParseError as ex:
+            raise ValueError("failed to parse infer request header: " + str(ex))
+
+        batch_size = request.batch_size
+        try:
+            if (batch_size < 1) or (batch_size > max(1, self._max_batch_size)):
+                raise ValueError(
+                    "inference request batch-size must be <= " +
+                    str(max(1, self._max_batch_size)) + " for '" + self._model_name + "'")
+
+            # Inputs are concatenated in the body in the order of the
+            # request header.
+            config = self._model_status.config
+            input_names = [ io.name for io in config.input ]
+            inputs = dict()
+            offset = 0
+            for input in request.input:
+                if input.name not in input_names:
+                    raise ValueError("unexpected inference input '" + input.name +
+                                     "' for model '" + self._model_name + "'")
+                if input.HasField('shared_memory'):
+                    raise ValueError("stand-in model does not support shared memory")
+                dims = list(input.dims) if len(input.dims) > 0 else self._dims
+                byte_size = (batch_size * int(np.prod(dims)) *
+                             np.dtype(self._dtype).itemsize)
+                if offset + byte_size > len(body):
+                    raise ValueError("unexpected size for input '" + input.name + "'")
+                inputs[input.name] = (body[offset:offset + byte_size], dims)
+                offset += byte_size
+            if offset != len(body):
+                raise ValueError("unexpected additional input data for model '" +
+                                 self._model_name + "'")
+            if len(inputs) != len(input_names):
+                raise ValueError("expected " + str(len(input_names)) + " inputs but got " +
+                                 str(len(inputs)) + " inputs for model '" +
+                                 self._model_name + "'")
+
+            queue_start = _now()
+            with self._instance_lock:
+                compute_start = _now()
+                response = api_pb2.InferResponseHeader()
+                response.model_name = self._model_name
+                response.model_version = 1
+                response.batch_size = batch_size
+                raw_outputs = list()
+                for output in request.output:
+                    input_name = 'INPUT' + output.name[len('OUTPUT'):]
+                    if (not output.name.startswith('OUTPUT')) or (input_name not in inputs):
+                        raise ValueError("unexpected inference output '" + output.name +
+                                         "' for model '" + self._model_name + "'")
+                    if output.HasField('shared_memory'):
+                        raise ValueError("stand-in model does not support shared memory")
+                    data, dims = inputs[input_name]
+                    routput = response.output.add()
+                    routput.name = output.name
+                    if output.HasField('cls'):
+                        values = np.frombuffer(data, dtype=self._dtype).reshape(
+                            batch_size, -1)
+                        k = min(output.cls.count, values.shape[1])
+                        for batch_values in values:
+                            classes = routput.batch_classes.add()
+                            for idx in np.argsort(-batch_values, kind='mergesort')[:k]:
+                                cls = classes.cls.add()
+                                cls.idx = int(idx)
+                                cls.value = float(batch_values[idx])
+                    else:
+                        routput.raw.dims.extend(dims)
+                        routput.raw.batch_byte_size = len(data)
+                        raw_outputs.append(data)
+                if self._compute_delay_s > 0:
+                    time.sleep(self._compute_delay_s)
+                compute_end = _now()
+        except ValueError:
+            self._record(batch_size, False, int((_now() - start) * 1e9))
+            raise
+
+        self._record(batch_size, True, int((_now() - start) * 1e9),
+                     int((compute_start - queue_start) * 1e9),
+                     int((compute_end - compute_start) * 1e9))
+        return response, raw_outputs
+
+def _parse_range(value, parse):
+    # Parse 'start[:end[:step]]', end defaults to start and step to 1.
+    parts = [ parse(p) for p in value.split(':') ]
+    if (len(parts) < 1) or (len(parts) > 3):
+        raise argparse.ArgumentTypeError("expected start[:end[:step]], got '" + value + "'")
+    start = parts[0]
+    end = parts[1] if len(parts) > 1 else start
+    step = parts[2] if len(parts) > 2 else parse(1)
+    if step <= 0:
+        raise argparse.ArgumentTypeError("step must be positive, got '" + value + "'")
+    return (start, end, step)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m tensorrtserver.perf',
+        description='Measure latency and throughput of a model using the Python client.')
+    parser.add_argument('-v', '--verbose', action="store_true", required=False, default=False,
+                        help='Enable verbose output')
+    parser.add_argument('-m', '--model-name', type=str, required=False, default='identity',
+                        help='Name of model. Default is identity.')
+    parser.add_argument('-x', '--model-version', type=int, required=False,
+                        help='Version of model. Default is to use latest version.')
+    parser.add_argument('-u', '--url', type=str, required=False, default='localhost:8000',
+                        help='Inference server URL. Default is localhost:8000.')
+    parser.add_argument('-i', '--protocol', type=str, required=False, default='HTTP',
+                        help='Protocol (HTTP/gRPC) used to ' +
+                        'communicate with inference service. Default is HTTP.')
+    parser.add_argument('-b', '--batch-size', type=int, required=False, default=1,
+                        help='Batch size of each request. Default is 1.')
+    parser.add_argument('--shape', type=str, action='append', required=False, default=[],
+                        help='Shape of an input with variable-size dimensions, as ' +
+                        'NAME:D0,D1,... May be given multiple times.')
+    parser.add_argument('-p', '--measurement-window', type=int, required=False, default=5000,
+                        help='Measurement window in msec. Default is 5000.')
+    parser.add_argument('-w', '--warmup', type=int, required=False, default=1000,
+                        help='Warmup before each measurement in msec. Default is 1000.')
+    parser.add_argument('--concurrency-range', type=lambda v: _parse_range(v, int),
+                        required=False,
+                        help='Closed-loop concurrency as start[:end[:step]]. ' +
+                        'Default is 1.')
+    parser.add_argument('--request-rate-range', type=lambda v: _parse_range(v, float),
+                        required=False,
+                        help='Open-loop requests per second as start[:end[:step]].')
+    parser.add_argument('--poisson', action="store_true", required=False, default=False,
+                        help='Use exponentially distributed intervals between ' +
+                        'requests for the open loop. Default is constant intervals.')
+    parser.add_argument('--max-contexts', type=int, required=False, default=16,
+                        help='Number of contexts used by the open loop. Default is 16.')
+    parser.add_argument('-f', '--file', type=str, required=False,
+                        help='Write the results to this file. Default is stdout.')
+    parser.add_argument('--format', type=str, required=False, default='csv',
+                        choices=('csv', 'json'),
+                        help='Format of the results. Default is csv.')
+    parser.add_argument('--stand-in', action="store_true", required=False, default=False,
+                        help='Measure a local stand-in identity model instead of ' +
+                        'an inference server. -u and -i are ignored.')
+    parser.add_argument('--stand-in-dims', type=str, required=False, default='16',
+                        help='Comma-separated input shape of the stand-in model. ' +
+                        'Default is 16.')
+    parser.add_argument('--stand-in-delay', type=int, required=False, default=0,
+                        help='Compute time, in usec, of the stand-in model. Default is 0.')
+    FLAGS = parser.parse_args(argv)
+
+    if (FLAGS.concurrency_range is not None) and (FLAGS.request_rate_range is not None):
+        parser.error('--concurrency-range and --request-rate-range are exclusive')
+
+    input_shapes = dict()
+    for shape in FLAGS.shape:
+        name, _, dims = shape.rpartition(':')
+        input_shapes[name] = [ int(d) for d in dims.split(',') ]
+
+    stand_in = None
+    url = FLAGS.url
+    protocol = ProtocolType.from_str(FLAGS.protocol)
+    if FLAGS.stand_in:
+        stand_in = StandInServer(
+            FLAGS.model_name, dims=[ int(d) for d in FLAGS.stand_in_dims.split(',') ],
+            max_batch_size=max(8, FLAGS.batch_size),
+            compute_delay_us=FLAGS.stand_in_delay, verbose=FLAGS.verbose)
+        stand_in.start()
+        url = stand_in.url
+        protocol = ProtocolType.HTTP
+
+    try:
+        analyzer = PerfAnalyzer(url, protocol, FLAGS.model_name, FLAGS.model_version,
+                                FLAGS.batch_size, input_shapes,
+                                window_ms=FLAGS.measurement_window,
+                                warmup_ms=FLAGS.warmup, verbose=FLAGS.verbose)
+
+        measurements = list()
+        if FLAGS.request_rate_range is not None:
+            start, end, step = FLAGS.request_rate_range
+            rate = start
+            while rate <= end:
+                measurements.append(
+                    analyzer.measure_rate(rate, FLAGS.poisson, FLAGS.max_contexts))
+                print(measurements[-1], file=sys.stderr)
+                rate += step
+        else:
+            start, end, step = FLAGS.concurrency_range or (1, 1, 1)
+            for concurrency in range(start, end + 1, step):
+                measurements.append(analyzer.measure_concurrency(concurrency))
+                print(measurements[-1], file=sys.stderr)
+    except InferenceServerException as ex:
+        print("error: " + str(ex), file=sys.stderr)
+        return 1
+    finally:
+        if stand_in is not None:
+            stand_in.stop()
+
+    write = write_json if FLAGS.format == 'json' else write_csv
+    if FLAGS.file is None:
+        write(measurements, sys.stdout)
+    else:
+        with open(FLAGS.file, 'w') as f:
+            write(measurements, f)
+
+    if any(m.request_count == 0 for m in measurements):
+        print("error: no requests completed successfully in a measurement window",
+              file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
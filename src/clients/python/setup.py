@@ -35,6 +35,7 @@ VERSION = os.environ['VERSION']
 
 REQUIRED = [
     'future',
+    'futures; python_version < "3"',
     'numpy',
     'protobuf>=3.5.0',
     'grpcio'
@@ -0,0 +1,230 @@
+# Copyright (c) 2019, NVIDIA CORPORATION. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#  * Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#  * Neither the name of NVIDIA CORPORATION nor the names of its
+#    contributors may be used to endorse or promote products derived
+#    from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS ``AS IS'' AND ANY
+# EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY
+# OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Recording of request traces for the TensorRT Inference Server client
+API.
+
+A TraceRecorder is set as the trace hook of one or more contexts, see
+InferContext.set_trace_hook(), and keeps the most recent events in a
+ring buffer. The recorded events can be written in the Chrome trace
+event format and viewed with chrome://tracing or Perfetto, where each
+request is shown as a span with its prepare, in-flight and decode
+stages.
+
+"""
+
+from collections import deque
+import json
+import os
+import threading
+
+from tensorrtserver.api import InferenceServerException, TraceEventType, _raise_error
+
+# The stages of a request shown in a Chrome trace, as the events that
+# start and end each stage.
+_STAGES = (('prepare', TraceEventType.PREPARE_START, TraceEventType.PREPARE_END),
+           ('in flight', TraceEventType.SEND, TraceEventType.RESPONSE),
+           ('decode', TraceEventType.RESPONSE, TraceEventType.DECODED))
+
+class TraceRecorder:
+    """Records the TraceEvents it is called with in a fixed-size ring
+    buffer, so that a recorder can be the trace hook of any number of
+    contexts used from any number of threads. Once the buffer is full
+    each new event replaces the oldest.
+
+    Parameters
+    ----------
+    capacity : int
+        The maximum number of events kept.
+
+    Raises
+    ------
+    InferenceServerException
+        If 'capacity' is less than 1.
+
+    """
+    def __init__(self, capacity=65536):
+        if capacity < 1:
+            _raise_error("trace capacity must be at least 1, got " + str(capacity))
+        self._lock = threading.Lock()
+        self._events = deque(maxlen=capacity)
+        self._recorded = 0
+
+    def __call__(self, event):
+        # The exception of an ERROR event references the frames it
+        # was raised through, which may hold request inputs, so only
+        # a copy without the traceback is kept.
+        if event.error is not None:
+            error = event.error
+            event = event._replace(error=InferenceServerException(
+                None, msg=error.message(), server_id=error.server_id(),
+                request_id=error.request_id()))
+        with self._lock:
+            self._events.append(event)
+            self._recorded += 1
+
+    def events(self):
+        """Get the recorded events.
+
+        Returns
+        -------
+        list of TraceEvent
+            The events in the order they were recorded.
+
+        """
+        with self._lock:
+            return list(self._events)
+
+    def clear(self):
+        """Remove all recorded events."""
+        with self._lock:
+            self._events.clear()
+            self._recorded = 0
+
+    def get_stats(self):
+        """Get the statistics of the recorder.
+
+        Returns
+        -------
+        dict
+            Dictionary with 'events', the number of events held,
+            'capacity', the maximum number of events held, and
+            'dropped', the number of events replaced by newer events
+            since the recorder was created or cleared.
+
+        """
+        with self._lock:
+            return { 'events' : len(self._events),
+                     'capacity' : self._events.maxlen,
+                     'dropped' : self._recorded - len(self._events) }
+
+    def write_chrome_trace(self, file):
+        """Write the recorded events in the Chrome trace event format.
+        See write_chrome_trace().
+
+        Parameters
+        ----------
+        file : str or file
+            The path of the file, or a file object open for writing
+            text.
+
+        """
+        write_chrome_trace(self.events(), file)
+
+def _requests(events):
+    # Group 'events', in the order they were reported, into the
+    # events of each request. The events of a request are reported in
+    # the order of their types so a new request of the same context
+    # and request ID starts when the type does not increase, e.g. two
+    # requests that fail before being sent both have request ID 0.
+    requests = list()
+    current = dict()
+    for event in events:
+        key = (event.context_id, event.request_id)
+        request = current.get(key)
+        if (request is None) or (event.type <= request[-1].type):
+            request = list()
+            current[key] = request
+            requests.append(request)
+        request.append(event)
+    return requests
+
+def chrome_trace(events):
+    """Convert trace events to the Chrome trace event format. Each
+    request is an async span named for its model, or for its context
+    if it is not made for a model, nested with a span for each stage
+    of the request. A failed request has an instant event holding the
+    error message. Timestamps are relative to the earliest event.
+
+    Parameters
+    ----------
+    events : list of TraceEvent
+        The events in the order they were reported, e.g. as returned
+        by TraceRecorder.events().
+
+    Returns
+    -------
+    dict
+        The trace, which can be serialized with json.
+
+    """
+    trace_events = list()
+    if len(events) == 0:
+        return { 'traceEvents' : trace_events, 'displayTimeUnit' : 'ms' }
+
+    pid = os.getpid()
+    origin_ns = min(event.timestamp_ns for event in events)
+
+    def us(timestamp_ns):
+        return (timestamp_ns - origin_ns) / 1000.0
+
+    for span_id, request in enumerate(_requests(events)):
+        first = request[0]
+        common = { 'cat' : first.context, 'id' : span_id, 'pid' : pid,
+                   'tid' : first.context_id }
+        name = first.model_name if first.model_name is not None else first.context
+        args = { 'request_id' : first.request_id, 'context' : first.context }
+        trace_events.append(dict(common, name=name, ph='b', ts=us(first.timestamp_ns),
+                                 args=args))
+
+        timestamps = dict()
+        for event in request:
+            timestamps[event.type] = event.timestamp_ns
+        for stage, start, end in _STAGES:
+            if (start in timestamps) and (end in timestamps):
+                trace_events.append(dict(common, name=stage, ph='b',
+                                         ts=us(timestamps[start])))
+                trace_events.append(dict(common, name=stage, ph='e',
+                                         ts=us(timestamps[end])))
+
+        last = request[-1]
+        if last.type == TraceEventType.ERROR:
+            trace_events.append(dict(common, name='error', ph='n', ts=us(last.timestamp_ns),
+                                     args={ 'message' : last.error.message() }))
+        trace_events.append(dict(common, name=name, ph='e', ts=us(last.timestamp_ns)))
+
+    return { 'traceEvents' : trace_events, 'displayTimeUnit' : 'ms' }
+
+def write_chrome_trace(events, file):
+    """Write trace events in the Chrome trace event format, see
+    chrome_trace().
+
+    Parameters
+    ----------
+    events : list of TraceEvent
+        The events, e.g. as returned by TraceRecorder.events().
+
+    file : str or file
+        The path of the file, or a file object open for writing
+        text.
+
+    """
+    trace = chrome_trace(events)
+    if isinstance(file, str):
+        with open(file, 'w') as f:
+            json.dump(trace, f)
+    else:
+        json.dump(trace, file)
@@ -32,11 +32,14 @@ namespace nvidia { namespace inferenceserver {
 constexpr char kInferRequestHTTPHeader[] = "NV-InferRequest";
 constexpr char kInferResponseHTTPHeader[] = "NV-InferResponse";
 constexpr char kStatusHTTPHeader[] = "NV-Status";
+constexpr char kSharedMemoryControlRequestHTTPHeader[] =
+    "NV-SharedMemoryControlRequest";
 
 constexpr char kInferRESTEndpoint[] = "api/infer";
 constexpr char kStatusRESTEndpoint[] = "api/status";
 constexpr char kProfileRESTEndpoint[] = "api/profile";
 constexpr char kHealthRESTEndpoint[] = "api/health";
+constexpr char kSharedMemoryControlRESTEndpoint[] = "api/sharedmemorycontrol";
 
 constexpr char kTensorFlowGraphDefPlatform[] = "tensorflow_graphdef";
 constexpr char kTensorFlowSavedModelPlatform[] = "tensorflow_savedmodel";
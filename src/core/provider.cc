@@ -31,6 +31,7 @@
 #include "src/core/logging.h"
 #include "src/core/model_config.h"
 #include "src/core/model_config_utils.h"
+#include "src/core/shared_memory_manager.h"
 
 namespace nvidia { namespace inferenceserver {
 
@@ -312,8 +313,10 @@ AddClassResults(
 //
 InferResponseProvider::InferResponseProvider(
     const InferRequestHeader& request_header,
-    const std::shared_ptr<LabelProvider>& label_provider)
-    : request_header_(request_header), label_provider_(label_provider)
+    const std::shared_ptr<LabelProvider>& label_provider,
+    SharedMemoryManager* shm_manager)
+    : request_header_(request_header), label_provider_(label_provider),
+      shm_manager_(shm_manager)
 {
   // Create a map from output name to the InferRequestHeader::Output
   // object for that output.
@@ -364,7 +367,32 @@ InferResponseProvider::CheckAndSetIfBufferedOutput(
   loutput->ptr_ = nullptr;
   loutput->byte_size_ = content_byte_size;
 
-  if (pr->second->has_cls()) {
+  if (pr->second->has_shared_memory()) {
+    const SharedMemoryRegion& region = pr->second->shared_memory();
+    if (pr->second->has_cls()) {
+      return Status(
+          RequestStatusCode::INVALID_ARG,
+          "output '" + name +
+              "' cannot be returned as a classification in shared memory");
+    }
+    if (shm_manager_ == nullptr) {
+      return Status(
+          RequestStatusCode::INVALID_ARG,
+          "output '" + name + "' cannot be returned in shared memory");
+    }
+    if (region.byte_size() != content_byte_size) {
+      return Status(
+          RequestStatusCode::INVALID_ARG,
+          "unexpected shared memory size " +
+              std::to_string(region.byte_size()) + " for output '" + name +
+              "', expecting " + std::to_string(content_byte_size));
+    }
+
+    RETURN_IF_ERROR(
+        shm_manager_->GetSystemMemory(region, &loutput->shm_buffer_));
+    *content = static_cast<void*>(loutput->shm_buffer_->MutableBuffer());
+    loutput->ptr_ = *content;
+  } else if (pr->second->has_cls()) {
     loutput->cls_count_ = pr->second->cls().count();
     char* buffer = new char[content_byte_size];
     *content = static_cast<void*>(buffer);
@@ -618,7 +646,7 @@ InternalInferResponseProvider::GetSystemMemory(
 InternalInferResponseProvider::InternalInferResponseProvider(
     const InferRequestHeader& request_header,
     const std::shared_ptr<LabelProvider>& label_provider)
-    : InferResponseProvider(request_header, label_provider)
+    : InferResponseProvider(request_header, label_provider, nullptr)
 {
 }
 
@@ -629,10 +657,11 @@ Status
 GRPCInferResponseProvider::Create(
     const InferRequestHeader& request_header, InferResponse* response,
     const std::shared_ptr<LabelProvider>& label_provider,
+    SharedMemoryManager* shm_manager,
     std::shared_ptr<GRPCInferResponseProvider>* infer_provider)
 {
-  GRPCInferResponseProvider* provider =
-      new GRPCInferResponseProvider(request_header, response, label_provider);
+  GRPCInferResponseProvider* provider = new GRPCInferResponseProvider(
+      request_header, response, label_provider, shm_manager);
   infer_provider->reset(provider);
 
   return Status::Success;
@@ -661,7 +690,8 @@ GRPCInferResponseProvider::AllocateOutputBuffer(
 
   // Must always add a raw output into the list so that the number and
   // order of raw output entries equals the output meta-data. But
-  // leave empty if not returning raw result for the output.
+  // leave empty if not returning raw result for the output or if the
+  // raw result is written to shared memory.
   std::string* raw_output = response_->add_raw_output();
   if (output->ptr_ == nullptr) {
     raw_output->resize(content_byte_size);
@@ -677,8 +707,9 @@ GRPCInferResponseProvider::AllocateOutputBuffer(
 //
 HTTPInferResponseProvider::HTTPInferResponseProvider(
     evbuffer* output_buffer, const InferRequestHeader& request_header,
-    const std::shared_ptr<LabelProvider>& label_provider)
-    : InferResponseProvider(request_header, label_provider),
+    const std::shared_ptr<LabelProvider>& label_provider,
+    SharedMemoryManager* shm_manager)
+    : InferResponseProvider(request_header, label_provider, shm_manager),
       output_buffer_(output_buffer)
 {
 }
@@ -688,10 +719,11 @@ HTTPInferResponseProvider::Create(
     evbuffer* output_buffer, const InferenceBackend& is,
     const InferRequestHeader& request_header,
     const std::shared_ptr<LabelProvider>& label_provider,
+    SharedMemoryManager* shm_manager,
     std::shared_ptr<HTTPInferResponseProvider>* infer_provider)
 {
   HTTPInferResponseProvider* provider = new HTTPInferResponseProvider(
-      output_buffer, request_header, label_provider);
+      output_buffer, request_header, label_provider, shm_manager);
   infer_provider->reset(provider);
 
   return Status::Success;
@@ -35,6 +35,8 @@ namespace nvidia { namespace inferenceserver {
 
 class InferenceBackend;
 class LabelProvider;
+class SharedMemoryManager;
+class SharedMemoryReference;
 
 //
 // SystemMemory used to access data in providers
@@ -225,9 +227,13 @@ class InferResponseProvider {
   using SecondaryLabelProviderMap =
       std::unordered_map<std::string, SecondaryLabelProvider>;
 
-  explicit InferResponseProvider(
+  // 'shm_manager' resolves the shared memory regions that outputs
+  // are requested in, or is nullptr if the provider does not support
+  // returning outputs in shared memory.
+  InferResponseProvider(
       const InferRequestHeader& request_header,
-      const std::shared_ptr<LabelProvider>& label_provider);
+      const std::shared_ptr<LabelProvider>& label_provider,
+      SharedMemoryManager* shm_manager);
 
   // Get the full response header for this inference request.
   virtual const InferResponseHeader& ResponseHeader() const = 0;
@@ -272,7 +278,9 @@ class InferResponseProvider {
   struct Output;
 
   // Check that 'name' is a valid output. If output is to be buffered,
-  // allocate space for it and point to that space with 'content'
+  // allocate space for it and point to that space with 'content'. If
+  // output is requested in shared memory, point 'content' to the
+  // requested range of the shared memory region.
   Status CheckAndSetIfBufferedOutput(
       const std::string& name, void** content, size_t content_byte_size,
       const std::vector<int64_t>& content_shape, Output** output);
@@ -295,6 +303,10 @@ class InferResponseProvider {
 
     // Created buffer for non-RAW results
     std::unique_ptr<char[]> buffer_;
+
+    // Range of a shared memory region holding the RAW result, if
+    // requested in shared memory
+    std::shared_ptr<SharedMemoryReference> shm_buffer_;
   };
 
   // Ordered list of outputs as they "added" by AllocateOutputBuffer().
@@ -303,6 +315,10 @@ class InferResponseProvider {
   // label provider used to generate classification results.
   std::shared_ptr<LabelProvider> label_provider_;
 
+  // Shared memory manager used to resolve outputs requested in shared
+  // memory.
+  SharedMemoryManager* shm_manager_;
+
   // Map from output name to external label provider and name for that provider.
   // This map should only be non-empty if the response provider is for models
   // that doesn't provide labels directly, i.e. ensemble models.
@@ -349,6 +365,7 @@ class GRPCInferResponseProvider : public InferResponseProvider {
   static Status Create(
       const InferRequestHeader& request_header, InferResponse* response,
       const std::shared_ptr<LabelProvider>& label_provider,
+      SharedMemoryManager* shm_manager,
       std::shared_ptr<GRPCInferResponseProvider>* infer_provider);
 
   const InferResponseHeader& ResponseHeader() const override;
@@ -360,8 +377,9 @@ class GRPCInferResponseProvider : public InferResponseProvider {
  private:
   GRPCInferResponseProvider(
       const InferRequestHeader& request_header, InferResponse* response,
-      const std::shared_ptr<LabelProvider>& label_provider)
-      : InferResponseProvider(request_header, label_provider),
+      const std::shared_ptr<LabelProvider>& label_provider,
+      SharedMemoryManager* shm_manager)
+      : InferResponseProvider(request_header, label_provider, shm_manager),
         response_(response)
   {
   }
@@ -378,6 +396,7 @@ class HTTPInferResponseProvider : public InferResponseProvider {
       evbuffer* output_buffer, const InferenceBackend& is,
       const InferRequestHeader& request_header,
       const std::shared_ptr<LabelProvider>& label_provider,
+      SharedMemoryManager* shm_manager,
       std::shared_ptr<HTTPInferResponseProvider>* infer_provider);
 
   const InferResponseHeader& ResponseHeader() const override;
@@ -389,7 +408,8 @@ class HTTPInferResponseProvider : public InferResponseProvider {
  private:
   HTTPInferResponseProvider(
       evbuffer* output_buffer, const InferRequestHeader& request_header,
-      const std::shared_ptr<LabelProvider>& label_provider);
+      const std::shared_ptr<LabelProvider>& label_provider,
+      SharedMemoryManager* shm_manager);
 
   InferResponseHeader response_header_;
   evbuffer* output_buffer_;
@@ -416,7 +436,7 @@ class DelegatingInferResponseProvider : public InferResponseProvider {
   DelegatingInferResponseProvider(
       const InferRequestHeader& request_header,
       const std::shared_ptr<LabelProvider>& label_provider)
-      : InferResponseProvider(request_header, label_provider)
+      : InferResponseProvider(request_header, label_provider, nullptr)
   {
   }
 
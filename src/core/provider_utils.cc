@@ -35,6 +35,33 @@
 
 namespace nvidia { namespace inferenceserver {
 
+namespace {
+
+Status
+SharedMemoryToInputMap(
+    const std::string& model_name, const InferRequestHeader::Input& io,
+    SharedMemoryManager* shm_manager,
+    std::unordered_map<std::string, std::shared_ptr<SystemMemory>>& input_map)
+{
+  if (io.shared_memory().byte_size() != io.batch_byte_size()) {
+    return Status(
+        RequestStatusCode::INVALID_ARG,
+        "unexpected shared memory size " +
+            std::to_string(io.shared_memory().byte_size()) + " for input '" +
+            io.name() + "', expecting " +
+            std::to_string(io.batch_byte_size()) + " for model '" +
+            model_name + "'");
+  }
+
+  std::shared_ptr<SharedMemoryReference> memory;
+  RETURN_IF_ERROR(shm_manager->GetSystemMemory(io.shared_memory(), &memory));
+  input_map.emplace(std::make_pair(io.name(), std::move(memory)));
+
+  return Status::Success;
+}
+
+}  // namespace
+
 Status
 NormalizeRequestHeader(
     const InferenceBackend& is, InferRequestHeader& request_header)
@@ -178,7 +205,7 @@ NormalizeRequestHeader(
 Status
 EVBufferToInputMap(
     const std::string& model_name, const InferRequestHeader& request_header,
-    evbuffer* input_buffer,
+    evbuffer* input_buffer, SharedMemoryManager* shm_manager,
     std::unordered_map<std::string, std::shared_ptr<SystemMemory>>& input_map)
 {
   // Now need to create 'ref'. Each input has one entry in
@@ -204,8 +231,15 @@ EVBufferToInputMap(
   }
 
   // Get the byte-size for each input and from that get the blocks
-  // holding the data for that input
+  // holding the data for that input. Inputs delivered in shared
+  // memory have no data in the HTTP body.
   for (const auto& io : request_header.input()) {
+    if (io.has_shared_memory()) {
+      RETURN_IF_ERROR(
+          SharedMemoryToInputMap(model_name, io, shm_manager, input_map));
+      continue;
+    }
+
     auto memory_ref = std::make_shared<SystemMemoryReference>();
     input_map.emplace(std::make_pair(
         io.name(), std::static_pointer_cast<SystemMemory>(memory_ref)));
@@ -248,16 +282,24 @@ EVBufferToInputMap(
 Status
 GRPCInferRequestToInputMap(
     const InferRequestHeader& request_header, const InferRequest& request,
+    SharedMemoryManager* shm_manager,
     std::unordered_map<std::string, std::shared_ptr<SystemMemory>>& input_map)
 {
   // Make sure that the request is providing the same number of raw
-  // input tensor data.
-  if (request_header.input_size() != request.raw_input_size()) {
+  // input tensor data as there are inputs not delivered in shared
+  // memory.
+  int raw_input_cnt = 0;
+  for (const auto& io : request_header.input()) {
+    if (!io.has_shared_memory()) {
+      raw_input_cnt++;
+    }
+  }
+
+  if (raw_input_cnt != request.raw_input_size()) {
     return Status(
         RequestStatusCode::INVALID_ARG,
-        "expected tensor data for " +
-            std::to_string(request_header.input_size()) + " inputs but got " +
-            std::to_string(request.raw_input_size()) +
+        "expected tensor data for " + std::to_string(raw_input_cnt) +
+            " inputs but got " + std::to_string(request.raw_input_size()) +
             " sets of data for model '" + request.model_name() + "'");
   }
 
@@ -265,6 +307,12 @@ GRPCInferRequestToInputMap(
   // the provided raw tensor data.
   size_t idx = 0;
   for (const auto& io : request_header.input()) {
+    if (io.has_shared_memory()) {
+      RETURN_IF_ERROR(SharedMemoryToInputMap(
+          request.model_name(), io, shm_manager, input_map));
+      continue;
+    }
+
     auto memory_ref = std::make_shared<SystemMemoryReference>();
     input_map.emplace(std::make_pair(
         io.name(), std::static_pointer_cast<SystemMemory>(memory_ref)));
@@ -30,6 +30,7 @@
 #include "src/core/grpc_service.pb.h"
 #include "src/core/model_config.h"
 #include "src/core/provider.h"
+#include "src/core/shared_memory_manager.h"
 
 namespace nvidia { namespace inferenceserver {
 
@@ -40,14 +41,21 @@ class InferenceBackend;
 Status NormalizeRequestHeader(
     const InferenceBackend& is, InferRequestHeader& request_header);
 
+// Create the input map for an HTTP request. Inputs that reference
+// shared memory are looked up in 'shm_manager', all other inputs
+// are read, in order, from 'input_buffer'.
 Status EVBufferToInputMap(
     const std::string& model_name,
     const InferRequestHeader& normalized_request_header, evbuffer* input_buffer,
+    SharedMemoryManager* shm_manager,
     std::unordered_map<std::string, std::shared_ptr<SystemMemory>>& input_map);
 
+// Create the input map for a GRPC request. Inputs that reference
+// shared memory are looked up in 'shm_manager', all other inputs
+// are read, in order, from the raw input of 'request'.
 Status GRPCInferRequestToInputMap(
     const InferRequestHeader& normalized_request_header,
-    const InferRequest& request,
+    const InferRequest& request, SharedMemoryManager* shm_manager,
     std::unordered_map<std::string, std::shared_ptr<SystemMemory>>& input_map);
 
 }}  // namespace nvidia::inferenceserver
@@ -101,6 +101,7 @@ InferenceServer::InferenceServer()
   inflight_request_counter_ = 0;
 
   status_manager_.reset(new ServerStatusManager(version_));
+  shared_memory_manager_.reset(new SharedMemoryManager());
 }
 
 bool
@@ -305,6 +306,49 @@ InferenceServer::HandleProfile(
   }
 }
 
+void
+InferenceServer::HandleSharedMemoryControl(
+    RequestStatus* request_status, const SharedMemoryControlRequest& request)
+{
+  if (ready_state_ != ServerReadyState::SERVER_READY) {
+    RequestStatusFactory::Create(
+        request_status, 0, id_, RequestStatusCode::UNAVAILABLE,
+        "Server not ready");
+    return;
+  }
+
+  ScopedAtomicIncrement inflight(inflight_request_counter_);
+  const uint64_t request_id = NextRequestId();
+
+  switch (request.shared_memory_control_case()) {
+    case SharedMemoryControlRequest::kRegisterRegion: {
+      const auto& reg = request.register_region();
+      RequestStatusFactory::Create(
+          request_status, request_id, id_,
+          shared_memory_manager_->RegisterSharedMemory(
+              reg.name(), reg.shared_memory_key(), reg.offset(),
+              reg.byte_size()));
+      break;
+    }
+    case SharedMemoryControlRequest::kUnregisterRegion:
+      RequestStatusFactory::Create(
+          request_status, request_id, id_,
+          shared_memory_manager_->UnregisterSharedMemory(
+              request.unregister_region().name()));
+      break;
+    case SharedMemoryControlRequest::kUnregisterAll:
+      RequestStatusFactory::Create(
+          request_status, request_id, id_,
+          shared_memory_manager_->UnregisterAllSharedMemory());
+      break;
+    default:
+      RequestStatusFactory::Create(
+          request_status, request_id, id_, RequestStatusCode::INVALID_ARG,
+          "shared memory control request does not specify an action");
+      break;
+  }
+}
+
 void
 InferenceServer::HandleInfer(
     RequestStatus* request_status,
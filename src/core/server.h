@@ -38,6 +38,7 @@
 #include "src/core/request_status.pb.h"
 #include "src/core/server_status.h"
 #include "src/core/server_status.pb.h"
+#include "src/core/shared_memory_manager.h"
 #include "src/core/status.h"
 
 namespace nvidia { namespace inferenceserver {
@@ -68,6 +69,11 @@ class InferenceServer {
   // Run profile 'cmd' for profiling all the all GPU devices
   void HandleProfile(RequestStatus* request_status, const std::string& cmd);
 
+  // Register or unregister shared memory regions as specified by
+  // 'request'.
+  void HandleSharedMemoryControl(
+      RequestStatus* request_status, const SharedMemoryControlRequest& request);
+
   // Perform inference on the given input for specified model and
   // update RequestStatus object with the status of the inference.
   void HandleInfer(
@@ -146,6 +152,12 @@ class InferenceServer {
     return model_repository_manager_.get();
   }
 
+  // Return the shared memory manager for this server.
+  SharedMemoryManager* ShmManager() const
+  {
+    return shared_memory_manager_.get();
+  }
+
   // A handle to a backend.
   class InferBackendHandle {
    public:
@@ -190,6 +202,7 @@ class InferenceServer {
 
   std::shared_ptr<ServerStatusManager> status_manager_;
   std::unique_ptr<ModelRepositoryManager> model_repository_manager_;
+  std::unique_ptr<SharedMemoryManager> shared_memory_manager_;
 };
 
 }}  // namespace nvidia::inferenceserver
@@ -0,0 +1,206 @@
+// Copyright (c) 2019, NVIDIA CORPORATION. All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions
+// are met:
+//  * Redistributions of source code must retain the above copyright
+//    notice, this list of conditions and the following disclaimer.
+//  * Redistributions in binary form must reproduce the above copyright
+//    notice, this list of conditions and the following disclaimer in the
+//    documentation and/or other materials provided with the distribution.
+//  * Neither the name of NVIDIA CORPORATION nor the names of its
+//    contributors may be used to endorse or promote products derived
+//    from this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS ``AS IS'' AND ANY
+// EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+// IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+// PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+// CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+// EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+// PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+// PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY
+// OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+// (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+#include "src/core/shared_memory_manager.h"
+
+#include <errno.h>
+#include <fcntl.h>
+#include <string.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+
+#include "src/core/logging.h"
+
+namespace nvidia { namespace inferenceserver {
+
+//
+// SharedMemoryReference
+//
+SharedMemoryReference::SharedMemoryReference(
+    const std::shared_ptr<char>& mapped_addr, size_t offset, size_t byte_size)
+    : SystemMemory(), mapped_addr_(mapped_addr),
+      base_(mapped_addr.get() + offset)
+{
+  total_byte_size_ = byte_size;
+}
+
+const char*
+SharedMemoryReference::BufferAt(size_t idx, size_t* byte_size) const
+{
+  if (idx != 0) {
+    *byte_size = 0;
+    return nullptr;
+  }
+  *byte_size = total_byte_size_;
+  return base_;
+}
+
+char*
+SharedMemoryReference::MutableBuffer()
+{
+  return base_;
+}
+
+//
+// SharedMemoryManager
+//
+SharedMemoryManager::~SharedMemoryManager()
+{
+  UnregisterAllSharedMemory();
+}
+
+Status
+SharedMemoryManager::RegisterSharedMemory(
+    const std::string& name, const std::string& shm_key, size_t offset,
+    size_t byte_size)
+{
+  std::lock_guard<std::mutex> lock(mu_);
+
+  if (shared_memory_map_.find(name) != shared_memory_map_.end()) {
+    return Status(
+        RequestStatusCode::ALREADY_EXISTS,
+        "shared memory region '" + name + "' is already registered");
+  }
+
+  int shm_fd = shm_open(shm_key.c_str(), O_RDWR, S_IRUSR | S_IWUSR);
+  if (shm_fd == -1) {
+    return Status(
+        RequestStatusCode::INVALID_ARG,
+        "failed to open shared memory object '" + shm_key + "' for region '" +
+            name + "': " + strerror(errno));
+  }
+
+  // Accessing a mapping beyond the end of the shared memory object
+  // raises SIGBUS so make sure the object covers the whole region.
+  const size_t map_size = offset + byte_size;
+  struct stat shm_stat;
+  if (fstat(shm_fd, &shm_stat) == -1) {
+    close(shm_fd);
+    return Status(
+        RequestStatusCode::INTERNAL,
+        "failed to get size of shared memory object '" + shm_key + "': " +
+            strerror(errno));
+  }
+  if ((size_t)shm_stat.st_size < map_size) {
+    close(shm_fd);
+    return Status(
+        RequestStatusCode::INVALID_ARG,
+        "shared memory object '" + shm_key + "' has size " +
+            std::to_string(shm_stat.st_size) + " bytes, region '" + name +
+            "' requires " + std::to_string(map_size) + " bytes");
+  }
+
+  // Map from the start of the object since mmap requires a
+  // page-aligned offset.
+  void* addr =
+      mmap(nullptr, map_size, PROT_READ | PROT_WRITE, MAP_SHARED, shm_fd, 0);
+  close(shm_fd);
+  if (addr == MAP_FAILED) {
+    return Status(
+        RequestStatusCode::INTERNAL,
+        "failed to map shared memory object '" + shm_key + "' for region '" +
+            name + "': " + strerror(errno));
+  }
+
+  auto info = std::make_shared<SharedMemoryInfo>();
+  info->shm_key_ = shm_key;
+  info->offset_ = offset;
+  info->byte_size_ = byte_size;
+  info->mapped_addr_.reset(static_cast<char*>(addr), [map_size](char* p) {
+    if (munmap(p, map_size) == -1) {
+      LOG_ERROR << "failed to unmap shared memory: " << strerror(errno);
+    }
+  });
+
+  shared_memory_map_.emplace(name, std::move(info));
+
+  LOG_VERBOSE(1) << "Registered shared memory region '" << name << "' ("
+                 << shm_key << ", offset " << offset << ", " << byte_size
+                 << " bytes)";
+
+  return Status::Success;
+}
+
+Status
+SharedMemoryManager::UnregisterSharedMemory(const std::string& name)
+{
+  std::lock_guard<std::mutex> lock(mu_);
+
+  if (shared_memory_map_.erase(name) == 0) {
+    return Status(
+        RequestStatusCode::NOT_FOUND,
+        "shared memory region '" + name + "' is not registered");
+  }
+
+  LOG_VERBOSE(1) << "Unregistered shared memory region '" << name << "'";
+
+  return Status::Success;
+}
+
+Status
+SharedMemoryManager::UnregisterAllSharedMemory()
+{
+  std::lock_guard<std::mutex> lock(mu_);
+  shared_memory_map_.clear();
+  return Status::Success;
+}
+
+Status
+SharedMemoryManager::GetSystemMemory(
+    const SharedMemoryRegion& region,
+    std::shared_ptr<SharedMemoryReference>* memory)
+{
+  std::shared_ptr<SharedMemoryInfo> info;
+  {
+    std::lock_guard<std::mutex> lock(mu_);
+    const auto& itr = shared_memory_map_.find(region.name());
+    if (itr == shared_memory_map_.end()) {
+      return Status(
+          RequestStatusCode::INVALID_ARG,
+          "shared memory region '" + region.name() + "' is not registered");
+    }
+    info = itr->second;
+  }
+
+  if ((region.offset() > info->byte_size_) ||
+      (region.byte_size() > (info->byte_size_ - region.offset()))) {
+    return Status(
+        RequestStatusCode::INVALID_ARG,
+        "range of " + std::to_string(region.byte_size()) +
+            " bytes at offset " + std::to_string(region.offset()) +
+            " exceeds the " + std::to_string(info->byte_size_) +
+            " bytes of shared memory region '" + region.name() + "'");
+  }
+
+  memory->reset(new SharedMemoryReference(
+      info->mapped_addr_, info->offset_ + region.offset(),
+      region.byte_size()));
+
+  return Status::Success;
+}
+
+}}  // namespace nvidia::inferenceserver
@@ -0,0 +1,113 @@
+// Copyright (c) 2019, NVIDIA CORPORATION. All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions
+// are met:
+//  * Redistributions of source code must retain the above copyright
+//    notice, this list of conditions and the following disclaimer.
+//  * Redistributions in binary form must reproduce the above copyright
+//    notice, this list of conditions and the following disclaimer in the
+//    documentation and/or other materials provided with the distribution.
+//  * Neither the name of NVIDIA CORPORATION nor the names of its
+//    contributors may be used to endorse or promote products derived
+//    from this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS ``AS IS'' AND ANY
+// EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+// IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+// PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+// CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+// EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+// PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+// PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY
+// OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+// (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#pragma once
+
+#include <memory>
+#include <mutex>
+#include <string>
+#include <unordered_map>
+
+#include "src/core/api.pb.h"
+#include "src/core/provider.h"
+#include "src/core/status.h"
+
+namespace nvidia { namespace inferenceserver {
+
+//
+// A reference to a range of a mapped shared memory region. Holds the
+// mapping so that the region stays mapped while the reference is in
+// use even if the region is unregistered.
+//
+class SharedMemoryReference : public SystemMemory {
+ public:
+  SharedMemoryReference(
+      const std::shared_ptr<char>& mapped_addr, size_t offset,
+      size_t byte_size);
+
+  //\see SystemMemory::BufferAt()
+  const char* BufferAt(size_t idx, size_t* byte_size) const override;
+
+  // Return a pointer to the start of the range, used to write output
+  // tensor data directly into the region.
+  char* MutableBuffer();
+
+ private:
+  std::shared_ptr<char> mapped_addr_;
+  char* base_;
+};
+
+//
+// Manage the shared memory regions that clients register with the
+// server so that input and output tensor data can be delivered
+// without copying it into the request or response.
+//
+class SharedMemoryManager {
+ public:
+  SharedMemoryManager() = default;
+  ~SharedMemoryManager();
+
+  // Register the 'byte_size' bytes at 'offset' within the POSIX
+  // shared memory object 'shm_key' as the region 'name'. The region
+  // is mapped into the server's address space until it is
+  // unregistered.
+  Status RegisterSharedMemory(
+      const std::string& name, const std::string& shm_key, size_t offset,
+      size_t byte_size);
+
+  // Unregister the region 'name'. In-flight requests that reference
+  // the region keep it mapped until they complete.
+  Status UnregisterSharedMemory(const std::string& name);
+
+  // Unregister all regions.
+  Status UnregisterAllSharedMemory();
+
+  // Return in 'memory' a reference to the range of a registered
+  // region described by 'region'. The reference keeps the region
+  // mapped for as long as it is alive.
+  Status GetSystemMemory(
+      const SharedMemoryRegion& region,
+      std::shared_ptr<SharedMemoryReference>* memory);
+
+ private:
+  struct SharedMemoryInfo {
+    std::string shm_key_;
+    size_t offset_;
+    size_t byte_size_;
+
+    // The mapping of the shared memory object, which starts at the
+    // beginning of the object and not at 'offset_'. The mapping is
+    // unmapped when the last reference is released.
+    std::shared_ptr<char> mapped_addr_;
+  };
+
+  std::mutex mu_;
+
+  // Map from region name to the region information.
+  std::unordered_map<std::string, std::shared_ptr<SharedMemoryInfo>>
+      shared_memory_map_;
+};
+
+}}  // namespace nvidia::inferenceserver
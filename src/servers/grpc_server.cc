@@ -119,8 +119,8 @@ class InferBaseContext : public BaseContext<LifeCycle, AsyncResources> {
     InferRequestHeader request_header = request.meta_data();
     RETURN_IF_ERROR(NormalizeRequestHeader(
         *backend->GetInferenceBackend(), request_header));
-    RETURN_IF_ERROR(
-        GRPCInferRequestToInputMap(request_header, request, input_map));
+    RETURN_IF_ERROR(GRPCInferRequestToInputMap(
+        request_header, request, server->ShmManager(), input_map));
 
     std::shared_ptr<InferRequestProvider> request_provider;
     std::shared_ptr<GRPCInferResponseProvider> response_provider;
@@ -132,7 +132,7 @@ class InferBaseContext : public BaseContext<LifeCycle, AsyncResources> {
     RETURN_IF_ERROR(GRPCInferResponseProvider::Create(
         request.meta_data(), &response,
         backend->GetInferenceBackend()->GetLabelProvider(),
-        &response_provider));
+        server->ShmManager(), &response_provider));
 
     RequestStatus* request_status = response.mutable_request_status();
     uint64_t id = request.meta_data().id();
@@ -236,6 +236,25 @@ class HealthContext final
         });
   }
 };
+
+class SharedMemoryControlContext final
+    : public Context<
+          SharedMemoryControlRequest, SharedMemoryControlResponse,
+          AsyncResources> {
+  void ExecuteRPC(
+      SharedMemoryControlRequest& request,
+      SharedMemoryControlResponse& response) final override
+  {
+    uintptr_t execution_context = this->GetExecutionContext();
+    GetResources()->GetMgmtThreadPool().enqueue(
+        [this, execution_context, &request, &response] {
+          auto server = GetResources()->GetServer();
+          RequestStatus* request_status = response.mutable_request_status();
+          server->HandleSharedMemoryControl(request_status, request);
+          this->CompleteExecution(execution_context);
+        });
+  }
+};
 }  // namespace
 
 GRPCServer::GRPCServer(
@@ -290,6 +309,11 @@ GRPCServer::Create(
   (*grpc_server)->rpcHealth_ = inferenceService->RegisterRPC<HealthContext>(
       &GRPCService::AsyncService::RequestHealth);
 
+  LOG_INFO << "Register SharedMemoryControl RPC";
+  (*grpc_server)->rpcSharedMemoryControl_ =
+      inferenceService->RegisterRPC<SharedMemoryControlContext>(
+          &GRPCService::AsyncService::RequestSharedMemoryControl);
+
   return Status::Success;
 }
 
@@ -309,6 +333,7 @@ GRPCServer::Start()
     executor->RegisterContexts(rpcStatus_, g_Resources, 1);
     executor->RegisterContexts(rpcHealth_, g_Resources, 1);
     executor->RegisterContexts(rpcProfile_, g_Resources, 1);
+    executor->RegisterContexts(rpcSharedMemoryControl_, g_Resources, 1);
 
     AsyncRun();
     return Status::Success;
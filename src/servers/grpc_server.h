@@ -55,6 +55,7 @@ class GRPCServer : private nvrpc::Server {
   nvrpc::IRPC* rpcStatus_;
   nvrpc::IRPC* rpcProfile_;
   nvrpc::IRPC* rpcHealth_;
+  nvrpc::IRPC* rpcSharedMemoryControl_;
   int infer_thread_cnt_;
   int stream_infer_thread_cnt_;
   bool running_;
@@ -50,7 +50,8 @@ class HTTPServerImpl : public HTTPServer {
       int32_t port, int thread_cnt)
       : server_(server), endpoint_names_(endpoints), port_(port),
         thread_cnt_(thread_cnt),
-        api_regex_(R"(/api/(health|profile|infer|status)(.*))"),
+        api_regex_(
+            R"(/api/(health|profile|infer|status|sharedmemorycontrol)(.*))"),
         health_regex_(R"(/(live|ready))"),
         infer_regex_(R"(/([^/]+)(?:/(\d+))?)"), status_regex_(R"(/(.*))")
   {
@@ -95,6 +96,8 @@ class HTTPServerImpl : public HTTPServer {
   void HandleProfile(evhtp_request_t* req, const std::string& profile_uri);
   void HandleInfer(evhtp_request_t* req, const std::string& infer_uri);
   void HandleStatus(evhtp_request_t* req, const std::string& status_uri);
+  void HandleSharedMemoryControl(
+      evhtp_request_t* req, const std::string& shm_uri);
 
   // Helper function that utilizes RETURN_IF_ERROR to avoid nested 'if'
   Status InferHelper(
@@ -215,6 +218,14 @@ HTTPServerImpl::Handle(evhtp_request_t* req)
       HandleInfer(req, rest);
       return;
     }
+    // shared memory control
+    if (endpoint == "sharedmemorycontrol" &&
+        (std::find(
+             endpoint_names_.begin(), endpoint_names_.end(),
+             "sharedmemorycontrol") != endpoint_names_.end())) {
+      HandleSharedMemoryControl(req, rest);
+      return;
+    }
   }
 
   LOG_VERBOSE(1) << "HTTP error: " << req->method << " " << req->uri->path->full
@@ -291,6 +302,44 @@ HTTPServerImpl::HandleProfile(
                : EVHTP_RES_BADREQ);
 }
 
+void
+HTTPServerImpl::HandleSharedMemoryControl(
+    evhtp_request_t* req, const std::string& shm_uri)
+{
+  if (req->method != htp_method_POST) {
+    evhtp_send_reply(req, EVHTP_RES_METHNALLOWED);
+    return;
+  }
+
+  if (!shm_uri.empty() && (shm_uri != "/")) {
+    evhtp_send_reply(req, EVHTP_RES_BADREQ);
+    return;
+  }
+
+  // The action is described by a SharedMemoryControlRequest in the
+  // request header.
+  SharedMemoryControlRequest shm_request;
+  const char* shm_request_c_str =
+      evhtp_kv_find(req->headers_in, kSharedMemoryControlRequestHTTPHeader);
+  if (shm_request_c_str != NULL) {
+    google::protobuf::TextFormat::ParseFromString(
+        std::string(shm_request_c_str), &shm_request);
+  }
+
+  RequestStatus request_status;
+  server_->HandleSharedMemoryControl(&request_status, shm_request);
+
+  evhtp_headers_add_header(
+      req->headers_out,
+      evhtp_header_new(
+          kStatusHTTPHeader, request_status.ShortDebugString().c_str(), 1, 1));
+
+  evhtp_send_reply(
+      req, (request_status.code() == RequestStatusCode::SUCCESS)
+               ? EVHTP_RES_OK
+               : EVHTP_RES_BADREQ);
+}
+
 void
 HTTPServerImpl::HandleInfer(evhtp_request_t* req, const std::string& infer_uri)
 {
@@ -438,7 +487,8 @@ HTTPServerImpl::InferHelper(
   RETURN_IF_ERROR(
       NormalizeRequestHeader(*backend->GetInferenceBackend(), request_header));
   RETURN_IF_ERROR(EVBufferToInputMap(
-      model_name, request_header, req->buffer_in, input_map));
+      model_name, request_header, req->buffer_in, server_->ShmManager(),
+      input_map));
 
   std::shared_ptr<InferRequestProvider> request_provider;
   RETURN_IF_ERROR(InferRequestProvider::Create(
@@ -449,7 +499,8 @@ HTTPServerImpl::InferHelper(
   RETURN_IF_ERROR(HTTPInferResponseProvider::Create(
       req->buffer_out, *backend->GetInferenceBackend(),
       request_provider->RequestHeader(),
-      backend->GetInferenceBackend()->GetLabelProvider(), &response_provider));
+      backend->GetInferenceBackend()->GetLabelProvider(),
+      server_->ShmManager(), &response_provider));
 
   std::shared_ptr<InferRequest> request(new InferRequest(
       req, request_header.id(), request_provider, response_provider,
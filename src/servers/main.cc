@@ -90,7 +90,7 @@ bool allow_metrics_ = true;
 
 // endpoint names for http/gRPC
 std::vector<std::string> endpoint_names = {"status", "health", "profile",
-                                           "infer"};
+                                           "infer", "sharedmemorycontrol"};
 
 // Should GPU metrics be reported.
 bool allow_gpu_metrics_ = false;
@@ -567,7 +567,8 @@ Parse(nvidia::inferenceserver::InferenceServer* server, int argc, char** argv)
   http_health_port_ = http_health_port;
 
   metrics_port_ = allow_metrics_ ? metrics_port : -1;
-  http_ports_ = {http_port_, http_health_port_, http_port_, http_port_};
+  http_ports_ = {http_port_, http_health_port_, http_port_, http_port_,
+                 http_port_};
 
   // Check if HTTP, GRPC and metrics port clash
   if (CheckPortCollision())